@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Démarrage à froid : bibliothèque en dict Python vs fichiers par chapitre
+
+Chaque mesure est faite dans un interpréteur neuf (comme un démarrage serverless) :
+- "dict littéral"  : module Python contenant toute la bibliothèque (ancienne forme),
+                     sans .pyc (premier démarrage) puis avec .pyc
+- "par chapitre"   : import de library_store + lecture de l'index + premier chapitre
+
+La bibliothèque verset par verset actuelle est répliquée jusqu'à la taille
+visée (objectif « 66 livres ») en recyclant les chapitres existants.
+
+Usage : python bench_cold_start.py [tailles_en_chapitres, ex. 24,300,1189]
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from library_store import ShardedLibrary, export_library
+from passage_ref import BOOK_NAMES_FR
+from versification import VERSE_COUNTS
+
+SIZES = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [24, 300, 1189]
+ROUNDS = 5
+
+
+def scaled_library(size: int) -> dict:
+    """Bibliothèque de `size` chapitres (ordre canonique) remplie avec les chapitres existants"""
+    source = ShardedLibrary("verse_by_verse")
+    chapters = [source[book][chapter] for book in source for chapter in source[book]]
+    library: dict = {}
+    n = 0
+    for osis, counts in VERSE_COUNTS.items():
+        for chapter in range(1, len(counts) + 1):
+            if n == size:
+                return library
+            library.setdefault(BOOK_NAMES_FR[osis], {})[chapter] = chapters[n % len(chapters)]
+            n += 1
+    return library
+
+
+def timed(code: str, cwd: str) -> float:
+    """Durée (s) de `code` mesurée dans un interpréteur neuf"""
+    script = f"import time\nt0 = time.perf_counter()\n{code}\nprint(time.perf_counter() - t0)"
+    out = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))})
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def best(code: str, cwd: str, before=None) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        if before:
+            before()
+        timings.append(timed(code, cwd))
+    return min(timings)
+
+
+def main():
+    print(f"{'chapitres':>9} | {'dict sans .pyc':>14} | {'dict avec .pyc':>14} | {'par chapitre':>12} | {'source':>9}")
+    for size in SIZES:
+        library = scaled_library(size)
+        first_book = next(iter(library))
+        first_chapter = next(iter(library[first_book]))
+        workdir = tempfile.mkdtemp(prefix="bench_cold_")
+        try:
+            with open(os.path.join(workdir, "lib_literal.py"), "w", encoding="utf-8") as f:
+                f.write(f"LIBRARY = {library!r}\n")
+            export_library(library, os.path.join(workdir, "data", "verse_by_verse"))
+            pycache = os.path.join(workdir, "__pycache__")
+
+            literal_cold = best("import lib_literal", workdir,
+                                before=lambda: shutil.rmtree(pycache, ignore_errors=True))
+            timed("import lib_literal", workdir)  # écrit le .pyc
+            literal_warm = best("import lib_literal", workdir)
+            sharded = best(
+                "from library_store import ShardedLibrary\n"
+                f"lib = ShardedLibrary('verse_by_verse', root={os.path.join(workdir, 'data')!r})\n"
+                f"assert lib.get({first_book!r}, {{}}).get({first_chapter})",
+                workdir)
+            source_kb = os.path.getsize(os.path.join(workdir, "lib_literal.py")) / 1024
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        print(f"{size:>9} | {literal_cold * 1000:>11.1f} ms | {literal_warm * 1000:>11.1f} ms | "
+              f"{sharded * 1000:>9.1f} ms | {source_kb:>6.0f} Ko")
+
+    # Module réel : import de verse_by_verse_content (index et chapitres non lus)
+    real = best("import verse_by_verse_content", os.path.dirname(os.path.abspath(__file__)))
+    print(f"\nimport verse_by_verse_content (réel, dépendances comprises) : {real * 1000:.1f} ms")
+    print(json.dumps(ShardedLibrary("verse_by_verse").stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Lot progressif de /api/generate-verse-by-verse-progressive
+
+LLM simulé à latence fixe (aucun appel réseau) et texte biblique simulé :
+- "séquentiel" : un verset après l'autre (concurrence 1, sans prompt groupé)
+- "simultané"  : récupération et génération bornées par sémaphore
+- "groupé"     : un seul prompt pour les versets manquants (verse_batch)
+
+Le cache verset est vidé avant chaque mesure : chaque lot est généré.
+
+Usage : python bench_progressive.py [latence_llm_secondes] [taille_lot]
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+import server
+import verse_batch
+from verse_cache import verse_cache
+
+LLM_LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+BATCH_SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+FETCH_LATENCY = 0.05
+ROUNDS = 3
+EXPLANATION = "**I. ANALYSE TEXTUELLE ET LEXICALE**\n" + "Explication simulée du verset. " * 20
+
+
+class FakeMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeChat:
+    calls = 0
+
+    def __init__(self, **kwargs):
+        self.session_id = kwargs.get("session_id", "")
+
+    def with_model(self, *args):
+        return self
+
+    async def send_message(self, message: FakeMessage) -> str:
+        FakeChat.calls += 1
+        await asyncio.sleep(LLM_LATENCY)
+        if self.session_id.startswith("verse_batch"):
+            verses = json.loads(message.text.split("VERSETS (JSON) : ", 1)[1].split("\n", 1)[0])
+            return json.dumps([{"verse": v["verse"], "explanation": EXPLANATION} for v in verses])
+        return EXPLANATION
+
+
+async def fake_fetch_passage_text(bible_id, osis_book, chapter, verse=None):
+    await asyncio.sleep(FETCH_LATENCY)
+    return f"Texte simulé de {osis_book} {chapter}:{verse}"
+
+
+async def fake_get_bible_id():
+    return "bench"
+
+
+async def bench_mode(client, label: str, concurrency: int, batch_size: int):
+    server.VERSE_FETCH_CONCURRENCY = concurrency
+    server.VERSE_LLM_CONCURRENCY = concurrency
+    verse_batch.VERSE_BATCH_SIZE = batch_size
+    FakeChat.calls = 0
+    timings = []
+    for _ in range(ROUNDS):
+        verse_cache.clear()
+        t0 = time.perf_counter()
+        r = await client.post("/api/generate-verse-by-verse-progressive",
+                              json={"passage": "Psaumes 119", "batch_size": BATCH_SIZE, "start_verse": 1})
+        timings.append(time.perf_counter() - t0)
+        assert r.status_code == 200, r.text
+        body = r.json()["batch_content"]
+        # Ordre déterministe des versets dans le lot
+        positions = [body.index(f"## VERSET {v}\n") for v in range(1, BATCH_SIZE + 1)]
+        assert positions == sorted(positions)
+    best = min(timings)
+    print(f"{label:<28} | {best:>8.2f}s | {FakeChat.calls / ROUNDS:>10.1f}")
+    return best
+
+
+async def main():
+    server.GEMINI_AVAILABLE = True
+    server.EMERGENT_LLM_KEY = "bench-key"
+    server.LlmChat = FakeChat
+    server.UserMessage = FakeMessage
+    server.fetch_passage_text = fake_fetch_passage_text
+    server.get_bible_id = fake_get_bible_id
+
+    print(f"Lot de {BATCH_SIZE} versets, latence LLM {LLM_LATENCY}s, récupération {FETCH_LATENCY}s")
+    print(f"{'mode':<28} | {'lot':>9} | {'appels LLM':>10}")
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        sequential = await bench_mode(client, "séquentiel (avant)", 1, 1)
+        for concurrency in (2, 4, 8):
+            elapsed = await bench_mode(client, f"simultané x{concurrency}", concurrency, 1)
+            print(f"{'':<28}   accélération x{sequential / elapsed:.1f}")
+        elapsed = await bench_mode(client, "groupé (verse_batch)", 4, BATCH_SIZE)
+        print(f"{'':<28}   accélération x{sequential / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Client HTTP partagé pour api.scripture.api.bible
+- Un seul httpx.AsyncClient par processus, géré par le lifespan FastAPI
+- Connexions keep-alive réutilisées (une session TLS pour tout un chapitre)
+- HTTP/2 si le paquet h2 est installé
+- Limite de connexions simultanées par hôte
+- Retry avec backoff exponentiel + jitter (429 / 5xx / erreurs réseau)
+"""
+
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+API_BASE = os.getenv("BIBLE_API_BASE", "https://api.scripture.api.bible/v1")
+
+MAX_CONNECTIONS = int(os.getenv("BIBLE_HTTP_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("BIBLE_HTTP_MAX_KEEPALIVE", "10"))
+PER_HOST_LIMIT = int(os.getenv("BIBLE_HTTP_PER_HOST_LIMIT", "10"))
+DEFAULT_TIMEOUT = float(os.getenv("BIBLE_HTTP_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("BIBLE_HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("BIBLE_HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("BIBLE_HTTP_BACKOFF_MAX", "8"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_client: Optional[httpx.AsyncClient] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+_stats = {
+    "requests": 0,
+    "retries": 0,
+    "transport_errors": 0,
+    "clients_created": 0,
+}
+
+
+def get_client() -> httpx.AsyncClient:
+    """Retourner le client partagé (créé à la demande si le lifespan ne l'a pas fait)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+        )
+        _stats["clients_created"] += 1
+        print(f"🌐 Client HTTP partagé créé (HTTP/2: {'oui' if HTTP2_AVAILABLE else 'non'})")
+    return _client
+
+
+async def aclose() -> None:
+    """Fermer le client partagé (appelé à l'arrêt du serveur)"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _host_semaphores.clear()
+
+
+@asynccontextmanager
+async def client_lifespan():
+    """À utiliser dans le lifespan FastAPI : ouvre le pool au démarrage, le ferme à l'arrêt"""
+    get_client()
+    try:
+        yield
+    finally:
+        await aclose()
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    sem = _host_semaphores.get(host)
+    if sem is None:
+        sem = asyncio.Semaphore(PER_HOST_LIMIT)
+        _host_semaphores[host] = sem
+    return sem
+
+
+def _backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Délai avant le prochain essai : Retry-After si fourni, sinon exponentiel + jitter"""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+    delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+    return random.uniform(0, delay)
+
+
+async def request(method: str, url: str, *, headers: Optional[Dict[str, str]] = None,
+                  params: Optional[Dict] = None, json=None, timeout: Optional[float] = None,
+                  retries: Optional[int] = None) -> httpx.Response:
+    """
+    Requête via le pool partagé avec retry/backoff
+    Les méthodes non idempotentes (POST...) ne sont pas rejouées par défaut.
+    Retourne la dernière réponse obtenue ; lève l'erreur réseau si aucun essai n'a abouti.
+    """
+    method = method.upper()
+    if retries is None:
+        retries = MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+
+    client = get_client()
+    semaphore = _host_semaphore(url)
+    request_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+
+    for attempt in range(retries + 1):
+        response = None
+        _stats["requests"] += 1
+        try:
+            async with semaphore:
+                response = await client.request(method, url, headers=headers, params=params,
+                                                json=json, timeout=request_timeout)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+        except httpx.TransportError as e:
+            _stats["transport_errors"] += 1
+            if attempt == retries:
+                raise
+            print(f"🔁 [HTTP] Erreur réseau {urlsplit(url).netloc} ({e.__class__.__name__}), nouvel essai")
+
+        _stats["retries"] += 1
+        await asyncio.sleep(_backoff_delay(attempt, response))
+
+    raise RuntimeError("unreachable")
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs) -> httpx.Response:
+    return await request("POST", url, **kwargs)
+
+
+def client_stats() -> Dict:
+    """Statistiques du pool pour les endpoints de diagnostic"""
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "open": _client is not None and not _client.is_closed,
+        "max_connections": MAX_CONNECTIONS,
+        "per_host_limit": PER_HOST_LIMIT,
+        **_stats,
+    }
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Texte biblique local hors-ligne (fichier compact ouvert via mmap)
+- Format : en-tête + métadonnées JSON + index trié de clés uint32
+  (livre << 16 | chapitre << 8 | verset) + offsets uint32 + blob UTF-8
+- Lecture d'un verset : recherche dichotomique dans l'index mappé, sans
+  parsing au démarrage ni appel réseau
+- Importeur CLI depuis JSON / JSONL / CSV (Bible du domaine public, ex. LSG 1910, Darby)
+
+Usage :
+  python bible_store.py import lsg1910.csv bible_store.bin --name "Louis Segond 1910"
+  python bible_store.py info bible_store.bin
+  python bible_store.py get bible_store.bin "Jean 3:16"
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"BIBSTOR1"
+HEADER = struct.Struct("<8sII")  # magic, nombre de versets, taille des métadonnées
+
+DEFAULT_PATH = os.getenv(
+    "BIBLE_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "bible_store.bin"),
+)
+
+# Ordre canonique protestant (66 livres), codes OSIS utilisés par api.bible
+BOOK_ORDER: List[str] = [
+    "GEN", "EXO", "LEV", "NUM", "DEU", "JOS", "JDG", "RUT", "1SA", "2SA",
+    "1KI", "2KI", "1CH", "2CH", "EZR", "NEH", "EST", "JOB", "PSA", "PRO",
+    "ECC", "SNG", "ISA", "JER", "LAM", "EZK", "DAN", "HOS", "JOL", "AMO",
+    "OBA", "JON", "MIC", "NAM", "HAB", "ZEP", "HAG", "ZEC", "MAL",
+    "MAT", "MRK", "LUK", "JHN", "ACT", "ROM", "1CO", "2CO", "GAL", "EPH",
+    "PHP", "COL", "1TH", "2TH", "1TI", "2TI", "TIT", "PHM", "HEB", "JAS",
+    "1PE", "2PE", "1JN", "2JN", "3JN", "JUD", "REV",
+]
+BOOK_INDEX: Dict[str, int] = {osis: i + 1 for i, osis in enumerate(BOOK_ORDER)}
+
+
+def verse_key(osis: str, chapter: int, verse: int) -> Optional[int]:
+    book = BOOK_INDEX.get(osis)
+    if book is None or not (0 <= chapter < 256 and 0 <= verse < 256):
+        return None
+    return (book << 16) | (chapter << 8) | verse
+
+
+class BibleStore:
+    """Lecture seule d'un fichier bible_store (mmap)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, meta_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} n'est pas un fichier bible_store")
+        self.count = count
+        self.meta = json.loads(self._mm[HEADER.size:HEADER.size + meta_len].decode("utf-8"))
+        index_start = _align4(HEADER.size + meta_len)
+        offsets_start = index_start + 4 * count
+        self._blob_start = offsets_start + 4 * (count + 1)
+        self._view = memoryview(self._mm)
+        # Vues uint32 directement sur le fichier mappé (aucune copie)
+        self._keys = self._view[index_start:offsets_start].cast("I")
+        self._offsets = self._view[offsets_start:self._blob_start].cast("I")
+        self.counters = {"lookups": 0, "hits": 0, "misses": 0}
+
+    @property
+    def bible_id(self) -> Optional[str]:
+        return self.meta.get("bible_id")
+
+    def serves(self, bible_id: Optional[str]) -> bool:
+        """Le fichier correspond-il à la traduction demandée ? (sans bible_id : toutes)"""
+        return not bible_id or not self.bible_id or bible_id == self.bible_id
+
+    def _text_at(self, i: int) -> str:
+        start = self._blob_start + self._offsets[i]
+        end = self._blob_start + self._offsets[i + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def get_verse(self, osis: str, chapter: int, verse: int) -> Optional[str]:
+        self.counters["lookups"] += 1
+        key = verse_key(osis, chapter, verse)
+        if key is not None:
+            i = bisect.bisect_left(self._keys, key)
+            if i < self.count and self._keys[i] == key:
+                self.counters["hits"] += 1
+                return self._text_at(i)
+        self.counters["misses"] += 1
+        return None
+
+    def get_range(self, osis: str, chapter: int, start: int, end: int) -> Dict[int, str]:
+        """Versets start..end présents localement (les absents sont omis)"""
+        self.counters["lookups"] += 1
+        first = verse_key(osis, chapter, max(0, start))
+        last = verse_key(osis, chapter, min(255, end))
+        verses: Dict[int, str] = {}
+        if first is not None and last is not None:
+            i = bisect.bisect_left(self._keys, first)
+            while i < self.count and self._keys[i] <= last:
+                verses[self._keys[i] & 0xFF] = self._text_at(i)
+                i += 1
+        self.counters["hits" if verses else "misses"] += 1
+        return verses
+
+    def get_chapter(self, osis: str, chapter: int) -> Dict[int, str]:
+        return self.get_range(osis, chapter, 0, 255)
+
+    def iter_verses(self) -> Iterator[Tuple[str, int, int, str]]:
+        """Parcourir tout le fichier dans l'ordre canonique : (osis, chapitre, verset, texte)"""
+        for i in range(self.count):
+            key = self._keys[i]
+            yield BOOK_ORDER[(key >> 16) - 1], (key >> 8) & 0xFF, key & 0xFF, self._text_at(i)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._keys.release()
+        self._offsets.release()
+        self._view.release()
+        self._mm.close()
+        self._file.close()
+
+    def stats(self) -> Dict:
+        return {"path": self.path, "verses": self.count, **self.meta, **self.counters}
+
+
+_store: Optional[BibleStore] = None
+_store_checked = False
+
+
+def get_store() -> Optional[BibleStore]:
+    """Store global (ouvert à la première utilisation) ; None si aucun fichier n'est installé"""
+    global _store, _store_checked
+    if not _store_checked:
+        _store_checked = True
+        if os.path.exists(DEFAULT_PATH):
+            try:
+                _store = BibleStore(DEFAULT_PATH)
+                print(f"📚 Bible locale chargée : {_store.meta.get('name', DEFAULT_PATH)} ({len(_store)} versets)")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Bible locale illisible ({DEFAULT_PATH}): {e}")
+    return _store
+
+
+def lookup_verses(bible_id: Optional[str], osis: str, chapter: int,
+                  start: Optional[int] = None, end: Optional[int] = None) -> Dict[int, str]:
+    """Versets disponibles localement pour un chapitre ou une plage ({} si pas de store)"""
+    store = get_store()
+    if store is None or not store.serves(bible_id):
+        return {}
+    try:
+        chapter = int(chapter)
+    except (TypeError, ValueError):
+        return {}
+    if start is None:
+        return store.get_chapter(osis, chapter)
+    return store.get_range(osis, chapter, start, end or start)
+
+
+def lookup_verse_id(bible_id: Optional[str], verse_id: str) -> Optional[str]:
+    """Texte local d'un identifiant api.bible 'JHN.3.16' (None si absent)"""
+    store = get_store()
+    if store is None or not store.serves(bible_id):
+        return None
+    try:
+        osis, chapter, verse = verse_id.split(".")
+        return store.get_verse(osis, int(chapter), int(verse))
+    except ValueError:
+        return None
+
+
+# =========================
+#   IMPORT
+# =========================
+def _align4(n: int) -> int:
+    return (n + 3) & ~3
+
+
+def _resolve_book(raw) -> Optional[str]:
+    """Code OSIS, numéro 1..66 ou nom français"""
+    value = str(raw).strip()
+    if value.isdigit():
+        n = int(value)
+        return BOOK_ORDER[n - 1] if 1 <= n <= len(BOOK_ORDER) else None
+    if value.upper() in BOOK_INDEX:
+        return value.upper()
+    from passage_ref import resolve_osis
+    return resolve_osis(value)
+
+
+def _read_rows(path: str) -> Iterator[Tuple[object, object, object, str]]:
+    """(livre, chapitre, verset, texte) depuis JSONL, JSON ou CSV/TSV"""
+    lower = path.lower()
+    if lower.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield row["book"], row["chapter"], row["verse"], row["text"]
+    elif lower.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            for row in data:
+                yield row["book"], row["chapter"], row["verse"], row["text"]
+        else:
+            # {"GEN": {"1": {"1": "Au commencement..."}}}
+            for book, chapters in data.items():
+                for chapter, verses in chapters.items():
+                    for verse, text in verses.items():
+                        yield book, chapter, verse, text
+    else:
+        # CSV/TSV avec en-tête : book|b, chapter|c, verse|v, text|t
+        with open(path, encoding="utf-8", newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            reader = csv.DictReader(f, dialect=csv.Sniffer().sniff(sample, delimiters=",\t;"))
+            for row in reader:
+                yield (row.get("book") or row.get("b"), row.get("chapter") or row.get("c"),
+                       row.get("verse") or row.get("v"), row.get("text") or row.get("t") or "")
+
+
+def build_store(rows: Iterable[Tuple[object, object, object, str]], output: str, meta: Dict) -> int:
+    """Écrire le fichier compact ; retourne le nombre de versets"""
+    entries: Dict[int, bytes] = {}
+    skipped = 0
+    for book, chapter, verse, text in rows:
+        osis = _resolve_book(book)
+        key = verse_key(osis, int(chapter), int(verse)) if osis else None
+        text = " ".join(str(text).split())
+        if key is None or not text:
+            skipped += 1
+            continue
+        entries[key] = text.encode("utf-8")
+    if skipped:
+        print(f"⚠️ {skipped} lignes ignorées (livre inconnu ou texte vide)")
+
+    keys = sorted(entries)
+    meta_bytes = json.dumps({**meta, "created": int(time.time())}, ensure_ascii=False).encode("utf-8")
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(entries[key]))
+
+    tmp = output + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), len(meta_bytes)))
+        f.write(meta_bytes)
+        f.write(b"\0" * (_align4(HEADER.size + len(meta_bytes)) - HEADER.size - len(meta_bytes)))
+        f.write(struct.pack(f"<{len(keys)}I", *keys))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        for key in keys:
+            f.write(entries[key])
+    os.replace(tmp, output)
+    return len(keys)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bible locale compacte (mmap)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Construire le fichier depuis JSON/JSONL/CSV")
+    p_import.add_argument("source")
+    p_import.add_argument("output", nargs="?", default=DEFAULT_PATH)
+    p_import.add_argument("--name", default="")
+    p_import.add_argument("--bible-id", default="", help="bibleId api.bible correspondant (optionnel)")
+
+    p_info = sub.add_parser("info", help="Afficher les métadonnées")
+    p_info.add_argument("path", nargs="?", default=DEFAULT_PATH)
+
+    p_get = sub.add_parser("get", help="Lire un passage, ex. 'Jean 3:16'")
+    p_get.add_argument("path")
+    p_get.add_argument("passage")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        meta = {"name": args.name or os.path.basename(args.source)}
+        if args.bible_id:
+            meta["bible_id"] = args.bible_id
+        started = time.perf_counter()
+        count = build_store(_read_rows(args.source), args.output, meta)
+        size = os.path.getsize(args.output)
+        print(f"✅ {count} versets écrits dans {args.output} ({size / 1024:.0f} Ko, {time.perf_counter() - started:.1f}s)")
+        return 0
+
+    store = BibleStore(args.path)
+    if args.command == "info":
+        print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+        return 0
+
+    from passage_ref import parse_passage_ref
+    ref = parse_passage_ref(args.passage)
+    if ref is None:
+        print(f"❌ Passage non reconnu: {args.passage}")
+        return 1
+    started = time.perf_counter()
+    verses = (store.get_chapter(ref.osis, ref.chapter) if ref.is_chapter
+              else store.get_range(ref.osis, ref.chapter, ref.start, ref.end))
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    for number, text in verses.items():
+        print(f"{number}. {text}")
+    print(f"\n⏱️ {len(verses)} verset(s) en {elapsed_us:.0f} µs")
+    return 0 if verses else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Moteur de règles des explications de repli (sans LLM)
+- Règles déclarées en JSON : data/rules/<jeu>.json (EXPLANATION_RULES_DIR) ;
+  couvrir un nouveau livre = ajouter des règles, sans toucher au code
+- Portée d'une règle : livres (noms français ou abréviations, résolus en OSIS),
+  chapitres (ou tous sauf "except_chapters"), plage de versets ; héritée de sa section si absente
+- Conditions : groupes de mots-clés, un mot de chaque groupe doit apparaître.
+  Mots repliés (minuscules, sans accents) et entiers : "mal" ne trouve pas "animal",
+  "créa*" est un radical (créa, création, créature)
+- Sections évaluées dans l'ordre :
+  "first" : la règle vérifiée de plus haute priorité (équivalent d'un if/elif)
+  "all"   : toutes les règles vérifiées, par priorité
+  "if_empty" : section ignorée si les précédentes ont déjà produit un texte
+- Compilation : livre OSIS -> chapitre -> règles triées par priorité ; la liste des
+  règles d'un (livre, chapitre) est calculée une fois, un chapitre entier est évalué
+  avec une seule résolution de portée
+- Modèles : "{book}", "{chapter}", "{verse}"
+
+Usage :
+  python explanation_rules.py data/rules/<jeu>.json "Genèse" 1 27 "texte du verset"
+"""
+
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from keyword_matcher import fold
+from passage_ref import resolve_osis
+
+EXPLANATION_RULES_DIR = os.getenv(
+    "EXPLANATION_RULES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rules"))
+
+_ANY = None  # livre ou chapitre non précisé
+
+
+def _padded(text: str) -> str:
+    """Texte replié et encadré : 'Dieu créa l'homme.' -> ' dieu crea l homme  '"""
+    return " " + fold(text or "") + " "
+
+
+def _needle(keyword: str) -> str:
+    """Mot-clé -> aiguille cherchée dans le texte encadré (frontières de mot comprises)"""
+    stem = keyword.endswith("*")
+    word = " ".join(fold(keyword.rstrip("*")).split())
+    if not word:
+        raise ValueError(f"Mot-clé vide: '{keyword}'")
+    return " " + word + ("" if stem else " ")
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    priority: int
+    order: int
+    first_verse: int
+    last_verse: Optional[int]
+    groups: Tuple[Tuple[str, ...], ...]
+    template: str
+    dynamic: bool
+    except_chapters: FrozenSet[int] = frozenset()
+    name: str = ""
+
+    def in_verses(self, verse: Optional[int]) -> bool:
+        if self.first_verse > 1 or self.last_verse is not None:
+            if verse is None or verse < self.first_verse or (self.last_verse is not None and verse > self.last_verse):
+                return False
+        return True
+
+    def matches(self, padded: str) -> bool:
+        for group in self.groups:
+            for needle in group:
+                if needle in padded:
+                    break
+            else:
+                return False
+        return True
+
+    def render(self, fields: Dict[str, Any]) -> str:
+        return self.template.format_map(fields) if self.dynamic else self.template
+
+
+@dataclass(frozen=True, slots=True)
+class _Section:
+    name: str
+    first: bool
+    if_empty: bool
+    index: Mapping[Optional[str], Mapping[Optional[int], Tuple[Rule, ...]]]
+
+    def rules_for(self, osis: Optional[str], chapter: Optional[int]) -> Tuple[Rule, ...]:
+        """Règles applicables au chapitre, de la plus prioritaire à la moins prioritaire"""
+        found: List[Rule] = []
+        for book_key in ((osis, _ANY) if osis else (_ANY,)):
+            chapters = self.index.get(book_key)
+            if chapters:
+                found.extend(chapters.get(chapter, ()))
+                found.extend(rule for rule in chapters.get(_ANY, ()) if chapter not in rule.except_chapters)
+        found.sort(key=lambda rule: (-rule.priority, rule.order))
+        return tuple(found)
+
+
+def _compile_rule(spec: Mapping[str, Any], section: Mapping[str, Any], order: int) -> Tuple[Tuple[Optional[str], ...], Tuple[Optional[int], ...], Rule]:
+    books = spec.get("books", section.get("books"))
+    chapters = spec.get("chapters", section.get("chapters"))
+    osis_keys: Tuple[Optional[str], ...] = (_ANY,)
+    if books:
+        resolved = []
+        for book in books:
+            osis = resolve_osis(book)
+            if not osis:
+                raise ValueError(f"Livre non reconnu: '{book}'")
+            resolved.append(osis)
+        osis_keys = tuple(dict.fromkeys(resolved))
+    chapter_keys: Tuple[Optional[int], ...] = tuple(int(c) for c in chapters) if chapters else (_ANY,)
+
+    verses = spec.get("verses") or [1, None]
+    groups = spec.get("when", [])
+    if "any" in spec:
+        groups = list(groups) + [spec["any"]]
+    template = spec["template"]
+    rule = Rule(
+        priority=int(spec.get("priority", 0)),
+        order=order,
+        first_verse=int(verses[0] or 1),
+        last_verse=None if verses[-1] is None else int(verses[-1]),
+        groups=tuple(tuple(dict.fromkeys(_needle(k) for k in group)) for group in groups),
+        template=template,
+        dynamic="{" in template,
+        except_chapters=frozenset(int(c) for c in spec.get("except_chapters", ())),
+        name=spec.get("name", ""),
+    )
+    return osis_keys, chapter_keys, rule
+
+
+class RuleSet:
+    """Jeu de règles compilé, évalué verset par verset ou par chapitre"""
+
+    def __init__(self, spec: Mapping[str, Any], name: str = ""):
+        self.name = name or spec.get("name", "")
+        sections: List[_Section] = []
+        order = 0
+        for section in spec.get("sections", []):
+            index: Dict[Optional[str], Dict[Optional[int], List[Rule]]] = {}
+            for rule_spec in section.get("rules", []):
+                osis_keys, chapter_keys, rule = _compile_rule(rule_spec, section, order)
+                order += 1
+                for osis in osis_keys:
+                    for chapter in chapter_keys:
+                        index.setdefault(osis, {}).setdefault(chapter, []).append(rule)
+            sections.append(_Section(
+                name=section.get("name", ""),
+                first=section.get("mode", "first") == "first",
+                if_empty=bool(section.get("if_empty", False)),
+                index={osis: {c: tuple(rules) for c, rules in chapters.items()} for osis, chapters in index.items()},
+            ))
+        self.sections = tuple(sections)
+        self.rules = order
+        self._scopes: Dict[Tuple[Optional[str], Optional[int]], Tuple[Tuple[_Section, Tuple[Rule, ...]], ...]] = {}
+        self._lock = threading.Lock()
+
+    def _scope(self, book: str, chapter: Optional[int]) -> Tuple[Tuple[_Section, Tuple[Rule, ...]], ...]:
+        """Règles de chaque section pour (livre, chapitre), calculées une fois"""
+        osis = resolve_osis(book) if book else None
+        key = (osis, chapter)
+        scope = self._scopes.get(key)
+        if scope is None:
+            scope = tuple((section, rules) for section in self.sections
+                          if (rules := section.rules_for(osis, chapter)))
+            with self._lock:
+                self._scopes[key] = scope
+        return scope
+
+    @staticmethod
+    def _apply(scope, text: str, fields: Dict[str, Any]) -> List[str]:
+        parts: List[str] = []
+        verse = fields["verse"]
+        padded = None  # texte replié seulement si une règle à mots-clés est examinée
+        for section, rules in scope:
+            if section.if_empty and parts:
+                continue
+            for rule in rules:
+                if not rule.in_verses(verse):
+                    continue
+                if rule.groups:
+                    if padded is None:
+                        padded = _padded(text)
+                    if not rule.matches(padded):
+                        continue
+                parts.append(rule.render(fields))
+                if section.first:
+                    break
+        return parts
+
+    def evaluate(self, text: str, book: str, chapter: Optional[int], verse: Optional[int] = None) -> List[str]:
+        """Textes produits pour un verset, dans l'ordre des sections"""
+        fields = {"book": book, "chapter": chapter, "verse": verse}
+        return self._apply(self._scope(book, chapter), text, fields)
+
+    def evaluate_chapter(self, book: str, chapter: int, verses: Mapping[int, str]) -> Dict[int, List[str]]:
+        """Textes produits pour chaque verset d'un chapitre (une seule résolution de portée)"""
+        scope = self._scope(book, chapter)
+        return {
+            verse: self._apply(scope, text, {"book": book, "chapter": chapter, "verse": verse})
+            for verse, text in verses.items()
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {"sections": len(self.sections), "rules": self.rules, "scopes": len(self._scopes)}
+
+
+def load_rule_set(path: str) -> RuleSet:
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    return RuleSet(spec, name=os.path.splitext(os.path.basename(path))[0])
+
+
+@lru_cache(maxsize=None)
+def get_rule_set(name: str) -> RuleSet:
+    """Jeu de règles data/rules/<name>.json, compilé au premier usage"""
+    path = os.path.join(EXPLANATION_RULES_DIR, f"{name}.json")
+    try:
+        rule_set = load_rule_set(path)
+    except FileNotFoundError:
+        print(f"⚠️ Règles d'explication {name} absentes ({path})")
+        return RuleSet({}, name=name)
+    print(f"✅ Règles d'explication {name} : {rule_set.rules} règles, {len(rule_set.sections)} sections")
+    return rule_set
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 5:
+        print(__doc__)
+        return 2
+    path, book, chapter, verse, text = argv
+    rule_set = load_rule_set(path)
+    for part in rule_set.evaluate(text, book, int(chapter), int(verse)):
+        print(part)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
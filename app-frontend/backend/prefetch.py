@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Préchargement spéculatif des lots progressifs
+- Dès qu'un lot N est renvoyé, les lots suivants (profondeur configurable) sont
+  générés en tâche de fond ; le résultat va dans le cache verset (TTL court)
+- Concurrence globale bornée : le préchargement ne consomme pas tout le quota LLM
+- Une requête qui arrive pendant le préchargement de son lot l'attend au lieu de
+  le régénérer
+- Annulation : déconnexion du client pendant une requête de l'étude, ou étude
+  abandonnée (aucune requête depuis PREFETCH_IDLE_SECONDS)
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", "1"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL_SECONDS", "900"))
+PREFETCH_IDLE_SECONDS = float(os.getenv("PREFETCH_IDLE_SECONDS", "120"))
+
+
+class Prefetcher:
+    def __init__(self, name: str, depth: int = PREFETCH_DEPTH, concurrency: int = PREFETCH_CONCURRENCY,
+                 idle_seconds: float = PREFETCH_IDLE_SECONDS):
+        self.name = name
+        self.depth = max(0, depth)
+        self.concurrency = max(1, concurrency)
+        self.idle_seconds = idle_seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # (étude, verset de départ) -> tâche de préchargement du lot
+        self._batches: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._last_seen: Dict[str, float] = {}
+        self.counters = {"scheduled": 0, "completed": 0, "served": 0, "cancelled": 0, "abandoned": 0, "errors": 0}
+
+    def touch(self, study: str) -> None:
+        """Activité du client sur l'étude (requête reçue)"""
+        self._last_seen[study] = time.time()
+
+    def schedule(self, study: str, starts: List[int], run_batch: Callable[[int], Awaitable]) -> None:
+        """Précharger les lots commençant à `starts` (limités à la profondeur configurée)"""
+        if self.depth == 0:
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        for start in starts[:self.depth]:
+            key = (study, start)
+            if key in self._batches:
+                continue
+            self.counters["scheduled"] += 1
+            task = asyncio.create_task(self._run(study, start, run_batch))
+            self._batches[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+
+    async def _run(self, study: str, start: int, run_batch: Callable[[int], Awaitable]) -> None:
+        async with self._semaphore:
+            # Étude abandonnée pendant l'attente : ne pas dépenser de quota
+            if time.time() - self._last_seen.get(study, 0.0) > self.idle_seconds:
+                self.counters["abandoned"] += 1
+                return
+            await run_batch(start)
+            self.counters["completed"] += 1
+
+    def _finish(self, key: Tuple[str, int], task: asyncio.Task) -> None:
+        if self._batches.get(key) is task:
+            del self._batches[key]
+        if task.cancelled():
+            self.counters["cancelled"] += 1
+        elif task.exception() is not None:
+            self.counters["errors"] += 1
+            print(f"⚠️ Préchargement {key[0]} v{key[1]} échoué: {task.exception()}")
+        if not any(k[0] == key[0] for k in self._batches) and \
+                time.time() - self._last_seen.get(key[0], 0.0) > self.idle_seconds:
+            self._last_seen.pop(key[0], None)
+
+    async def wait_for(self, study: str, start: int) -> bool:
+        """Attendre le préchargement en cours de ce lot ; True si un préchargement a été rejoint"""
+        task = self._batches.get((study, start))
+        if task is None or task.done():
+            return False
+        self.counters["served"] += 1
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise  # Annulation de l'appelant, pas du préchargement
+        except Exception:
+            pass  # Le lot sera généré normalement
+        return True
+
+    def cancel(self, study: str) -> int:
+        """Annuler les préchargements d'une étude, retourne le nombre de lots annulés"""
+        tasks = [task for (s, _), task in self._batches.items() if s == study and not task.done()]
+        for task in tasks:
+            task.cancel()
+        self._last_seen.pop(study, None)
+        if tasks:
+            print(f"🛑 Préchargement annulé pour {study} ({len(tasks)} lot(s))")
+        return len(tasks)
+
+    def cancel_all(self) -> None:
+        for task in list(self._batches.values()):
+            task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "concurrency": self.concurrency,
+            "in_flight": len(self._batches),
+            **self.counters,
+        }
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Modèles précompilés du contenu des rubriques (repli sans LLM)
+- Chaque modèle est analysé une seule fois, à l'enregistrement (string.Formatter) :
+  suite de segments (texte littéral, champ) ; le rendu ne construit que la rubrique
+  demandée, sans réévaluer les textes des 27 autres
+- Champs : {book}, {chapter}... ; spécification de format ({chapter:>3}) et filtre ({book|upper})
+- Fragments partagés entre rubriques : {>nom} insère le fragment enregistré sous ce nom,
+  résolu à la compilation (aucun coût au rendu)
+- Mesure du rendu par modèle (nombre, durée totale, moyenne) : stats() / all_stats()
+"""
+
+import string
+import time
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+_registry: Dict[str, "TemplateRegistry"] = {}
+_FORMATTER = string.Formatter()
+
+FILTERS: Dict[str, Callable[[str], str]] = {
+    "upper": str.upper,
+    "lower": str.lower,
+    "title": str.title,
+    "strip": str.strip,
+}
+
+# (texte littéral, champ ou None, spécification de format, filtre ou None)
+_Segment = Tuple[str, Optional[str], str, Optional[Callable[[str], str]]]
+
+
+class Template:
+    """Modèle compilé : segments figés et compteurs de rendu"""
+
+    __slots__ = ("key", "segments", "fields", "renders", "seconds")
+
+    def __init__(self, key: Hashable, segments: Tuple[_Segment, ...]):
+        self.key = key
+        self.segments = segments
+        self.fields = frozenset(field for _, field, _, _ in segments if field is not None)
+        self.renders = 0
+        self.seconds = 0.0
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        parts: List[str] = []
+        for literal, field, spec, apply in self.segments:
+            parts.append(literal)
+            if field is None:
+                continue
+            try:
+                value = values[field]
+            except KeyError:
+                raise KeyError(f"Champ '{field}' manquant pour le modèle {self.key!r}") from None
+            value = format(value, spec) if spec else str(value)
+            parts.append(apply(value) if apply else value)
+        return "".join(parts)
+
+
+class TemplateRegistry:
+    """Modèles d'un générateur de rubriques, indexés par clé (numéro de rubrique, titre...)"""
+
+    def __init__(self, name: str, partials: Optional[Mapping[str, str]] = None,
+                 templates: Optional[Mapping[Hashable, str]] = None):
+        self.name = name
+        self._partials: Dict[str, Tuple[_Segment, ...]] = {}
+        self._templates: Dict[Hashable, Template] = {}
+        for partial_name, source in (partials or {}).items():
+            self.partial(partial_name, source)
+        for key, source in (templates or {}).items():
+            self.register(key, source)
+        _registry[name] = self
+
+    def _compile(self, source: str) -> List[_Segment]:
+        segments: List[_Segment] = []
+        for literal, field, spec, conversion in _FORMATTER.parse(source):
+            if field is None:
+                segments.append((literal, None, "", None))
+            elif field.startswith(">"):
+                partial = self._partials.get(field[1:].strip())
+                if partial is None:
+                    raise KeyError(f"Fragment '{field[1:]}' inconnu ({self.name}) : l'enregistrer avant usage")
+                segments.append((literal, None, "", None))
+                segments.extend(partial)
+            else:
+                if conversion:
+                    raise ValueError(f"Conversion !{conversion} non prise en charge : utiliser un filtre ({field})")
+                name, _, filter_name = field.partition("|")
+                apply = None
+                if filter_name:
+                    apply = FILTERS.get(filter_name.strip())
+                    if apply is None:
+                        raise ValueError(f"Filtre inconnu: '{filter_name}' ({field})")
+                segments.append((literal, name.strip(), spec or "", apply))
+        # Littéraux consécutifs (fragments, texte) fusionnés : un segment par champ au plus
+        merged: List[_Segment] = []
+        for segment in segments:
+            if merged and merged[-1][1] is None:
+                literal = merged.pop()[0] + segment[0]
+                segment = (literal,) + segment[1:]
+            merged.append(segment)
+        return merged
+
+    def partial(self, name: str, source: str) -> None:
+        """Fragment réutilisable par les modèles enregistrés ensuite ({>nom})"""
+        self._partials[name] = tuple(self._compile(source))
+
+    def register(self, key: Hashable, source: str) -> Template:
+        template = Template(key, tuple(self._compile(source)))
+        self._templates[key] = template
+        return template
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._templates
+
+    def render(self, key: Hashable, fallback: Optional[Hashable] = None, **values: Any) -> str:
+        """Rendu du seul modèle `key` (ou `fallback` s'il n'existe pas)"""
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates.get(fallback) if fallback is not None else None
+            if template is None:
+                raise KeyError(f"Modèle {key!r} inconnu ({self.name})")
+        t0 = time.perf_counter()
+        out = template.render(values)
+        template.seconds += time.perf_counter() - t0
+        template.renders += 1
+        return out
+
+    def stats(self) -> Dict:
+        rendered = [t for t in self._templates.values() if t.renders]
+        renders = sum(t.renders for t in rendered)
+        seconds = sum(t.seconds for t in rendered)
+        return {
+            "templates": len(self._templates),
+            "partials": len(self._partials),
+            "renders": renders,
+            "render_ms": round(seconds * 1000, 3),
+            "avg_render_us": round(seconds / renders * 1e6, 2) if renders else 0.0,
+            "by_template": {
+                str(t.key): {"renders": t.renders, "avg_render_us": round(t.seconds / t.renders * 1e6, 2)}
+                for t in rendered
+            },
+        }
+
+
+def all_stats() -> Dict[str, Dict]:
+    """Statistiques de tous les registres de modèles (endpoints de diagnostic)"""
+    return {name: registry.stats() for name, registry in _registry.items()}
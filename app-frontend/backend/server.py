@@ -6,25 +6,42 @@
 # - Renvoie toujours {"content": "..."} pour coller au front.
 # - OPTIMISATION: 5 premiers versets rapides, puis progression normale
 
+import asyncio
 import os
 import re
-import unicodedata
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
-import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
+import bible_http
+import bible_store
+import concordance
+import passage_engine
+import prefetch
+import rubric_templates
+import singleflight
+import verse_batch
+import versification
+from explanation_rules import get_rule_set
+from verse_cache import VerseKey, verse_cache, VERSE_CACHE_FALLBACK_TTL
+from passage_ref import Passage, canonical_passage, parse_reference, resolve_osis
+
 # ==== Chargement env ====
 load_dotenv()
 
-API_BASE = "https://api.scripture.api.bible/v1"
+API_BASE = bible_http.API_BASE
 APP_NAME = "Bible Study API - Darby Enhanced"
 BIBLE_API_KEY = os.getenv("BIBLE_API_KEY", "demo_key_for_testing")
 PREFERRED_BIBLE_ID = os.getenv("BIBLE_ID", "a93a92589195411f-01")  # Darby FR
 EMERGENT_LLM_KEY = os.getenv("EMERGENT_LLM_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+# Traitement simultané des versets d'un lot (bornes par requête)
+VERSE_FETCH_CONCURRENCY = int(os.getenv("VERSE_FETCH_CONCURRENCY", "8"))
+VERSE_LLM_CONCURRENCY = int(os.getenv("VERSE_LLM_CONCURRENCY", "4"))
 
 # ==== Bibliothèque locale riche (ta base) ====
 try:
@@ -56,7 +73,25 @@ _default_origins = [
 _extra = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o.strip()]
 ALLOW_ORIGINS = _default_origins + _extra
 
-app = FastAPI(title="FastAPI", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pool HTTP partagé (keep-alive / HTTP/2) : ouvert au démarrage, fermé à l'arrêt
+    async with bible_http.client_lifespan():
+        # Index de concordance construit une seule fois, en tâche de fond (ne retarde pas le démarrage)
+        concordance_build = asyncio.create_task(asyncio.to_thread(concordance.build_default_index))
+        yield
+        concordance_build.cancel()
+        progressive_prefetch.cancel_all()
+
+app = FastAPI(title="FastAPI", version="0.1.0", lifespan=lifespan)
+
+# Générations identiques concurrentes partagées (une seule génération par clé)
+study_flight = singleflight.SingleFlight("generate-study")
+verse_flight = singleflight.SingleFlight("generate-verse-by-verse")
+explanation_flight = singleflight.SingleFlight("verse-explanation")
+batch_explanation_flight = singleflight.SingleFlight("verse-explanation-batch")
+# Lots progressifs suivants générés en avance (profondeur / concurrence : PREFETCH_*)
+progressive_prefetch = prefetch.Prefetcher("verse-by-verse-progressive")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOW_ORIGINS if _extra else ["*"],  # large en phase de test
@@ -103,13 +138,15 @@ class VerseByVerseRequest(BaseModel):
 # =========================
 #      Helpers
 # =========================
-def _norm(s: str) -> str:
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = re.sub(r"[^a-zA-Z0-9 ]+", " ", s).lower()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+async def gather_bounded(items, func, limit: int) -> list:
+    """func(item) pour chaque item, au plus `limit` à la fois ; résultats dans l'ordre des items"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
 
+    return await asyncio.gather(*(run(item) for item in items))
 def format_theological_content(content: str) -> str:
     """Formate le contenu théologique : retire les ** et nettoie."""
     content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)
@@ -122,49 +159,6 @@ def clean_plain_text(s: str) -> str:
     s = re.sub(r"\s+", " ", s)
     return s.strip()
 
-BOOKS_FR_OSIS: Dict[str, str] = {
-    # Pentateuque
-    "genese": "GEN", "gen": "GEN",
-    "exode": "EXO", "exo": "EXO",
-    "levitique": "LEV", "lev": "LEV",
-    "nombres": "NUM", "nom": "NUM", "nbr": "NUM", "nb": "NUM",
-    "deuteronome": "DEU", "deut": "DEU", "dt": "DEU",
-    # Historiques
-    "josue": "JOS", "juges": "JDG", "ruth": "RUT",
-    "1 samuel": "1SA", "2 samuel": "2SA",
-    "1 rois": "1KI", "2 rois": "2KI",
-    "1 chroniques": "1CH", "2 chroniques": "2CH",
-    "esdras": "EZR", "nehemie": "NEH", "esther": "EST",
-    # Poétiques
-    "job": "JOB", "psaumes": "PSA", "psaume": "PSA", "ps": "PSA",
-    "proverbes": "PRO", "prov": "PRO",
-    "ecclesiaste": "ECC", "cantique des cantiques": "SNG", "cantique": "SNG",
-    # Prophètes majeurs
-    "esaie": "ISA", "jeremie": "JER", "lamentations": "LAM",
-    "ezechiel": "EZK", "daniel": "DAN",
-    # Prophètes mineurs
-    "osee": "HOS", "joel": "JOL", "amos": "AMO", "abdi": "OBA",
-    "jonas": "JON", "michee": "MIC", "nahum": "NAM", "habakuk": "HAB",
-    "sophonie": "ZEP", "aggee": "HAG", "zacharie": "ZEC", "malachie": "MAL",
-    # Évangiles & Actes
-    "matthieu": "MAT", "marc": "MRK", "luc": "LUK", "jean": "JHN",
-    "actes": "ACT",
-    # Épîtres
-    "romains": "ROM", "1 corinthiens": "1CO", "2 corinthiens": "2CO",
-    "galates": "GAL", "ephesiens": "EPH", "philippiens": "PHP",
-    "colossiens": "COL", "1 thessaloniciens": "1TH", "2 thessaloniciens": "2TH",
-    "1 timothee": "1TI", "2 timothee": "2TI", "tite": "TIT", "philemon": "PHM",
-    "hebreux": "HEB", "jacques": "JAS", "1 pierre": "1PE", "2 pierre": "2PE",
-    "1 jean": "1JN", "2 jean": "2JN", "3 jean": "3JN", "jude": "JUD",
-    # Apocalypse
-    "apocalypse": "REV", "apoc": "REV",
-}
-
-def resolve_osis(book_raw: str) -> Optional[str]:
-    key = _norm(book_raw)
-    key = key.replace("er ", "1 ").replace("ere ", "1 ").replace("eme ", " ")
-    return BOOKS_FR_OSIS.get(key)
-
 # =========================
 #   API.BIBLE CLIENT
 # =========================
@@ -186,53 +180,52 @@ async def get_bible_id() -> str:
         _cached_bible_name = "Darby (config)"
         return _cached_bible_id
 
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        r = await client.get(f"{API_BASE}/bibles", headers=headers())
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"api.bible bibles: {r.text}")
-        data = r.json()
-        lst = data.get("data", [])
+    r = await bible_http.get(f"{API_BASE}/bibles", headers=headers(), timeout=20.0)
+    if r.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"api.bible bibles: {r.text}")
+    data = r.json()
+    lst = data.get("data", [])
+    for b in lst:
+        name = (b.get("name") or "") + " " + (b.get("abbreviationLocal") or "")
+        lang = (b.get("language") or {}).get("name", "")
+        if "darby" in name.lower() and ("fr" in lang.lower() or "fra" in lang.lower()):
+            _cached_bible_id = b.get("id")
+            _cached_bible_name = b.get("name")
+            break
+    if not _cached_bible_id:
         for b in lst:
-            name = (b.get("name") or "") + " " + (b.get("abbreviationLocal") or "")
             lang = (b.get("language") or {}).get("name", "")
-            if "darby" in name.lower() and ("fr" in lang.lower() or "fra" in lang.lower()):
+            if "fr" in lang.lower() or "fra" in lang.lower():
                 _cached_bible_id = b.get("id")
                 _cached_bible_name = b.get("name")
                 break
-        if not _cached_bible_id:
-            for b in lst:
-                lang = (b.get("language") or {}).get("name", "")
-                if "fr" in lang.lower() or "fra" in lang.lower():
-                    _cached_bible_id = b.get("id")
-                    _cached_bible_name = b.get("name")
-                    break
-        if not _cached_bible_id:
-            raise HTTPException(status_code=500, detail="Aucune Bible FR trouvée via api.bible.")
+    if not _cached_bible_id:
+        raise HTTPException(status_code=500, detail="Aucune Bible FR trouvée via api.bible.")
     return _cached_bible_id
 
 async def list_verses_ids(bible_id: str, osis_book: str, chapter: int) -> List[str]:
-    # Mode test pour Genèse 1
-    if osis_book == "GEN" and chapter == 1:
-        return [f"GEN.1.{i}" for i in range(1, 6)]  # 5 premiers versets
-    elif osis_book == "JHN" and chapter == 3:
-        return [f"JHN.3.{i}" for i in range(16, 17)]  # Jean 3:16
-    
-    # Essayer l'API normale
+    # Table de versification : aucun appel réseau, nombre de versets exact
+    ids = versification.verse_ids(osis_book, chapter)
+    if ids:
+        return ids
+    # Chapitre hors table : demander à l'API
     try:
         chap_id = f"{osis_book}.{chapter}"
         url = f"{API_BASE}/bibles/{bible_id}/chapters/{chap_id}/verses"
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            r = await client.get(url, headers=headers())
-            if r.status_code != 200:
-                # Retourner des IDs simulés
-                return [f"{osis_book}.{chapter}.{i}" for i in range(1, 11)]
-            data = r.json()
-            return [v["id"] for v in data.get("data", [])]
-    except:
-        # Fallback avec IDs simulés
-        return [f"{osis_book}.{chapter}.{i}" for i in range(1, 11)]
+        r = await bible_http.get(url, headers=headers())
+        if r.status_code != 200:
+            return []
+        data = r.json()
+        return [v["id"] for v in data.get("data", [])]
+    except Exception:
+        return []
 
 async def fetch_verse_text(bible_id: str, verse_id: str) -> str:
+    # Bible locale (mmap) d'abord : aucun appel réseau si le verset est installé
+    local = bible_store.lookup_verse_id(bible_id, verse_id)
+    if local:
+        return local
+
     # Mode de test avec textes simulés pour Genèse 1
     test_verses = {
         "GEN.1.1": "Au commencement, Dieu créa les cieux et la terre.",
@@ -250,15 +243,14 @@ async def fetch_verse_text(bible_id: str, verse_id: str) -> str:
     try:
         url = f"{API_BASE}/bibles/{bible_id}/verses/{verse_id}"
         params = {"content-type": "text"}
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            r = await client.get(url, headers=headers(), params=params)
-            if r.status_code != 200:
-                return f"[Texte simulé] Verset {verse_id} de la Bible"
-            data = r.json()
-            content = (data.get("data") or {}).get("content") or ""
-            content = re.sub(r"\s+", " ", content).strip()
-            content = clean_plain_text(content)
-            return content
+        r = await bible_http.get(url, headers=headers(), params=params)
+        if r.status_code != 200:
+            return f"[Texte simulé] Verset {verse_id} de la Bible"
+        data = r.json()
+        content = (data.get("data") or {}).get("content") or ""
+        content = re.sub(r"\s+", " ", content).strip()
+        content = clean_plain_text(content)
+        return content
     except:
         return f"[Texte simulé] Verset {verse_id} de la Bible"
 
@@ -266,63 +258,146 @@ async def fetch_passage_text(bible_id: str, osis_book: str, chapter: int, verse:
     if verse:
         verse_id = f"{osis_book}.{chapter}.{verse}"
         return await fetch_verse_text(bible_id, verse_id)
-    ids = await list_verses_ids(bible_id, osis_book, chapter)
-    parts: List[str] = []
-    for idx, vid in enumerate(ids, start=1):
-        txt = await fetch_verse_text(bible_id, vid)
-        parts.append(f"{idx}. {txt}")
+    # Chapitre entier en un appel groupé, repli verset par verset en parallèle
+    verses = await passage_engine.fetch_passage_verses(
+        bible_id, osis_book, chapter,
+        headers=headers(),
+        fetch_one=lambda vid: fetch_verse_text(bible_id, vid),
+        list_ids=lambda: list_verses_ids(bible_id, osis_book, chapter),
+    )
+    parts: List[str] = [f"{vnum}. {txt}" for vnum, txt in verses.items()]
     return clean_plain_text("\n".join(parts).strip())
 
 # =========================
 #   Parsing du passage
 # =========================
+def _parse_reference_or_400(p: str) -> Passage:
+    parsed = parse_reference(p or "")
+    if parsed:
+        return parsed
+    m = re.match(r"^(.*?)[\s,]+\d", (p or "").strip())
+    osis = resolve_osis(m.group(1)) if m else None
+    if m and not osis:
+        raise HTTPException(status_code=400, detail=f"Livre non reconnu: '{m.group(1).strip()}'.")
+    if osis:
+        # Livre reconnu mais chapitre ou verset hors de la table de versification ("Jean 22", "Jean 3:0")
+        raise HTTPException(status_code=400, detail=f"Passage inexistant: '{(p or '').strip()}' hors de la "
+                            f"versification de {osis} ({versification.chapter_count(osis)} chapitre(s))")
+    raise HTTPException(status_code=400, detail="Format passage invalide. Ex: 'Jean 3', 'Jean 3:16' ou 'Jean 3:1-5'.")
+
 def parse_passage_input_extended(p: str):
     """
     'Jean 3:1-5' -> ('Jean','JHN',3,(1,5))
     'Jean 3:16'  -> ('Jean','JHN',3,16)
     'Jean 3'     -> ('Jean','JHN',3,None)
+    Listes et plages multi-chapitres : première plage, bornée à son premier chapitre
     """
-    p = p.strip()
-    m1 = re.match(r"^(.*?)\s+(\d+):(\d+)-(\d+)(?:\s+\S+.*)?$", p)
-    if m1:
-        book = m1.group(1).strip()
-        chapter = int(m1.group(2)); start_verse = int(m1.group(3)); end_verse = int(m1.group(4))
-        osis = resolve_osis(book)
-        if not osis:
-            raise HTTPException(status_code=400, detail=f"Livre non reconnu: '{book}'.")
-        return book, osis, chapter, (start_verse, end_verse)
-    m2 = re.match(r"^(.*?)\s+(\d+)(?::(\d+))?(?:\s+\S+.*)?$", p)
-    if m2:
-        book = m2.group(1).strip()
-        chapter = int(m2.group(2)); verse = int(m2.group(3)) if m2.group(3) else None
-        osis = resolve_osis(book)
-        if not osis:
-            raise HTTPException(status_code=400, detail=f"Livre non reconnu: '{book}'.")
-        return book, osis, chapter, verse
-    raise HTTPException(status_code=400, detail="Format passage invalide. Ex: 'Jean 3', 'Jean 3:16' ou 'Jean 3:1-5'.")
+    parsed = _parse_reference_or_400(p)
+    ref = parsed.ref
+    if ref.is_chapter:
+        return parsed.book, parsed.osis, ref.chapter, None
+    if ref.end == ref.start:
+        return parsed.book, parsed.osis, ref.chapter, ref.start
+    return parsed.book, parsed.osis, ref.chapter, (ref.start, ref.end)
 
 def parse_passage_input(p: str):
     """
-    'Genèse 1'    -> ('Genèse', 1, None)
-    'Genèse 1:3'  -> ('Genèse', 1, 3)
+    'Genèse 1'    -> ('Genèse', 'GEN', 1, None)
+    'Genèse 1:3'  -> ('Genèse', 'GEN', 1, 3)
+    'Gn 1,3 LSG'  -> idem (abréviation, virgule française, version ignorée)
     """
-    p = p.strip()
-    m = re.match(r"^(.*?)[\s,]+(\d+)(?::(\d+))?(?:\s+\S+.*)?$", p)
-    if not m:
-        raise HTTPException(status_code=400, detail="Format passage invalide. Ex: 'Genèse 1' ou 'Genèse 1:1'.")
-    book = m.group(1).strip()
-    chapter = int(m.group(2))
-    verse = int(m.group(3)) if m.group(3) else None
-    osis = resolve_osis(book)
-    if not osis:
-        raise HTTPException(status_code=400, detail=f"Livre non reconnu: '{book}'.")
-    return book, osis, chapter, verse
+    parsed = _parse_reference_or_400(p)
+    ref = parsed.ref
+    try:
+        versification.validate_range(parsed.osis, ref.chapter, ref.start, ref.start)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Passage inexistant: {e}")
+    return parsed.book, parsed.osis, ref.chapter, ref.start
 
 # =========================
 #   Génération théologique ENRICHIE
 # =========================
-async def generate_enriched_theological_explanation(verse_text: str, book: str, chap: int, vnum: int, enriched: bool = True) -> str:
-    """PRIORITÉ ULTRA-ENRICHISSEMENT: Gemini académique -> fallback avancé -> base locale."""
+def _explanation_key(book: str, chap: int, vnum: int, enriched: bool) -> VerseKey:
+    """Clé du cache verset : (osis, chapitre, verset, niveau de détail, modèle)"""
+    use_llm = enriched and GEMINI_AVAILABLE and bool(EMERGENT_LLM_KEY)
+    return VerseKey(resolve_osis(book) or book.strip().casefold(), chap, vnum,
+                    "enriched" if enriched else "standard", GEMINI_MODEL if use_llm else "local")
+
+async def generate_enriched_theological_explanation(verse_text: str, book: str, chap: int, vnum: int, enriched: bool = True,
+                                                    speculative: bool = False) -> str:
+    """
+    Explication d'un verset : cache verset d'abord, une seule génération par verset en vol.
+    speculative=True (préchargement) : TTL provisoire, génération annulable (hors single flight).
+    """
+    key = _explanation_key(book, chap, vnum, enriched)
+    cached = verse_cache.get(key, promote=not speculative)
+    if cached is not None:
+        return cached
+
+    async def generate() -> str:
+        explanation, source = await _generate_theological_explanation(verse_text, book, chap, vnum, enriched)
+        # Repli sans LLM alors qu'un LLM était attendu : TTL court, le verset sera retenté
+        ttl = VERSE_CACHE_FALLBACK_TTL if key.model != "local" and "gemini" not in source else None
+        verse_cache.set(key, explanation, source=source, ttl=ttl,
+                        provisional_ttl=prefetch.PREFETCH_TTL if speculative else None)
+        return explanation
+
+    if speculative:
+        return await generate()
+    explanation, _ = await explanation_flight.do(singleflight.request_key(*key), generate)
+    return explanation
+
+async def explain_verses(book: str, chap: int, verses: Dict[int, str], enriched: bool = True,
+                         speculative: bool = False) -> Dict[int, str]:
+    """
+    Explications d'un ensemble de versets {numéro: texte}, assemblées depuis le cache verset :
+    seuls les versets manquants sont générés.
+    """
+    keys = {vnum: _explanation_key(book, chap, vnum, enriched) for vnum in verses}
+    cached = verse_cache.get_many(keys.values(), promote=not speculative)
+    explanations = {vnum: cached[key] for vnum, key in keys.items() if key in cached}
+    missing = [vnum for vnum in verses if vnum not in explanations]
+    if explanations:
+        print(f"♻️ {book} {chap}: {len(explanations)}/{len(verses)} explications depuis le cache verset")
+
+    # Plusieurs versets manquants : un seul prompt par groupe, appel par verset pour les non analysés
+    if len(missing) > 1 and verse_batch.VERSE_BATCH_SIZE > 1 and keys[missing[0]].model != "local":
+        async def generate_batch(group: List[int]) -> Dict[int, str]:
+            batch = await generate_gemini_explanations_batch({v: verses[v] for v in group}, book, chap)
+            formatted = {}
+            for vnum, explanation in batch.items():
+                formatted[vnum] = format_theological_content(explanation)
+                verse_cache.set(keys[vnum], formatted[vnum], source="gemini-batch",
+                                provisional_ttl=prefetch.PREFETCH_TTL if speculative else None)
+            return formatted
+
+        async def batch_once(group: List[int]) -> Dict[int, str]:
+            # Même groupe demandé en parallèle (même chapitre, même état du cache) : un seul prompt
+            if speculative:
+                return await generate_batch(group)
+            first = keys[group[0]]
+            key = singleflight.request_key("batch", first.osis, chap, tuple(group), first.level, first.model)
+            batch, _ = await batch_explanation_flight.do(key, lambda: generate_batch(group))
+            return batch
+
+        batches = await gather_bounded(list(verse_batch.chunks(missing)), batch_once, VERSE_LLM_CONCURRENCY)
+        for batch in batches:
+            explanations.update(batch)
+        missing = [vnum for vnum in missing if vnum not in explanations]
+        if missing:
+            print(f"🔁 {book} {chap}: versets {missing} non obtenus en lot, génération individuelle")
+
+    generated = await gather_bounded(
+        missing,
+        lambda vnum: generate_enriched_theological_explanation(verses[vnum], book, chap, vnum, enriched, speculative),
+        VERSE_LLM_CONCURRENCY,
+    )
+    explanations.update(zip(missing, generated))
+    # Ordre déterministe : celui des versets demandés
+    return {vnum: explanations[vnum] for vnum in verses}
+
+async def _generate_theological_explanation(verse_text: str, book: str, chap: int, vnum: int, enriched: bool = True) -> Tuple[str, str]:
+    """PRIORITÉ ULTRA-ENRICHISSEMENT: Gemini académique -> fallback avancé -> base locale. Retourne (explication, source)."""
     
     # 1) PRIORITÉ ABSOLUE: Gemini ultra-enrichi (niveau académique)
     if enriched and GEMINI_AVAILABLE and EMERGENT_LLM_KEY:
@@ -330,7 +405,7 @@ async def generate_enriched_theological_explanation(verse_text: str, book: str,
             gemini_result = await generate_gemini_explanation(verse_text, book, chap, vnum)
             if gemini_result and len(gemini_result.strip()) > 300:  # Exigence minimale 300+ mots
                 print(f"✅ Gemini ultra-enrichi généré pour {book} {chap}:{vnum} ({len(gemini_result)} car.)")
-                return gemini_result
+                return gemini_result, "gemini"
         except Exception as e:
             print(f"⚠️ Gemini error for {book} {chap}:{vnum} -> {e}")
 
@@ -338,7 +413,7 @@ async def generate_enriched_theological_explanation(verse_text: str, book: str,
     advanced_fallback = generate_smart_fallback_explanation(verse_text, book, chap, vnum)
     if len(advanced_fallback) > 400:  # Si le fallback est riche
         print(f"✅ Fallback ultra-enrichi pour {book} {chap}:{vnum} ({len(advanced_fallback)} car.)")
-        return advanced_fallback
+        return advanced_fallback, "fallback"
 
     # 3) Base locale SEULEMENT comme dernier recours (et enrichir si possible)
     if VLIB_AVAILABLE:
@@ -354,25 +429,18 @@ async def generate_enriched_theological_explanation(verse_text: str, book: str,
                     try:
                         enriched_result = await enrich_with_gemini(verse_text, book, chap, vnum, base_explanation)
                         if enriched_result and len(enriched_result) > len(base_explanation) + 100:
-                            return enriched_result
+                            return enriched_result, "vlib+gemini"
                     except Exception:
                         pass
                 
-                return base_explanation
+                return base_explanation, "vlib"
         except Exception as e:
             print(f"VLIB error for {book} {chap}:{vnum} -> {e}")
 
     # 4) Dernier recours: fallback basique
-    return generate_smart_fallback_explanation(verse_text, book, chap, vnum)
+    return generate_smart_fallback_explanation(verse_text, book, chap, vnum), "fallback"
 
-async def generate_gemini_explanation(verse_text: str, book: str, chap: int, vnum: int) -> str:
-    """Génère une explication théologique TRÈS enrichie avec Gemini."""
-    try:
-        chat = (
-            LlmChat(
-                api_key=EMERGENT_LLM_KEY,
-                session_id=f"verse_ultra_enriched_{book}_{chap}_{vnum}",
-                system_message="""Tu es un DOCTEUR EN THÉOLOGIE BIBLIQUE de niveau universitaire, spécialisé dans l'exégèse approfondie. 
+EXEGETE_SYSTEM_MESSAGE = """Tu es un DOCTEUR EN THÉOLOGIE BIBLIQUE de niveau universitaire, spécialisé dans l'exégèse approfondie. 
 Tes explications sont d'un niveau ACADÉMIQUE SUPÉRIEUR :
 - 400-500 mots minimum par verset
 - Terminologie technique précise (hébreu/grec/latin)
@@ -380,8 +448,36 @@ Tes explications sont d'un niveau ACADÉMIQUE SUPÉRIEUR :
 - Analyse grammaticale et syntaxique
 - Contexte historico-culturel détaillé
 - Implications dogmatiques et sotériologiques
-- Christologie systématique""",
-            ).with_model("gemini", "gemini-2.0-flash")
+- Christologie systématique"""
+
+async def generate_gemini_explanations_batch(verses: Dict[int, str], book: str, chap: int) -> Dict[int, str]:
+    """Explications de plusieurs versets en un seul appel Gemini (sortie JSON). Versets non analysés absents."""
+    first, last = min(verses), max(verses)
+    try:
+        chat = (
+            LlmChat(
+                api_key=EMERGENT_LLM_KEY,
+                session_id=f"verse_batch_{book}_{chap}_{first}_{last}",
+                system_message=EXEGETE_SYSTEM_MESSAGE,
+            ).with_model("gemini", GEMINI_MODEL)
+        )
+        resp = await chat.send_message(UserMessage(text=verse_batch.build_batch_prompt(book, chap, verses)))
+        parsed = verse_batch.parse_batch_explanations(resp or "", verses)
+        print(f"✅ Gemini lot {book} {chap}:{first}-{last} : {len(parsed)}/{len(verses)} versets analysés")
+        return parsed
+    except Exception as e:
+        print(f"Gemini batch generation error ({book} {chap}:{first}-{last}): {e}")
+    return {}
+
+async def generate_gemini_explanation(verse_text: str, book: str, chap: int, vnum: int) -> str:
+    """Génère une explication théologique TRÈS enrichie avec Gemini."""
+    try:
+        chat = (
+            LlmChat(
+                api_key=EMERGENT_LLM_KEY,
+                session_id=f"verse_ultra_enriched_{book}_{chap}_{vnum}",
+                system_message=EXEGETE_SYSTEM_MESSAGE,
+            ).with_model("gemini", GEMINI_MODEL)
         )
         
         prompt = f"""
@@ -438,7 +534,7 @@ async def enrich_with_gemini(verse_text: str, book: str, chap: int, vnum: int, b
                 api_key=EMERGENT_LLM_KEY,
                 session_id=f"enrich_{book}_{chap}_{vnum}",
                 system_message="Expert théologien : enrichis et complète les explications bibliques existantes.",
-            ).with_model("gemini", "gemini-2.0-flash")
+            ).with_model("gemini", GEMINI_MODEL)
         )
         
         prompt = f"""
@@ -467,83 +563,9 @@ Garde l'explication existante et ajoute tes enrichissements de manière fluide.
 
 def generate_smart_fallback_explanation(verse_text: str, book: str, chap: int, vnum: int) -> str:
     """Génère une explication ULTRA-ENRICHIE intelligente sans LLM."""
-    
-    low = verse_text.lower()
-    explanations = []
-    
-    # I. ANALYSE TEXTUELLE APPROFONDIE
-    explanations.append(f"**ANALYSE TEXTUELLE DE {book} {chap}:{vnum}**")
-    
-    # Contexte littéraire spécialisé par livre
-    advanced_contexts = {
-        "Genèse": f"Dans le récit primordial de la création (Ma'aseh Bereshit), ce verset {vnum} révèle l'ordre cosmogonique divin et établit les fondements ontologiques de la réalité. La structure hébraïque du texte massorétique déploie une théologie de la transcendance créatrice.",
-        "Exode": f"Ce passage du récit de l'Exode (Sefer Shemot) s'inscrit dans la théologie de la libération sotériologique. Le verset {vnum} articule la dialectique entre l'oppression pharaonique et la rédemption yahviste, préfigurant l'œuvre messianique.",
-        "Psaumes": f"Cette expression du psautier davidique (Tehillim) constitue une théophanie poétique révélant l'intimité de l'alliance. Le verset {vnum} exprime la spiritualité hébraïque authentique dans sa relation covenantale avec YHWH.",
-        "Jean": f"Dans le quatrième évangile johannique, ce logion du verset {vnum} déploie la christologie haute et révèle l'économie trinitaire. La théologie johannique articule l'incarnation du Logos et la sotériologie pneumatique.",
-        "Romains": f"Cette péricope de l'épître paulinienne développe la théologie de la justification (dikaiôsis). Le verset {vnum} explicite la doctrine de la grâce souveraine et l'imputation de la justice christique."
-    }
-    
-    explanations.append(advanced_contexts.get(book, f"Ce texte de {book} s'inscrit dans l'économie révélationnelle progressive et manifeste l'herméneutique christocentrique de l'Écriture."))
-    
-    # II. ANALYSE LEXICALE ET GRAMMATICALE AVANCÉE
-    explanations.append("**ANALYSE LEXICALE :**")
-    
-    if any(word in low for word in ["créa", "commencement", "dieu créa", "בראשית", "ברא"]):
-        explanations.append("Le terme hébraïque 'bara' (ברא) exprime la création ex nihilo, activité exclusive de la divinité. 'Bereshit' (בראשית) indique l'inauguration absolue du temps cosmique. 'Elohim' (אלהים), pluriel d'intensité, révèle la majesté trinitaire préfigurée dans l'économie créatrice.")
-    
-    if any(word in low for word in ["lumière", "soit", "dit", "אור", "יהי"]):
-        explanations.append("La formule performative 'yehi or' (יהי אור) constitue le premier fiat divin, révélant l'efficacité de la Parole créatrice (dabar). Cette lumière primordiale (or rishon) précède ontologiquement les luminaires, évoquant la nature métaphysique de la révélation divine.")
-    
-    if any(word in low for word in ["image", "ressemblance", "tselem", "demut", "צלם"]):
-        explanations.append("Le concept d'image divine (tselem Elohim - צלם אלהים) et de ressemblance (demut - דמות) établit l'anthropologie biblique. Cette imago Dei comprend la rationalité (mens), la volonté libre (liberum arbitrium) et la capacité relationnelle, corrompue par la chute mais restaurée en Christ, l'image parfaite du Père.")
-    
-    if any(word in low for word in ["alliance", "berith", "brit", "ברית"]):
-        explanations.append("Le concept d'alliance (berith - ברית) structure l'histoire du salut selon le modèle suzerain-vassal du Proche-Orient ancien. Cette disposition covenantale révèle la fidélité de YHWH (hesed - חסד) et préfigure la nouvelle alliance (berith hadashah) ratifiée par le sang christique.")
-    
-    if any(word in low for word in ["amour", "agape", "hesed", "אהבה"]):
-        explanations.append("L'amour divin (ahavah - אהבה) se manifeste comme hesed (חסד - fidélité covenantale) dans l'AT et agapè (ἀγάπη) dans le NT. Cette agapè inconditionnelle culmine dans le sacrifice propitiatoire du Calvaire, révélant la philanthropie divine (Tite 3:4).")
-    
-    if any(word in low for word in ["foi", "aman", "pistis", "אמן", "πίστις"]):
-        explanations.append("La foi biblique ('emunah - אמונה/pistis - πίστις) implique la confiance fiduciale (fiducia), l'assentiment intellectuel (assensus) et la connaissance salvifique (notitia). Instrument de la justification (sola fide), elle unit le croyant au Christ par l'union mystique.")
-    
-    # III. THÉOLOGIE SYSTÉMATIQUE
-    explanations.append("**IMPLICATIONS DOGMATIQUES :**")
-    
-    if book in ["Genèse"]:
-        explanations.append("Ce texte fonde la théologie de la création contre le panthéisme, le dualisme et l'évolutionnisme athée. La creatio ex nihilo affirme la transcendance divine et établit la distinction Créateur-créature, base de toute métaphysique biblique.")
-    elif book in ["Jean"]:
-        explanations.append("Cette péricope articule la christologie chalcédonienne (deux natures, une personne) et la théologie trinitaire. L'incarnation du Logos révèle l'économie immanente de la Trinité et accomplit l'œuvre de réconciliation.")
-    elif book in ["Romains"]:
-        explanations.append("Ce passage développe la sotériologie réformée : dépravation totale, élection inconditionnelle, expiation limitée, grâce irrésistible et persévérance des saints. La justification sola gratia exclut toute coopération synergiste.")
-    
-    # IV. PERSPECTIVE HISTORICO-RÉDEMPTRICE
-    explanations.append("**ÉCONOMIE DU SALUT :**")
-    
-    cristocentrique_apps = {
-        "Genèse": "Cette vérité créationnelle trouve son accomplissement dans l'œuvre du Logos incarné, agent de la création (Jean 1:3, Col 1:16) et de la nouvelle création (2 Cor 5:17). Christ, dernier Adam, restaure l'image divine déchue.",
-        "Exode": "Cette libération typologique préfigure l'exode spirituel accompli par Christ, notre Pâque (1 Cor 5:7). L'agneau pascal anticipe l'Agneau de Dieu qui ôte le péché du monde (Jean 1:29).",
-        "Psaumes": "Ce psaume messianique trouve son accomplissement en Christ, Fils de David selon la chair (Rom 1:3), qui règne à la droite du Père (Ps 110:1, Héb 1:3).",
-        "Jean": "Cette révélation johannique manifeste l'unité essentielle du Fils avec le Père (homoousios) et la mission sotériologique du Verbe incarné pour le salut du cosmos.",
-        "Romains": "Cette exposition sotériologique révèle l'œuvre substitutionnaire du Christ, qui devient péché pour nous afin que nous devenions justice de Dieu en lui (2 Cor 5:21)."
-    }
-    
-    explanations.append(cristocentrique_apps.get(book, "Ce passage révèle un aspect de l'œuvre rédemptrice du Christ et de son application par l'Esprit Saint dans l'ordo salutis."))
-    
-    # V. RÉFÉRENCES PATRISTIQUES ET RÉFORMÉES
-    explanations.append("**CONSENSUS PATRUM :**")
-    
-    patristique_refs = {
-        "Genèse": "Augustin (Conf. XI) médite sur l'éternité créatrice de Dieu. Basile de Césarée (Hexaemeron) développe la théologie de la création. Calvin (Inst. I.14) explicite la doctrine de la providence.",
-        "Jean": "Athanase d'Alexandrie défend l'homoousios contre l'arianisme. Jean Chrysostome développe l'exégèse christologique. Luther redécouvre la justification sola fide.",
-        "Romains": "Augustin contre Pélage articule la doctrine de la grâce. Thomas d'Aquin systématise la théologie de la justification. Calvin explicite la prédestination double.",
-    }
-    
-    explanations.append(patristique_refs.get(book, "Les Pères de l'Église et les Réformateurs ont développé l'herméneutique christocentrique de ce passage dans la tradition orthodoxe."))
-    
-    # VI. APPLICATION PASTORALE
-    explanations.append("**IMPLICATIONS PASTORALES :** Cette vérité théologique transforme la vie chrétienne par la sanctification progressive (theosis), nourrit la piété réformée et oriente la mission évangélique ad majorem Dei gloriam.")
-    
-    return " ".join(explanations)
+    # Sections (analyse textuelle, lexicale, dogmatique, économie du salut, patristique,
+    # pastorale) et leurs règles par livre / mots-clés : data/rules/smart_fallback.json
+    return " ".join(get_rule_set("smart_fallback").evaluate(verse_text, book, chap, vnum))
 
 # =========================
 #   Génération "28 rubriques" (intelligente basique)
@@ -579,20 +601,28 @@ RUBRIQUES_28 = [
     "Plan d'action",
 ]
 
+# Textes de base par rubrique, compilés une fois : seul le texte demandé est rendu
+RUBRIC_TEMPLATES = rubric_templates.TemplateRegistry(
+    "rubriques_backend",
+    partials={"passage": "{book} {chapter}"},
+    templates={
+        1: "Seigneur, ouvre nos cœurs à la compréhension de {>passage}. Que ton Esprit nous guide dans ta vérité et nous transforme par ta Parole.",
+        2: "Le chapitre {chapter} de {book} révèle une structure littéraire qui sert le propos théologique de l'auteur inspiré.",
+        4: "Le thème doctrinal central de {>passage} manifeste des vérités fondamentales sur la nature de Dieu, l'homme et le salut.",
+        6: "Le contexte historique éclaire la situation des premiers auditeurs de {>passage} et enrichit notre compréhension contemporaine.",
+        10: "Les parallèles bibliques enrichissent la lecture canonique de {>passage} et révèlent l'unité de la révélation divine.",
+        15: "Christ se révèle au centre de {>passage} comme accomplissement des promesses et clé d'interprétation de l'Écriture.",
+        17: "Application personnelle : comment {>passage} transforme notre marche quotidienne avec Dieu et notre croissance spirituelle ?",
+        "défaut": "Contenu contextualisé et enrichi pour {>passage} selon la perspective évangélique.",
+    },
+)
+
 def generate_intelligent_rubric_content(rubric_num: int, book_name: str, chapter: int,
                                         text: str, historical_context: str = "", cross_refs = None) -> str:
     if cross_refs is None:
         cross_refs = []
     rubric_name = RUBRIQUES_28[rubric_num - 1] if rubric_num <= len(RUBRIQUES_28) else f"Rubrique {rubric_num}"
-    base = {
-        1: f"Seigneur, ouvre nos cœurs à la compréhension de {book_name} {chapter}. Que ton Esprit nous guide dans ta vérité et nous transforme par ta Parole.",
-        2: f"Le chapitre {chapter} de {book_name} révèle une structure littéraire qui sert le propos théologique de l'auteur inspiré.",
-        4: f"Le thème doctrinal central de {book_name} {chapter} manifeste des vérités fondamentales sur la nature de Dieu, l'homme et le salut.",
-        6: f"Le contexte historique éclaire la situation des premiers auditeurs de {book_name} {chapter} et enrichit notre compréhension contemporaine.",
-        10: f"Les parallèles bibliques enrichissent la lecture canonique de {book_name} {chapter} et révèlent l'unité de la révélation divine.",
-        15: f"Christ se révèle au centre de {book_name} {chapter} comme accomplissement des promesses et clé d'interprétation de l'Écriture.",
-        17: f"Application personnelle : comment {book_name} {chapter} transforme notre marche quotidienne avec Dieu et notre croissance spirituelle ?",
-    }.get(rubric_num, f"Contenu contextualisé et enrichi pour {book_name} {chapter} selon la perspective évangélique.")
+    base = RUBRIC_TEMPLATES.render(rubric_num, fallback="défaut", book=book_name, chapter=chapter)
     out = f"## {rubric_num}. {rubric_name}\n\n{base}"
     if historical_context:
         out += f"\n\nContexte historique détaillé: {historical_context}"
@@ -628,11 +658,53 @@ async def health():
         bid = await get_bible_id()
     except Exception:
         pass
-    return {"status": "ok", "bibleId": bid or "unknown", "gemini": GEMINI_AVAILABLE}
+    store = bible_store.get_store()
+    index = concordance.get_index()
+    return {"status": "ok", "bibleId": bid or "unknown", "gemini": GEMINI_AVAILABLE,
+            "bible_http": bible_http.client_stats(),
+            "bible_store": store.stats() if store else None,
+            "concordance": index.stats() if index else None,
+            "verse_cache": verse_cache.stats(),
+            "prefetch": progressive_prefetch.stats(),
+            "single_flight": singleflight.all_stats(),
+            "rubric_templates": rubric_templates.all_stats()}
+
+@app.get("/api/concordance")
+async def search_concordance(
+    q: str = Query(..., min_length=1, description="Mots, \"expression exacte\" ou préfixe*"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=concordance.MAX_PAGE_SIZE),
+    prefix: bool = Query(False, description="Traiter le dernier mot comme un préfixe (recherche à la frappe)"),
+):
+    index = concordance.get_index()
+    if index is None:
+        if bible_store.get_store() is None:
+            raise HTTPException(status_code=503, detail="Concordance indisponible : aucune Bible locale (bible_store).")
+        raise HTTPException(status_code=503, detail="Index de concordance en cours de construction, réessayez.")
+    return index.search(q, page=page, page_size=page_size, prefix=prefix)
 
 # ---- Progressif OPTIMISÉ
+async def _progressive_batch(bible_id: str, book_label: str, osis: str, chap: int, start: int, end: int,
+                             speculative: bool = False):
+    """(textes, explications) des versets start..end, dans l'ordre des versets"""
+    # Textes du lot récupérés simultanément (ordre conservé)
+    batch_verses = list(range(start, end + 1))
+    texts = await gather_bounded(batch_verses, lambda v: fetch_passage_text(bible_id, osis, chap, v),
+                                 VERSE_FETCH_CONCURRENCY)
+    verse_texts = dict(zip(batch_verses, texts))
+    # Fragments déjà expliqués servis par le cache verset, seuls les manquants sont générés
+    explanations = await explain_verses(book_label, chap, verse_texts, enriched=True, speculative=speculative)
+    return verse_texts, explanations
+
+async def _cancel_prefetch_on_disconnect(http_request: Request, study: str) -> None:
+    """Client parti pendant la requête : abandonner le préchargement de l'étude"""
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(0.5)
+    progressive_prefetch.cancel(study)
+
 @app.post("/api/generate-verse-by-verse-progressive", response_model=ProgressiveStudyResponse)
-async def generate_verse_by_verse_progressive(request: ProgressiveStudyRequest):
+async def generate_verse_by_verse_progressive(request: ProgressiveStudyRequest, http_request: Request):
+    disconnect_watch = None
     try:
         passage = request.passage.strip()
         batch_size = max(1, min(request.batch_size, 10))
@@ -643,41 +715,38 @@ async def generate_verse_by_verse_progressive(request: ProgressiveStudyRequest):
         bible_id = await get_bible_id()
 
         if isinstance(verse_info, tuple):
-            start_verse_orig, end_verse = verse_info
-        elif verse_info:
-            start_verse_orig = end_verse = verse_info
+            range_start, range_end = verse_info
         else:
-            try:
-                verses_list = await list_verses_ids(bible_id, osis, chap)
-                start_verse_orig, end_verse = 1, len(verses_list)
-            except Exception:
-                start_verse_orig, end_verse = 1, 31
+            range_start = range_end = verse_info
+        # Bornes exactes du chapitre depuis la table de versification (aucune E/S)
+        try:
+            start_verse_orig, end_verse = versification.validate_range(osis, chap, range_start, range_end)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{book_label} {chap}: {e}")
 
-        batch_start = request.start_verse
+        batch_start = max(request.start_verse, start_verse_orig)
+        if batch_start > end_verse:
+            raise HTTPException(status_code=400, detail=f"start_verse {request.start_verse} au-delà de la plage {start_verse_orig}-{end_verse}")
         batch_end = min(batch_start + batch_size - 1, end_verse)
         total_verses = end_verse - start_verse_orig + 1
 
+        study = f"{osis}.{chap}:{start_verse_orig}-{end_verse}"
+        progressive_prefetch.touch(study)
+        disconnect_watch = asyncio.create_task(_cancel_prefetch_on_disconnect(http_request, study))
+        # Lot en cours de préchargement : le rejoindre plutôt que le régénérer
+        if await progressive_prefetch.wait_for(study, batch_start):
+            print(f"⚡ Lot {study} v{batch_start} issu du préchargement")
+
         batch_content = ""
         if batch_start == start_verse_orig:
             title = f"Étude Verset par Verset - {book_label} Chapitre {chap}"
             intro = "Cette étude parcourt la Bible Darby (FR) avec des explications théologiques enrichies automatiquement par IA."
             batch_content += f"# {title}\n\n{intro}\n\n"
 
-        # Mode priorité pour les 5 premiers versets : traitement simultané et enrichissement adapté
-        is_priority_batch = request.priority_mode and batch_start <= 5
-        
-        for v in range(batch_start, batch_end + 1):
-            verse_text = await fetch_passage_text(bible_id, osis, chap, v)
-            
-            # Enrichissement adapté selon la priorité
-            if is_priority_batch:
-                # Mode rapide pour les 5 premiers : enrichissement modéré
-                theox = await generate_enriched_theological_explanation(verse_text, book_label, chap, v, enriched=True)
-            else:
-                # Mode complet pour les suivants
-                theox = await generate_enriched_theological_explanation(verse_text, book_label, chap, v, enriched=True)
-            
-            theox = format_theological_content(theox)
+        verse_texts, explanations = await _progressive_batch(bible_id, book_label, osis, chap, batch_start, batch_end)
+
+        for v, verse_text in verse_texts.items():
+            theox = format_theological_content(explanations[v])
             batch_content += (
                 f"## VERSET {v}\n\n"
                 f"**TEXTE BIBLIQUE :**\n{verse_text}\n\n"
@@ -689,6 +758,15 @@ async def generate_verse_by_verse_progressive(request: ProgressiveStudyRequest):
         verses_completed = batch_end - start_verse_orig + 1
         total_progress = min((verses_completed / total_verses) * 100, 100)
 
+        # Lots suivants générés en avance : le client les demande dès réception de celui-ci
+        if has_more and not disconnect_watch.done():
+            progressive_prefetch.schedule(
+                study,
+                list(range(next_start_verse, end_verse + 1, batch_size)),
+                lambda start: _progressive_batch(bible_id, book_label, osis, chap, start,
+                                                 min(start + batch_size - 1, end_verse), speculative=True),
+            )
+
         # Stats pour le frontend
         verse_stats = {
             "processed": verses_completed,
@@ -704,9 +782,14 @@ async def generate_verse_by_verse_progressive(request: ProgressiveStudyRequest):
             total_progress=round(total_progress, 1),
             verse_stats=verse_stats
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Erreur generate_verse_by_verse_progressive: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération: {str(e)}")
+    finally:
+        if disconnect_watch:
+            disconnect_watch.cancel()
 
 # ---- Verset par verset (non progressif) ENRICHI
 @app.post("/api/generate-verse-by-verse")
@@ -715,7 +798,8 @@ async def generate_verse_by_verse(request: StudyRequest):
         passage = request.passage.strip()
         if not passage:
             raise HTTPException(status_code=400, detail="Passage requis")
-        base = await _generate_verse_by_verse_content(request)
+        key = singleflight.request_key(canonical_passage(passage), request.enriched)
+        base, _ = await verse_flight.do(key, lambda: _generate_verse_by_verse_content(request))
         return base
     except Exception as e:
         print(f"❌ Erreur generate_verse_by_verse: {e}")
@@ -752,11 +836,10 @@ async def _generate_verse_by_verse_content(req: StudyRequest):
         try:
             entries = vlib_all_verses(book_label, chap) or []
             if entries:
-                for e in entries:
-                    vnum = int(e["verse_number"])
-                    vtxt = clean_plain_text(e["verse_text"])
-                    theox = await generate_enriched_theological_explanation(vtxt, book_label, chap, vnum, enriched=True)  # Force enrichissement
-                    theox = format_theological_content(theox)
+                verse_texts = {int(e["verse_number"]): clean_plain_text(e["verse_text"]) for e in entries}
+                explanations = await explain_verses(book_label, chap, verse_texts, enriched=True)  # Force enrichissement
+                for vnum, vtxt in verse_texts.items():
+                    theox = format_theological_content(explanations[vnum])
                     blocks.append(
                         f"**VERSET {vnum}**\n\n"
                         f"**TEXTE BIBLIQUE :**\n{vtxt}\n\n"
@@ -767,14 +850,14 @@ async def _generate_verse_by_verse_content(req: StudyRequest):
             print(f"VLIB chapter fallback: {e}")
 
     # Sinon, parser le texte brut et générer verset par verset
-    lines = [l for l in text.splitlines() if l.strip()]
-    for line in lines:
+    verse_texts: Dict[int, str] = {}
+    for line in text.splitlines():
         m = re.match(r"^(\d+)\.\s*(.*)$", line)
-        if not m:
-            continue
-        vnum = int(m.group(1))
-        vtxt = m.group(2).strip()
-        theox = await generate_enriched_theological_explanation(vtxt, book_label, chap, vnum, enriched=True)  # Force enrichissement
+        if m:
+            verse_texts[int(m.group(1))] = m.group(2).strip()
+    explanations = await explain_verses(book_label, chap, verse_texts, enriched=True)  # Force enrichissement
+    for vnum, vtxt in verse_texts.items():
+        theox = explanations[vnum]
         blocks.append(
             f"**VERSET {vnum}**\n\n"
             f"**TEXTE BIBLIQUE :**\n{vtxt}\n\n"
@@ -785,6 +868,12 @@ async def _generate_verse_by_verse_content(req: StudyRequest):
 # ---- Étude 28 rubriques ENRICHIE
 @app.post("/api/generate-study")
 async def generate_study(request: StudyRequest):
+    key = singleflight.request_key(canonical_passage(request.passage), request.enriched,
+                                   request.requestedRubriques or [])
+    result, _ = await study_flight.do(key, lambda: _generate_study(request))
+    return result
+
+async def _generate_study(request: StudyRequest):
     try:
         passage = request.passage.strip()
         if not passage:
@@ -843,7 +932,7 @@ async def generate_enhanced_study_with_gemini(book: str, chapter: int, rubric_in
                 "Théologien expert : génère des études bibliques approfondies, riches en doctrine, "
                 "références canoniques et applications pratiques. Style académique mais accessible."
             ),
-        ).with_model("gemini", "gemini-2.0-flash")
+        ).with_model("gemini", GEMINI_MODEL)
 
         rubrics_requested = [RUBRIQUES_28[i] for i in rubric_indices if i < len(RUBRIQUES_28)]
         rubrics_text = ", ".join(rubrics_requested[:10])  # Limiter pour le prompt
@@ -895,7 +984,7 @@ async def generate_enhanced_content_with_gemini(passage: str, rubric_type: str,
                 "Théologien expert : contenus théologiques riches, contextualisés, doctrinalement fidèles, "
                 "avec références canoniques précises et applications pratiques contemporaines, en français."
             ),
-        ).with_model("gemini", "gemini-2.0-flash")
+        ).with_model("gemini", GEMINI_MODEL)
 
         if rubric_type == "verse_by_verse":
             prompt = f"""
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Déduplication des générations concurrentes identiques (single-flight)
+- La première requête pour une clé lance la génération
+- Les requêtes identiques arrivées pendant ce temps attendent le même résultat
+  au lieu de relancer un appel LLM (et de consommer le quota des clés)
+- La génération tourne dans sa propre tâche : si le client qui l'a lancée se
+  déconnecte, les autres requêtes en attente reçoivent quand même le résultat
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+_registry: Dict[str, "SingleFlight"] = {}
+
+
+def request_key(*parts: Any) -> str:
+    """Clé normalisée : espaces réduits, casse ignorée, listes triées"""
+    normalized = []
+    for part in parts:
+        if isinstance(part, (list, tuple, set)):
+            part = ",".join(str(p) for p in sorted(part))
+        normalized.append(" ".join(str(part).split()).casefold())
+    return "|".join(normalized)
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.counters = {"leaders": 0, "coalesced": 0, "errors": 0}
+        _registry[name] = self
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Exécuter func une seule fois par clé parmi les appels concurrents
+        Retourne (résultat, partagé) ; partagé=True si l'appel a rejoint une génération en cours.
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.counters["coalesced"] += 1
+        else:
+            self.counters["leaders"] += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        # shield : l'annulation d'un appelant n'annule pas la génération partagée
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["errors"] += 1
+
+    def stats(self) -> Dict:
+        total = self.counters["leaders"] + self.counters["coalesced"]
+        return {
+            "in_flight": len(self._in_flight),
+            "requests": total,
+            "coalesce_rate": round(self.counters["coalesced"] / total, 3) if total else 0.0,
+            **self.counters,
+        }
+
+
+def all_stats() -> Dict[str, Dict]:
+    """Statistiques de tous les groupes single-flight (endpoints de diagnostic)"""
+    return {name: flight.stats() for name, flight in _registry.items()}
@@ -9,58 +9,17 @@ Générateur d'étude théologique 'chapitre'
 """
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import List, Optional
+
+from library_store import ShardedLibrary
 
 # =====================================================================
-# 1) TA BASE CHAPITRÉE — mets ICI ton dictionnaire complet (sans tronquer)
+# 1) TA BASE CHAPITRÉE — data/theological/<OSIS>/<chapitre>.json
+#    (python library_store.py index data/theological après ajout d'un chapitre)
 # =====================================================================
 
-THEOLOGICAL_LIBRARY: Dict[str, Dict[int, dict]] = {
-    # ⬇️ EXEMPLES minimaux. Remplace/complète par ton dump intégral.
-    "Genèse": {
-        4: {
-            "title": "Caïn et Abel : grâce et jugement aux origines",
-            "narrative": (
-                "La tension post-chute culmine dans l’opposition foi/œuvre. "
-                "L’offrande d’Abel par la foi préfigure l’Agneau parfait ; la colère de Caïn révèle l’orgueil religieux."
-            ),
-            "theological_points": [
-                "Spiritualité authentique vs ritualisme.",
-                "Typologie sacrificielle et annonce du Christ.",
-                "Éthique fraternelle et responsabilité morale."
-            ],
-        },
-    },
-    "Exode": {
-        2: {
-            "title": "Formation de Moïse : providence en temps d’adversité",
-            "narrative": (
-                "Moïse, tiré des eaux, est préparé dans la maison de Pharaon. "
-                "Dieu forme ses instruments avant l’envoi."
-            ),
-            "theological_points": [
-                "Souveraineté de Dieu dans l’histoire.",
-                "Vocation et préparation de l’envoyé.",
-                "Rédemption annoncée par figure."
-            ],
-        },
-    },
-    "Jean": {
-        1: {
-            "title": "Le Logos éternel : révélation suprême",
-            "narrative": (
-                "Le prologue dévoile la divinité du Christ, Parole créatrice et révélatrice, "
-                "source de vie et de lumière."
-            ),
-            "theological_points": [
-                "Christologie haute (préexistence, divinité).",
-                "Création par le Fils.",
-                "Révélation et salut."
-            ],
-        },
-    },
-}
-# =====================================================================
+# livre -> chapitre -> {"title", "narrative", "theological_points"}
+THEOLOGICAL_LIBRARY = ShardedLibrary("theological")
 
 
 # =====================================================================
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Génération groupée des explications : un seul prompt pour N versets
+- Sortie demandée en JSON (un objet par verset), analysée de façon tolérante :
+  blocs ```json, texte autour, guillemets non échappés, clés FR/EN
+- Les versets absents ou inexploitables sont signalés à l'appelant,
+  qui ne les régénère qu'eux (appel par verset)
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+VERSE_BATCH_SIZE = int(os.getenv("VERSE_BATCH_SIZE", "10"))
+VERSE_BATCH_MIN_CHARS = int(os.getenv("VERSE_BATCH_MIN_CHARS", "200"))
+
+_VERSE_KEYS = ("verse", "verset", "v", "number", "numero")
+_TEXT_KEYS = ("explanation", "explication", "content", "contenu", "text")
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.S | re.I)
+# Repli quand le JSON est invalide : "verse": 3, "explanation": "..." }
+_PAIR_RE = re.compile(
+    r'"(?:%s)"\s*:\s*"?(\d+)"?\s*,\s*"(?:%s)"\s*:\s*"(.*?)"\s*}' % ("|".join(_VERSE_KEYS), "|".join(_TEXT_KEYS)),
+    re.S | re.I,
+)
+# Dernier repli : sections "### VERSET 3" en texte libre
+_SECTION_RE = re.compile(r"^\W*VERSET\s+(\d+)\W*$", re.M | re.I)
+
+
+def chunks(items: List[int], size: int = VERSE_BATCH_SIZE) -> Iterable[List[int]]:
+    size = max(1, size)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def build_batch_prompt(book: str, chap: int, verses: Dict[int, str]) -> str:
+    """Prompt structuré pour plusieurs versets, réponse attendue en JSON strict"""
+    payload = json.dumps([{"verse": v, "text": t} for v, t in sorted(verses.items())], ensure_ascii=False)
+    first, last = min(verses), max(verses)
+    return f"""
+EXÉGÈSE ACADÉMIQUE APPROFONDIE : {book} {chap}:{first}-{last}
+
+VERSETS (JSON) : {payload}
+
+Pour CHAQUE verset, produis une ANALYSE THÉOLOGIQUE UNIVERSITAIRE (250-350 mots) structurée ainsi :
+**I. ANALYSE TEXTUELLE ET LEXICALE** (termes hébreux/grecs clés, grammaire)
+**II. CONTEXTE HISTORICO-LITTÉRAIRE**
+**III. THÉOLOGIE BIBLIQUE CANONIQUE** (typologie, accomplissement christologique)
+**IV. HISTOIRE DE L'INTERPRÉTATION** (Pères, Réforme)
+**V. APPLICATIONS PASTORALES**
+
+FORMAT DE SORTIE OBLIGATOIRE : uniquement un tableau JSON, sans texte autour :
+[{{"verse": {first}, "explanation": "..."}}, ...]
+Un objet par verset ({len(verses)} au total), dans l'ordre. Markdown autorisé dans "explanation",
+guillemets et retours à la ligne échappés (\\" et \\n).
+"""
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _from_json(data) -> Dict[int, str]:
+    if isinstance(data, dict):
+        for wrapper in ("verses", "versets", "results", "data"):
+            if isinstance(data.get(wrapper), list):
+                return _from_json(data[wrapper])
+        # {"3": "explication", ...}
+        return {n: str(t) for n, t in ((_as_int(k), v) for k, v in data.items())
+                if n is not None and isinstance(t, str)}
+    found: Dict[int, str] = {}
+    if isinstance(data, list):
+        for obj in data:
+            if not isinstance(obj, dict):
+                continue
+            lowered = {str(k).lower(): v for k, v in obj.items()}
+            num = next((_as_int(lowered[k]) for k in _VERSE_KEYS if k in lowered), None)
+            text = next((lowered[k] for k in _TEXT_KEYS if isinstance(lowered.get(k), str)), None)
+            if num is not None and text:
+                found[num] = text
+    return found
+
+
+def _load_json(candidate: str):
+    try:
+        return json.loads(candidate, strict=False)  # strict=False : retours à la ligne bruts tolérés
+    except ValueError:
+        return None
+
+
+def _unescape(raw: str) -> str:
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except ValueError:
+        return raw.replace("\\n", "\n").replace('\\"', '"')
+
+
+def parse_batch_explanations(raw: str, expected: Iterable[int], min_chars: int = VERSE_BATCH_MIN_CHARS) -> Dict[int, str]:
+    """
+    Explications par numéro de verset extraites de la réponse du LLM.
+    Seuls les versets attendus et suffisamment développés sont retenus.
+    """
+    expected = set(expected)
+    text = (raw or "").strip()
+    found: Dict[int, str] = {}
+
+    candidates = [m.group(1).strip() for m in _FENCE_RE.finditer(text)] + [text]
+    for start_char, end_char in (("[", "]"), ("{", "}")):
+        start, end = text.find(start_char), text.rfind(end_char)
+        if 0 <= start < end:
+            candidates.append(text[start:end + 1])
+    for candidate in candidates:
+        data = _load_json(candidate)
+        if data is not None:
+            found = _from_json(data)
+            if found:
+                break
+
+    if not found:
+        found = {int(n): _unescape(body) for n, body in _PAIR_RE.findall(text)}
+    if not found:
+        sections = list(_SECTION_RE.finditer(text))
+        for i, m in enumerate(sections):
+            end = sections[i + 1].start() if i + 1 < len(sections) else len(text)
+            found[int(m.group(1))] = text[m.end():end].strip().strip("-").strip()
+
+    return {n: t.strip() for n, t in found.items() if n in expected and len(t.strip()) >= min_chars}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Cache des explications théologiques au niveau du verset
+- Clé : (osis, chapitre, verset, niveau de détail, modèle)
+- Une étude de chapitre, de plage ou un lot progressif est assemblé à partir
+  des fragments en cache : seuls les versets manquants sont générés
+- LRU en mémoire + TTL, borné en entrées et en octets
+- TTL court pour les replis (sans LLM) : le verset sera retenté avec Gemini
+- TTL provisoire pour les fragments préchargés : TTL normal dès le premier service
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+VERSE_CACHE_TTL = float(os.getenv("VERSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+VERSE_CACHE_FALLBACK_TTL = float(os.getenv("VERSE_CACHE_FALLBACK_TTL_SECONDS", "600"))
+VERSE_CACHE_MAX_ENTRIES = int(os.getenv("VERSE_CACHE_MAX_ENTRIES", "8192"))
+VERSE_CACHE_MAX_BYTES = int(os.getenv("VERSE_CACHE_MAX_BYTES", str(48 * 1024 * 1024)))
+
+
+class VerseKey(NamedTuple):
+    osis: str
+    chapter: int
+    verse: int
+    level: str  # "enriched" ou "standard"
+    model: str  # modèle LLM, ou "local" sans LLM
+
+
+class VerseCache:
+    """LRU + TTL des explications par verset, borné en entrées et en octets"""
+
+    def __init__(self, max_entries: int = VERSE_CACHE_MAX_ENTRIES, max_bytes: int = VERSE_CACHE_MAX_BYTES,
+                 ttl: float = VERSE_CACHE_TTL):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # clé -> (explication, source, expiration, taille, TTL final si provisoire)
+        self._data: "OrderedDict[VerseKey, Tuple[str, str, float, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0,
+                         "promotions": 0}
+
+    def get(self, key: VerseKey, promote: bool = True) -> Optional[str]:
+        with self._lock:
+            return self._lookup(key, promote)
+
+    def get_many(self, keys: Iterable[VerseKey], promote: bool = True) -> Dict[VerseKey, str]:
+        """
+        Fragments présents pour ces clés (les absents ne figurent pas dans le résultat)
+        promote=False : lecture spéculative, les fragments provisoires le restent.
+        """
+        found: Dict[VerseKey, str] = {}
+        with self._lock:
+            for key in keys:
+                content = self._lookup(key, promote)
+                if content is not None:
+                    found[key] = content
+        return found
+
+    def _lookup(self, key: VerseKey, promote: bool = True) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            self.counters["misses"] += 1
+            return None
+        content, source, expires_at, size, final_ttl = item
+        now = time.time()
+        if expires_at <= now:
+            self._remove(key)
+            self.counters["expirations"] += 1
+            self.counters["misses"] += 1
+            return None
+        if promote and final_ttl is not None:
+            # Fragment préchargé effectivement servi : il devient un fragment ordinaire
+            self._data[key] = (content, source, now + final_ttl, size, None)
+            self.counters["promotions"] += 1
+        self._data.move_to_end(key)
+        self.counters["hits"] += 1
+        return content
+
+    def set(self, key: VerseKey, content: str, source: str = "", ttl: Optional[float] = None,
+            provisional_ttl: Optional[float] = None) -> None:
+        """provisional_ttl : durée de vie tant que le fragment n'a pas été servi (préchargement)"""
+        if not content:
+            return
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        final_ttl = None
+        if provisional_ttl is not None and provisional_ttl < ttl:
+            ttl, final_ttl = provisional_ttl, ttl
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (content, source, time.time() + ttl, size, final_ttl)
+            self._bytes += size
+            self.counters["sets"] += 1
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.counters["evictions"] += 1
+
+    def _remove(self, key: VerseKey) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[3]
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            self._bytes = 0
+            return count
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            sources: Dict[str, int] = {}
+            provisional = 0
+            for _, source, _, _, final_ttl in self._data.values():
+                provisional += final_ttl is not None
+                sources[source or "unknown"] = sources.get(source or "unknown", 0) + 1
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+                "sources": sources,
+                "provisional": provisional,
+                **self.counters,
+            }
+
+
+# Instance partagée par les endpoints
+verse_cache = VerseCache()
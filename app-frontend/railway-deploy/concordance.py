@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Concordance biblique : index inversé sur le texte local (bible_store)
+- Tokens insensibles aux accents et à la casse, comme passage_ref._norm
+  ("Éternel", "eternel" et "ÉTERNEL" donnent le même terme)
+- Postings positionnels compacts (array) : recherche d'expressions entre guillemets
+- Recherche par préfixe sur le vocabulaire trié ("bénédic*")
+- Classement BM25 (poids précalculés à la construction), résultats paginés
+- Construit une seule fois (au démarrage du serveur, en tâche de fond : 2-3 s pour la Bible entière)
+
+Syntaxe des requêtes :
+  amour prochain        -> versets contenant les deux termes
+  "aime ton prochain"   -> expression exacte
+  bénédic*              -> tous les termes commençant par "benedic"
+
+Usage :
+  python concordance.py bible_store.bin "aime ton prochain" [--page 1] [--bench]
+"""
+
+import argparse
+import bisect
+import heapq
+import math
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import bible_store
+from passage_ref import BOOK_NAMES_FR, _norm
+
+BM25_K1 = float(os.getenv("CONCORDANCE_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("CONCORDANCE_BM25_B", "0.75"))
+PREFIX_MIN_LENGTH = int(os.getenv("CONCORDANCE_PREFIX_MIN_LENGTH", "2"))
+PREFIX_MAX_TERMS = int(os.getenv("CONCORDANCE_PREFIX_MAX_TERMS", "64"))
+MAX_PAGE_SIZE = 100
+
+# _norm supprime les lettres sans décomposition NFKD ("cœur" -> "c ur") : on les déplie avant
+_LIGATURES = str.maketrans({"œ": "oe", "Œ": "OE", "æ": "ae", "Æ": "AE"})
+_WORD_RE = re.compile(r"[^\W_]+")
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    return _norm((text or "").translate(_LIGATURES)).split()
+
+
+class _Postings:
+    """Postings d'un terme : documents triés, tf, poids BM25 et positions (tableaux compacts)"""
+
+    __slots__ = ("docs", "weights", "offsets", "positions")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.weights = array("f")
+        self.offsets = array("I", [0])
+        self.positions = array("H")
+
+    def find(self, doc: int) -> int:
+        i = bisect.bisect_left(self.docs, doc)
+        return i if i < len(self.docs) and self.docs[i] == doc else -1
+
+    def positions_at(self, i: int) -> array:
+        return self.positions[self.offsets[i]:self.offsets[i + 1]]
+
+
+class _Clause:
+    """Terme, préfixe (union des termes développés) ou expression exacte"""
+
+    def __init__(self, kind: str, postings: List[_Postings]):
+        self.kind = kind
+        self.postings = postings
+
+    @property
+    def estimate(self) -> int:
+        return sum(len(p.docs) for p in self.postings)
+
+    def all_scores(self) -> Dict[int, float]:
+        if self.kind == "phrase":
+            rarest = min(self.postings, key=lambda p: len(p.docs))
+            scores = {}
+            for doc in rarest.docs:
+                score = self.score(doc)
+                if score is not None:
+                    scores[doc] = score
+            return scores
+        if len(self.postings) == 1:
+            return dict(zip(self.postings[0].docs, self.postings[0].weights))
+        scores: Dict[int, float] = {}
+        for p in self.postings:
+            for doc, weight in zip(p.docs, p.weights):
+                scores[doc] = scores.get(doc, 0.0) + weight
+        return scores
+
+    def score(self, doc: int) -> Optional[float]:
+        """Contribution BM25 du document, None s'il ne satisfait pas la clause"""
+        if self.kind == "phrase":
+            hits = []
+            for p in self.postings:
+                i = p.find(doc)
+                if i < 0:
+                    return None
+                hits.append(i)
+            starts = set(self.postings[0].positions_at(hits[0]))
+            for offset, (p, i) in enumerate(zip(self.postings[1:], hits[1:]), start=1):
+                following = set(p.positions_at(i))
+                starts = {s for s in starts if s + offset in following}
+                if not starts:
+                    return None
+            return sum(p.weights[i] for p, i in zip(self.postings, hits))
+        total, found = 0.0, False
+        for p in self.postings:
+            i = p.find(doc)
+            if i >= 0:
+                total += p.weights[i]
+                found = True
+        return total if found else None
+
+
+class ConcordanceIndex:
+    def __init__(self):
+        self.keys = array("I")  # clé bible_store (livre << 16 | chapitre << 8 | verset) par document
+        self.texts: List[str] = []
+        self.postings: Dict[str, _Postings] = {}
+        self.vocabulary: List[str] = []
+        self.build_seconds = 0.0
+        self.token_count = 0
+
+    @classmethod
+    def build(cls, verses: Iterable[Tuple[str, int, int, str]]) -> "ConcordanceIndex":
+        """Indexer (osis, chapitre, verset, texte) ; les documents gardent l'ordre fourni"""
+        started = time.perf_counter()
+        index = cls()
+        lengths = array("H")
+        for osis, chapter, verse, text in verses:
+            key = bible_store.verse_key(osis, int(chapter), int(verse))
+            if key is None:
+                continue
+            doc = len(index.keys)
+            index.keys.append(key)
+            index.texts.append(text)
+            tokens = tokenize(text)
+            lengths.append(min(len(tokens), 0xFFFF))
+            seen: Dict[str, List[int]] = {}
+            for pos, token in enumerate(tokens[:0xFFFF]):
+                seen.setdefault(token, []).append(pos)
+            for token, positions in seen.items():
+                p = index.postings.get(token)
+                if p is None:
+                    p = index.postings[token] = _Postings()
+                p.docs.append(doc)
+                p.weights.append(len(positions))  # tf, converti en poids BM25 ci-dessous
+                p.positions.extend(positions)
+                p.offsets.append(len(p.positions))
+        index.token_count = sum(lengths)
+        index._apply_bm25(lengths)
+        index.vocabulary = sorted(index.postings)
+        index.build_seconds = time.perf_counter() - started
+        return index
+
+    def _apply_bm25(self, lengths: array) -> None:
+        n = len(self.keys)
+        if not n:
+            return
+        avgdl = (sum(lengths) / n) or 1.0
+        norms = [BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl) for dl in lengths]
+        for p in self.postings.values():
+            df = len(p.docs)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for i, doc in enumerate(p.docs):
+                tf = p.weights[i]
+                p.weights[i] = idf * tf * (BM25_K1 + 1) / (tf + norms[doc])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # ---- Requêtes
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Termes du vocabulaire commençant par prefix (les plus fréquents si trop nombreux)"""
+        if len(prefix) < PREFIX_MIN_LENGTH:
+            return []
+        lo = bisect.bisect_left(self.vocabulary, prefix)
+        hi = bisect.bisect_left(self.vocabulary, prefix + "\uffff")
+        terms = self.vocabulary[lo:hi]
+        if len(terms) > PREFIX_MAX_TERMS:
+            terms = heapq.nlargest(PREFIX_MAX_TERMS, terms, key=lambda t: len(self.postings[t].docs))
+        return terms
+
+    def _parse(self, query: str, prefix_last: bool) -> Tuple[List[_Clause], List[str], bool]:
+        """Clauses de la requête, termes à surligner ; False si une clause ne peut rien trouver"""
+        clauses: List[_Clause] = []
+        terms: List[str] = []
+        matchable = True
+        parts = list(_QUERY_RE.finditer(query or ""))
+        for n, m in enumerate(parts):
+            phrase, word = m.group(1), m.group(2)
+            is_prefix = word is not None and (word.endswith("*") or (prefix_last and n == len(parts) - 1))
+            tokens = tokenize(phrase if phrase is not None else word)
+            if not tokens:
+                continue
+            if is_prefix:
+                # "l'amou*" : les premiers tokens sont des termes exacts, seul le dernier est un préfixe
+                for token in tokens[:-1]:
+                    clauses.append(self._term_clause(token, terms))
+                expanded = self.expand_prefix(tokens[-1])
+                terms.extend(expanded)
+                clauses.append(_Clause("prefix", [self.postings[t] for t in expanded]))
+            elif len(tokens) > 1:
+                missing = [t for t in tokens if t not in self.postings]
+                terms.extend(tokens)
+                clauses.append(_Clause("phrase", [] if missing else [self.postings[t] for t in tokens]))
+            else:
+                clauses.append(self._term_clause(tokens[0], terms))
+        for clause in clauses:
+            if not clause.postings:
+                matchable = False
+        return clauses, terms, matchable
+
+    def _term_clause(self, token: str, terms: List[str]) -> _Clause:
+        terms.append(token)
+        p = self.postings.get(token)
+        return _Clause("term", [p] if p is not None else [])
+
+    def search(self, query: str, page: int = 1, page_size: int = 20, prefix: bool = False) -> Dict:
+        started = time.perf_counter()
+        page = max(1, page)
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        clauses, terms, matchable = self._parse(query, prefix)
+        scores: Dict[int, float] = {}
+        if clauses and matchable:
+            # Clause la plus sélective d'abord, les autres filtrent ses documents
+            clauses.sort(key=lambda c: c.estimate)
+            scores = clauses[0].all_scores()
+            for clause in clauses[1:]:
+                if not scores:
+                    break
+                if clause.kind != "phrase" and clause.estimate <= 4 * len(scores):
+                    # Clause de taille comparable : intersection de dictionnaires plutôt que bisect par document
+                    other = clause.all_scores()
+                    scores = {doc: score + other[doc] for doc, score in scores.items() if doc in other}
+                    continue
+                filtered = {}
+                for doc, score in scores.items():
+                    extra = clause.score(doc)
+                    if extra is not None:
+                        filtered[doc] = score + extra
+                scores = filtered
+        # Score décroissant ; à score égal, nlargest garde l'ordre d'insertion (ordre canonique)
+        top = heapq.nlargest(page * page_size, scores, key=scores.__getitem__)
+        highlight = set(terms)
+        results = [self._result(doc, scores[doc], highlight) for doc in top[(page - 1) * page_size:]]
+        return {
+            "query": query,
+            "terms": terms,
+            "total": len(scores),
+            "page": page,
+            "page_size": page_size,
+            "has_more": page * page_size < len(scores),
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _result(self, doc: int, score: float, highlight: set) -> Dict:
+        key = self.keys[doc]
+        osis = bible_store.BOOK_ORDER[(key >> 16) - 1]
+        chapter, verse = (key >> 8) & 0xFF, key & 0xFF
+        text = self.texts[doc]
+        book = BOOK_NAMES_FR.get(osis, osis)
+        # Mots du texte original correspondant aux termes de la requête (surlignage côté front)
+        words = []
+        for m in _WORD_RE.finditer(text):
+            if any(t in highlight for t in tokenize(m.group())) and m.group() not in words:
+                words.append(m.group())
+        return {
+            "osis": osis,
+            "book": book,
+            "chapter": chapter,
+            "verse": verse,
+            "reference": f"{book} {chapter}:{verse}",
+            "text": text,
+            "score": round(score, 4),
+            "highlights": words,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "verses": len(self.keys),
+            "terms": len(self.postings),
+            "tokens": self.token_count,
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+
+# =========================
+#   Index partagé (serveur)
+# =========================
+_index: Optional[ConcordanceIndex] = None
+_index_lock = threading.Lock()
+
+
+def build_default_index(store_loader: Callable[[], Optional[bible_store.BibleStore]] = bible_store.get_store) -> Optional[ConcordanceIndex]:
+    """Construire l'index partagé depuis le bible_store local (une seule fois)"""
+    global _index
+    with _index_lock:
+        if _index is not None:
+            return _index
+        store = store_loader()
+        if store is None:
+            print("ℹ️ Concordance indisponible : aucun bible_store local")
+            return None
+        _index = ConcordanceIndex.build(store.iter_verses())
+        print(f"✅ Concordance : {len(_index)} versets, {len(_index.postings)} termes "
+              f"indexés en {_index.build_seconds:.2f}s")
+        return _index
+
+
+def get_index() -> Optional[ConcordanceIndex]:
+    return _index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recherche dans la concordance biblique locale")
+    parser.add_argument("store", help="Fichier bible_store")
+    parser.add_argument("query")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--prefix", action="store_true", help="Dernier mot traité comme préfixe")
+    parser.add_argument("--bench", action="store_true", help="Mesurer le temps de requête (200 répétitions)")
+    args = parser.parse_args(argv)
+
+    store = bible_store.BibleStore(args.store)
+    index = ConcordanceIndex.build(store.iter_verses())
+    print(f"📚 {index.stats()}")
+    res = index.search(args.query, args.page, args.page_size, args.prefix)
+    print(f"🔎 {res['total']} résultat(s) pour {res['terms']} en {res['took_ms']} ms")
+    for r in res["results"]:
+        print(f"  {r['reference']:<24} {r['score']:>7.3f}  {r['text'][:90]}")
+    if args.bench:
+        runs = 200
+        started = time.perf_counter()
+        for _ in range(runs):
+            index.search(args.query, args.page, args.page_size, args.prefix)
+        print(f"⏱️ {(time.perf_counter() - started) * 1000 / runs:.3f} ms / requête")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
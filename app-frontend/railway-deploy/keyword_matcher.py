@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Recherche de lexèmes sur texte français normalisé
+- Un str.find (en C) par motif : le lexique théologique compte une vingtaine de
+  motifs, bien en deçà du point (~60-80 motifs sur un verset) où un automate
+  d'Aho-Corasick, parcouru caractère par caractère en Python, deviendrait rentable
+- Préfiltre : une seule expression régulière (tous les motifs en alternance) écarte
+  d'un coup les textes sans aucun lexème, soit les trois quarts des versets
+- Texte et lexèmes repliés caractère par caractère (minuscules, sans accents) :
+  les positions renvoyées sont celles du texte d'origine
+- Frontières de mot incluses dans les motifs : "bara" ne trouve pas "barabbas" ;
+  un lexème terminé par "*" est un radical ("sauve*" : sauvé, sauver, sauveur)
+- Lots : plusieurs textes (versets d'un chapitre) analysés en un seul passage
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Generic, Iterable, List, NamedTuple, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_BOUNDARY = " "
+
+
+class _FoldTable(dict):
+    """Table str.translate : un caractère -> un caractère (minuscule sans accent, ou espace)"""
+
+    def __missing__(self, code: int) -> str:
+        ch = chr(code)
+        base = "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c)).lower()
+        folded = base if len(base) == 1 and base.isalnum() else (_BOUNDARY if not ch.isalnum() else ch.lower()[:1])
+        self[code] = folded
+        return folded
+
+
+_FOLD = _FoldTable()
+
+
+def _byte_entry(byte: int) -> int:
+    try:
+        folded = _FOLD[ord(bytes([byte]).decode("cp1252"))].encode("cp1252")
+    except UnicodeError:
+        return ord(_BOUNDARY)
+    return folded[0] if len(folded) == 1 else ord(_BOUNDARY)
+
+
+# Texte français (accents, œ, ’, « », –) : repli octet par octet en cp1252, en C ;
+# str.translate avec une table dict coûte ~70 ns par caractère
+_FOLD_CP1252 = bytes(_byte_entry(byte) for byte in range(256))
+
+
+def fold(text: str) -> str:
+    """Texte replié de même longueur : 'Créé, Noël' -> 'cree  noel'"""
+    try:
+        return text.encode("cp1252").translate(_FOLD_CP1252).decode("cp1252")
+    except UnicodeEncodeError:  # hébreu, grec...
+        return text.translate(_FOLD)
+
+
+class Match(NamedTuple):
+    start: int
+    end: int  # exclusive
+    lexeme: str
+    value: Any
+
+
+class KeywordMatcher(Generic[T]):
+    """Lexèmes encadrés recherchés par str.find, un motif après l'autre"""
+
+    def __init__(self, lexemes: Iterable[Tuple[str, T]]):
+        # Chaque motif est encadré d'espaces ("bara" -> " bara ") : les frontières
+        # de mot sont vérifiées par la recherche elle-même, sans test a posteriori.
+        patterns: Dict[str, list] = {}
+        for lexeme, value in lexemes:
+            stem = lexeme.endswith("*")
+            word = fold(lexeme.rstrip("*")).strip()
+            if not word:
+                continue
+            pattern = _BOUNDARY + word + ("" if stem else _BOUNDARY)
+            # Position dans le texte d'origine = index du dernier caractère du motif
+            # dans le texte encadré - 1 : début = i - (longueur + 1 ou longueur),
+            # fin exclusive = i - 1 ou i
+            output = (len(word) + 1, 1, lexeme, value) if not stem else (len(word), 0, lexeme, value)
+            patterns.setdefault(pattern, []).append(output)
+        self._patterns = tuple((pattern, tuple(found)) for pattern, found in patterns.items())
+        self._prefilter = re.compile("|".join(re.escape(pattern) for pattern in patterns)) if patterns else None
+
+    def __len__(self) -> int:
+        """Nombre de motifs distincts (un str.find chacun par recherche)"""
+        return len(self._patterns)
+
+    def _scan(self, padded: str) -> List[Tuple[int, int, str, T]]:
+        """Occurrences par fin croissante ; à fin égale, motif le plus long d'abord"""
+        if self._prefilter is None or not self._prefilter.search(padded):
+            return []
+        hits = []
+        for pattern, found in self._patterns:
+            pos = padded.find(pattern)
+            while pos != -1:
+                i = pos + len(pattern) - 1
+                hits.extend((i, -len(pattern), i - to_start, i - to_end, lexeme, value)
+                            for to_start, to_end, lexeme, value in found)
+                pos = padded.find(pattern, pos + 1)
+        if len(hits) > 1:
+            hits.sort(key=lambda hit: hit[:2])
+        return [hit[2:] for hit in hits]
+
+    def find(self, text: str) -> List[Match]:
+        """Occurrences (début, fin exclusive, lexème, valeur), positions dans `text`"""
+        return [Match(start, end, lexeme, value)
+                for start, end, lexeme, value in self._scan(_BOUNDARY + fold(text) + _BOUNDARY)]
+
+    def find_many(self, texts: Sequence[str]) -> List[List[Match]]:
+        """Occurrences de chaque texte, en un seul passage sur leur concaténation"""
+        results: List[List[Match]] = [[] for _ in texts]
+        if not texts:
+            return results
+        starts: List[int] = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + 1
+        padded = _BOUNDARY + _BOUNDARY.join(fold(text) for text in texts) + _BOUNDARY
+        index, last = 0, len(texts) - 1
+        for start, end, lexeme, value in self._scan(padded):
+            # Occurrences dans l'ordre de leur fin : l'index du texte ne fait qu'avancer
+            while index < last and end > starts[index] + len(texts[index]):
+                index += 1
+            base = starts[index]
+            if start >= base:  # pas d'occurrence à cheval sur deux textes
+                results[index].append(Match(start - base, end - base, lexeme, value))
+        return results
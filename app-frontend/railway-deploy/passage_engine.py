@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Moteur de récupération de passages pour api.scripture.api.bible
+- Un seul appel /chapters/{id} ou /passages/{plage} pour tout un chapitre / une plage
+- Découpage local du texte en versets ([1] ... [2] ...)
+- Repli : récupération verset par verset EN PARALLÈLE avec fan-out borné
+- Bible locale (bible_store) consultée d'abord : seuls les versets absents
+  localement passent par le réseau
+"""
+
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import bible_http
+import bible_store
+import versification
+
+PASSAGE_FANOUT = int(os.getenv("PASSAGE_FANOUT", "8"))
+
+# Paramètres communs : texte brut avec numéros de versets, sans titres ni notes
+BULK_PARAMS = {
+    "content-type": "text",
+    "include-notes": "false",
+    "include-titles": "false",
+    "include-chapter-numbers": "false",
+    "include-verse-numbers": "true",
+    "include-verse-spans": "false",
+}
+
+_VERSE_MARKER = re.compile(r"\[(\d+)\]")
+_SPACES = re.compile(r"\s+")
+
+
+class PassageFetchError(Exception):
+    """Le passage n'a pas pu être récupéré en un seul appel"""
+
+
+def split_verses(content: str) -> Dict[int, str]:
+    """'[1] Au commencement... [2] La terre...' -> {1: 'Au commencement...', 2: 'La terre...'}"""
+    verses: Dict[int, str] = {}
+    parts = _VERSE_MARKER.split(content or "")
+    # parts = [préambule, num, texte, num, texte, ...]
+    for i in range(1, len(parts) - 1, 2):
+        text = _SPACES.sub(" ", parts[i + 1]).strip()
+        if text:
+            verses[int(parts[i])] = text
+    return verses
+
+
+async def _fetch_bulk(url: str, headers: Dict[str, str]) -> Dict[int, str]:
+    r = await bible_http.get(url, headers=headers, params=BULK_PARAMS)
+    if r.status_code != 200:
+        raise PassageFetchError(f"HTTP {r.status_code} pour {url}")
+    content = (r.json().get("data") or {}).get("content") or ""
+    verses = split_verses(content)
+    if not verses:
+        raise PassageFetchError(f"Aucun verset trouvé dans {url}")
+    return verses
+
+
+async def fetch_chapter_verses(bible_id: str, osis_book: str, chapter: int,
+                               headers: Dict[str, str]) -> Dict[int, str]:
+    """Chapitre entier en un seul appel /chapters/{OSIS.chap}"""
+    url = f"{bible_http.API_BASE}/bibles/{bible_id}/chapters/{osis_book}.{chapter}"
+    return await _fetch_bulk(url, headers)
+
+
+async def fetch_range_verses(bible_id: str, osis_book: str, chapter: int, start: int, end: int,
+                             headers: Dict[str, str]) -> Dict[int, str]:
+    """Plage de versets en un seul appel /passages/{OSIS.c.v1-OSIS.c.v2}"""
+    passage_id = f"{osis_book}.{chapter}.{start}-{osis_book}.{chapter}.{end}"
+    url = f"{bible_http.API_BASE}/bibles/{bible_id}/passages/{passage_id}"
+    verses = await _fetch_bulk(url, headers)
+    return {n: t for n, t in verses.items() if start <= n <= end}
+
+
+async def gather_verses(verse_ids: List[str], fetch_one: Callable[[str], Awaitable[str]],
+                        fanout: Optional[int] = None) -> List[str]:
+    """
+    Récupérer plusieurs versets en parallèle (au plus `fanout` à la fois)
+    L'ordre de sortie suit l'ordre de verse_ids ; un échec donne "".
+    """
+    semaphore = asyncio.Semaphore(max(1, fanout or PASSAGE_FANOUT))
+
+    async def bounded(verse_id: str) -> str:
+        async with semaphore:
+            try:
+                return await fetch_one(verse_id)
+            except Exception as e:
+                print(f"[PASSAGE] ❌ Verset {verse_id}: {e}")
+                return ""
+
+    return list(await asyncio.gather(*(bounded(vid) for vid in verse_ids)))
+
+
+async def fetch_passage_verses(bible_id: str, osis_book: str, chapter: int,
+                               start: Optional[int] = None, end: Optional[int] = None, *,
+                               headers: Dict[str, str],
+                               fetch_one: Callable[[str], Awaitable[str]],
+                               list_ids: Optional[Callable[[], Awaitable[List[str]]]] = None,
+                               fanout: Optional[int] = None) -> Dict[int, str]:
+    """
+    Chapitre (start/end None) ou plage de versets -> {numéro: texte}, dans l'ordre
+    0. Bible locale (mmap) : chapitre présent ou plage complète -> aucun appel réseau
+    1. Appel groupé /chapters ou /passages
+    2. Repli : IDs (table de versification) puis fetch_one en parallèle (fan-out borné)
+    """
+    local = bible_store.lookup_verses(bible_id, osis_book, chapter, start, end)
+    if local:
+        if start is None:
+            return local
+        wanted = range(start, (end or start) + 1)
+        missing = [n for n in wanted if n not in local]
+        if not missing:
+            return local
+        # Plage partiellement locale : seuls les versets absents sont demandés à l'API
+        texts = await gather_verses([f"{osis_book}.{chapter}.{n}" for n in missing], fetch_one, fanout)
+        local.update(zip(missing, texts))
+        return {n: local[n] for n in wanted}
+
+    try:
+        if start is None:
+            return await fetch_chapter_verses(bible_id, osis_book, chapter, headers)
+        return await fetch_range_verses(bible_id, osis_book, chapter, start, end or start, headers)
+    except Exception as e:
+        print(f"[PASSAGE] Appel groupé indisponible ({e}) - repli verset par verset")
+
+    if start is None:
+        # Table de versification : liste des versets sans appel réseau
+        verse_ids = versification.verse_ids(osis_book, chapter)
+        if not verse_ids and list_ids:
+            verse_ids = await list_ids()
+    else:
+        verse_ids = [f"{osis_book}.{chapter}.{n}" for n in range(start, (end or start) + 1)]
+
+    texts = await gather_verses(verse_ids, fetch_one, fanout)
+    verses: Dict[int, str] = {}
+    for verse_id, text in zip(verse_ids, texts):
+        try:
+            number = int(verse_id.rsplit(".", 1)[1])
+        except (IndexError, ValueError):
+            number = len(verses) + 1
+        verses[number] = text
+    return verses
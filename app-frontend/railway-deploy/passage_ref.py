@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Référence canonique de passage biblique
+- Table livres FR -> OSIS (BOOKS_FR_OSIS / resolve_osis), partagée par les serveurs
+- PassageRef : (OSIS, chapitre, plage de versets), immuable et hashable
+- Clés de cache / single-flight indépendantes de l'écriture du passage :
+  "Genèse 1", "genese 1", "Gen 1" et "Genèse 1 LSG" donnent la même clé
+- Regroupement des cibles de tokens par paliers (500 et 480 partagent l'entrée)
+- Une plage couvrant tout le chapitre ("Jean 3:1-36") a la clé du chapitre
+- parse_reference : analyseur unique des serveurs et du cache de repli
+  (abréviations "Jn 3,16", ordinaux "1er Jean", listes "Jean 3:16,18",
+  plages multi-chapitres "Jean 3:16-4:2") ; motifs précompilés, résultat mémorisé (LRU)
+"""
+
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from versification import chapter_count, verse_count
+
+TOKEN_BUCKET = int(os.getenv("CACHE_TOKEN_BUCKET", "250"))
+PARSE_CACHE_SIZE = int(os.getenv("PASSAGE_PARSE_CACHE_SIZE", "4096"))
+
+
+def _norm(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = re.sub(r"[^a-zA-Z0-9 ]+", " ", s).lower()
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+BOOKS_FR_OSIS: Dict[str, str] = {
+    # Pentateuque
+    "genese": "GEN", "gen": "GEN",
+    "exode": "EXO", "exo": "EXO",
+    "levitique": "LEV", "lev": "LEV",
+    "nombres": "NUM", "nom": "NUM", "nbr": "NUM", "nb": "NUM",
+    "deuteronome": "DEU", "deut": "DEU", "dt": "DEU",
+    # Historiques
+    "josue": "JOS", "juges": "JDG", "ruth": "RUT",
+    "1 samuel": "1SA", "2 samuel": "2SA",
+    "1 rois": "1KI", "2 rois": "2KI",
+    "1 chroniques": "1CH", "2 chroniques": "2CH",
+    "esdras": "EZR", "nehemie": "NEH", "esther": "EST",
+    # Poétiques
+    "job": "JOB", "psaumes": "PSA", "psaume": "PSA", "ps": "PSA",
+    "proverbes": "PRO", "prov": "PRO",
+    "ecclesiaste": "ECC", "cantique des cantiques": "SNG", "cantique": "SNG",
+    # Prophètes majeurs
+    "esaie": "ISA", "jeremie": "JER", "lamentations": "LAM",
+    "ezechiel": "EZK", "daniel": "DAN",
+    # Prophètes mineurs
+    "osee": "HOS", "joel": "JOL", "amos": "AMO", "abdi": "OBA",
+    "jonas": "JON", "michee": "MIC", "nahum": "NAM", "habakuk": "HAB",
+    "sophonie": "ZEP", "aggee": "HAG", "zacharie": "ZEC", "malachie": "MAL",
+    # Évangiles & Actes
+    "matthieu": "MAT", "marc": "MRK", "luc": "LUK", "jean": "JHN",
+    "actes": "ACT",
+    # Épîtres
+    "romains": "ROM", "1 corinthiens": "1CO", "2 corinthiens": "2CO",
+    "galates": "GAL", "ephesiens": "EPH", "philippiens": "PHP",
+    "colossiens": "COL", "1 thessaloniciens": "1TH", "2 thessaloniciens": "2TH",
+    "1 timothee": "1TI", "2 timothee": "2TI", "tite": "TIT", "philemon": "PHM",
+    "hebreux": "HEB", "jacques": "JAS", "1 pierre": "1PE", "2 pierre": "2PE",
+    "1 jean": "1JN", "2 jean": "2JN", "3 jean": "3JN", "jude": "JUD",
+    # Apocalypse
+    "apocalypse": "REV", "apoc": "REV",
+}
+
+# Nom d'affichage français par code OSIS (ordre canonique)
+BOOK_NAMES_FR: Dict[str, str] = {
+    "GEN": "Genèse", "EXO": "Exode", "LEV": "Lévitique", "NUM": "Nombres", "DEU": "Deutéronome",
+    "JOS": "Josué", "JDG": "Juges", "RUT": "Ruth", "1SA": "1 Samuel", "2SA": "2 Samuel",
+    "1KI": "1 Rois", "2KI": "2 Rois", "1CH": "1 Chroniques", "2CH": "2 Chroniques",
+    "EZR": "Esdras", "NEH": "Néhémie", "EST": "Esther", "JOB": "Job", "PSA": "Psaumes",
+    "PRO": "Proverbes", "ECC": "Ecclésiaste", "SNG": "Cantique des cantiques", "ISA": "Ésaïe",
+    "JER": "Jérémie", "LAM": "Lamentations", "EZK": "Ézéchiel", "DAN": "Daniel", "HOS": "Osée",
+    "JOL": "Joël", "AMO": "Amos", "OBA": "Abdias", "JON": "Jonas", "MIC": "Michée", "NAM": "Nahum",
+    "HAB": "Habakuk", "ZEP": "Sophonie", "HAG": "Aggée", "ZEC": "Zacharie", "MAL": "Malachie",
+    "MAT": "Matthieu", "MRK": "Marc", "LUK": "Luc", "JHN": "Jean", "ACT": "Actes",
+    "ROM": "Romains", "1CO": "1 Corinthiens", "2CO": "2 Corinthiens", "GAL": "Galates",
+    "EPH": "Éphésiens", "PHP": "Philippiens", "COL": "Colossiens", "1TH": "1 Thessaloniciens",
+    "2TH": "2 Thessaloniciens", "1TI": "1 Timothée", "2TI": "2 Timothée", "TIT": "Tite",
+    "PHM": "Philémon", "HEB": "Hébreux", "JAS": "Jacques", "1PE": "1 Pierre", "2PE": "2 Pierre",
+    "1JN": "1 Jean", "2JN": "2 Jean", "3JN": "3 Jean", "JUD": "Jude", "REV": "Apocalypse",
+}
+
+# Abréviations françaises usuelles (forme normalisée) et variantes d'orthographe
+BOOK_ABBREVIATIONS_FR: Dict[str, str] = {
+    "gn": "GEN", "ex": "EXO", "lv": "LEV", "nm": "NUM", "jos": "JOS", "jg": "JDG", "rt": "RUT",
+    "1 s": "1SA", "2 s": "2SA", "1 r": "1KI", "2 r": "2KI", "1 ch": "1CH", "2 ch": "2CH",
+    "esd": "EZR", "ne": "NEH", "est": "EST", "jb": "JOB", "pr": "PRO", "qo": "ECC", "qohelet": "ECC",
+    "ec": "ECC", "ct": "SNG", "es": "ISA", "is": "ISA", "isaie": "ISA", "jr": "JER", "lm": "LAM",
+    "ez": "EZK", "dn": "DAN", "os": "HOS", "jl": "JOL", "am": "AMO", "ab": "OBA", "abdias": "OBA",
+    "jon": "JON", "mi": "MIC", "na": "NAM", "ha": "HAB", "habacuc": "HAB", "so": "ZEP", "ag": "HAG",
+    "za": "ZEC", "ml": "MAL",
+    "mt": "MAT", "mc": "MRK", "lc": "LUK", "jn": "JHN", "ac": "ACT", "actes des apotres": "ACT",
+    "rm": "ROM", "rom": "ROM", "1 co": "1CO", "2 co": "2CO", "ga": "GAL", "gal": "GAL", "ep": "EPH",
+    "eph": "EPH", "ph": "PHP", "phil": "PHP", "col": "COL", "1 th": "1TH", "2 th": "2TH",
+    "1 tm": "1TI", "2 tm": "2TI", "tt": "TIT", "phm": "PHM", "he": "HEB", "heb": "HEB", "jc": "JAS",
+    "1 p": "1PE", "2 p": "2PE", "1 jn": "1JN", "2 jn": "2JN", "3 jn": "3JN", "jd": "JUD", "ap": "REV",
+}
+
+# Ordinal en tête du livre : "1er", "1re", "1ère", "I", "premier", "deuxième", "IIe"...
+_ORDINAL_RE = re.compile(
+    r"^(?:([1-3])(?:ere|eme|nde|er|re|nd|e)?\s*|(iii|ii|i)(?:eme|e)?\s+|"
+    r"(premier|premiere|1ere)\s+|(deuxieme|second|seconde)\s+|(troisieme)\s+)(?=[a-z])"
+)
+# Mots de liaison : "Évangile selon Jean", "Épître aux Romains", "1re épître de Pierre"
+_FILLER_RE = re.compile(r"\b(?:evangile|epitre|livre)\b(?:\s+(?:selon|de la|des|de|du|aux|a|d|l))?\s*")
+_DIGIT_WORD_RE = re.compile(r"^(\d)(?=[a-z])")
+
+
+def _book_aliases() -> Dict[str, str]:
+    """Table de résolution : noms complets, abréviations, codes OSIS ("1co" -> "1 co")"""
+    aliases = dict(BOOKS_FR_OSIS)
+    aliases.update(BOOK_ABBREVIATIONS_FR)
+    for osis, name in BOOK_NAMES_FR.items():
+        aliases.setdefault(_norm(name), osis)
+        aliases.setdefault(_DIGIT_WORD_RE.sub(r"\1 ", osis.lower()), osis)
+    return aliases
+
+
+_BOOK_ALIASES = _book_aliases()
+# Noms complets triés pour la résolution par préfixe non ambigu ("deutero", "philip")
+_FULL_NAMES = sorted({_norm(name): osis for osis, name in BOOK_NAMES_FR.items()}.items())
+
+
+def _normalize_book(book_raw: str) -> str:
+    key = _norm(book_raw)
+    m = _ORDINAL_RE.match(key)
+    if m:
+        number = m.group(1) or {"i": "1", "ii": "2", "iii": "3"}.get(m.group(2) or "") or \
+            ("1" if m.group(3) else "2" if m.group(4) else "3")
+        key = f"{number} {key[m.end():]}"
+    key = _FILLER_RE.sub("", key).strip()
+    return _DIGIT_WORD_RE.sub(r"\1 ", key)  # "1jean" -> "1 jean"
+
+
+@lru_cache(maxsize=1024)
+def resolve_osis(book_raw: str) -> Optional[str]:
+    """Nom de livre (complet, abrégé, ordinal, code OSIS) -> code OSIS ; None si inconnu"""
+    key = _normalize_book(book_raw)
+    osis = _BOOK_ALIASES.get(key)
+    if osis or len(key.replace(" ", "")) < 3:
+        return osis
+    # Préfixe d'un seul nom complet
+    matches = {code for name, code in _FULL_NAMES if name.startswith(key)}
+    return matches.pop() if len(matches) == 1 else None
+
+
+# Livre (peut commencer par un chiffre ou un ordinal), référence numérique, version éventuelle en fin
+_PASSAGE_RE = re.compile(
+    r"^\s*(?P<book>[1-3]?[^\d]*?[^\d\s,.:;])\s*"
+    r"(?P<ref>\d[\d\s:;,.\-–—]*?)"
+    r"(?:\s+(?P<version>[^\d\s:;,.\-–—].*?))?\s*$"
+)
+_DASHES_RE = re.compile(r"\s*[\-–—]\s*")
+_SPACES_RE = re.compile(r"\s+")
+_ITEM_RE = re.compile(r"^(\d+)(?::(\d+))?(?:-(\d+)(?::(\d+))?)?$")
+_ITEM_SPLIT_RE = re.compile(r"([,;])")
+
+
+@dataclass(frozen=True)
+class PassageRef:
+    osis: str
+    chapter: int
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+    @property
+    def is_chapter(self) -> bool:
+        return self.start is None
+
+    @property
+    def key(self) -> str:
+        """'GEN.1', 'JHN.3.16', 'MAT.5.1-10'"""
+        if self.start is None:
+            return f"{self.osis}.{self.chapter}"
+        if self.end is None or self.end == self.start:
+            return f"{self.osis}.{self.chapter}.{self.start}"
+        return f"{self.osis}.{self.chapter}.{self.start}-{self.end}"
+
+    def __str__(self) -> str:
+        return self.key
+
+
+@dataclass(frozen=True)
+class PassageSpan:
+    """Chapitres entiers (start None) ou versets, éventuellement sur plusieurs chapitres"""
+    chapter: int
+    start: Optional[int] = None
+    end_chapter: Optional[int] = None
+    end: Optional[int] = None
+
+    @property
+    def last_chapter(self) -> int:
+        return self.end_chapter or self.chapter
+
+    @property
+    def key(self) -> str:
+        """'3', '1-3', '3.16', '3.16-18', '3.16-4.2'"""
+        if self.start is None:
+            return str(self.chapter) if self.last_chapter == self.chapter else f"{self.chapter}-{self.last_chapter}"
+        end = self.end if self.end is not None else self.start
+        if self.last_chapter != self.chapter:
+            return f"{self.chapter}.{self.start}-{self.last_chapter}.{end}"
+        return f"{self.chapter}.{self.start}" if end == self.start else f"{self.chapter}.{self.start}-{end}"
+
+
+@dataclass(frozen=True)
+class Passage:
+    """Référence complète : livre, une ou plusieurs plages, version éventuelle"""
+    osis: str
+    spans: Tuple[PassageSpan, ...]
+    version: Optional[str] = None
+
+    @property
+    def book(self) -> str:
+        """Nom d'affichage français ("Jean", "1 Rois")"""
+        return BOOK_NAMES_FR[self.osis]
+
+    @property
+    def chapter(self) -> int:
+        return self.spans[0].chapter
+
+    @property
+    def key(self) -> str:
+        """Clé canonique : 'JHN.3', 'JHN.3.16,3.18', 'GEN.1-3' (identique à PassageRef.key pour une plage simple)"""
+        return f"{self.osis}." + ",".join(span.key for span in self.spans)
+
+    @property
+    def ref(self) -> PassageRef:
+        """Première plage réduite à son premier chapitre (API mono-chapitre des serveurs)"""
+        span = self.spans[0]
+        if span.start is None:
+            return PassageRef(self.osis, span.chapter)
+        end = span.end if span.end is not None else span.start
+        if span.last_chapter != span.chapter:
+            end = verse_count(self.osis, span.chapter) or end
+        return PassageRef(self.osis, span.chapter, span.start, end)
+
+    def verses(self) -> List[Tuple[int, int]]:
+        """[(chapitre, verset), ...] dans l'ordre, bornés par la table de versification"""
+        result: List[Tuple[int, int]] = []
+        for span in self.spans:
+            for chapter in range(span.chapter, span.last_chapter + 1):
+                total = verse_count(self.osis, chapter) or 0
+                first = span.start if span.start is not None and chapter == span.chapter else 1
+                last = span.end if span.end is not None and chapter == span.last_chapter else total
+                result.extend((chapter, v) for v in range(first, min(last, total) + 1))
+        return result
+
+
+def _span(osis: str, a: int, b: Optional[int], c: Optional[int], d: Optional[int]) -> Optional[PassageSpan]:
+    """
+    Groupes de _ITEM_RE (chapitre, verset, fin, verset de fin) -> PassageSpan normalisée ;
+    None si un chapitre n'existe pas dans la table de versification, si un verset vaut 0
+    ou si le premier verset dépasse le chapitre ; le verset de fin est borné au chapitre
+    (comme dans validate_range)
+    """
+    chapters = chapter_count(osis)
+    if not 1 <= a <= chapters:
+        return None
+    if b is None:
+        if d is not None:
+            b = 1  # "3-4:2"
+        else:
+            if c is not None and not a <= c <= chapters:
+                return None
+            return PassageSpan(a, None, c if c and c != a else None, None)  # "3", "1-3"
+    if c is None:
+        c, d = a, b  # "3:16"
+    elif d is None:
+        c, d = a, c  # "3:16-18"
+    if c == a and d < b:
+        b, d = d, b
+    if b < 1 or d < 1 or not a <= c <= chapters or b > verse_count(osis, a):
+        return None
+    d = min(d, verse_count(osis, c))  # "3:30-99" -> "3:30-36" : même clé que la plage effective
+    if c == a and b == 1 and d == verse_count(osis, a):
+        return PassageSpan(a)  # Plage couvrant tout le chapitre : même clé que le chapitre
+    return PassageSpan(a, b, c if c != a else None, d)
+
+
+def _parse_spans(osis: str, ref: str) -> Optional[Tuple[PassageSpan, ...]]:
+    ref = _SPACES_RE.sub("", _DASHES_RE.sub("-", ref))
+    if ":" not in ref:
+        if "." in ref:
+            ref = ref.replace(".", ":")  # "Jean 3.16"
+        elif "," in ref:
+            # Notation française "Jean 3,16" : première virgule de chaque groupe = chapitre:verset
+            ref = ";".join(part.replace(",", ":", 1) for part in ref.split(";"))
+    if chapter_count(osis) == 1 and ":" not in ref and ref != "1":
+        ref = "1:" + ref  # Livre d'un seul chapitre : "Jude 3" = Jude 1:3
+    spans: List[PassageSpan] = []
+    separator = ";"
+    for token in _ITEM_SPLIT_RE.split(ref):
+        if token in (",", ";"):
+            separator = token
+            continue
+        m = _ITEM_RE.match(token)
+        if not m:
+            return None
+        a, b, c, d = (int(g) if g else None for g in m.groups())
+        if b is None and separator == "," and spans and spans[-1].start is not None:
+            # "3:16,18" / "3:16,18-20" : après une virgule, des versets du chapitre courant
+            a, b, c, d = spans[-1].last_chapter, a, (c and spans[-1].last_chapter), c
+        span = _span(osis, a, b, c, d)
+        if span is None:
+            return None
+        spans.append(span)
+    return tuple(spans) or None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_reference(passage: str) -> Optional[Passage]:
+    """
+    'Jean 3:16', '1er Jean 4:7-12', 'Jn 3,16', 'Gn 1-3', 'Jean 3:16,18', 'Jean 3:16-4:2', 'Ps 23 LSG'
+    -> Passage ; None si le livre est inconnu, la référence illisible ou hors de la table de
+    versification ("Jean 3:0", "Genèse 51"). Résultat mémorisé (LRU).
+    """
+    m = _PASSAGE_RE.match(passage or "")
+    if not m or not m.group("ref"):
+        return None
+    osis = resolve_osis(m.group("book"))
+    if not osis:
+        return None
+    spans = _parse_spans(osis, m.group("ref"))
+    if not spans:
+        return None
+    version = (m.group("version") or "").strip() or None
+    return Passage(osis, spans, version)
+
+
+def parse_passage_ref(passage: str) -> Optional[PassageRef]:
+    """'Genèse 1:1-5 LSG' -> PassageRef('GEN', 1, 1, 5) ; None si le livre est inconnu"""
+    parsed = parse_reference(passage)
+    return parsed.ref if parsed else None
+
+
+def canonical_passage(passage: str) -> str:
+    """Clé canonique du passage ; à défaut, le texte normalisé"""
+    parsed = parse_reference(passage)
+    return parsed.key if parsed else _norm(passage or "")
+
+
+def bucket_tokens(tokens: Optional[int], step: int = TOKEN_BUCKET) -> int:
+    """Arrondir la cible de tokens au palier le plus proche (480, 500, 520 -> 500)"""
+    if not tokens or tokens <= 0:
+        return 0
+    step = max(1, step)
+    return max(step, int(round(tokens / step)) * step)
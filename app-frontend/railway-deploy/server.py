@@ -5,17 +5,26 @@
 # - Génération automatique d'explications théologiques via LLM
 # - Renvoie toujours {"content": "..."} pour coller au front.
 
+import asyncio
 import os
 import re
-import unicodedata
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
-import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
+import bible_http
+import bible_store
+import concordance
+import passage_engine
+import rubric_templates
+import versification
+from explanation_rules import get_rule_set
+from passage_ref import parse_reference, resolve_osis
+
 # Import our new intelligent generators
 try:
     from theological_database import theological_db
@@ -40,7 +49,7 @@ load_dotenv()
 # Configuration Railway
 PORT = int(os.getenv("PORT", 8000))
 
-API_BASE = "https://api.scripture.api.bible/v1"
+API_BASE = bible_http.API_BASE
 APP_NAME = "Bible Study API - Darby"
 BIBLE_API_KEY = os.getenv("BIBLE_API_KEY", "0cff5d83f6852c3044a180cc4cdeb0fe")
 PREFERRED_BIBLE_ID = os.getenv("BIBLE_ID", "a93a92589195411f-01")  # Bible J.N. Darby (French)
@@ -55,7 +64,16 @@ _default_origins = [
 _extra = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o.strip()]
 ALLOW_ORIGINS = _default_origins + _extra
 
-app = FastAPI(title="FastAPI", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pool HTTP partagé (keep-alive / HTTP/2) : ouvert au démarrage, fermé à l'arrêt
+    async with bible_http.client_lifespan():
+        # Index de concordance construit une seule fois, en tâche de fond (ne retarde pas le démarrage)
+        concordance_build = asyncio.create_task(asyncio.to_thread(concordance.build_default_index))
+        yield
+        concordance_build.cancel()
+
+app = FastAPI(title="FastAPI", version="0.1.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOW_ORIGINS if _extra else ["*"],  # large en phase de test
@@ -239,60 +257,6 @@ class VerseByVerseRequest(BaseModel):
     version: str = Field("", description="Ignoré (api.bible).")
 
 
-# =========================
-#  OUTILS livres → OSIS
-# =========================
-def _norm(s: str) -> str:
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = re.sub(r"[^a-zA-Z0-9 ]+", " ", s).lower()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-BOOKS_FR_OSIS: Dict[str, str] = {
-    # Pentateuque
-    "genese": "GEN", "gen": "GEN",
-    "exode": "EXO", "exo": "EXO",
-    "levitique": "LEV", "lev": "LEV",
-    "nombres": "NUM", "nom": "NUM", "nbr": "NUM", "nb": "NUM",
-    "deuteronome": "DEU", "deut": "DEU", "dt": "DEU",
-    # Historiques
-    "josue": "JOS", "juges": "JDG", "ruth": "RUT",
-    "1 samuel": "1SA", "2 samuel": "2SA",
-    "1 rois": "1KI", "2 rois": "2KI",
-    "1 chroniques": "1CH", "2 chroniques": "2CH",
-    "esdras": "EZR", "nehemie": "NEH", "esther": "EST",
-    # Poétiques
-    "job": "JOB", "psaumes": "PSA", "psaume": "PSA", "ps": "PSA",
-    "proverbes": "PRO", "prov": "PRO",
-    "ecclesiaste": "ECC", "cantique des cantiques": "SNG", "cantique": "SNG",
-    # Prophètes majeurs
-    "esaie": "ISA", "jeremie": "JER", "lamentations": "LAM",
-    "ezechiel": "EZK", "daniel": "DAN",
-    # Prophètes mineurs
-    "osee": "HOS", "joel": "JOL", "amos": "AMO", "abdi": "OBA",
-    "jonas": "JON", "michee": "MIC", "nahum": "NAM", "habakuk": "HAB",
-    "sophonie": "ZEP", "aggée": "HAG", "aggee": "HAG", "zacharie": "ZEC", "malachie": "MAL",
-    # Évangiles & Actes
-    "matthieu": "MAT", "marc": "MRK", "luc": "LUK", "jean": "JHN",
-    "actes": "ACT",
-    # Épîtres
-    "romains": "ROM", "1 corinthiens": "1CO", "2 corinthiens": "2CO",
-    "galates": "GAL", "ephesiens": "EPH", "philippiens": "PHP",
-    "colossiens": "COL", "1 thessaloniciens": "1TH", "2 thessaloniciens": "2TH",
-    "1 timothee": "1TI", "2 timothee": "2TI", "tite": "TIT", "philemon": "PHM",
-    "hebreux": "HEB", "jacques": "JAS", "1 pierre": "1PE", "2 pierre": "2PE",
-    "1 jean": "1JN", "2 jean": "2JN", "3 jean": "3JN", "jude": "JUD",
-    # Apocalypse
-    "apocalypse": "REV", "apoc": "REV",
-}
-
-def resolve_osis(book_raw: str) -> Optional[str]:
-    key = _norm(book_raw)
-    key = key.replace("er ", "1 ").replace("ere ", "1 ").replace("eme ", " ")
-    return BOOKS_FR_OSIS.get(key)
-
-
 # =========================
 #   API.BIBLE CLIENT
 # =========================
@@ -314,65 +278,73 @@ async def get_bible_id() -> str:
         _cached_bible_name = "Darby (config)"
         return _cached_bible_id
 
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        r = await client.get(f"{API_BASE}/bibles", headers=headers())
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"api.bible bibles: {r.text}")
-        data = r.json()
-        lst = data.get("data", [])
-        # cherche Darby FR
+    r = await bible_http.get(f"{API_BASE}/bibles", headers=headers(), timeout=20.0)
+    if r.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"api.bible bibles: {r.text}")
+    data = r.json()
+    lst = data.get("data", [])
+    # cherche Darby FR
+    for b in lst:
+        name = (b.get("name") or "") + " " + (b.get("abbreviationLocal") or "")
+        lang = (b.get("language") or {}).get("name", "")
+        if "darby" in name.lower() and ("fr" in lang.lower() or "fra" in lang.lower()):
+            _cached_bible_id = b.get("id")
+            _cached_bible_name = b.get("name")
+            break
+    if not _cached_bible_id:
         for b in lst:
-            name = (b.get("name") or "") + " " + (b.get("abbreviationLocal") or "")
             lang = (b.get("language") or {}).get("name", "")
-            if "darby" in name.lower() and ("fr" in lang.lower() or "fra" in lang.lower()):
+            if "fr" in lang.lower() or "fra" in lang.lower():
                 _cached_bible_id = b.get("id")
                 _cached_bible_name = b.get("name")
                 break
-        if not _cached_bible_id:
-            for b in lst:
-                lang = (b.get("language") or {}).get("name", "")
-                if "fr" in lang.lower() or "fra" in lang.lower():
-                    _cached_bible_id = b.get("id")
-                    _cached_bible_name = b.get("name")
-                    break
-        if not _cached_bible_id:
-            raise HTTPException(status_code=500, detail="Aucune Bible FR trouvée via api.bible.")
+    if not _cached_bible_id:
+        raise HTTPException(status_code=500, detail="Aucune Bible FR trouvée via api.bible.")
     return _cached_bible_id
 
 
 async def list_verses_ids(bible_id: str, osis_book: str, chapter: int) -> List[str]:
+    # Table de versification : aucun appel réseau
+    ids = versification.verse_ids(osis_book, chapter)
+    if ids:
+        return ids
     chap_id = f"{osis_book}.{chapter}"
     url = f"{API_BASE}/bibles/{bible_id}/chapters/{chap_id}/verses"
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.get(url, headers=headers())
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"api.bible verses list: {r.text}")
-        data = r.json()
-        return [v["id"] for v in data.get("data", [])]
+    r = await bible_http.get(url, headers=headers())
+    if r.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"api.bible verses list: {r.text}")
+    data = r.json()
+    return [v["id"] for v in data.get("data", [])]
 
 
 async def fetch_verse_text(bible_id: str, verse_id: str) -> str:
+    # Bible locale (mmap) d'abord : aucun appel réseau si le verset est installé
+    local = bible_store.lookup_verse_id(bible_id, verse_id)
+    if local:
+        return local
     url = f"{API_BASE}/bibles/{bible_id}/verses/{verse_id}"
     params = {"content-type": "text"}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.get(url, headers=headers(), params=params)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"api.bible verse: {r.text}")
-        data = r.json()
-        content = (data.get("data") or {}).get("content") or ""
-        content = re.sub(r"\s+", " ", content).strip()
-        return content
+    r = await bible_http.get(url, headers=headers(), params=params)
+    if r.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"api.bible verse: {r.text}")
+    data = r.json()
+    content = (data.get("data") or {}).get("content") or ""
+    content = re.sub(r"\s+", " ", content).strip()
+    return content
 
 
 async def fetch_passage_text(bible_id: str, osis_book: str, chapter: int, verse: Optional[int] = None) -> str:
     if verse:
         verse_id = f"{osis_book}.{chapter}.{verse}"
         return await fetch_verse_text(bible_id, verse_id)
-    ids = await list_verses_ids(bible_id, osis_book, chapter)
-    parts: List[str] = []
-    for idx, vid in enumerate(ids, start=1):
-        txt = await fetch_verse_text(bible_id, vid)
-        parts.append(f"{idx}. {txt}")
+    # Chapitre entier en un appel groupé, repli verset par verset en parallèle
+    verses = await passage_engine.fetch_passage_verses(
+        bible_id, osis_book, chapter,
+        headers=headers(),
+        fetch_one=lambda vid: fetch_verse_text(bible_id, vid),
+        list_ids=lambda: list_verses_ids(bible_id, osis_book, chapter),
+    )
+    parts: List[str] = [f"{vnum}. {txt}" for vnum, txt in verses.items()]
     return "\n".join(parts).strip()
 
 
@@ -412,22 +384,27 @@ RUBRIQUES_28 = [
 
 def parse_passage_input(p: str):
     """
-    'Genèse 1'    -> ('Genèse', 1, None)
-    'Genèse 1:3'  -> ('Genèse', 1, 3)
-    'Genèse 1 LSG' / 'Genèse 1:3 LSG' -> idem (version ignorée)
+    'Genèse 1'    -> ('Genèse', 'GEN', 1, None)
+    'Genèse 1:3'  -> ('Genèse', 'GEN', 1, 3)
+    'Genèse 1 LSG' / 'Gn 1,3 LSG' -> idem (version ignorée)
     """
-    p = p.strip()
-    # tolère un éventuel "version" en fin (un mot ou deux)
-    m = re.match(r"^(.*?)[\s,]+(\d+)(?::(\d+))?(?:\s+\S+.*)?$", p)
-    if not m:
+    parsed = parse_reference(p or "")
+    if not parsed:
+        m = re.match(r"^(.*?)[\s,]+\d", (p or "").strip())
+        osis = resolve_osis(m.group(1)) if m else None
+        if m and not osis:
+            raise HTTPException(status_code=400, detail=f"Livre non reconnu: '{m.group(1).strip()}'.")
+        if osis:
+            # Livre reconnu mais chapitre ou verset hors de la table de versification ("Jean 22", "Jean 3:0")
+            raise HTTPException(status_code=400, detail=f"Passage inexistant: '{(p or '').strip()}' hors de la "
+                                f"versification de {osis} ({versification.chapter_count(osis)} chapitre(s))")
         raise HTTPException(status_code=400, detail="Format passage invalide. Ex: 'Genèse 1' ou 'Genèse 1:1'.")
-    book = m.group(1).strip()
-    chapter = int(m.group(2))
-    verse = int(m.group(3)) if m.group(3) else None
-    osis = resolve_osis(book)
-    if not osis:
-        raise HTTPException(status_code=400, detail=f"Livre non reconnu: '{book}'.")
-    return book, osis, chapter, verse
+    ref = parsed.ref
+    try:
+        versification.validate_range(parsed.osis, ref.chapter, ref.start, ref.start)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Passage inexistant: {e}")
+    return parsed.book, parsed.osis, ref.chapter, ref.start
 
 
 # =========================
@@ -487,73 +464,8 @@ def _generate_fallback_explanation(verse_text: str, book_name: str, chapter: int
     """
     Génère une explication théologique basée sur l'analyse intelligente du contenu du verset (mode fallback)
     """
-    verse_lower = verse_text.lower()
-    explanation_parts = []
-    
-    # === ANALYSE CONTEXTUELLE PAR LIVRE ET CONTENU SPÉCIFIQUE ===
-    
-    # Genèse - Contexte de création et origines avec plus de spécificité
-    if book_name == "Genèse":
-        if chapter == 1:
-            if verse_num == 1:
-                explanation_parts.append("Ce verset fondamental proclame l'existence éternelle de Dieu et établit le principe de création ex nihilo, révélant Dieu comme la source unique de toute réalité.")
-            elif verse_num in [2,3]:
-                explanation_parts.append("Cette description révèle le processus créateur divin par la parole, démontrant la puissance absolue de Dieu qui transforme le chaos en ordre par son commandement.")
-            elif verse_num == 27:
-                explanation_parts.append("Cette création de l'homme à l'image de Dieu révèle la dignité unique de l'humanité et sa vocation à refléter la gloire divine dans la création.")
-            elif verse_num >= 28:
-                explanation_parts.append("Cette bénédiction divine établit le mandat culturel de l'humanité, révélant sa responsabilité de gérance sur la création sous l'autorité divine.")
-        elif chapter == 2:
-            explanation_parts.append("Ce récit complémentaire révèle la dimension relationnelle de la création et l'intimité originelle entre Dieu et l'humanité dans le jardin d'Éden.")
-        elif chapter == 3:
-            explanation_parts.append("Cette narration de la chute révèle l'origine du mal et l'inauguration du plan de rédemption à travers la promesse messianique.")
-        elif chapter == 6:
-            if "fils de Dieu" in verse_lower or "filles des hommes" in verse_lower:
-                explanation_parts.append("Ce passage controversé révèle la corruption progressive de l'humanité et l'effacement de la distinction entre la lignée pieuse et impie, préparant le jugement du déluge.")
-            elif "mon esprit" in verse_lower or "120 ans" in verse_lower:
-                explanation_parts.append("Cette limitation divine révèle à la fois la patience de Dieu et sa justice, accordant un temps de grâce avant le jugement tout en maintenant ses standards moraux.")
-            elif "géants" in verse_lower or "nephilim" in verse_lower:
-                explanation_parts.append("Cette mention des géants illustre l'ampleur de la corruption qui caractérise l'humanité prédiluvienne, justifiant l'intervention divine radicale du déluge.")
-            elif "méchanceté" in verse_lower or "mal" in verse_lower:
-                explanation_parts.append("Cette évaluation divine révèle l'état de corruption totale du cœur humain, démontrant la nécessité de l'intervention divine pour la rédemption.")
-            elif "repentit" in verse_lower or "affligea" in verse_lower:
-                explanation_parts.append("Cette expression anthropomorphique révèle la douleur divine face au péché, illustrant l'amour de Dieu pour sa création tout en maintenant sa justice.")
-            elif "noé" in verse_lower and "grâce" in verse_lower:
-                explanation_parts.append("Cette découverte de grâce révèle le principe de l'élection divine et de la préservation d'un reste fidèle, préfigurant le salut par grâce.")
-            elif "juste" in verse_lower or "parfait" in verse_lower or "marchait avec dieu" in verse_lower:
-                explanation_parts.append("Cette caractérisation de Noé révèle les qualités requises pour trouver grâce devant Dieu : la justice, l'intégrité et la communion spirituelle.")
-            elif "corruption" in verse_lower or "violence" in verse_lower:
-                explanation_parts.append("Cette description de l'état moral du monde révèle les conséquences de l'éloignement de Dieu : la corruption spirituelle et la violence sociale.")
-            elif "fin de toute chair" in verse_lower or "détruire" in verse_lower:
-                explanation_parts.append("Cette annonce du jugement révèle la justice inexorable de Dieu face au péché, tout en préparant la voie pour un nouveau commencement à travers Noé.")
-            elif "arche" in verse_lower or "bois de gopher" in verse_lower:
-                explanation_parts.append("Ces instructions détaillées révèlent la provision divine de salut au cœur même du jugement, préfigurant l'œuvre rédemptrice du Christ.")
-            else:
-                explanation_parts.append(f"Ce verset du chapitre 6 de la Genèse révèle un aspect important de la condition humaine avant le déluge et de la réponse divine à la corruption.")
-        else:
-            explanation_parts.append(f"Ce passage de Genèse {chapter} révèle les développements du plan divin dans l'histoire des origines.")
-    
-    # Continuer avec les autres livres mais de manière plus spécifique...
-    elif book_name == "Jean":
-        if chapter == 3:
-            if verse_num == 16:
-                explanation_parts.append("Ce verset central de l'Évangile révèle la motivation divine du salut : l'amour, et sa manifestation suprême : le don du Fils unique pour la vie éternelle.")
-            elif verse_num == 3:
-                explanation_parts.append("Cette exigence de nouvelle naissance révèle la nécessité de la régénération spirituelle pour entrer dans le royaume de Dieu.")
-            else:
-                explanation_parts.append(f"Ce verset du dialogue avec Nicodème révèle les conditions et la nature de la vie spirituelle authentique.")
-        else:
-            explanation_parts.append(f"Ce passage de Jean {chapter} révèle la divinité du Christ et les implications pour la foi.")
-    
-    # Si aucune analyse spécifique n'est trouvée, utiliser le contexte général du livre
-    if not explanation_parts:
-        book_contexts = {
-            "Genèse": f"Ce verset du chapitre {chapter} révèle un aspect des origines et du plan divin pour l'humanité.",
-            "Exode": f"Ce passage du chapitre {chapter} illustre l'œuvre libératrice de Dieu et ses implications spirituelles.",
-            "Jean": f"Ce verset du chapitre {chapter} révèle la personne et l'œuvre du Christ pour le salut.",
-            "Romains": f"Cette doctrine du chapitre {chapter} expose les fondements du salut par la foi en Christ."
-        }
-        explanation_parts.append(book_contexts.get(book_name, f"Ce verset révèle un aspect important de la révélation divine dans {book_name} {chapter}."))
+    # Analyses par livre, chapitre, verset et mots-clés : data/rules/fallback_explanation.json
+    explanation_parts = get_rule_set("fallback_explanation").evaluate(verse_text, book_name, chapter, verse_num)
     
     # Joindre les explications
     full_explanation = " ".join(explanation_parts)
@@ -585,73 +497,6 @@ def format_theological_content(content: str) -> str:
     return content
 
 
-def generate_intelligent_rubric_content(rubric_num: int, book_name: str, chapter: int, text: str, historical_context: str = "", cross_refs = None) -> str:
-    """
-    Génère un contenu intelligent pour une rubrique spécifique basé sur le contexte théologique
-    """
-    if cross_refs is None:
-        cross_refs = []
-    
-    rubric_name = RUBRIQUES_28[rubric_num - 1] if rubric_num <= len(RUBRIQUES_28) else f"Rubrique {rubric_num}"
-    
-    # Contenu de base contextualisé par rubrique
-    base_content = {
-        1: f"Seigneur, ouvre nos cœurs à la compréhension de {book_name} {chapter}. Que ton Esprit nous guide dans cette étude.",
-        2: f"Le chapitre {chapter} de {book_name} présente une structure littéraire révélant la progression divine du récit.",
-        3: f"Les questions soulevées dans le chapitre précédent trouvent leur développement dans {book_name} {chapter}.",
-        4: f"Le thème doctrinal central de {book_name} {chapter} révèle des vérités fondamentales sur la nature de Dieu.",
-        5: f"Les fondements théologiques de ce passage s'enracinent dans la révélation progressive de Dieu.",
-        6: f"Le contexte historique de {book_name} {chapter} éclaire la situation du peuple de Dieu à cette époque.",
-        7: f"Les éléments culturels de ce passage révèlent les coutumes et pratiques de l'époque biblique.",
-        8: f"La géographie de {book_name} {chapter} situe les événements dans leur cadre territorial significatif.",
-        9: f"L'analyse lexicale révèle la richesse des termes hébreux/grecs utilisés dans ce passage.",
-        10: f"Les parallèles bibliques enrichissent notre compréhension de {book_name} {chapter}.",
-        11: f"Les éléments prophétiques de ce passage trouvent leur accomplissement dans l'histoire du salut.",
-        12: f"Les personnages de {book_name} {chapter} illustrent différents aspects de la foi et de l'obéissance.",
-        13: f"La structure rhétorique révèle l'art littéraire inspiré de l'auteur biblique.",
-        14: f"La théologie trinitaire transparaît dans l'œuvre du Père, du Fils et du Saint-Esprit.",
-        15: f"Christ se révèle au centre de {book_name} {chapter} comme accomplissement des promesses divines.",
-        16: f"L'évangile et la grâce de Dieu brillent à travers les vérités de ce passage.",
-        17: f"Application personnelle: Comment {book_name} {chapter} transforme-t-il notre marche avec Dieu?",
-        18: f"Application communautaire: Quelles implications pour l'Église dans {book_name} {chapter}?",
-        19: f"Seigneur, que les vérités de {book_name} {chapter} transforment nos cœurs et nos vies.",
-        20: f"Questions d'étude pour approfondir la compréhension de {book_name} {chapter}.",
-        21: f"Points de vigilance: Quelles erreurs d'interprétation éviter dans ce passage?",
-        22: f"Objections courantes et réponses bibliques concernant {book_name} {chapter}.",
-        23: f"Perspective missionnelle: Comment ce passage inspire-t-il l'évangélisation?",
-        24: f"Éthique chrétienne: Quels principes moraux ressortent de {book_name} {chapter}?",
-        25: f"Louange et liturgie inspirées par les vérités de {book_name} {chapter}.",
-        26: f"Méditation guidée sur les richesses spirituelles de ce passage.",
-        27: f"Versets clés à mémoriser dans {book_name} {chapter}.",
-        28: f"Plan d'action concret basé sur les enseignements de {book_name} {chapter}."
-    }
-    
-    content = base_content.get(rubric_num, f"Contenu intelligent pour la rubrique {rubric_num} de {book_name} {chapter}")
-    
-    # Ajouter le contexte historique si disponible
-    if historical_context:
-        content += f"\n\nContexte historique: {historical_context}"
-    
-    # Ajouter les références croisées si disponibles
-    if cross_refs:
-        # Convertir les objets CrossReference en chaînes de caractères
-        ref_strings = []
-        for ref in cross_refs[:3]:  # Limiter à 3 références
-            if hasattr(ref, 'book') and hasattr(ref, 'chapter'):
-                if hasattr(ref, 'verse') and ref.verse:
-                    ref_strings.append(f"{ref.book} {ref.chapter}:{ref.verse}")
-                else:
-                    ref_strings.append(f"{ref.book} {ref.chapter}")
-            else:
-                # Si c'est déjà une chaîne de caractères
-                ref_strings.append(str(ref))
-        
-        if ref_strings:
-            content += f"\n\nRéférences croisées: {', '.join(ref_strings)}"
-    
-    return f"## {rubric_num}. {rubric_name}\n\n{content}"
-
-
 # =========================
 #        ROUTES
 # =========================
@@ -661,16 +506,36 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
+    store = bible_store.get_store()
+    index = concordance.get_index()
     return {
         "status": "ok", 
         "bibleId": PREFERRED_BIBLE_ID,
         "gemini_enabled": GEMINI_AVAILABLE,
-        "intelligent_mode": INTELLIGENT_MODE
+        "intelligent_mode": INTELLIGENT_MODE,
+        "bible_http": bible_http.client_stats(),
+        "bible_store": store.stats() if store else None,
+        "concordance": index.stats() if index else None,
+        "rubric_templates": rubric_templates.all_stats()
     }
 
 # =========================
 #   ROUTES PROXY pour contourner CORS
 # =========================
+@app.get("/api/concordance")
+async def search_concordance(
+    q: str = Query(..., min_length=1, description="Mots, \"expression exacte\" ou préfixe*"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=concordance.MAX_PAGE_SIZE),
+    prefix: bool = Query(False, description="Traiter le dernier mot comme un préfixe (recherche à la frappe)"),
+):
+    index = concordance.get_index()
+    if index is None:
+        if bible_store.get_store() is None:
+            raise HTTPException(status_code=503, detail="Concordance indisponible : aucune Bible locale (bible_store).")
+        raise HTTPException(status_code=503, detail="Index de concordance en cours de construction, réessayez.")
+    return index.search(q, page=page, page_size=page_size, prefix=prefix)
+
 @app.get("/api/test")
 async def test_connection():
     """Route de test simple pour vérifier la connexion"""
@@ -680,16 +545,16 @@ async def test_connection():
 async def proxy_verse_by_verse(req: VerseByVerseRequest):
     """Proxy vers l'API externe etude8-bible-api-production.up.railway.app"""
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
-                headers={"Content-Type": "application/json"},
-                json={"passage": req.passage, "version": req.version}
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
+        response = await bible_http.post(
+            "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
+            headers={"Content-Type": "application/json"},
+            json={"passage": req.passage, "version": req.version},
+            timeout=120.0
+        )
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur proxy verse-by-verse: {str(e)}")
 
@@ -771,19 +636,15 @@ async def _generate_verse_by_verse_content(req):
         )
     return {"content": format_theological_content("\n\n".join(blocks).strip())}
 
-def generate_intelligent_rubric_content(rubric_index: int, book: str, chapter: int, 
-                                       verse_text: str, historical_context: str, cross_refs: list) -> str:
-    """Génère le contenu intelligent pour une rubrique spécifique"""
-    
-    # Utiliser notre générateur intelligent si disponible
-    if INTELLIGENT_MODE:
-        try:
-            from theological_database import theological_db
-            
-            # Générateur intelligent pour quelques rubriques clés
-            if rubric_index == 1:  # Prière d'ouverture
-                if book == "Genèse" and chapter == 1:
-                    return """## 1. Prière d'ouverture
+# Modèles des rubriques, compilés une fois : seul le modèle de la rubrique demandée est rendu
+RUBRIC_TEMPLATES = rubric_templates.TemplateRegistry(
+    "rubriques_railway",
+    partials={
+        "titre": "## {num}. {name}",
+        "passage": "{book} {chapter}",
+    },
+    templates={
+        "priere:Genèse 1": """## 1. Prière d'ouverture
 
 **ADORATION :**
 Père céleste, nous Te reconnaissons comme le Créateur souverain de toutes choses. Comme le déclare Ta Parole : "Au commencement, Dieu créa les cieux et la terre" (Genèse 1:1). Tu es l'Alpha et l'Oméga, Celui qui donne la vie et qui soutient toute création par Ta puissance.
@@ -792,10 +653,8 @@ Père céleste, nous Te reconnaissons comme le Créateur souverain de toutes cho
 Nous confessons notre orgueil qui nous fait parfois oublier que nous sommes Tes créatures, entièrement dépendantes de Ta grâce. Pardonne-nous de ne pas toujours reconnaître Ta souveraineté sur nos vies et sur l'univers entier.
 
 **DEMANDE :**
-Accorde-nous la sagesse spirituelle pour comprendre les mystères de Ta création révélés dans ce premier chapitre. Que Ton Esprit illumine notre intelligence pour saisir la beauté de Ton œuvre créatrice et son message pour nos cœurs aujourd'hui."""
-                
-                elif book == "Jean" and chapter == 1:  
-                    return """## 1. Prière d'ouverture
+Accorde-nous la sagesse spirituelle pour comprendre les mystères de Ta création révélés dans ce premier chapitre. Que Ton Esprit illumine notre intelligence pour saisir la beauté de Ton œuvre créatrice et son message pour nos cœurs aujourd'hui.""",
+        "priere:Jean 1": """## 1. Prière d'ouverture
 
 **ADORATION :**
 Seigneur Jésus, Logos éternel, nous T'adorons comme la Parole qui était au commencement avec Dieu et qui était Dieu (Jean 1:1). Tu es la lumière véritable qui éclaire tout homme en venant dans le monde.
@@ -804,84 +663,89 @@ Seigneur Jésus, Logos éternel, nous T'adorons comme la Parole qui était au co
 Nous confessons que trop souvent nous n'avons pas reçu Ta lumière, préférant nos ténèbres spirituelles à Ta vérité. Pardonne notre résistance à Ta révélation parfaite.
 
 **DEMANDE :**
-Ouvre nos cœurs pour recevoir la révélation suprême de Dieu en Christ. Que nous comprenions la profondeur du mystère de l'Incarnation révélé dans ce prologue majestueux."""
-                
-                else:
-                    return f"""## 1. Prière d'ouverture
+Ouvre nos cœurs pour recevoir la révélation suprême de Dieu en Christ. Que nous comprenions la profondeur du mystère de l'Incarnation révélé dans ce prologue majestueux.""",
+        "priere": """## 1. Prière d'ouverture
 
 **ADORATION :**
-Père éternel, nous Te reconnaissons comme le Dieu qui Se révèle progressivement à travers Sa Parole. Dans {book} {chapter}, Tu continues de déployer Ton plan parfait pour l'humanité.
+Père éternel, nous Te reconnaissons comme le Dieu qui Se révèle progressivement à travers Sa Parole. Dans {>passage}, Tu continues de déployer Ton plan parfait pour l'humanité.
 
 **CONFESSION :**
 Nous nous plaçons humblement dans Ta lumière, confessant nos faiblesses et notre besoin constant de Ta grâce. Purifie nos cœurs pour recevoir Ta vérité.
 
 **DEMANDE :**
-Accorde-nous la sagesse et la compréhension spirituelle pour saisir les enseignements de ce chapitre. Que Ton Esprit nous guide dans toute la vérité."""
-            
-            elif rubric_index == 6:  # Contexte historique
-                historical_ctx = theological_db.get_historical_context(book, chapter)
-                return f"""## 6. Contexte historique
+Accorde-nous la sagesse et la compréhension spirituelle pour saisir les enseignements de ce chapitre. Que Ton Esprit nous guide dans toute la vérité.""",
+        "contexte_historique": """{>titre}
 
-{historical_ctx}
+{historical}
 
 **CHRONOLOGIE BIBLIQUE :**
-Ce passage de {book} {chapter} s'inscrit dans l'histoire de la révélation progressive de Dieu à l'humanité.
+Ce passage de {>passage} s'inscrit dans l'histoire de la révélation progressive de Dieu à l'humanité.
 
 **IMPLICATIONS HISTORIQUES :**
-La compréhension du contexte historique éclaire les enjeux spirituels et pratiques que ce texte adressait aux premiers destinataires."""
-            
-            elif rubric_index == 10:  # Parallèles bibliques
-                cross_refs_db = theological_db.get_cross_references(book, chapter)
-                if cross_refs_db:
-                    refs_text = "\n".join([f"**{ref.book} {ref.chapter}:{ref.verse or ''}** - {ref.context}" 
-                                         for ref in cross_refs_db[:4]])
-                    return f"""## 10. Parallèles bibliques 
+La compréhension du contexte historique éclaire les enjeux spirituels et pratiques que ce texte adressait aux premiers destinataires.""",
+        "paralleles": """{>titre} 
 
 **RÉFÉRENCES CROISÉES PRINCIPALES :**
 
-{refs_text}
+{refs}
 
 **PRINCIPE DE L'ANALOGIE DE LA FOI :**
-L'Écriture s'interprète par l'Écriture. Ces passages parallèles éclairent et confirment les vérités révélées ici."""
-                else:
-                    return f"""## 10. Parallèles bibliques
+L'Écriture s'interprète par l'Écriture. Ces passages parallèles éclairent et confirment les vérités révélées ici.""",
+        "paralleles:aucune": """{>titre}
 
-Ce passage de {book} {chapter} trouve des échos dans toute l'Écriture, révélant l'unité organique de la révélation divine."""
-            
-            else:
-                # Rubrique générique intelligente
-                rubric_names = [
-                    "", "Prière d'ouverture", "Structure littéraire", "Questions du chapitre précédent",
-                    "Thème doctrinal", "Fondements théologiques", "Contexte historique", "Contexte culturel",
-                    "Contexte géographique", "Analyse lexicale", "Parallèles bibliques", "Prophétie et accomplissement",
-                    "Personnages", "Structure rhétorique", "Théologie trinitaire", "Christ au centre",
-                    "Évangile et grâce", "Application personnelle", "Application communautaire", "Prière de réponse",
-                    "Questions d'étude", "Points de vigilance", "Objections et réponses", "Perspective missionnelle",
-                    "Éthique chrétienne", "Louange / liturgie", "Méditation guidée", "Mémoire / versets clés", "Plan d'action"
-                ]
-                
-                rubric_name = rubric_names[rubric_index] if rubric_index < len(rubric_names) else f"Rubrique {rubric_index}"
-                
-                return f"""## {rubric_index}. {rubric_name}
+Ce passage de {>passage} trouve des échos dans toute l'Écriture, révélant l'unité organique de la révélation divine.""",
+        "generique": """{>titre}
 
-**ANALYSE CONTEXTUELLE DE {book.upper()} {chapter} :**
+**ANALYSE CONTEXTUELLE DE {book|upper} {chapter} :**
 Ce passage révèle des vérités spécifiques sur la nature de Dieu et Son œuvre dans l'histoire du salut.
 
 **ENSEIGNEMENT CENTRAL :**
 L'étude de ce texte dans son contexte historique et théologique révèle des principes durables pour la vie chrétienne.
 
 **APPLICATION PRATIQUE :**
-Comment ces vérités transforment-elles notre compréhension de Dieu et notre réponse de foi ?"""
+Comment ces vérités transforment-elles notre compréhension de Dieu et notre réponse de foi ?""",
+        "repli": """## {num}. Rubrique {num}
+
+**Contenu contextualisé pour {>passage}**
+
+Cette rubrique révèle des aspects importants de la vérité divine spécifiques à ce passage.""",
+    },
+)
+
+def generate_intelligent_rubric_content(rubric_index: int, book: str, chapter: int, 
+                                       verse_text: str, historical_context: str, cross_refs: list) -> str:
+    """Génère le contenu intelligent pour une rubrique spécifique"""
+    
+    # Utiliser notre générateur intelligent si disponible
+    if INTELLIGENT_MODE:
+        try:
+            rubric_name = RUBRIQUES_28[rubric_index - 1] if 0 < rubric_index <= len(RUBRIQUES_28) else f"Rubrique {rubric_index}"
+            fields = {"num": rubric_index, "name": rubric_name, "book": book, "chapter": chapter}
+            
+            if rubric_index == 1:  # Prière d'ouverture (Genèse 1 et Jean 1 ont la leur)
+                return RUBRIC_TEMPLATES.render(f"priere:{book} {chapter}", fallback="priere", **fields)
+            
+            elif rubric_index == 6:  # Contexte historique
+                historical_ctx = historical_context or theological_db.get_historical_context(book, chapter)
+                return RUBRIC_TEMPLATES.render("contexte_historique", historical=historical_ctx, **fields)
+            
+            elif rubric_index == 10:  # Parallèles bibliques
+                cross_refs_db = cross_refs if cross_refs is not None else theological_db.get_cross_references(book, chapter)
+                if cross_refs_db:
+                    refs_text = "\n".join([f"**{ref.book} {ref.chapter}:{ref.verse or ''}** - {ref.context}" 
+                                         for ref in cross_refs_db[:4]])
+                    return RUBRIC_TEMPLATES.render("paralleles", refs=refs_text, **fields)
+                return RUBRIC_TEMPLATES.render("paralleles:aucune", **fields)
+            
+            else:
+                # Rubrique générique intelligente
+                return RUBRIC_TEMPLATES.render("generique", **fields)
                 
         except Exception as e:
             print(f"Erreur génération rubrique {rubric_index}: {e}")
     
     # Fallback
-    return f"""## {rubric_index}. Rubrique {rubric_index}
-
-**Contenu contextualisé pour {book} {chapter}**
-
-Cette rubrique révèle des aspects importants de la vérité divine spécifiques à ce passage."""
+    return RUBRIC_TEMPLATES.render("repli", num=rubric_index, book=book, chapter=chapter)
 
 
 @app.post("/api/generate-study")
@@ -957,15 +821,11 @@ async def _generate_intelligent_study(req: StudyRequest):
     # GÉNÉRATION INTELLIGENTE pour chaque rubrique
     if INTELLIGENT_MODE:
         try:
+            # Contexte intelligent basé sur le livre (index précompilés, une lecture par étude)
+            cross_refs = theological_db.get_cross_references(book_label, chap)
+            historical_context = theological_db.get_historical_context(book_label, chap)
             for i, rubric_idx in enumerate(requested_indices):
                 if rubric_idx < len(RUBRIQUES_28):
-                    # Utiliser le générateur intelligent
-                    from theological_database import theological_db
-                    
-                    # Contexte intelligent basé sur le livre
-                    cross_refs = theological_db.get_cross_references(book_label, chap)
-                    historical_context = theological_db.get_historical_context(book_label, chap)
-                    
                     # Génération spécialisée par rubrique
                     rubric_content = generate_intelligent_rubric_content(
                         rubric_idx + 1, book_label, chap, text, historical_context, cross_refs
@@ -988,13 +848,13 @@ async def _generate_intelligent_study(req: StudyRequest):
 async def verse_proxy_to_railway(req: StudyRequest):
     """Proxy vers etude8-bible-api Railway pour éviter CORS"""
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
-                json=req.dict(),
-                headers={"Content-Type": "application/json"}
-            )
-            return response.json()
+        response = await bible_http.post(
+            "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
+            json=req.dict(),
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        )
+        return response.json()
     except Exception as e:
         print(f"❌ Proxy error: {e}")
         raise HTTPException(status_code=500, detail=f"Proxy error: {str(e)}")
@@ -1003,13 +863,13 @@ async def verse_proxy_to_railway(req: StudyRequest):
 async def study_proxy_to_railway(req: StudyRequest):
     """Proxy vers etude28-bible-api Railway pour éviter CORS"""
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                "https://etude28-bible-api-production.up.railway.app/api/generate-study",
-                json=req.dict(),
-                headers={"Content-Type": "application/json"}
-            )
-            return response.json()
+        response = await bible_http.post(
+            "https://etude28-bible-api-production.up.railway.app/api/generate-study",
+            json=req.dict(),
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        )
+        return response.json()
     except Exception as e:
         print(f"❌ Proxy error: {e}")
         raise HTTPException(status_code=500, detail=f"Proxy error: {str(e)}")
@@ -1,52 +1,11 @@
 # Contenu théologique unique pour les 66 livres bibliques
 # Orienté narratif, doctrine saine, niveau grandes écoles de théologie
 
-THEOLOGICAL_LIBRARY = {
-    "Genèse": {
-        # ... (contenu déjà créé ci-dessus)
-        4: {
-            "title": "**Caïn et Abel** : Première Manifestation de la Grâce et du Jugement",
-            "narrative": """Le récit de Caïn et Abel révèle la polarisation morale post-chute. **Abel** (*Hevel* - souffle, vanité) incarne la foi authentique, tandis que **Caïn** (*Qayin* - acquisition) représente la religiosité charnelle.
+from library_store import ShardedLibrary
 
-L'**offrande d'Abel** - les **premiers-nés** de son troupeau et leur **graisse** - révèle le principe sacrificiel : sans effusion de sang, il n'y a pas de pardon. Cette offrande préfigure le sacrifice parfait du Christ.
-
-L'**offrande de Caïn** - fruits de la terre - bien que belle extérieurement, manque de foi. Hébreux 11:4 précise qu'Abel offrit "par la foi" un sacrifice plus excellent.
-
-La **colère** de Caïn révèle l'orgueil religieux blessé. Dieu l'avertit paternellement : **"le péché se couche à ta porte"** - image d'une bête féroce prête à bondir."""
-        },
-        5: {
-            "title": "Les **Générations d'Adam** : La Marche avec Dieu à travers les Siècles",
-            "narrative": """Cette généalogie révèle la **continuité** de la grâce divine à travers les générations. Le refrain "il mourut" souligne la réalité du jugement divin, mais la **longévité** patriarcale témoigne de la miséricorde.
-
-**Hénoc** marche avec Dieu 300 ans et "ne fut plus, car Dieu le prit", préfigurant l'**enlèvement** des saints. Sa translation sans mort révèle que la communion divine transcende la mortalité."""
-        }
-        # ... continuer pour tous les 50 chapitres
-    },
-    
-    "Exode": {
-        2: {
-            "title": "La **Formation de Moïse** : Providence Divine dans l'Adversité",
-            "narrative": """La naissance de **Moïse** (*Mosheh* - "tiré des eaux") dans la persécution révèle comment Dieu prépare Ses instruments dans l'épreuve. Sa mère **Jokébed** illustre la foi maternelle qui défie les édits humains.
-
-L'adoption par la **fille de Pharaon** accomplit providentiellement la formation royale nécessaire au futur libérateur. Moïse reçoit "toute la sagesse des Égyptiens" (Actes 7:22) dans le palais même de l'oppresseur."""
-        }
-        # ... continuer pour tous les 40 chapitres
-    },
-    
-    "Jean": {
-        1: {
-            "title": "Le **Logos Éternel** : Révélation Suprême de Dieu",
-            "narrative": """Le **Prologue johannique** révèle la divinité éternelle du Christ. Le terme **Logos** (*ho Logos*) désigne la Parole créatrice, révélatrice et rédemptrice de Dieu.
-
-"**Au commencement**" (*en arche*) fait écho à Genèse 1:1, mais révèle que le Logos **était** (*en*) déjà, soulignant Son existence éternelle.
-
-"**Le Logos était avec Dieu**" (*pros ton Theon*) révèle la communion trinitaire éternelle, tandis que "**le Logos était Dieu**" (*Theos en ho Logos*) affirme Sa divinité absolue."""
-        }
-        # ... continuer pour tous les 21 chapitres
-    }
-    
-    # ... Développer progressivement tous les 66 livres avec leurs chapitres respectifs
-}
+# Un fichier JSON par chapitre : data/theological/<OSIS>/<chapitre>.json, chargé à la demande
+# ... Développer progressivement tous les 66 livres avec leurs chapitres respectifs
+THEOLOGICAL_LIBRARY = ShardedLibrary("theological")
 
 def get_theological_content(book: str, chapter: int) -> dict:
     """Récupère le contenu théologique pour un livre et chapitre donné"""
@@ -1,11 +1,22 @@
 # Base de données théologique enrichie pour génération de contenu intelligent
 # Système de références croisées, contextes historiques, et analyses lexicales
+#
+# Compilée une seule fois à l'import (singleton theological_db) :
+# - clés (OSIS, chapitre) résolues par passage_ref : "Genèse", "Gn", "genese" -> GEN
+# - enregistrements immuables à __slots__, séquences en tuples partagés
+# - index inverses : thème -> passages, personnage -> passages,
+#   passage cité -> passages qui le citent
+# - analyse lexicale (keyword_matcher : un str.find par motif), un passage par texte
+# Les accès des rubriques sont des lectures de dict sans construction d'objet.
 
-from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
-import re
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
-@dataclass
+from keyword_matcher import KeywordMatcher, Match
+from passage_ref import _norm, resolve_osis
+
+@dataclass(frozen=True, slots=True)
 class CrossReference:
     """Référence croisée biblique avec contexte"""
     book: str
@@ -14,253 +25,376 @@ class CrossReference:
     context: str = ""
     theme: str = ""
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TheologicalTheme:
     """Thème théologique avec développement"""
     name: str
     definition: str
-    biblical_foundation: List[CrossReference]
+    biblical_foundation: Tuple[CrossReference, ...]
     practical_application: str
 
-@dataclass
+    def __post_init__(self):
+        object.__setattr__(self, "biblical_foundation", tuple(self.biblical_foundation))
+
+@dataclass(frozen=True, slots=True)
 class BiblicalCharacter:
     """Personnage biblique avec caractéristiques"""
     name: str
     hebrew_greek_name: str = ""
     meaning: str = ""
     role: str = ""
-    lessons: List[str] = None
-    cross_references: List[CrossReference] = None
+    lessons: Tuple[str, ...] = ()
+    cross_references: Tuple[CrossReference, ...] = ()
 
-class EnhancedTheologicalDatabase:
-    """Base de données théologique enrichie pour génération intelligente"""
-    
-    def __init__(self):
-        self.cross_references_db = self._build_cross_references()
-        self.themes_db = self._build_themes()
-        self.characters_db = self._build_characters()
-        self.historical_contexts = self._build_historical_contexts()
-        self.cultural_contexts = self._build_cultural_contexts()
-        self.geographical_contexts = self._build_geographical_contexts()
-        self.lexical_analysis = self._build_lexical_analysis()
-        
-    def _build_cross_references(self) -> Dict[str, Dict[int, List[CrossReference]]]:
-        """Construction des références croisées par livre/chapitre"""
-        return {
-            "Genèse": {
-                1: [
-                    CrossReference("Jean", 1, 1, "Le Logos créateur", "Création divine"),
-                    CrossReference("Hébreux", 11, 3, "La foi et la création", "Foi créatrice"),
-                    CrossReference("Apocalypse", 4, 11, "Digne es-tu de créer", "Louange au Créateur"),
-                    CrossReference("Psaumes", 33, 6, "Par la parole de l'Éternel", "Puissance créatrice"),
-                    CrossReference("Colossiens", 1, 16, "Tout a été créé par lui", "Christ créateur")
-                ],
-                2: [
-                    CrossReference("Matthieu", 19, 3, "Dès le commencement", "Mariage divin"),
-                    CrossReference("Éphésiens", 5, 31, "Grande est cette parole", "Mystère du mariage"),
-                    CrossReference("1 Corinthiens", 11, 8, "L'homme n'est pas de la femme", "Ordre créationnel")
-                ],
-                3: [
-                    CrossReference("Romains", 5, 12, "Par un seul homme", "Entrée du péché"),
-                    CrossReference("1 Corinthiens", 15, 22, "En Adam tous meurent", "Solidarité adamique"),
-                    CrossReference("Hébreux", 2, 14, "Détruire celui qui avait le pouvoir", "Victoire sur Satan"),
-                    CrossReference("Apocalypse", 12, 9, "L'ancien serpent", "Identification de Satan")
-                ]
-            },
-            "Exode": {
-                3: [
-                    CrossReference("Jean", 8, 58, "Avant qu'Abraham fût, je suis", "JE SUIS éternel"),
-                    CrossReference("Apocalypse", 1, 8, "Celui qui est, qui était", "Éternité divine"),
-                    CrossReference("Actes", 7, 30, "L'ange lui apparut", "Théophanie")
-                ],
-                12: [
-                    CrossReference("1 Corinthiens", 5, 7, "Christ notre Pâque", "Sacrifice pascal"),
-                    CrossReference("Jean", 1, 29, "L'Agneau de Dieu", "Agneau pascal"),
-                    CrossReference("1 Pierre", 1, 19, "Sang précieux", "Rachat par le sang")
-                ]
-            },
-            "Jean": {
-                1: [
-                    CrossReference("Genèse", 1, 1, "Au commencement", "Logos créateur"),
-                    CrossReference("Colossiens", 1, 15, "Premier-né de toute création", "Préexistence"),
-                    CrossReference("Hébreux", 1, 3, "Rayonnement de sa gloire", "Révélation divine")
-                ],
-                3: [
-                    CrossReference("Romains", 3, 23, "Tous ont péché", "Nécessité de la nouvelle naissance"),
-                    CrossReference("Éphésiens", 2, 1, "Morts par vos fautes", "Mort spirituelle"),
-                    CrossReference("2 Corinthiens", 5, 17, "Nouvelle création", "Régénération")
-                ]
-            },
-            "Romains": {
-                1: [
-                    CrossReference("Psaumes", 19, 1, "Les cieux racontent", "Révélation naturelle"),
-                    CrossReference("Actes", 17, 28, "En lui nous vivons", "Proximité divine"),
-                    CrossReference("Jean", 1, 9, "Véritable lumière", "Lumière universelle")
-                ],
-                3: [
-                    CrossReference("Galates", 2, 16, "Justifié par la foi", "Justification"),
-                    CrossReference("Éphésiens", 2, 8, "Par grâce vous êtes sauvés", "Salut par grâce"),
-                    CrossReference("Psaumes", 14, 3, "Nul ne fait le bien", "Corruption universelle")
-                ]
-            }
-        }
-    
-    def _build_themes(self) -> Dict[str, TheologicalTheme]:
-        """Construction des thèmes théologiques majeurs"""
-        return {
-            "création": TheologicalTheme(
-                name="Création Divine",
-                definition="L'acte souverain par lequel Dieu a créé toutes choses ex nihilo",
-                biblical_foundation=[
-                    CrossReference("Genèse", 1, 1, "Au commencement Dieu créa", "Création initiale"),
-                    CrossReference("Jean", 1, 3, "Tout fut créé par le Logos", "Médiation créatrice"),
-                    CrossReference("Colossiens", 1, 16, "Tout a été créé par lui", "Christ créateur")
-                ],
-                practical_application="Reconnaître Dieu comme Créateur transforme notre vision du monde et de notre responsabilité écologique"
-            ),
-            "rédemption": TheologicalTheme(
-                name="Rédemption en Christ",
-                definition="L'œuvre salvifique de Christ rachetant l'humanité de l'esclavage du péché",
-                biblical_foundation=[
-                    CrossReference("Galates", 3, 13, "Christ nous a rachetés", "Rachat de la malédiction"),
-                    CrossReference("1 Pierre", 1, 18, "Rachetés par le sang précieux", "Prix du rachat"),
-                    CrossReference("Apocalypse", 5, 9, "Tu nous as rachetés", "Universalité du rachat")
-                ],
-                practical_application="La rédemption appelle à une vie de gratitude et de sainteté"
-            ),
-            "alliance": TheologicalTheme(
-                name="Alliance Divine",
-                definition="La relation contractuelle établie par Dieu avec son peuple",
-                biblical_foundation=[
-                    CrossReference("Genèse", 17, 7, "Alliance éternelle", "Alliance abrahamique"),
-                    CrossReference("Jérémie", 31, 31, "Nouvelle alliance", "Alliance messianique"),
-                    CrossReference("Hébreux", 8, 8, "Je ferai une alliance nouvelle", "Accomplissement")
-                ],
-                practical_application="L'alliance implique la fidélité mutuelle et la confiance"
-            )
-        }
-    
-    def _build_characters(self) -> Dict[str, BiblicalCharacter]:
-        """Construction de la base des personnages bibliques"""
-        return {
-            "Abraham": BiblicalCharacter(
-                name="Abraham",
-                hebrew_greek_name="אַבְרָהָם (Avraham)",
-                meaning="Père d'une multitude",
-                role="Père de la foi et des croyants",
-                lessons=[
-                    "La foi obéissante malgré l'impossibilité apparente",
-                    "La patience dans l'attente des promesses divines",
-                    "L'intercession pour les autres (Sodome)"
-                ],
-                cross_references=[
-                    CrossReference("Romains", 4, 16, "Père de nous tous", "Paternité spirituelle"),
-                    CrossReference("Galates", 3, 7, "Fils d'Abraham", "Filiation par la foi"),
-                    CrossReference("Hébreux", 11, 8, "Par la foi Abraham obéit", "Obéissance de foi")
-                ]
-            ),
-            "Moïse": BiblicalCharacter(
-                name="Moïse",
-                hebrew_greek_name="מֹשֶׁה (Moshé)",
-                meaning="Tiré des eaux",
-                role="Législateur et libérateur d'Israël",
-                lessons=[
-                    "L'humilité devant l'appel divin",
-                    "La persévérance dans le leadership difficile",
-                    "L'intercession sacrificielle pour le peuple"
-                ],
-                cross_references=[
-                    CrossReference("Hébreux", 3, 2, "Fidèle dans toute sa maison", "Fidélité"),
-                    CrossReference("Deutéronome", 34, 10, "Nul prophète ne s'est levé", "Unicité prophétique"),
-                    CrossReference("Actes", 7, 22, "Puissant en paroles et en œuvres", "Formation providentielle")
-                ]
-            ),
-            "David": BiblicalCharacter(
-                name="David",
-                hebrew_greek_name="דָּוִד (David)",
-                meaning="Bien-aimé",
-                role="Roi selon le cœur de Dieu, ancêtre du Messie",
-                lessons=[
-                    "L'importance du cœur selon Dieu",
-                    "La repentance authentique après la chute",
-                    "La louange dans l'épreuve et la victoire"
-                ],
-                cross_references=[
-                    CrossReference("1 Samuel", 13, 14, "Homme selon son cœur", "Cœur selon Dieu"),
-                    CrossReference("2 Samuel", 7, 16, "Ta maison sera affermie", "Alliance davidique"),
-                    CrossReference("Matthieu", 1, 1, "Fils de David", "Lignée messianique")
-                ]
-            )
+    def __post_init__(self):
+        object.__setattr__(self, "lessons", tuple(self.lessons or ()))
+        object.__setattr__(self, "cross_references", tuple(self.cross_references or ()))
+
+# =========================
+#   Données sources
+# =========================
+
+def _build_cross_references() -> Dict[str, Dict[int, List[CrossReference]]]:
+    """Construction des références croisées par livre/chapitre"""
+    return {
+        "Genèse": {
+            1: [
+                CrossReference("Jean", 1, 1, "Le Logos créateur", "Création divine"),
+                CrossReference("Hébreux", 11, 3, "La foi et la création", "Foi créatrice"),
+                CrossReference("Apocalypse", 4, 11, "Digne es-tu de créer", "Louange au Créateur"),
+                CrossReference("Psaumes", 33, 6, "Par la parole de l'Éternel", "Puissance créatrice"),
+                CrossReference("Colossiens", 1, 16, "Tout a été créé par lui", "Christ créateur")
+            ],
+            2: [
+                CrossReference("Matthieu", 19, 3, "Dès le commencement", "Mariage divin"),
+                CrossReference("Éphésiens", 5, 31, "Grande est cette parole", "Mystère du mariage"),
+                CrossReference("1 Corinthiens", 11, 8, "L'homme n'est pas de la femme", "Ordre créationnel")
+            ],
+            3: [
+                CrossReference("Romains", 5, 12, "Par un seul homme", "Entrée du péché"),
+                CrossReference("1 Corinthiens", 15, 22, "En Adam tous meurent", "Solidarité adamique"),
+                CrossReference("Hébreux", 2, 14, "Détruire celui qui avait le pouvoir", "Victoire sur Satan"),
+                CrossReference("Apocalypse", 12, 9, "L'ancien serpent", "Identification de Satan")
+            ]
+        },
+        "Exode": {
+            3: [
+                CrossReference("Jean", 8, 58, "Avant qu'Abraham fût, je suis", "JE SUIS éternel"),
+                CrossReference("Apocalypse", 1, 8, "Celui qui est, qui était", "Éternité divine"),
+                CrossReference("Actes", 7, 30, "L'ange lui apparut", "Théophanie")
+            ],
+            12: [
+                CrossReference("1 Corinthiens", 5, 7, "Christ notre Pâque", "Sacrifice pascal"),
+                CrossReference("Jean", 1, 29, "L'Agneau de Dieu", "Agneau pascal"),
+                CrossReference("1 Pierre", 1, 19, "Sang précieux", "Rachat par le sang")
+            ]
+        },
+        "Jean": {
+            1: [
+                CrossReference("Genèse", 1, 1, "Au commencement", "Logos créateur"),
+                CrossReference("Colossiens", 1, 15, "Premier-né de toute création", "Préexistence"),
+                CrossReference("Hébreux", 1, 3, "Rayonnement de sa gloire", "Révélation divine")
+            ],
+            3: [
+                CrossReference("Romains", 3, 23, "Tous ont péché", "Nécessité de la nouvelle naissance"),
+                CrossReference("Éphésiens", 2, 1, "Morts par vos fautes", "Mort spirituelle"),
+                CrossReference("2 Corinthiens", 5, 17, "Nouvelle création", "Régénération")
+            ]
+        },
+        "Romains": {
+            1: [
+                CrossReference("Psaumes", 19, 1, "Les cieux racontent", "Révélation naturelle"),
+                CrossReference("Actes", 17, 28, "En lui nous vivons", "Proximité divine"),
+                CrossReference("Jean", 1, 9, "Véritable lumière", "Lumière universelle")
+            ],
+            3: [
+                CrossReference("Galates", 2, 16, "Justifié par la foi", "Justification"),
+                CrossReference("Éphésiens", 2, 8, "Par grâce vous êtes sauvés", "Salut par grâce"),
+                CrossReference("Psaumes", 14, 3, "Nul ne fait le bien", "Corruption universelle")
+            ]
         }
-    
-    def _build_historical_contexts(self) -> Dict[str, Dict[int, str]]:
-        """Contextes historiques par livre/chapitre"""
-        return {
-            "Genèse": {
-                1: "Récit des origines révélé dans un contexte polythéiste. La cosmogonie hébraïque s'oppose aux mythologies babyloniennes et égyptiennes par son monothéisme radical.",
-                11: "Construction de Babel vers 2200 av. J.-C. Contexte de dispersion des peuples et formation des nations.",
-                12: "Appel d'Abraham vers 2000 av. J.-C. Transition de l'universalité vers l'élection particulière d'un peuple."
-            },
-            "Exode": {
-                1: "Oppression en Égypte vers 1550-1450 av. J.-C. Règne des pharaons de la XVIIIe dynastie, probablement Thoutmôsis III.",
-                12: "Institution de la Pâque vers 1446 av. J.-C. Contexte de sortie d'Égypte sous Ramsès II ou Amenhotep II.",
-                20: "Révélation au Sinaï vers 1446 av. J.-C. Établissement de l'alliance mosaïque et du code moral universel."
-            },
-            "Jean": {
-                1: "Rédaction vers 90-95 ap. J.-C. Contexte de polémique anti-gnostique et d'affermissement de la christologie haute.",
-                3: "Ministère de Jésus vers 30 ap. J.-C. Contexte pharisien, attente messianique intense, débats sur la purification."
-            }
+    }
+
+def _build_themes() -> Dict[str, TheologicalTheme]:
+    """Construction des thèmes théologiques majeurs"""
+    return {
+        "création": TheologicalTheme(
+            name="Création Divine",
+            definition="L'acte souverain par lequel Dieu a créé toutes choses ex nihilo",
+            biblical_foundation=[
+                CrossReference("Genèse", 1, 1, "Au commencement Dieu créa", "Création initiale"),
+                CrossReference("Jean", 1, 3, "Tout fut créé par le Logos", "Médiation créatrice"),
+                CrossReference("Colossiens", 1, 16, "Tout a été créé par lui", "Christ créateur")
+            ],
+            practical_application="Reconnaître Dieu comme Créateur transforme notre vision du monde et de notre responsabilité écologique"
+        ),
+        "rédemption": TheologicalTheme(
+            name="Rédemption en Christ",
+            definition="L'œuvre salvifique de Christ rachetant l'humanité de l'esclavage du péché",
+            biblical_foundation=[
+                CrossReference("Galates", 3, 13, "Christ nous a rachetés", "Rachat de la malédiction"),
+                CrossReference("1 Pierre", 1, 18, "Rachetés par le sang précieux", "Prix du rachat"),
+                CrossReference("Apocalypse", 5, 9, "Tu nous as rachetés", "Universalité du rachat")
+            ],
+            practical_application="La rédemption appelle à une vie de gratitude et de sainteté"
+        ),
+        "alliance": TheologicalTheme(
+            name="Alliance Divine",
+            definition="La relation contractuelle établie par Dieu avec son peuple",
+            biblical_foundation=[
+                CrossReference("Genèse", 17, 7, "Alliance éternelle", "Alliance abrahamique"),
+                CrossReference("Jérémie", 31, 31, "Nouvelle alliance", "Alliance messianique"),
+                CrossReference("Hébreux", 8, 8, "Je ferai une alliance nouvelle", "Accomplissement")
+            ],
+            practical_application="L'alliance implique la fidélité mutuelle et la confiance"
+        )
+    }
+
+def _build_characters() -> Dict[str, BiblicalCharacter]:
+    """Construction de la base des personnages bibliques"""
+    return {
+        "Abraham": BiblicalCharacter(
+            name="Abraham",
+            hebrew_greek_name="אַבְרָהָם (Avraham)",
+            meaning="Père d'une multitude",
+            role="Père de la foi et des croyants",
+            lessons=[
+                "La foi obéissante malgré l'impossibilité apparente",
+                "La patience dans l'attente des promesses divines",
+                "L'intercession pour les autres (Sodome)"
+            ],
+            cross_references=[
+                CrossReference("Romains", 4, 16, "Père de nous tous", "Paternité spirituelle"),
+                CrossReference("Galates", 3, 7, "Fils d'Abraham", "Filiation par la foi"),
+                CrossReference("Hébreux", 11, 8, "Par la foi Abraham obéit", "Obéissance de foi")
+            ]
+        ),
+        "Moïse": BiblicalCharacter(
+            name="Moïse",
+            hebrew_greek_name="מֹשֶׁה (Moshé)",
+            meaning="Tiré des eaux",
+            role="Législateur et libérateur d'Israël",
+            lessons=[
+                "L'humilité devant l'appel divin",
+                "La persévérance dans le leadership difficile",
+                "L'intercession sacrificielle pour le peuple"
+            ],
+            cross_references=[
+                CrossReference("Hébreux", 3, 2, "Fidèle dans toute sa maison", "Fidélité"),
+                CrossReference("Deutéronome", 34, 10, "Nul prophète ne s'est levé", "Unicité prophétique"),
+                CrossReference("Actes", 7, 22, "Puissant en paroles et en œuvres", "Formation providentielle")
+            ]
+        ),
+        "David": BiblicalCharacter(
+            name="David",
+            hebrew_greek_name="דָּוִד (David)",
+            meaning="Bien-aimé",
+            role="Roi selon le cœur de Dieu, ancêtre du Messie",
+            lessons=[
+                "L'importance du cœur selon Dieu",
+                "La repentance authentique après la chute",
+                "La louange dans l'épreuve et la victoire"
+            ],
+            cross_references=[
+                CrossReference("1 Samuel", 13, 14, "Homme selon son cœur", "Cœur selon Dieu"),
+                CrossReference("2 Samuel", 7, 16, "Ta maison sera affermie", "Alliance davidique"),
+                CrossReference("Matthieu", 1, 1, "Fils de David", "Lignée messianique")
+            ]
+        )
+    }
+
+def _build_historical_contexts() -> Dict[str, Dict[int, str]]:
+    """Contextes historiques par livre/chapitre"""
+    return {
+        "Genèse": {
+            1: "Récit des origines révélé dans un contexte polythéiste. La cosmogonie hébraïque s'oppose aux mythologies babyloniennes et égyptiennes par son monothéisme radical.",
+            11: "Construction de Babel vers 2200 av. J.-C. Contexte de dispersion des peuples et formation des nations.",
+            12: "Appel d'Abraham vers 2000 av. J.-C. Transition de l'universalité vers l'élection particulière d'un peuple."
+        },
+        "Exode": {
+            1: "Oppression en Égypte vers 1550-1450 av. J.-C. Règne des pharaons de la XVIIIe dynastie, probablement Thoutmôsis III.",
+            12: "Institution de la Pâque vers 1446 av. J.-C. Contexte de sortie d'Égypte sous Ramsès II ou Amenhotep II.",
+            20: "Révélation au Sinaï vers 1446 av. J.-C. Établissement de l'alliance mosaïque et du code moral universel."
+        },
+        "Jean": {
+            1: "Rédaction vers 90-95 ap. J.-C. Contexte de polémique anti-gnostique et d'affermissement de la christologie haute.",
+            3: "Ministère de Jésus vers 30 ap. J.-C. Contexte pharisien, attente messianique intense, débats sur la purification."
         }
-    
-    def _build_cultural_contexts(self) -> Dict[str, Dict[int, str]]:
-        """Contextes culturels par livre/chapitre"""
-        return {
-            "Genèse": {
-                1: "Culture sémitique ancienne avec vision cyclique du temps. Le sabbat révèle le rythme divin travail-repos.",
-                24: "Coutumes matrimoniales du Proche-Orient ancien : dot, fiançailles par procuration, rôle du serviteur fidèle."
-            },
-            "Jean": {
-                2: "Culture judéo-hellénistique du Ier siècle. Symbolisme de l'eau et du vin, hospitalité orientale, rôle des femmes.",
-                4: "Tensions ethniques juifs-samaritains. Importance des puits dans la culture nomade, heures de puisage."
-            }
+    }
+
+def _build_cultural_contexts() -> Dict[str, Dict[int, str]]:
+    """Contextes culturels par livre/chapitre"""
+    return {
+        "Genèse": {
+            1: "Culture sémitique ancienne avec vision cyclique du temps. Le sabbat révèle le rythme divin travail-repos.",
+            24: "Coutumes matrimoniales du Proche-Orient ancien : dot, fiançailles par procuration, rôle du serviteur fidèle."
+        },
+        "Jean": {
+            2: "Culture judéo-hellénistique du Ier siècle. Symbolisme de l'eau et du vin, hospitalité orientale, rôle des femmes.",
+            4: "Tensions ethniques juifs-samaritains. Importance des puits dans la culture nomade, heures de puisage."
         }
-    
-    def _build_geographical_contexts(self) -> Dict[str, Dict[int, str]]:
-        """Contextes géographiques par livre/chapitre"""
-        return {
-            "Genèse": {
-                1: "Cosmographie ancienne : eaux d'en haut et d'en bas, firmament solide, terre comme disque.",
-                28: "Béthel ('Maison de Dieu') à 19 km au nord de Jérusalem, sur la route Hébron-Sichem."
-            },
-            "Jean": {
-                1: "Jourdain près de Béthanie, lieu du baptême. Région désertique de Judée, symbolisme de l'eau vive.",
-                4: "Sychar en Samarie, près du puits de Jacob. Montagne du Garizim (880m), lieu de culte samaritain."
-            }
+    }
+
+def _build_geographical_contexts() -> Dict[str, Dict[int, str]]:
+    """Contextes géographiques par livre/chapitre"""
+    return {
+        "Genèse": {
+            1: "Cosmographie ancienne : eaux d'en haut et d'en bas, firmament solide, terre comme disque.",
+            28: "Béthel ('Maison de Dieu') à 19 km au nord de Jérusalem, sur la route Hébron-Sichem."
+        },
+        "Jean": {
+            1: "Jourdain près de Béthanie, lieu du baptême. Région désertique de Judée, symbolisme de l'eau vive.",
+            4: "Sychar en Samarie, près du puits de Jacob. Montagne du Garizim (880m), lieu de culte samaritain."
         }
-    
-    def _build_lexical_analysis(self) -> Dict[str, Dict[str, str]]:
-        """Analyses lexicales des termes clés"""
-        return {
-            "création": {
-                "bara": "ברא - Créer ex nihilo, activité exclusive de Dieu",
-                "asah": "עשה - Faire, façonner à partir de matériaux existants",
-                "yatsar": "יצר - Former, modeler comme un potier"
-            },
-            "alliance": {
-                "berith": "ברית - Alliance, contrat solennel avec obligations mutuelles",
-                "hesed": "חסד - Amour loyal, fidélité d'alliance",
-                "aman": "אמן - Être ferme, fidèle, digne de confiance"
-            },
-            "salut": {
-                "yeshua": "ישועה - Salut, délivrance, libération",
-                "soteria": "σωτηρία - Salut complet, préservation",
-                "apolytrosis": "ἀπολύτρωσις - Rédemption, libération par rançon"
-            }
+    }
+
+def _build_lexical_analysis() -> Dict[str, Dict[str, str]]:
+    """Analyses lexicales des termes clés"""
+    return {
+        "création": {
+            "bara": "ברא - Créer ex nihilo, activité exclusive de Dieu",
+            "asah": "עשה - Faire, façonner à partir de matériaux existants",
+            "yatsar": "יצר - Former, modeler comme un potier"
+        },
+        "alliance": {
+            "berith": "ברית - Alliance, contrat solennel avec obligations mutuelles",
+            "hesed": "חסד - Amour loyal, fidélité d'alliance",
+            "aman": "אמן - Être ferme, fidèle, digne de confiance"
+        },
+        "salut": {
+            "yeshua": "ישועה - Salut, délivrance, libération",
+            "soteria": "σωτηρία - Salut complet, préservation",
+            "apolytrosis": "ἀπολύτρωσις - Rédemption, libération par rançon"
         }
-    
-    def get_cross_references(self, book: str, chapter: int) -> List[CrossReference]:
+    }
+
+def _build_lexical_triggers() -> Dict[str, Tuple[str, ...]]:
+    """Mots français qui appellent l'analyse d'un terme ("*" : radical)"""
+    return {
+        "bara": ("crea*", "cree*", "creer*"),
+        "berith": ("alliance*",),
+        "yeshua": ("sauve*", "salut"),
+        "apolytrosis": ("redemption*", "rachet*", "rachat*"),
+    }
+
+# =========================
+#   Base compilée
+# =========================
+
+_NO_REFS: Tuple[CrossReference, ...] = ()
+_NO_PASSAGES: Tuple[Tuple[str, int], ...] = ()
+_NO_CHARACTERS: Tuple[BiblicalCharacter, ...] = ()
+
+
+def _book_key(book: str) -> str:
+    """Clé de livre : code OSIS si le nom est reconnu, sinon le nom tel quel"""
+    return resolve_osis(book) or book
+
+
+def _by_passage(table: Dict[str, Dict[int, Any]]) -> Dict[str, Dict[int, Any]]:
+    """{livre: {chapitre: valeur}} -> {OSIS: {chapitre: valeur}}"""
+    compiled: Dict[str, Dict[int, Any]] = {}
+    for book, chapters in table.items():
+        compiled.setdefault(_book_key(book), {}).update(chapters)
+    return compiled
+
+
+def _freeze(index: Dict[Any, list]) -> Mapping:
+    return MappingProxyType({key: tuple(values) for key, values in index.items()})
+
+
+class EnhancedTheologicalDatabase:
+    """Base de données théologique enrichie pour génération intelligente (instance unique)"""
+
+    __slots__ = (
+        "cross_references_db", "themes_db", "characters_db", "historical_contexts",
+        "cultural_contexts", "geographical_contexts", "lexical_analysis",
+        "_cross_refs", "_historical", "_cultural", "_geographical",
+        "_theme_passages", "_character_passages", "_cited_by", "_characters_by_passage",
+        "_keywords", "_term_analyses",
+    )
+    _instance: Optional["EnhancedTheologicalDatabase"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._compile()
+            cls._instance = instance
+        return cls._instance
+
+    def _compile(self) -> None:
+        cross_references = _build_cross_references()
+        themes = _build_themes()
+        characters = _build_characters()
+
+        # Vues en lecture seule des données sources (noms de livres d'origine)
+        self.cross_references_db = MappingProxyType({
+            book: MappingProxyType({c: tuple(refs) for c, refs in chapters.items()})
+            for book, chapters in cross_references.items()
+        })
+        self.themes_db = MappingProxyType(themes)
+        self.characters_db = MappingProxyType(characters)
+        self.historical_contexts = MappingProxyType(_build_historical_contexts())
+        self.cultural_contexts = MappingProxyType(_build_cultural_contexts())
+        self.geographical_contexts = MappingProxyType(_build_geographical_contexts())
+        self.lexical_analysis = MappingProxyType(_build_lexical_analysis())
+
+        # Index par (OSIS, chapitre)
+        self._cross_refs = _by_passage(self.cross_references_db)
+        self._historical = _by_passage(self.historical_contexts)
+        self._cultural = _by_passage(self.cultural_contexts)
+        self._geographical = _by_passage(self.geographical_contexts)
+
+        # Index inverses
+        theme_passages: Dict[str, list] = {}
+        for key, theme in themes.items():
+            theme_passages.setdefault(_norm(key), []).extend(theme.biblical_foundation)
+        for refs in self.cross_references_db.values():
+            for ref_list in refs.values():
+                for ref in ref_list:
+                    label = _norm(ref.theme)
+                    for key in theme_passages:
+                        if key in label.split():
+                            theme_passages[key].append(ref)
+        self._theme_passages = _freeze(theme_passages)
+
+        self._character_passages = MappingProxyType({
+            _norm(name): character.cross_references for name, character in characters.items()
+        })
+
+        cited_by: Dict[Tuple[str, int], list] = {}
+        for book, chapters in cross_references.items():
+            for chapter, refs in chapters.items():
+                for ref in refs:
+                    sources = cited_by.setdefault((_book_key(ref.book), ref.chapter), [])
+                    if (book, chapter) not in sources:
+                        sources.append((book, chapter))
+        self._cited_by = _freeze(cited_by)
+
+        characters_by_passage: Dict[Tuple[str, int], list] = {}
+        for character in characters.values():
+            for ref in character.cross_references:
+                found = characters_by_passage.setdefault((_book_key(ref.book), ref.chapter), [])
+                if character not in found:
+                    found.append(character)
+        self._characters_by_passage = _freeze(characters_by_passage)
+
+        # Lexèmes -> termes analysés : le terme lui-même, sa catégorie (tous les termes
+        # de la catégorie) et ses déclencheurs français
+        self._term_analyses = MappingProxyType({
+            term: analysis for terms in self.lexical_analysis.values() for term, analysis in terms.items()
+        })
+        lexemes: List[Tuple[str, Tuple[str, ...]]] = []
+        for category, terms in self.lexical_analysis.items():
+            lexemes.append((category, tuple(terms)))
+            lexemes.extend((term, (term,)) for term in terms)
+        for term, triggers in _build_lexical_triggers().items():
+            lexemes.extend((trigger, (term,)) for trigger in triggers)
+        self._keywords = KeywordMatcher(lexemes)
+
+    def get_cross_references(self, book: str, chapter: int) -> Tuple[CrossReference, ...]:
         """Récupère les références croisées pour un passage"""
-        return self.cross_references_db.get(book, {}).get(chapter, [])
+        return self._cross_refs.get(_book_key(book), {}).get(chapter, _NO_REFS)
     
     def get_theme_content(self, theme_key: str) -> Optional[TheologicalTheme]:
         """Récupère le contenu thématique"""
@@ -272,35 +406,55 @@ class EnhancedTheologicalDatabase:
     
     def get_historical_context(self, book: str, chapter: int) -> str:
         """Récupère le contexte historique"""
-        return self.historical_contexts.get(book, {}).get(chapter, 
-            f"Contexte historique de {book} {chapter} dans l'histoire de la révélation divine.")
+        return self._historical.get(_book_key(book), {}).get(chapter) or \
+            f"Contexte historique de {book} {chapter} dans l'histoire de la révélation divine."
     
     def get_cultural_context(self, book: str, chapter: int) -> str:
         """Récupère le contexte culturel"""
-        return self.cultural_contexts.get(book, {}).get(chapter,
-            f"Contexte culturel de {book} {chapter} révélant les coutumes de l'époque biblique.")
+        return self._cultural.get(_book_key(book), {}).get(chapter) or \
+            f"Contexte culturel de {book} {chapter} révélant les coutumes de l'époque biblique."
     
     def get_geographical_context(self, book: str, chapter: int) -> str:
         """Récupère le contexte géographique"""
-        return self.geographical_contexts.get(book, {}).get(chapter,
-            f"Contexte géographique de {book} {chapter} dans la Terre Sainte.")
+        return self._geographical.get(_book_key(book), {}).get(chapter) or \
+            f"Contexte géographique de {book} {chapter} dans la Terre Sainte."
+
+    def passages_for_theme(self, theme: str) -> Tuple[CrossReference, ...]:
+        """Fondements bibliques du thème et références croisées qui le portent ("création", "alliance")"""
+        return self._theme_passages.get(_norm(theme), _NO_REFS)
+
+    def passages_for_character(self, name: str) -> Tuple[CrossReference, ...]:
+        """Passages associés au personnage ("Moïse", "moise")"""
+        return self._character_passages.get(_norm(name), _NO_REFS)
+
+    def characters_in(self, book: str, chapter: int) -> Tuple[BiblicalCharacter, ...]:
+        """Personnages dont une référence renvoie à ce chapitre"""
+        return self._characters_by_passage.get((_book_key(book), chapter), _NO_CHARACTERS)
+
+    def cited_by(self, book: str, chapter: int) -> Tuple[Tuple[str, int], ...]:
+        """Passages (livre, chapitre) dont les références croisées renvoient à ce chapitre"""
+        return self._cited_by.get((_book_key(book), chapter), _NO_PASSAGES)
     
+    def find_keywords(self, text: str) -> List[Match]:
+        """Occurrences des lexèmes (début, fin, lexème, termes analysés) dans le texte"""
+        return self._keywords.find(text)
+
+    def _analyses(self, matches: List[Match]) -> Dict[str, str]:
+        if not matches:
+            return {}
+        found = {term for match in matches for term in match.value}
+        # Ordre de la base lexicale, comme avant
+        return {term: analysis for term, analysis in self._term_analyses.items() if term in found}
+
     def analyze_keywords(self, text: str) -> Dict[str, str]:
         """Analyse lexicale des mots-clés dans un texte"""
-        found_analyses = {}
-        text_lower = text.lower()
-        
-        for category, terms in self.lexical_analysis.items():
-            for french_term, analysis in terms.items():
-                if any(keyword in text_lower for keyword in [
-                    french_term, category, 
-                    "créer" if "bara" in analysis else "",
-                    "alliance" if "berith" in analysis else "",
-                    "salut" if "yeshua" in analysis else ""
-                ]):
-                    found_analyses[french_term] = analysis
-        
-        return found_analyses
+        return self._analyses(self._keywords.find(text))
+
+    def analyze_chapter(self, verses: Mapping[int, str]) -> Dict[int, Dict[str, str]]:
+        """Analyse lexicale de chaque verset d'un chapitre, en un seul passage ; versets sans mot-clé omis"""
+        numbers = list(verses)
+        results = self._keywords.find_many([verses[n] for n in numbers])
+        return {n: self._analyses(matches) for n, matches in zip(numbers, results) if matches}
 
 # Instance globale de la base théologique
 theological_db = EnhancedTheologicalDatabase()
\ No newline at end of file
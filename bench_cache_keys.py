@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Taux de hit du cache selon la clé utilisée
+
+Rejoue un trafic de requêtes d'étude (passages populaires écrits de plusieurs
+façons, cibles de tokens proches) et compare :
+- Ancienne clé : md5(passage brut + tokens exacts)
+- Nouvelle clé : CacheFallbackSystem._get_cache_key (passage canonique OSIS + palier de tokens)
+
+Usage : python bench_cache_keys.py [trafic.jsonl]
+Chaque ligne JSONL : {"passage": "...", "tokens": 500, "use_gemini": true}
+Sans fichier, un trafic synthétique reproductible est généré.
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+
+# Cache en mémoire uniquement : le benchmark ne touche pas au fichier SQLite
+os.environ.setdefault("STUDY_CACHE_PATH", ":memory:")
+
+from cache_fallback_system import cache_fallback
+
+BOOKS = [
+    ("Genèse", "Gen"), ("Jean", "Jean"), ("Psaumes", "Ps"), ("Romains", "Romains"),
+    ("Matthieu", "Matthieu"), ("Exode", "Exo"), ("Ésaïe", "Esaie"),
+    ("1 Corinthiens", "1Corinthiens"), ("Hébreux", "Hebreux"), ("Apocalypse", "Apoc"),
+]
+CHAPTERS_PER_BOOK = 12
+TOKEN_TARGETS = [480, 500, 500, 520, 1000, 1000, 1024]
+
+
+def _variants(book: str, abbrev: str, chapter: int):
+    plain = book.replace("É", "E").replace("é", "e").replace("ï", "i")
+    return [
+        f"{book} {chapter}",
+        f"{book.lower()} {chapter}",
+        f"{plain} {chapter}",
+        f"{abbrev} {chapter}",
+        f"{book} {chapter} LSG",
+        f"  {book}  {chapter} ",
+    ]
+
+
+def synthetic_traffic(count: int = 1000, seed: int = 42):
+    rng = random.Random(seed)
+    passages = [(book, abbrev, chapter) for book, abbrev in BOOKS
+                for chapter in range(1, CHAPTERS_PER_BOOK + 1)]
+    weights = [1 / (rank + 1) for rank in range(len(passages))]  # Popularité de type Zipf
+    traffic = []
+    for _ in range(count):
+        book, abbrev, chapter = rng.choices(passages, weights)[0]
+        traffic.append({
+            "passage": rng.choice(_variants(book, abbrev, chapter)),
+            "tokens": rng.choice(TOKEN_TARGETS),
+            "use_gemini": True,
+        })
+    return traffic
+
+
+def load_traffic(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def old_key(passage: str, tokens: int, use_gemini: bool) -> str:
+    return hashlib.md5(f"{passage}_{tokens}_{use_gemini}".encode()).hexdigest()
+
+
+def replay(traffic, key_func) -> float:
+    seen = set()
+    hits = 0
+    for req in traffic:
+        key = key_func(req["passage"], req.get("tokens", 500), req.get("use_gemini", True))
+        if key in seen:
+            hits += 1
+        else:
+            seen.add(key)
+    return hits / len(traffic) if traffic else 0.0
+
+
+def main():
+    traffic = load_traffic(sys.argv[1]) if len(sys.argv) > 1 else synthetic_traffic()
+    old_ratio = replay(traffic, old_key)
+    new_ratio = replay(traffic, cache_fallback._get_cache_key)
+    print(f"\n📊 {len(traffic)} requêtes rejouées")
+    print(f"{'clé':<40} | {'hit ratio':>9}")
+    print(f"{'Ancienne (passage brut, tokens exacts)':<40} | {old_ratio:>8.1%}")
+    print(f"{'Nouvelle (OSIS canonique, paliers)':<40} | {new_ratio:>8.1%}")
+    missed_before = 1 - old_ratio
+    print(f"\n✅ Générations évitées : {(new_ratio - old_ratio) / missed_before:.1%} des anciens miss" if missed_before else "")
+
+
+if __name__ == "__main__":
+    main()
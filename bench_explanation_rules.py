@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Moteur de règles des explications de repli (explanation_rules)
+
+Texte : la Bible entière (66 livres, versification de versification.py). Si
+bible_store.bin est installé, le texte réel est utilisé ; sinon les versets et
+explications de la bibliothèque verset par verset sont recyclés sur tous les versets.
+
+Pour chaque jeu de règles (data/rules/*.json des trois déploiements) :
+- évaluation verset par verset (RuleSet.evaluate)
+- évaluation par chapitre (RuleSet.evaluate_chapter, une résolution de portée)
+Comparé à l'ancienne chaîne if/elif de generate_simple_theological_explanation,
+reproduite à l'identique ; les écarts de résultat sont comptés et illustrés.
+
+Usage : python bench_explanation_rules.py
+"""
+
+import itertools
+import os
+import time
+
+import bible_store
+from explanation_rules import load_rule_set
+from library_store import ShardedLibrary
+from passage_ref import BOOK_NAMES_FR
+from versification import VERSE_COUNTS
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RULE_FILES = [
+    os.path.join(ROOT, "data", "rules", "simple_explanation.json"),
+    os.path.join(ROOT, "app-frontend", "railway-deploy", "data", "rules", "fallback_explanation.json"),
+    os.path.join(ROOT, "app-frontend", "backend", "data", "rules", "smart_fallback.json"),
+]
+ROUNDS = 3
+
+
+def legacy_simple_explanation(verse_text: str, book_name: str, chapter: int, verse_num: int) -> str:
+    """Ancienne chaîne if/elif (fonction_theo_amelioree), à l'identique"""
+    verse_lower = verse_text.lower()
+    explanation_parts = []
+    if book_name == "Genèse" and chapter == 1:
+        if "image" in verse_lower and ("homme" in verse_lower or "créa" in verse_lower):
+            explanation_parts.append("La création de l'homme à l'image de Dieu révèle la dignité unique de l'humanité et sa vocation à refléter la gloire divine. Cette image implique une capacité relationnelle, créatrice et morale qui distingue l'homme du reste de la création.")
+        elif ("bénit" in verse_lower or "fructifiez" in verse_lower) and "multipliez" in verse_lower:
+            explanation_parts.append("Cette bénédiction divine établit le mandat créationnel : fructifier, multiplier, remplir et dominer la terre. La domination n'est pas exploitation mais intendance responsable sous l'autorité de Dieu.")
+        elif "plante" in verse_lower and "nourriture" in verse_lower and "vous" in verse_lower:
+            explanation_parts.append("Dieu pourvoit généreusement aux besoins de l'humanité. Ce régime végétal initial révèle l'harmonie parfaite de la création avant la chute, où aucune mort n'était nécessaire pour la subsistance.")
+        elif "animal" in verse_lower and "plante verte" in verse_lower:
+            explanation_parts.append("La providence divine s'étend à toute créature vivante. Cette provision végétale universelle témoigne de l'ordre parfait voulu par Dieu, où toute vie trouve sa subsistance sans violence.")
+        elif "très bon" in verse_lower or ("vit" in verse_lower and "bon" in verse_lower):
+            explanation_parts.append("L'évaluation divine 'très bon' couronne l'œuvre créatrice. Cette perfection originelle contraste avec l'état actuel du monde et annonce la restauration future dans la nouvelle création.")
+        elif "sépara" in verse_lower or "divisa" in verse_lower:
+            explanation_parts.append("L'acte divin de séparation révèle un Dieu d'ordre qui structure le cosmos. Cette organisation témoigne de sa sagesse et prépare un habitat propice à la vie.")
+        elif "créa" in verse_lower or "fit" in verse_lower:
+            explanation_parts.append("Chaque acte créateur de Dieu témoigne de sa puissance souveraine et de sa bonté. La création ex nihilo (à partir de rien) révèle l'absolue transcendance divine.")
+    elif book_name == "Jean":
+        if verse_num <= 18:
+            if "parole" in verse_lower or "verbe" in verse_lower:
+                explanation_parts.append("Le Logos éternel révèle la divinité préexistante du Christ et son rôle dans la création. Cette Parole est personnelle, créatrice et révélatrice.")
+            elif "lumière" in verse_lower:
+                explanation_parts.append("Christ comme lumière véritable illumine tout homme. Cette lumière révèle, sanctifie et juge, offrant la vie à ceux qui la reçoivent.")
+            elif "monde" in verse_lower and "connu" in verse_lower:
+                explanation_parts.append("Le drame de l'incarnation : le Créateur vient chez les siens qui ne le reconnaissent pas. Cette tragédie révèle l'aveuglement du péché.")
+        else:
+            explanation_parts.append("Ce témoignage révèle la divinité du Christ et la vie éternelle disponible par la foi en son nom.")
+    elif book_name == "Psaumes":
+        if "louange" in verse_lower or "béni" in verse_lower:
+            explanation_parts.append("La louange authentique jaillit d'un cœur qui reconnaît la bonté et la fidélité divines dans toutes circonstances.")
+        elif "péché" in verse_lower or "iniquité" in verse_lower:
+            explanation_parts.append("La confession sincère ouvre la voie au pardon divin et à la restauration de la communion avec Dieu.")
+        else:
+            explanation_parts.append("Ce verset exprime l'authentique spiritualité dans la relation avec Dieu, mêlant adoration, supplication et confiance.")
+    if not explanation_parts:
+        book_contexts = {
+            "Genèse": "Ce récit des origines révèle les fondements du plan divin pour l'humanité et la création.",
+            "Exode": "Ce passage illustre l'œuvre libératrice de Dieu et établit les bases de l'alliance avec son peuple.",
+            "Matthieu": "Cet enseignement du Roi révèle les principes du royaume des cieux et appelle à la transformation du cœur.",
+            "Romains": "Cette vérité doctrinale expose les fondements de la justification par la foi et la vie nouvelle en Christ.",
+            "Éphésiens": "Ce passage révèle les richesses spirituelles du croyant et sa position glorieuse en Christ.",
+        }
+        explanation_parts.append(book_contexts.get(book_name, f"Ce verset révèle un aspect important de la révélation divine dans le livre de {book_name}."))
+    full_explanation = " ".join(explanation_parts)
+    return ' '.join(full_explanation.split())
+
+
+def whole_bible():
+    """{(livre, chapitre): {verset: texte}}"""
+    store = bible_store.get_store()
+    source = None
+    if store is None:
+        data_root = os.path.join(ROOT, "app-frontend", "backend", "data")
+        library = ShardedLibrary("verse_by_verse", root=data_root)
+        pool = [entry[key] for book in library for chapter in library[book].values()
+                for entry in chapter.values() for key in ("verse", "explanation")]
+        if not pool:
+            raise SystemExit(f"❌ Aucun texte : ni bible_store.bin ni bibliothèque verset par verset sous {data_root}")
+        source = itertools.cycle(pool)
+    chapters = {}
+    for osis, counts in VERSE_COUNTS.items():
+        for chapter, count in enumerate(counts, start=1):
+            verses = store.get_chapter(osis, chapter) if store else {}
+            if not verses:
+                verses = {v: next(source) for v in range(1, count + 1)} if source else {}
+            chapters[(BOOK_NAMES_FR[osis], chapter)] = verses
+    return chapters, "bible_store" if store else "bibliothèque verset par verset recyclée"
+
+
+def best(func) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def report(label: str, elapsed: float, verses: int, reference: float = 0.0):
+    speedup = f"x{reference / elapsed:.1f}" if reference else ""
+    print(f"{label:<44} | {elapsed * 1000:>9.1f} ms | {elapsed / verses * 1e6:>7.2f} µs/v | {speedup:>6}")
+
+
+def main():
+    chapters, source = whole_bible()
+    verses = [(book, chapter, verse, text) for (book, chapter), vs in chapters.items() for verse, text in vs.items()]
+    print(f"Bible : {len(chapters)} chapitres, {len(verses)} versets ({source})")
+
+    for path in RULE_FILES:
+        rule_set = load_rule_set(path)
+        print(f"\n{rule_set.name} ({rule_set.rules} règles, {len(rule_set.sections)} sections)")
+        print(f"{'':<44} | {'total':>12} | {'moyenne':>12} | {'gain':>6}")
+
+        # Le lot par chapitre donne exactement le résultat verset par verset
+        for (book, chapter), vs in chapters.items():
+            assert rule_set.evaluate_chapter(book, chapter, vs) == {
+                verse: rule_set.evaluate(text, book, chapter, verse) for verse, text in vs.items()}
+
+        legacy = 0.0
+        if rule_set.name == "simple_explanation":
+            legacy = best(lambda: [legacy_simple_explanation(t, b, c, v) for b, c, v, t in verses])
+            report("ancienne chaîne if/elif (verset par verset)", legacy, len(verses))
+            changed = [(b, c, v, t) for b, c, v, t in verses
+                       if legacy_simple_explanation(t, b, c, v) != " ".join(" ".join(rule_set.evaluate(t, b, c, v)).split())]
+            print(f"{'':<44}   {len(changed)} résultat(s) différent(s) (mots entiers au lieu de sous-chaînes)")
+            for b, c, v, t in changed[:3]:
+                print(f"{'':<44}   {b} {c}:{v} « {t[:60]} »")
+        report("règles (verset par verset)",
+               best(lambda: [rule_set.evaluate(t, b, c, v) for b, c, v, t in verses]), len(verses), legacy)
+        report("règles (par chapitre)",
+               best(lambda: [rule_set.evaluate_chapter(b, c, vs) for (b, c), vs in chapters.items()]), len(verses), legacy)
+        print(f"{'':<44}   {rule_set.stats()}")
+
+
+if __name__ == "__main__":
+    main()
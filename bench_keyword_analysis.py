@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Analyse lexicale (EnhancedTheologicalDatabase.analyze_keywords)
+
+Texte : le Nouveau Testament complet (7 957 versets, versification de versification.py).
+Si bible_store.bin est installé, le texte réel est utilisé ; sinon les versets et
+explications de la bibliothèque verset par verset sont recyclés sur tous les versets.
+
+Compare :
+- ancienne boucle (catégorie x terme, liste reconstruite et recherche de sous-chaînes)
+- KeywordMatcher (un str.find par motif encadré), verset par verset (analyze_keywords)
+- KeywordMatcher, un passage par chapitre (analyze_chapter)
+
+Usage : python bench_keyword_analysis.py
+"""
+
+import itertools
+import os
+import time
+
+import bible_store
+from library_store import ShardedLibrary
+from theological_database import theological_db
+from versification import VERSE_COUNTS
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+NT_BOOKS = bible_store.BOOK_ORDER[bible_store.BOOK_ORDER.index("MAT"):]
+ROUNDS = 3
+
+
+def legacy_analyze_keywords(lexical_analysis, text: str):
+    """Implémentation précédente, à l'identique"""
+    found_analyses = {}
+    text_lower = text.lower()
+    for category, terms in lexical_analysis.items():
+        for french_term, analysis in terms.items():
+            if any(keyword in text_lower for keyword in [
+                french_term, category,
+                "créer" if "bara" in analysis else "",
+                "alliance" if "berith" in analysis else "",
+                "salut" if "yeshua" in analysis else ""
+            ]):
+                found_analyses[french_term] = analysis
+    return found_analyses
+
+
+def new_testament():
+    """{(OSIS, chapitre): {verset: texte}}"""
+    store = bible_store.get_store()
+    source = None
+    if store is None:
+        data_root = os.path.join(ROOT, "app-frontend", "backend", "data")
+        library = ShardedLibrary("verse_by_verse", root=data_root)
+        pool = [entry[key] for book in library for chapter in library[book].values()
+                for entry in chapter.values() for key in ("verse", "explanation")]
+        if not pool:
+            raise SystemExit(f"❌ Aucun texte : ni bible_store.bin ni bibliothèque verset par verset sous {data_root}")
+        source = itertools.cycle(pool)
+    chapters = {}
+    for osis in NT_BOOKS:
+        for chapter, count in enumerate(VERSE_COUNTS[osis], start=1):
+            verses = store.get_chapter(osis, chapter) if store else {}
+            if not verses:
+                verses = {v: next(source) for v in range(1, count + 1)} if source else {}
+            chapters[(osis, chapter)] = verses
+    return chapters, "bible_store" if store else "bibliothèque verset par verset recyclée"
+
+
+def best(func) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def report(label: str, elapsed: float, verses: int, reference: float = 0.0):
+    speedup = f"x{reference / elapsed:.1f}" if reference else ""
+    print(f"{label:<44} | {elapsed * 1000:>9.1f} ms | {elapsed / verses * 1e6:>7.2f} µs/v | {speedup:>6}")
+
+
+def main():
+    chapters, source = new_testament()
+    verses = [text for chapter in chapters.values() for text in chapter.values()]
+    chars = sum(len(text) for text in verses)
+    print(f"Nouveau Testament : {len(chapters)} chapitres, {len(verses)} versets, {chars / 1e6:.2f} M caractères ({source})")
+
+    lexicon = theological_db.lexical_analysis
+    legacy_hits = sum(1 for text in verses if legacy_analyze_keywords(lexicon, text))
+    new_hits = sum(1 for text in verses if theological_db.analyze_keywords(text))
+    print(f"Versets avec analyse : ancienne {legacy_hits}, nouvelle {new_hits} "
+          f"(l'ancienne testait \"\" in texte, toujours vrai : tous les termes pour chaque verset)")
+
+    # Le lot par chapitre donne exactement le résultat verset par verset
+    for verses_map in chapters.values():
+        per_verse = {n: a for n, a in ((n, theological_db.analyze_keywords(t)) for n, t in verses_map.items()) if a}
+        assert theological_db.analyze_chapter(verses_map) == per_verse
+
+    print(f"\n{f'lexique de base ({len(theological_db._keywords)} motifs)':<44} | {'total':>12} | {'moyenne':>12} | {'gain':>6}")
+    legacy = best(lambda: [legacy_analyze_keywords(lexicon, t) for t in verses])
+    report("ancienne boucle (verset par verset)", legacy, len(verses))
+    report("KeywordMatcher (verset par verset)",
+           best(lambda: [theological_db.analyze_keywords(t) for t in verses]), len(verses), legacy)
+    report("KeywordMatcher (un passage par chapitre)",
+           best(lambda: [theological_db.analyze_chapter(c) for c in chapters.values()]), len(verses), legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Débit concurrent de /api/generate-verse-by-verse
+
+Compare deux modes d'appel Gemini simulés (latence fixe, sans réseau) :
+- "bloquant" : ancien comportement, generate_content synchrone dans la boucle
+- "async"    : nouvel exécuteur (gemini_executor) non bloquant
+
+Pour chaque nombre de connexions simultanées, on mesure le débit (req/s)
+et la latence de /api/health pendant la charge. En mode bloquant le débit
+reste plat ; en mode async il croît avec le nombre de connexions.
+
+Usage : python bench_llm_concurrency.py [latence_secondes]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Clés factices pour activer le chemin Gemini (aucun appel réseau réel)
+os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+os.environ.setdefault("GEMINI_API_KEY_2", "bench-key-2")
+
+import httpx
+
+import gemini_executor as executor_module
+import server
+from cache_fallback_system import cache_fallback
+
+LLM_LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+CONNECTION_COUNTS = [1, 2, 4, 8, 16]
+REQUESTS_PER_CONNECTION = 2
+
+
+async def fake_async_dispatch(api_key, prompt, model_name):
+    await asyncio.sleep(LLM_LATENCY)
+    return "**VERSET 1**\n\n**TEXTE BIBLIQUE :**\nTexte\n\n**EXPLICATION THÉOLOGIQUE :**\nExplication"
+
+
+async def fake_blocking_dispatch(api_key, prompt, model_name):
+    time.sleep(LLM_LATENCY)  # Reproduit l'ancien appel synchrone dans la boucle
+    return "**VERSET 1**\n\n**TEXTE BIBLIQUE :**\nTexte\n\n**EXPLICATION THÉOLOGIQUE :**\nExplication"
+
+
+async def run_load(client, connections: int, offset: int):
+    counter = {"n": offset}
+
+    async def worker():
+        for _ in range(REQUESTS_PER_CONNECTION):
+            counter["n"] += 1
+            # Passage différent à chaque requête pour éviter le cache
+            passage = f"Psaumes {counter['n'] % 150 + 1}:{counter['n']}"
+            r = await client.post("/api/generate-verse-by-verse", json={"passage": passage})
+            assert r.status_code == 200, r.text
+
+    async def probe_health():
+        # Mesure depuis l'échéance prévue : inclut le temps où la boucle était bloquée
+        delay = LLM_LATENCY / 4
+        t0 = time.perf_counter()
+        await asyncio.sleep(delay)
+        await client.get("/api/health")
+        return time.perf_counter() - t0 - delay
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(probe_health(), *[worker() for _ in range(connections)])
+    elapsed = time.perf_counter() - t0
+    total = connections * REQUESTS_PER_CONNECTION
+    return total / elapsed, results[0]
+
+
+async def bench_mode(label: str, dispatch):
+    executor_module.gemini_executor._dispatch = dispatch
+    transport = httpx.ASGITransport(app=server.app)
+    offset = 0
+    print(f"\n=== Mode {label} (latence LLM simulée: {LLM_LATENCY}s) ===")
+    print(f"{'connexions':>10} | {'req/s':>8} | {'/api/health (s)':>15}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for connections in CONNECTION_COUNTS:
+            cache_fallback.cache.clear()
+            throughput, health_latency = await run_load(client, connections, offset)
+            offset += connections * REQUESTS_PER_CONNECTION
+            print(f"{connections:>10} | {throughput:>8.2f} | {health_latency:>15.3f}")
+
+
+async def main():
+    executor_module.gemini_executor.max_concurrency = max(CONNECTION_COUNTS)
+    await bench_mode("bloquant (avant)", fake_blocking_dispatch)
+    await bench_mode("async (après)", fake_async_dispatch)
+    print(f"\n📊 Exécuteur: {executor_module.gemini_executor.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
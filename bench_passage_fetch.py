@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Récupération d'un chapitre de 50 versets
+
+Serveur api.bible simulé en local (asyncio, latence fixe par requête) puis
+comparaison de trois chemins :
+1. Ancien : liste des versets + 1 requête séquentielle par verset,
+   nouveau client httpx à chaque verset (comme fetch_passage_text avant)
+2. Nouveau, appel groupé : /chapters/{id} puis découpage local
+3. Nouveau, repli : /chapters indisponible -> versets en parallèle (fan-out borné)
+
+Usage : python bench_passage_fetch.py [latence_ms]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+HOST, PORT = "127.0.0.1", 8765
+os.environ["BIBLE_API_BASE"] = f"http://{HOST}:{PORT}/v1"
+
+import httpx
+
+import bible_http
+import passage_engine
+import versification
+
+LATENCY = (float(sys.argv[1]) if len(sys.argv) > 1 else 20.0) / 1000
+BIBLE_ID = "bench-bible"
+OSIS, CHAPTER = "PSA", 78
+# Le repli parallèle construit les identifiants depuis la versification : le mock sert le même nombre
+VERSE_COUNT = versification.verse_count(OSIS, CHAPTER)
+
+state = {"bulk_enabled": True, "requests": 0}
+
+
+def _verse_text(n: int) -> str:
+    return f"Texte simulé du verset {n} pour la mesure de latence."
+
+
+def _route(path: str):
+    """Retourne (status, payload) pour un chemin api.bible simulé"""
+    path = path.split("?", 1)[0]
+    prefix = f"/v1/bibles/{BIBLE_ID}"
+    chapter_id = f"{OSIS}.{CHAPTER}"
+    if path == f"{prefix}/chapters/{chapter_id}/verses":
+        return 200, {"data": [{"id": f"{chapter_id}.{n}"} for n in range(1, VERSE_COUNT + 1)]}
+    if path == f"{prefix}/chapters/{chapter_id}":
+        if not state["bulk_enabled"]:
+            return 503, {"error": "bulk disabled"}
+        content = " ".join(f"[{n}] {_verse_text(n)}" for n in range(1, VERSE_COUNT + 1))
+        return 200, {"data": {"content": content}}
+    if path.startswith(f"{prefix}/verses/"):
+        n = int(path.rsplit(".", 1)[1])
+        return 200, {"data": {"content": _verse_text(n)}}
+    return 404, {"error": "not found"}
+
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            state["requests"] += 1
+            await asyncio.sleep(LATENCY)
+            path = request_line.decode().split(" ")[1]
+            status, payload = _route(path)
+            body = json.dumps(payload).encode()
+            writer.write(
+                f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+    except (ConnectionResetError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def old_path():
+    """Reproduction de l'ancien fetch_passage_text (N+1 requêtes séquentielles)"""
+    base = f"{bible_http.API_BASE}/bibles/{BIBLE_ID}"
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        r = await client.get(f"{base}/chapters/{OSIS}.{CHAPTER}/verses")
+        ids = [v["id"] for v in r.json()["data"]]
+    parts = []
+    for idx, vid in enumerate(ids, start=1):
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            r = await client.get(f"{base}/verses/{vid}", params={"content-type": "text"})
+            parts.append(f"{idx}. {r.json()['data']['content']}")
+    return parts
+
+
+async def _fetch_one(verse_id: str) -> str:
+    r = await bible_http.get(f"{bible_http.API_BASE}/bibles/{BIBLE_ID}/verses/{verse_id}")
+    return r.json()["data"]["content"]
+
+
+async def _list_ids():
+    r = await bible_http.get(f"{bible_http.API_BASE}/bibles/{BIBLE_ID}/chapters/{OSIS}.{CHAPTER}/verses")
+    return [v["id"] for v in r.json()["data"]]
+
+
+async def new_path():
+    verses = await passage_engine.fetch_passage_verses(
+        BIBLE_ID, OSIS, CHAPTER, headers={}, fetch_one=_fetch_one, list_ids=_list_ids
+    )
+    return [f"{n}. {t}" for n, t in verses.items()]
+
+
+async def measure(label: str, func, runs: int = 3):
+    timings = []
+    for _ in range(runs):
+        state["requests"] = 0
+        t0 = time.perf_counter()
+        parts = await func()
+        timings.append(time.perf_counter() - t0)
+        assert len(parts) == VERSE_COUNT, f"{label}: {len(parts)} versets"
+    best = min(timings)
+    print(f"{label:<42} | {best * 1000:>9.1f} ms | {state['requests']:>3} requêtes")
+    return best
+
+
+async def main():
+    server = await asyncio.start_server(handle_connection, HOST, PORT)
+    bible_http.RETRY_STATUSES.discard(503)  # Pas de retry sur le 503 simulé
+    print(f"📖 Chapitre simulé de {VERSE_COUNT} versets, latence serveur {LATENCY * 1000:.0f} ms/requête\n")
+    async with server, bible_http.client_lifespan():
+        old = await measure("Ancien (séquentiel, client par verset)", old_path)
+        state["bulk_enabled"] = True
+        bulk = await measure("Nouveau (appel groupé /chapters)", new_path)
+        state["bulk_enabled"] = False
+        fanout = await measure(f"Nouveau (repli parallèle, fan-out {passage_engine.PASSAGE_FANOUT})", new_path)
+    print(f"\n📊 Gain appel groupé : x{old / bulk:.1f} | gain repli parallèle : x{old / fanout:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
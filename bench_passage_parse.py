@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Analyse des références de passage
+
+Compare, sur un trafic de références écrites de plusieurs façons :
+- Ancien analyseur : regex compilée à chaque appel + table FR -> OSIS sans mémoïsation
+- parse_reference à froid (cache LRU vidé à chaque tour)
+- parse_reference à chaud (trafic répétitif, cas réel des serveurs)
+
+Vérifie aussi le corpus de référence (entrée -> clé attendue) et un corpus
+« fuzz » : variantes de casse, d'accents, d'espaces, d'ordinaux, d'abréviations
+et de version, qui doivent toutes donner la clé de la forme canonique.
+
+Usage : python bench_passage_parse.py [nombre_de_requêtes]
+"""
+
+import random
+import re
+import sys
+import time
+import unicodedata
+
+import passage_ref
+from passage_ref import BOOKS_FR_OSIS, parse_reference
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+ROUNDS = 5
+
+# (entrée, clé attendue ; None si la référence doit être refusée)
+CORPUS = [
+    ("Jean 3:16", "JHN.3.16"),
+    ("Jean 3", "JHN.3"),
+    ("Jean 3:1-36", "JHN.3"),
+    ("Jean 3.16", "JHN.3.16"),
+    ("Jn 3,16", "JHN.3.16"),
+    ("Jean 3:16,18", "JHN.3.16,3.18"),
+    ("Jean 3:16-18,20", "JHN.3.16-18,3.20"),
+    ("Jean 3,16-18; 4,1", "JHN.3.16-18,4.1"),
+    ("Jean 3:16-4:2", "JHN.3.16-4.2"),
+    ("Jean 3:16 – 18", "JHN.3.16-18"),
+    ("Jean 18-20", "JHN.18-20"),
+    ("Genèse 1:1-5 LSG", "GEN.1.1-5"),
+    ("Gn 1-3", "GEN.1-3"),
+    ("Ps 23 LSG", "PSA.23"),
+    ("Psaumes 119:1-176", "PSA.119"),
+    ("1 Rois 2", "1KI.2"),
+    ("I Rois 2", "1KI.2"),
+    ("1er Jean 4:7-12", "1JN.4.7-12"),
+    ("1ère Jean 1", "1JN.1"),
+    ("1jn 4:8", "1JN.4.8"),
+    ("Deuxième Corinthiens 5:17", "2CO.5.17"),
+    ("2 Co 5:17", "2CO.5.17"),
+    ("1re épître de Pierre 2:9", "1PE.2.9"),
+    ("Évangile selon Jean 1:1-5", "JHN.1.1-5"),
+    ("Épître aux Romains 8", "ROM.8"),
+    ("Rm 8:28,30-32", "ROM.8.28,8.30-32"),
+    ("Isaïe 53", "ISA.53"),
+    ("Esaïe 53:5", "ISA.53.5"),
+    ("Qohelet 3:1", "ECC.3.1"),
+    ("Actes des Apôtres 2:1", "ACT.2.1"),
+    ("Philip 4:13", "PHP.4.13"),
+    ("Jude 3", "JUD.1.3"),
+    ("Jude 1", "JUD.1"),
+    ("3 Jean 4", "3JN.1.4"),
+    ("Abdias 1:4", "OBA.1.4"),
+    ("Matthieu 5:10-1", "MAT.5.1-10"),
+    ("Jean", None),
+    ("Foo 3:1", None),
+    ("Jean 3:abc", None),
+    ("Jean 3:0", None),
+    ("Jean 0:1", None),
+    ("Genèse 0", None),
+    ("Genèse 51", None),
+    ("Gn 1-60", None),
+    ("Jean 3:37", None),
+    ("Jean 3:30-99", "JHN.3.30-36"),
+    ("", None),
+]
+
+# Variantes d'écriture du nom de livre (canonique -> variantes)
+BOOK_VARIANTS = {
+    "Genèse": ["genese", "GENÈSE", "Gn", "Gen"],
+    "Jean": ["jean", "JEAN", "Jn", "Évangile selon Jean"],
+    "1 Jean": ["1er Jean", "1re Jean", "1ère Jean", "I Jean", "1jean", "1 Jn", "Première Jean"],
+    "2 Corinthiens": ["2e Corinthiens", "2ème Corinthiens", "II Corinthiens", "Deuxième Corinthiens", "2 Co", "2co"],
+    "1 Rois": ["1er Rois", "I Rois", "1 R", "1rois"],
+    "Ésaïe": ["Esaïe", "Esaie", "Isaïe", "Es", "Is"],
+    "Psaumes": ["psaume", "Ps", "PSAUMES"],
+    "Romains": ["Rm", "Rom", "Épître aux Romains"],
+    "Apocalypse": ["Ap", "Apoc", "apocalypse"],
+    "Habakuk": ["Habacuc", "Ha"],
+}
+REF_VARIANTS = [
+    ("3:8", ["3.8", "3,8", "3 : 8", " 3:8 "]),  # verset présent dans tous les livres (Ps 3 : 8 versets)
+    ("1:1-5", ["1.1-5", "1,1-5", "1:1 - 5", "1:1–5", "1:5-1"]),
+    ("2", ["2 ", " 2"]),
+]
+VERSIONS = ["", " LSG", " Segond 1910", " NBS"]
+
+
+def fuzz_corpus(rng: random.Random):
+    """[(variante, forme canonique)] : chaque variante doit avoir la clé de la forme canonique"""
+    cases = []
+    for canonical_book, variants in BOOK_VARIANTS.items():
+        for ref, ref_variants in REF_VARIANTS:
+            canonical = f"{canonical_book} {ref}"
+            for book in [canonical_book] + variants:
+                for ref_variant in [ref] + ref_variants:
+                    cases.append((f"{book} {ref_variant.strip()}{rng.choice(VERSIONS)}", canonical))
+    return cases
+
+
+# --- Ancien analyseur (avant unification) ---
+
+def _legacy_norm(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = re.sub(r"[^a-zA-Z0-9 ]+", " ", s).lower()
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def legacy_parse(passage: str):
+    m = re.match(r"^\s*(\d?\s*[^\d\s].*?)[\s,.]*(\d+)(?:\s*[:.,]\s*(\d+)(?:\s*-\s*(\d+))?)?(?:\s+\S+.*)?$",
+                 passage or "")
+    if not m:
+        return None
+    key = _legacy_norm(m.group(1))
+    key = key.replace("er ", "1 ").replace("ere ", "1 ").replace("eme ", " ")
+    key = re.sub(r"^(\d)(?=[a-z])", r"\1 ", key)
+    osis = BOOKS_FR_OSIS.get(key)
+    if not osis:
+        return None
+    return osis, int(m.group(2)), m.group(3), m.group(4)
+
+
+def check_corpus() -> int:
+    failures = 0
+    for text, expected in CORPUS:
+        parsed = parse_reference(text)
+        got = parsed.key if parsed else None
+        if got != expected:
+            failures += 1
+            print(f"  ❌ {text!r}: attendu {expected}, obtenu {got}")
+    legacy_ok = sum(1 for text, expected in CORPUS if expected and legacy_parse(text))
+    print(f"Corpus : {len(CORPUS) - failures}/{len(CORPUS)} conformes "
+          f"(ancien analyseur : {legacy_ok}/{sum(1 for _, e in CORPUS if e)} références reconnues)")
+    return failures
+
+
+def check_fuzz(rng: random.Random) -> int:
+    failures = 0
+    cases = fuzz_corpus(rng)
+    for variant, canonical in cases:
+        expected = parse_reference(canonical)
+        parsed = parse_reference(variant)
+        if not expected or not parsed or parsed.key != expected.key:
+            failures += 1
+            print(f"  ❌ {variant!r} -> {parsed.key if parsed else None}, "
+                  f"attendu {expected.key if expected else None} ({canonical!r})")
+    print(f"Fuzz : {len(cases) - failures}/{len(cases)} variantes donnent la clé canonique")
+    return failures
+
+
+def bench(label: str, func, traffic, reset=None) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        if reset:
+            reset()
+        t0 = time.perf_counter()
+        for text in traffic:
+            func(text)
+        timings.append(time.perf_counter() - t0)
+    best = min(timings)
+    print(f"{label:<34} | {best * 1000:>9.1f} ms | {best / len(traffic) * 1e6:>7.2f} µs/réf")
+    return best
+
+
+def main():
+    rng = random.Random(42)
+    failures = check_corpus() + check_fuzz(rng)
+
+    # Trafic : références populaires (loi de puissance), écrites de plusieurs façons
+    population = [text for text, expected in CORPUS if expected] + [v for v, _ in fuzz_corpus(rng)]
+    weights = [1 / (rank + 1) for rank in range(len(population))]
+    traffic = rng.choices(population, weights=weights, k=REQUESTS)
+    print(f"\n{REQUESTS} références, {len(set(traffic))} écritures distinctes, meilleur de {ROUNDS} tours")
+    print(f"{'analyseur':<34} | {'total':>12} | {'moyenne':>12}")
+
+    def cold_reset():
+        parse_reference.cache_clear()
+        passage_ref.resolve_osis.cache_clear()
+
+    def cold(text):
+        # Chaque référence analysée comme si elle était nouvelle
+        parse_reference.cache_clear()
+        return parse_reference(text)
+
+    legacy = bench("ancien (regex + table)", legacy_parse, traffic)
+    bench("parse_reference à froid", cold, traffic, reset=cold_reset)
+    warm = bench("parse_reference à chaud (LRU)", parse_reference, traffic, reset=cold_reset)
+    print(f"{'':<34}   accélération x{legacy / warm:.1f} ; {parse_reference.cache_info()}")
+
+    if failures:
+        print(f"\n❌ {failures} échec(s)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Rendu des rubriques par modèles précompilés (rubric_templates)
+
+Registre mesuré : THEOLOGICAL_TEMPLATES de cache_fallback_system (8 rubriques).
+L'ancien code construisait à chaque appel un dict de toutes les f-strings puis
+n'en gardait qu'une : il est reproduit ici en générant, à partir des segments
+compilés, une fonction qui évalue toutes les f-strings du registre.
+
+Pour chaque méthode : durée moyenne d'un rendu et pic mémoire (tracemalloc).
+
+Usage : python bench_rubric_templates.py
+"""
+
+import time
+import tracemalloc
+
+from cache_fallback_system import THEOLOGICAL_TEMPLATES
+from rubric_templates import FILTERS
+
+CALLS = 20000
+VALUES = {"passage": "Genèse 1", "biblical_text": "1. Au commencement, Dieu créa les cieux et la terre."}
+_FILTER_NAMES = {func: name for name, func in FILTERS.items()}
+
+
+def legacy_function(registry):
+    """Fonction équivalente à l'ancien dict de f-strings réévalué à chaque appel"""
+    entries = []
+    for key, template in registry._templates.items():
+        parts = []
+        for literal, field, spec, apply in template.segments:
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is not None:
+                expr = f"{field}.{_FILTER_NAMES[apply]}()" if apply else field
+                parts.append("{" + expr + (":" + spec if spec else "") + "}")
+        entries.append(f"{key!r}: f{''.join(parts)!r}")
+    args = ", ".join(sorted(set().union(*(t.fields for t in registry._templates.values()))))
+    namespace = {}
+    exec(f"def legacy(key, {args}):\n    return {{{', '.join(entries)}}}.get(key)", namespace)
+    return namespace["legacy"]
+
+
+def measure(label, render, keys):
+    render(keys[0])
+    t0 = time.perf_counter()
+    for i in range(CALLS):
+        render(keys[i % len(keys)])
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    render(keys[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<36} | {elapsed / CALLS * 1e6:>7.2f} µs/rendu | pic {peak / 1024:>6.1f} Kio")
+    return elapsed
+
+
+def main():
+    registry = THEOLOGICAL_TEMPLATES
+    keys = list(registry._templates)
+    legacy = legacy_function(registry)
+    for key in keys:
+        assert legacy(key, **VALUES) == registry.render(key, **VALUES), key
+    print(f"{registry.name} : {len(keys)} modèles, {CALLS} rendus")
+    old = measure("dict de f-strings (ancien)", lambda k: legacy(k, **VALUES), keys)
+    new = measure("modèles précompilés", lambda k: registry.render(k, **VALUES), keys)
+    print(f"gain : x{old / new:.1f}")
+    print(registry.stats()["avg_render_us"], "µs/rendu mesurés par le registre")
+
+
+if __name__ == "__main__":
+    main()
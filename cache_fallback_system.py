@@ -10,63 +10,156 @@ import json
 import hashlib
 import time
 import os
-import requests
+import re
 import asyncio
+import httpx
 from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import bible_http
+import bible_store
+import passage_engine
+from passage_ref import Passage, PassageSpan, bucket_tokens, canonical_passage, parse_reference, resolve_osis
+from rubric_templates import TemplateRegistry
+from study_cache import create_study_cache
+from gemini_executor import gemini_executor, GeminiTimeoutError
+from key_scheduler import KeyScheduler, is_quota_error
 
 # Charger les variables d'environnement
 load_dotenv()
 
+# Repli Bible API : durée de vie courte, une panne Gemini passagère ne doit pas être servie 24 h
+FALLBACK_CACHE_TTL = float(os.getenv("STUDY_CACHE_FALLBACK_TTL_SECONDS", "600"))
+
+# Échecs Gemini passagers (clés en pause, quotas épuisés, timeout) : seuls à justifier un nouvel essai
+GEMINI_NO_KEY = "Toutes les clés Gemini épuisées"
+GEMINI_QUOTAS_EXHAUSTED = "Tous quotas Gemini épuisés"
+
+
+def is_gemini_unavailable(source: Optional[str]) -> bool:
+    """Vrai si l'échec de _try_gemini_with_rotation tient à la disponibilité des clés, pas à la requête"""
+    return bool(source) and (source in (GEMINI_NO_KEY, GEMINI_QUOTAS_EXHAUSTED) or source.endswith(" - timeout"))
+
+# Textes de repli par rubrique, compilés une fois : seul le texte de la rubrique demandée est rendu
+THEOLOGICAL_TEMPLATES = TemplateRegistry(
+    "rubriques_bible_api",
+    templates={
+        "Prière d'ouverture": """Père céleste, Creator de toutes choses, nous voici rassemblés devant la majesté de Ta Parole, le cœur débordant de reconnaissance pour cette grâce immense que Tu nous accordes. En ouvrant {passage}, nous pénétrons dans le sanctuaire de Ta révélation où chaque mot porte l'empreinte de Ta sagesse éternelle.
+
+{biblical_text}
+
+Comme les patriarches d'autrefois qui dressaient des autels partout où Tu te révélais à eux, nous érigeons aujourd'hui l'autel de notre attention respectueuse devant ces versets sacrés. Nous reconnaissons que sans l'illumination de Ton Saint-Esprit, nos yeux demeurent voilés et notre intelligence obscurcie. 
+
+Viens donc, Esprit de vérité, pénètre les profondeurs de nos âmes comme Tu scrutes les profondeurs de Dieu. Que cette étude ne soit pas un simple exercice intellectuel, mais une véritable rencontre transformatrice avec le Dieu vivant. Que Ta Parole soit pour nous aujourd'hui ce qu'elle fut pour les disciples d'Emmaüs : un feu qui brûle dans nos cœurs et ouvre notre compréhension.
+
+Nous Te prions de nous révéler les trésors cachés de {passage}, ces richesses spirituelles que seul l'Esprit peut dévoiler à ceux qui cherchent Ta face avec sincérité. Que notre étude porte des fruits durables pour Ta gloire et l'édification mutuelle, au nom précieux de Jésus-Christ notre Seigneur. Amen.""",
+
+        "Structure littéraire": """En contemplant {passage}, nous découvrons avec émerveillement l'architecture magistrale que l'Esprit Saint a tissée dans ce texte inspiré. Comme un artisan génial qui façonne son œuvre avec une précision millimétrique, Dieu a orchestré chaque phrase, chaque transition, chaque répétition pour créer une symphonie littéraire d'une beauté saisissante.
+
+{biblical_text}
+
+L'auteur sacré, guidé par l'inspiration divine, déploie devant nous une structure narrative qui dépasse de loin les simples considérations stylistiques. Chaque élément du texte trouve sa place dans un ensemble plus vaste, comme les pierres d'un temple qui s'élèvent selon un plan divin minutieusement conçu. Les répétitions ne sont pas des redondances, mais des refrains spirituels qui ancrent les vérités essentielles dans nos cœurs.
+
+Cette organisation littéraire révèle la pédagogie divine à l'œuvre : Dieu ne se contente pas de nous transmettre des informations, Il sculpte notre compréhension par la beauté même de sa révélation. La progression du récit nous conduit naturellement des réalités visibles vers les vérités invisibles, de l'historique vers l'éternel. Ainsi, la forme devient message, et la structure se fait révélation, nous enseignant que dans l'économie divine, la manière de dire est indissociable de ce qui est dit.""",
+
+        "Questions du chapitre précédent": """Aborder {passage} sans considérer le chemin parcouru dans les chapitres précédents reviendrait à contempler un tableau en ne regardant qu'un seul détail, perdant ainsi la vision d'ensemble que l'artiste a voulu créer. L'Écriture sainte se déploie comme une majestueuse cathédrale où chaque pierre trouve son sens dans l'architecture globale de la révélation.
+
+{biblical_text}
+
+Lorsque nous remontons le fil de la narration biblique, nous découvrons avec fascination comment Dieu prépare méthodiquement le terrain pour chaque nouvelle révélation. Les interrogations soulevées dans les passages antérieurs ne sont jamais laissées sans réponse, mais Dieu, dans sa sagesse infinie, choisit le moment propice pour dévoiler progressivement les facettes de sa vérité.
+
+Cette progression révélationnelle témoigne de la patience divine envers notre faiblesse humaine. Comme un père aimant qui adapte son enseignement à la capacité de compréhension de son enfant, Dieu nous conduit étape par étape vers une connaissance plus pleine de ses voies. Les questions d'hier deviennent les fondements des réponses d'aujourd'hui, et les mystères présents préparent les illuminations futures. Cette marche progressive dans la lumière divine cultive en nous l'humilité de l'apprenant et la confiance en Celui qui détient toute sagesse.""",
+
+        "Fondements théologiques": """L'étude des fondements théologiques de {passage} nous conduit au cœur des vérités essentielles qui sous-tendent toute l'architecture de la foi chrétienne. Ce texte, loin d'être un simple récit historique, constitue un pilier doctrinal majeur qui éclaire notre compréhension de Dieu et de son œuvre dans l'histoire.
+
+{biblical_text}
+
+Les fondements théologiques révélés dans ce passage touchent aux questions les plus profondes de l'existence : la nature de Dieu, sa souveraineté, sa justice et sa grâce. Chaque verset résonne avec les grandes doctrines de la foi, offrant un terrain solide sur lequel édifier notre compréhension spirituelle.
+
+Cette exploration doctrinale nous révèle comment les vérités éternelles s'incarnent dans des situations concrètes. Nous découvrons que la théologie n'est pas une discipline abstraite, mais une réalité vivante qui transforme notre vision du monde et notre relation avec le Créateur. Les enseignements qui émergent de ce texte continuent de nourrir la foi des croyants à travers les âges.""",
+
+        "Contexte historique": """Pour saisir pleinement la portée de {passage}, il est essentiel de plonger dans le contexte historique qui a vu naître ce texte remarquable. L'histoire n'est jamais neutre dans l'Écriture ; elle constitue le théâtre choisi par Dieu pour révéler sa volonté et accomplir ses desseins éternels.
+
+{biblical_text}
+
+L'époque qui encadre ces événements était marquée par des bouleversements politiques, sociaux et spirituels considérables. Dans ce tourbillon historique, Dieu continue d'œuvrer avec une précision divine, utilisant les circonstances humaines pour faire avancer son plan rédempteur. Les personnages de ce récit évoluent dans un monde complexe où les enjeux terrestres se mêlent aux réalités spirituelles.
+
+Cette analyse historique nous enseigne que Dieu n'est pas un observateur distant de l'histoire humaine, mais qu'il en est le souverain orchestrateur. Chaque détail historique mentionné dans ce passage contribue à notre compréhension plus large de la manière dont Dieu guide les événements vers l'accomplissement de ses promesses. Cette perspective historique enrichit considérablement notre appréciation du texte et de son message intemporel.""",
+
+        "Contexte culturel": """La richesse culturelle qui entoure {passage} ouvre des perspectives fascinantes sur la manière dont Dieu communique à travers les particularités de chaque époque. Les coutumes, les traditions et les mentalités de l'ancien monde constituent un prisme à travers lequel la révélation divine prend une couleur particulièrement éclatante.
+
+{biblical_text}
+
+Les pratiques culturelles de cette période révèlent des vérités profondes sur la nature humaine et sur la façon dont Dieu s'adapte aux réalités sociales de chaque génération. Les codes sociaux, les structures familiales et les traditions religieuses de l'époque offrent un cadre interprétatif précieux pour comprendre les enjeux spirituels sous-jacents.
+
+Cette immersion culturelle nous aide à franchir le pont qui sépare notre monde moderne de celui des auteurs bibliques. Elle nous révèle l'universalité du message divin qui transcende les barrières culturelles tout en s'incarnant dans des contextes spécifiques. Cette double dimension - universelle et particulière - témoigne de la sagesse divine dans la communication de sa Parole à l'humanité.""",
+
+        "Thème doctrinal": """Pénétrer dans les profondeurs doctrinales de {passage}, c'est s'aventurer dans les mines d'or de la vérité divine où chaque verset recèle des trésors théologiques d'une richesse inouïe. Ce texte, loin d'être un simple récit historique, constitue un pilier doctrinal qui soutient l'édifice entier de notre foi chrétienne.
+
+{biblical_text}
+
+L'enseignement doctrinal qui émane de ces versets nous confronte aux réalités les plus essentielles de l'existence : qui est Dieu, quelle est sa nature, comment s'articulent sa justice et sa miséricorde, et de quelle manière Il entre en relation avec sa création. Chaque doctrine biblique trouve ici des racines profondes qui nourrissent l'arbre entier de la théologie chrétienne.
+
+Cette exploration doctrinale révèle la cohérence parfaite de la révélation divine. Les vérités qui se dessinent dans ce passage résonnent harmonieusement avec l'ensemble des Écritures, confirmant que nous avons affaire à une révélation unique et unifiée. Plus nous scrutons ces profondeurs doctrinales, plus nous sommes saisis par la grandeur de Dieu et l'excellence de son plan éternel pour l'humanité.""",
+
+        "Analyse lexicale": """Les mots de {passage} portent en eux une puissance qui dépasse infiniment leur simple définition lexicographique. Chaque terme choisi par l'Esprit Saint résonne de harmoniques spirituelles qui enrichissent prodigieusement notre compréhension du message divin. L'étude approfondie du vocabulaire original nous ouvre les portes d'un trésor linguistique où chaque nuance révèle une facette nouvelle de la vérité révélée.
+
+{biblical_text}
+
+L'hébreu et le grec bibliques, ces langues sacrées choisies par la Providence pour véhiculer la révélation, possèdent une richesse sémantique qui défie toute traduction exhaustive. Derrière chaque mot se cache souvent un univers conceptuel entier, une histoire culturelle millénaire, des associations symboliques qui éclairent d'un jour nouveau le texte inspiré.
+
+Cette plongée dans les racines linguistiques du texte nous révèle la précision divine dans le choix des mots. Rien n'est laissé au hasard dans l'Écriture : chaque terme est pesé, chaque expression calculée pour transmettre exactement la nuance de vérité que Dieu souhaite communiquer. Cette analyse lexicale nous enseigne le respect minutieux que nous devons porter à chaque parole divine, car dans la bouche de Dieu, il n'existe pas de mot anodin.""",
+    },
+)
+
 class CacheFallbackSystem:
     def __init__(self):
         # Configuration des APIs avec rotation automatique
         self.bible_api_key = os.getenv("BIBLE_API_KEY")
         self.bible_id = os.getenv("BIBLE_ID", "a93a92589195411f-01")
         
-        # Configuration rotation Gemini Keys (ordre exact utilisateur)
+        # Configuration des clés Gemini (ordre de préférence utilisateur, limites surchargeables par clé)
         self.gemini_keys = [
-            {
-                "key": os.getenv("GEMINI_API_KEY_2"),  # PREMIER
-                "name": "Gemini Key 2 (Primary)",
-                "failed": False
-            },
-            {
-                "key": os.getenv("GEMINI_API_KEY"),   # DEUXIÈME  
-                "name": "Gemini Key 1 (Secondary)",
-                "failed": False
-            },
-            {
-                "key": os.getenv("GEMINI_API_KEY_3"),  # TROISIÈME
-                "name": "Gemini Key 3 (Tertiary)",
-                "failed": False
-            },
-            {
-                "key": os.getenv("GEMINI_API_KEY_4"),  # QUATRIÈME
-                "name": "Gemini Key 4 (Quaternary)",
-                "failed": False
-            }
+            self._gemini_key_config("GEMINI_API_KEY_2", "Gemini Key 2 (Primary)"),
+            self._gemini_key_config("GEMINI_API_KEY", "Gemini Key 1 (Secondary)"),
+            self._gemini_key_config("GEMINI_API_KEY_3", "Gemini Key 3 (Tertiary)"),
+            self._gemini_key_config("GEMINI_API_KEY_4", "Gemini Key 4 (Quaternary)"),
         ]
+        # Budgets RPM/RPD par clé, sélection de la moins chargée, refroidissement sur 429
+        self.key_scheduler = KeyScheduler(self.gemini_keys)
         
-        # Cache en mémoire (en production, utiliser Redis ou base de données)
-        self.cache = {}
+        # Cache à deux niveaux : mémoire LRU + SQLite persistant (survit aux redéploiements)
         self.cache_ttl = 3600 * 24  # 24 heures
+        self.cache = create_study_cache(ttl=self.cache_ttl)
         
-        # Compteurs de quota par clé
-        self.quota_tracker = {
-            "reset_date": datetime.now().date().isoformat(),
-            "current_key_index": 0  # Index de la clé actuellement utilisée
-        }
-        
-        print("✅ Cache & Fallback System initialized with KEY ROTATION")
-        print(f"📍 Primary Gemini Key: {self.gemini_keys[0]['name']}")
-        print(f"📍 Secondary Gemini Key: {self.gemini_keys[1]['name']}")
+        print("✅ Cache & Fallback System initialized with KEY SCHEDULER")
+        for key_info in self.key_scheduler.stats():
+            print(f"📍 {key_info['name']}: {key_info['status']} ({key_info['remaining_minute']}/{key_info['rpm']} rpm, "
+                  f"{key_info['remaining_day']}/{key_info['rpd']} rpd)")
         print(f"📍 Bible API fallback configured")
     
+    @staticmethod
+    def _gemini_key_config(env_name: str, name: str) -> Dict:
+        """Clé lue dans l'environnement ; limites optionnelles GEMINI_API_KEY_2_RPM / _RPD"""
+        return {
+            "key": os.getenv(env_name),
+            "name": name,
+            "rpm": os.getenv(f"{env_name}_RPM"),
+            "rpd": os.getenv(f"{env_name}_RPD"),
+        }
+    
     def _get_cache_key(self, passage: str, tokens: int, use_gemini: bool) -> str:
-        """Générer une clé de cache unique pour la requête"""
-        data = f"{passage}_{tokens}_{use_gemini}"
+        """
+        Générer une clé de cache unique pour la requête
+        Passage canonique (OSIS) et tokens par palier : "Genèse 1" / "Gen 1" / "genese 1 LSG"
+        partagent la même entrée.
+        """
+        data = f"{canonical_passage(passage)}_{bucket_tokens(tokens)}_{use_gemini}"
+        return hashlib.md5(data.encode()).hexdigest()
+    
+    def _get_rubric_cache_key(self, passage: str, rubric_index: int, tokens: int, use_gemini: bool) -> str:
+        """Clé de cache d'une rubrique isolée (génération en streaming)"""
+        data = f"rubric_{canonical_passage(passage)}_{rubric_index}_{bucket_tokens(tokens)}_{use_gemini}"
         return hashlib.md5(data.encode()).hexdigest()
     
     def _is_cache_valid(self, cache_entry: Dict) -> bool:
@@ -74,112 +167,78 @@ class CacheFallbackSystem:
         if not cache_entry:
             return False
         
+        # Entrées pré-générées (warm_cache.py) : expiration explicite, plus longue que le TTL
+        if "expires_at" in cache_entry:
+            return time.time() < cache_entry["expires_at"]
         cache_time = cache_entry.get("timestamp", 0)
         return (time.time() - cache_time) < self.cache_ttl
     
-    def _get_next_gemini_key(self) -> tuple:
+    def _get_next_gemini_key(self):
         """
-        Récupérer la prochaine clé Gemini disponible selon l'ordre utilisateur
-        Retourne: (key, key_name, key_index) ou (None, None, -1) si toutes échouées
+        Réserver la clé Gemini la moins chargée ayant encore du budget
+        Retourne la réservation (KeyState) ou None si aucune clé n'est utilisable maintenant
         """
-        
-        # Vérifier si c'est un nouveau jour (reset des échecs)
-        today = datetime.now().date().isoformat()
-        if self.quota_tracker["reset_date"] != today:
-            print("🔄 Nouveau jour - Reset des échecs de clés")
-            self.quota_tracker = {
-                "reset_date": today,
-                "current_key_index": 0
-            }
-            # Reset des échecs
-            for key_info in self.gemini_keys:
-                key_info["failed"] = False
-        
-        # Essayer les clés dans l'ordre (en commençant par l'index actuel)
-        for i in range(len(self.gemini_keys)):
-            key_index = (self.quota_tracker["current_key_index"] + i) % len(self.gemini_keys)
-            key_info = self.gemini_keys[key_index]
-            
-            if not key_info["failed"] and key_info["key"]:
-                print(f"🔑 Sélection clé: {key_info['name']} (Index {key_index})")
-                return key_info["key"], key_info["name"], key_index
-        
-        print("❌ Toutes les clés Gemini ont échoué")
-        return None, None, -1
-    
-    def _mark_key_failed(self, key_index: int):
-        """Marquer une clé comme ayant échoué et passer à la suivante"""
-        if 0 <= key_index < len(self.gemini_keys):
-            self.gemini_keys[key_index]["failed"] = True
-            print(f"🚫 Clé {self.gemini_keys[key_index]['name']} marquée comme échouée")
-            
-            # Passer à la clé suivante pour les prochains essais
-            self.quota_tracker["current_key_index"] = (key_index + 1) % len(self.gemini_keys)
-            print(f"🔄 Rotation vers index {self.quota_tracker['current_key_index']}")
+        lease = self.key_scheduler.acquire()
+        if lease is None:
+            wait = self.key_scheduler.next_available_in()
+            print(f"❌ Aucune clé Gemini disponible" + (f" (prochaine dans {wait:.0f}s)" if wait is not None else ""))
+            return None
+        print(f"🔑 Sélection clé: {lease.name} (Index {lease.index}, {lease.in_flight} en vol)")
+        return lease
     
     async def _try_gemini_with_rotation(self, prompt: str) -> tuple:
         """
-        Essayer Gemini avec rotation automatique des clés
+        Essayer Gemini sur la clé la moins chargée ; sur un 429, la clé part en
+        refroidissement et la suivante est essayée (au plus une fois par clé)
         Retourne: (content, source, success)
         """
-        
-        gemini_key, key_name, key_index = self._get_next_gemini_key()
-        
-        if not gemini_key:
-            return None, "Toutes les clés Gemini épuisées", False
-        
-        try:
-            print(f"🤖 Tentative Gemini avec {key_name}")
-            
-            # Configurer temporairement cette clé
-            import google.generativeai as genai
-            genai.configure(api_key=gemini_key)
+        for _ in range(len(self.gemini_keys)):
+            lease = self._get_next_gemini_key()
+            if lease is None:
+                return None, GEMINI_NO_KEY, False
+            key_name = lease.name
             
-            model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            response = model.generate_content(prompt)
-            
-            if response and response.text:
-                content = response.text.strip()
-                print(f"✅ Succès avec {key_name}: {len(content)} caractères")
-                
-                # Enregistrer le succès
-                self.log_api_call(key_name, True, len(content))
-                
-                return content, f"{key_name} (GRATUIT)", True
-            else:
-                print(f"⚠️ Réponse vide avec {key_name}")
-                self._mark_key_failed(key_index)
+            try:
+                print(f"🤖 Tentative Gemini avec {key_name}")
                 
-                # Enregistrer l'échec
-                self.log_api_call(key_name, False, 0, "Réponse vide")
+                # Appel asynchrone borné (ne bloque plus la boucle d'événements)
+                content = await gemini_executor.generate(lease.secret, prompt)
+            except GeminiTimeoutError as e:
+                # Timeout : la clé n'est pas en cause
+                print(f"⏱️ {e} avec {key_name}")
+                self.key_scheduler.release(lease, success=False)
+                self.log_api_call(key_name, False, 0, f"Timeout: {e}")
+                return None, f"{key_name} - timeout", False
+            except asyncio.CancelledError:
+                self.key_scheduler.release(lease, success=False)
+                raise
+            except Exception as e:
+                error_msg = str(e)
+                print(f"❌ Erreur avec {key_name}: {error_msg}")
                 
-                return None, f"{key_name} - réponse vide", False
+                if is_quota_error(error_msg):
+                    # Refroidissement du délai annoncé par l'API, puis clé suivante
+                    delay = self.key_scheduler.report_quota_error(lease, error_msg)
+                    self.log_api_call(key_name, False, 0, f"Quota dépassé (pause {delay:.0f}s): {error_msg}")
+                    continue
                 
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Erreur avec {key_name}: {error_msg}")
-            
-            # Vérifier si c'est une erreur de quota
-            if "429" in error_msg or "quota" in error_msg.lower() or "exceeded" in error_msg.lower():
-                print(f"🚫 Quota dépassé pour {key_name} - rotation automatique")
-                self._mark_key_failed(key_index)
-                
-                # Enregistrer l'échec de quota
-                self.log_api_call(key_name, False, 0, f"Quota dépassé: {error_msg}")
-                
-                # Essayer automatiquement la clé suivante
-                next_key, next_name, next_index = self._get_next_gemini_key()
-                if next_key:
-                    print(f"🔄 Tentative automatique avec {next_name}")
-                    return await self._try_gemini_with_rotation(prompt)
-                else:
-                    return None, "Tous quotas Gemini épuisés", False
-            else:
-                # Erreur non-quota, ne pas marquer comme échouée
-                # Enregistrer l'erreur
+                # Erreur non-quota : la clé reste utilisable
+                self.key_scheduler.release(lease, success=False)
                 self.log_api_call(key_name, False, 0, f"Erreur: {error_msg}")
-                
                 return None, f"{key_name} - erreur: {error_msg}", False
+            
+            if content:
+                print(f"✅ Succès avec {key_name}: {len(content)} caractères")
+                self.key_scheduler.release(lease, success=True)
+                self.log_api_call(key_name, True, len(content))
+                return content, f"{key_name} (GRATUIT)", True
+            
+            print(f"⚠️ Réponse vide avec {key_name}")
+            self.key_scheduler.release(lease, success=False)
+            self.log_api_call(key_name, False, 0, "Réponse vide")
+            return None, f"{key_name} - réponse vide", False
+        
+        return None, GEMINI_QUOTAS_EXHAUSTED, False
     
     async def get_biblical_text_fallback(self, passage: str) -> Dict:
         """
@@ -189,26 +248,13 @@ class CacheFallbackSystem:
         try:
             print(f"[BIBLE API] Tentative récupération du texte pour: {passage}")
             
-            if not self.bible_api_key:
-                print("[BIBLE API] Clé API manquante")
-                return {"error": "Bible API key not configured"}
-            
             # Parser le passage pour détecter les plages
             book, chapter, start_verse, end_verse = self._parse_passage(passage)
             
             print(f"[BIBLE API] Parsed: {book} ch.{chapter}, versets {start_verse}-{end_verse}")
             
-            # Mapping des livres français vers l'API Bible
-            book_mapping = {
-                "Genèse": "GEN", "Exode": "EXO", "Lévitique": "LEV", "Nombres": "NUM",
-                "Deutéronome": "DEU", "Josué": "JOS", "Juges": "JDG", "Ruth": "RUT",
-                "1 Samuel": "1SA", "2 Samuel": "2SA", "1 Rois": "1KI", "2 Rois": "2KI",
-                "Matthieu": "MAT", "Marc": "MRK", "Luc": "LUK", "Jean": "JHN",
-                "Actes": "ACT", "Romains": "ROM", "1 Corinthiens": "1CO", "2 Corinthiens": "2CO",
-                "Galates": "GAL", "Éphésiens": "EPH", "Philippiens": "PHP", "Colossiens": "COL"
-            }
-            
-            book_code = book_mapping.get(book, "GEN")
+            # Livre français -> code OSIS de l'API Bible
+            book_code = resolve_osis(book) or "GEN"
             
             # Essayer l'API Scripture Bible.com
             headers = {
@@ -229,65 +275,42 @@ class CacheFallbackSystem:
             
             print(f"[BIBLE API] Récupération versets {verses_to_fetch}")
             
+            # Bible locale d'abord : plage complète -> aucun appel réseau
+            source = "Bible API"
+            fetched = bible_store.lookup_verses(self.bible_id, book_code, chapter,
+                                                verses_to_fetch[0], verses_to_fetch[-1])
+            if len(fetched) == len(verses_to_fetch):
+                source = "Bible locale"
+            elif not self.bible_api_key:
+                print("[BIBLE API] Clé API manquante")
+                return {"error": "Bible API key not configured"}
+            else:
+                # Plage entière en un appel /passages, repli verset par verset en parallèle
+                fetched = await passage_engine.fetch_passage_verses(
+                    self.bible_id, book_code, chapter, verses_to_fetch[0], verses_to_fetch[-1],
+                    headers=headers,
+                    fetch_one=lambda verse_id: self._fetch_api_verse(verse_id, headers),
+                )
+            
             for i, actual_verse_number in enumerate(verses_to_fetch, 1):
-                verse_id = f"{book_code}.{chapter}.{actual_verse_number}"
-                url = f"https://api.scripture.api.bible/v1/bibles/{self.bible_id}/verses/{verse_id}"
-                
-                try:
-                    response = requests.get(url, headers=headers, timeout=10)
-                    
-                    if response.status_code == 200:
-                        verse_data = response.json()
-                        verse_content = verse_data.get("data", {}).get("content", "")
-                        
-                        # Nettoyer le contenu HTML
-                        import re
-                        clean_text = re.sub(r'<[^>]+>', '', verse_content).strip()
-                        
-                        if clean_text:
-                            print(f"[BIBLE API] ✅ Verset {actual_verse_number}: {clean_text[:50]}...")
-                            biblical_content.append({
-                                "verse_number": i,
-                                "text": clean_text,
-                                "reference": f"{book} {chapter}:{actual_verse_number}",
-                                "actual_verse": actual_verse_number
-                            })
-                        else:
-                            # Si pas de texte, utiliser le texte connu
-                            fallback_text = await self._get_known_verse_text(book, chapter, actual_verse_number)
-                            biblical_content.append({
-                                "verse_number": i,
-                                "text": fallback_text,
-                                "reference": f"{book} {chapter}:{actual_verse_number}",
-                                "actual_verse": actual_verse_number
-                            })
-                    else:
-                        print(f"[BIBLE API] ❌ Erreur verset {actual_verse_number}: HTTP {response.status_code}")
-                        # Utiliser le texte connu comme fallback
-                        fallback_text = await self._get_known_verse_text(book, chapter, actual_verse_number)
-                        biblical_content.append({
-                            "verse_number": i,
-                            "text": fallback_text,
-                            "reference": f"{book} {chapter}:{actual_verse_number}",
-                            "actual_verse": actual_verse_number
-                        })
-                        
-                except requests.exceptions.RequestException as e:
-                    print(f"[BIBLE API] ❌ Erreur réseau verset {actual_verse_number}: {e}")
-                    # Utiliser le texte connu comme fallback
-                    fallback_text = await self._get_known_verse_text(book, chapter, actual_verse_number)
-                    biblical_content.append({
-                        "verse_number": i,
-                        "text": fallback_text,
-                        "reference": f"{book} {chapter}:{actual_verse_number}",
-                        "actual_verse": actual_verse_number
-                    })
+                clean_text = fetched.get(actual_verse_number, "")
+                if clean_text:
+                    print(f"[BIBLE API] ✅ Verset {actual_verse_number}: {clean_text[:50]}...")
+                else:
+                    # Si pas de texte, utiliser le texte connu
+                    clean_text = await self._get_known_verse_text(book, chapter, actual_verse_number)
+                biblical_content.append({
+                    "verse_number": i,
+                    "text": clean_text,
+                    "reference": f"{book} {chapter}:{actual_verse_number}",
+                    "actual_verse": actual_verse_number
+                })
             
             if biblical_content:
                 print(f"[BIBLE API] ✅ {len(biblical_content)} versets récupérés avec succès")
                 return {
                     "success": True,
-                    "source": "Bible API",
+                    "source": source,
                     "content": biblical_content,
                     "passage": passage
                 }
@@ -298,9 +321,32 @@ class CacheFallbackSystem:
         print(f"[BIBLE API] ❌ Échec total pour {passage}")
         return {"error": f"Bible API fallback failed for {passage}"}
     
+    async def _fetch_api_verse(self, verse_id: str, headers: Dict) -> str:
+        """Récupérer un verset via /verses/{id} ; retourne "" en cas d'échec"""
+        url = f"{bible_http.API_BASE}/bibles/{self.bible_id}/verses/{verse_id}"
+        try:
+            response = await bible_http.get(url, headers=headers, timeout=10)
+            if response.status_code != 200:
+                print(f"[BIBLE API] ❌ Erreur verset {verse_id}: HTTP {response.status_code}")
+                return ""
+            verse_content = response.json().get("data", {}).get("content", "")
+            # Nettoyer le contenu HTML
+            return re.sub(r'<[^>]+>', '', verse_content).strip()
+        except httpx.HTTPError as e:
+            print(f"[BIBLE API] ❌ Erreur réseau verset {verse_id}: {e}")
+            return ""
+    
     async def _get_known_verse_text(self, book: str, chapter: str, verse_number: int) -> str:
         """Récupérer du texte biblique connu pour les passages populaires"""
         
+        # Bible locale (mmap) si installée : n'importe quel verset, sans réseau
+        book_code = resolve_osis(book)
+        if book_code:
+            local_text = bible_store.lookup_verses(self.bible_id, book_code, chapter,
+                                                   verse_number, verse_number).get(verse_number)
+            if local_text:
+                return local_text
+        
         # Base de données de versets connus (LSG) - ÉTENDUE
         known_verses = {
             "Genèse": {
@@ -351,38 +397,26 @@ class CacheFallbackSystem:
             # Texte générique mais scripturaire
             return f"Parole de Dieu pour {book} {chapter}:{verse_number} - Méditation sur la sagesse divine."
     
+    def _reference(self, passage: str) -> Optional[Passage]:
+        """parse_reference ; un nom de livre seul ("Jude", "Genèse") vaut son chapitre 1"""
+        parsed = parse_reference(passage or "")
+        if parsed is None:
+            osis = resolve_osis((passage or "").strip())
+            if osis:
+                parsed = Passage(osis, (PassageSpan(1),))
+        return parsed
+    
     def _parse_passage(self, passage: str) -> tuple:
         """
-        Parser un passage comme "Genèse 1:6-10" ou "Genèse 1"
+        Parser un passage comme "Genèse 1:6-10", "1 Rois 2" ou "Gn 1,6"
         Retourne: (book, chapter, start_verse, end_verse) ou (book, chapter, None, None)
         """
-        try:
-            # Séparer livre et reste
-            parts = passage.strip().split()
-            if len(parts) < 2:
-                return passage, "1", None, None
-            
-            book = parts[0]  # "Genèse"
-            chapter_verse = parts[1]  # "1:6-10" ou "1"
-            
-            # Séparer chapitre et versets
-            if ":" in chapter_verse:
-                chapter, verse_part = chapter_verse.split(":", 1)
-                
-                # Gérer les plages (6-10)
-                if "-" in verse_part:
-                    start_verse, end_verse = verse_part.split("-", 1)
-                    return book, chapter, int(start_verse), int(end_verse)
-                else:
-                    # Verset unique (Genèse 1:5)
-                    return book, chapter, int(verse_part), int(verse_part)
-            else:
-                # Pas de verset spécifié (Genèse 1)
-                return book, chapter_verse, None, None
-                
-        except Exception as e:
-            print(f"[PARSE ERROR] {passage}: {e}")
+        parsed = self._reference(passage)
+        if not parsed:
+            print(f"[PARSE ERROR] {passage}: référence non reconnue")
             return passage, "1", None, None
+        ref = parsed.ref
+        return parsed.book, str(ref.chapter), ref.start, ref.end
     
     async def _get_static_biblical_content_range(self, passage: str, start_verse: int, end_verse: int) -> Dict:
         """Générer du contenu biblique pour une plage de versets spécifique"""
@@ -416,9 +450,7 @@ class CacheFallbackSystem:
     async def _get_static_biblical_content(self, passage: str) -> Dict:
         """Générer du contenu biblique statique mais authentique"""
         
-        parts = passage.strip().split()
-        book = parts[0] if parts else "Genèse"
-        chapter = parts[1] if len(parts) > 1 else "1"
+        book, chapter, _, _ = self._parse_passage(passage)
         
         biblical_content = []
         
@@ -485,8 +517,8 @@ class CacheFallbackSystem:
             }
         }
         
-        # Déterminer le livre
-        book = passage.split()[0] if passage else "default"
+        # Déterminer le livre ("Gn 1", "2 Rois 3" : nom d'affichage de la référence)
+        book, chapter, _, _ = self._parse_passage(passage)
         template = theological_templates.get(book, theological_templates["default"])
         
         # Générer le contenu basé sur le nombre de tokens demandé
@@ -527,13 +559,9 @@ La richesse théologique de ce texte mérite une étude attentive pour en saisir
             for i in range(1, min(verse_count + 1, 6)):  # Max 5 versets
                 # Récupérer le texte connu de façon synchrone
                 try:
-                    parts = passage.split()
-                    book_name = parts[0] if parts else "Genèse"
-                    chapter_name = parts[1] if len(parts) > 1 else "1"
-                    
                     # Utiliser les versets connus
                     loop = asyncio.get_event_loop()
-                    verse_text = loop.run_until_complete(self._get_known_verse_text(book_name, chapter_name, i))
+                    verse_text = loop.run_until_complete(self._get_known_verse_text(book, chapter, i))
                 except:
                     verse_text = f"Parole de Dieu - {passage}:{i}"
                 
@@ -555,30 +583,11 @@ La richesse théologique de ce texte mérite une étude attentive pour en saisir
         
         return "\n\n".join(content_parts)
     
-    async def get_cached_or_generate(self, passage: str, tokens: int, use_gemini: bool, 
-                                   gemini_generator_func) -> Tuple[str, str, bool]:
-        """
-        Méthode principale avec rotation automatique des clés Gemini
-        Ordre : Gemini Key 2 → Gemini Key 1 → Bible API
-        Retourne: (content, source, from_cache)
-        """
-        
-        # 1. Vérifier le cache
-        cache_key = self._get_cache_key(passage, tokens, use_gemini)
-        cached_entry = self.cache.get(cache_key)
-        
-        if cached_entry and self._is_cache_valid(cached_entry):
-            print(f"📋 Cache HIT pour {passage}")
-            return cached_entry["content"], cached_entry.get("source", "Cache"), True
-        
-        # 2. Essayer les clés Gemini avec rotation automatique
-        if use_gemini:
-            print(f"🔑 Tentative rotation Gemini pour {passage}")
-            
-            # Construction du prompt pour Gemini
-            if ":" in passage:
-                # Plage de versets
-                prompt = f"""
+    def _verse_by_verse_prompt(self, passage: str) -> str:
+        """Prompt Gemini de l'étude verset par verset (partagé avec warm_cache.py)"""
+        if ":" in passage:
+            # Plage de versets
+            return f"""
 Analyse théologique approfondie du passage biblique : {passage}
 
 Fournissez une étude verset par verset avec le format exact suivant pour chaque verset :
@@ -592,10 +601,9 @@ Fournissez une étude verset par verset avec le format exact suivant pour chaque
 [analyse théologique approfondie de 120-180 mots]
 
 Assurez-vous que chaque verset a sa propre section distincte et complète.
-                """.strip()
-            else:
-                # Chapitre entier
-                prompt = f"""
+            """.strip()
+        # Chapitre entier
+        return f"""
 Analyse théologique approfondie du passage biblique : {passage}
 
 Fournissez une étude des 5 premiers versets avec le format exact suivant :
@@ -609,7 +617,29 @@ Fournissez une étude des 5 premiers versets avec le format exact suivant :
 [analyse théologique approfondie de 120-180 mots]
 
 Couvrez les versets 1 à 5 du chapitre {passage}.
-                """.strip()
+        """.strip()
+    
+    async def get_cached_or_generate(self, passage: str, tokens: int, use_gemini: bool, 
+                                   gemini_generator_func) -> Tuple[str, str, bool]:
+        """
+        Méthode principale avec rotation automatique des clés Gemini
+        Ordre : Gemini Key 2 → Gemini Key 1 → Bible API
+        Retourne: (content, source, from_cache)
+        """
+        
+        # 1. Vérifier le cache
+        cache_key = self._get_cache_key(passage, tokens, use_gemini)
+        cached_entry = self.cache.get(cache_key)
+        
+        if cached_entry and self._is_cache_valid(cached_entry):
+            print(f"📋 Cache HIT pour {passage}")
+            return cached_entry["content"], cached_entry.get("source", "Cache"), True
+        
+        # 2. Essayer les clés Gemini avec rotation automatique
+        if use_gemini:
+            print(f"🔑 Tentative rotation Gemini pour {passage}")
+            
+            prompt = self._verse_by_verse_prompt(passage)
             
             # Essayer avec rotation automatique
             gemini_content, gemini_source, success = await self._try_gemini_with_rotation(prompt)
@@ -662,176 +692,64 @@ Désolé, impossible de récupérer le contenu pour {passage}.
 Veuillez vérifier votre connexion et réessayer.
             """.strip()
             source = "Erreur - Toutes APIs échouées"
+            # Message d'erreur jamais mis en cache : la requête suivante retente les APIs
+            return fallback_content, source, False
         
-        # Mise en cache du fallback
-        self.cache[cache_key] = {
+        # Mise en cache du fallback, TTL court pour laisser Gemini reprendre la main
+        self.cache.set(cache_key, {
             "content": fallback_content,
             "timestamp": time.time(),
             "source": source
-        }
+        }, ttl=FALLBACK_CACHE_TTL)
         
         return fallback_content, source, False
     
-    async def generate_theological_content_with_bible_api(self, passage: str, rubrique_title: str, rubrique_index: int) -> str:
+    async def fetch_theological_biblical_text(self, passage: str) -> str:
+        """
+        Texte biblique servant de base aux rubriques théologiques (5 versets max)
+        Récupéré une seule fois par requête puis partagé entre les rubriques.
+        """
+        parsed = self._reference(passage)
+        if parsed is None:
+            print(f"[PARSING ERROR] Référence non reconnue: '{passage}'")
+            return ""
+        
+        # Premiers versets du premier chapitre cité : "Genèse 1" -> 1-5, "Jean 3:16,18" -> 16 et 18
+        chapter = parsed.chapter
+        verses = [verse for verse_chapter, verse in parsed.verses() if verse_chapter == chapter][:5]
+        if not verses:
+            return f"Texte de {passage}"
+        
+        # Récupérer le texte biblique via l'API
+        headers = {
+            "api-key": self.bible_api_key,
+            "accept": "application/json"
+        }
+        fetched = await passage_engine.fetch_passage_verses(
+            self.bible_id, parsed.osis, chapter, verses[0], verses[-1],
+            headers=headers,
+            fetch_one=lambda verse_id: self._fetch_api_verse(verse_id, headers),
+        )
+        biblical_texts = [f"{verse_num}. {fetched[verse_num]}" for verse_num in verses if fetched.get(verse_num)]
+        
+        return "\n".join(biblical_texts) if biblical_texts else f"Texte de {passage}"
+    
+    async def generate_theological_content_with_bible_api(self, passage: str, rubrique_title: str, rubrique_index: int,
+                                                          biblical_text: Optional[str] = None) -> str:
         """
         Générer du contenu théologique en utilisant la Bible API pour le texte et une analyse théologique basique
+        biblical_text : texte déjà récupéré (évite un appel API par rubrique)
         """
         try:
             print(f"[BIBLE API THÉOLOGIQUE] Génération pour {passage} - {rubrique_title}")
             
-            # 1. Récupérer le texte biblique authentique
-            biblical_text = ""
+            # 1. Récupérer le texte biblique authentique (sauf s'il est fourni)
+            if biblical_text is None:
+                biblical_text = await self.fetch_theological_biblical_text(passage)
             
-            # Parsing intelligent pour gérer "2 Rois 1", "1 Chroniques 5", etc.
-            parts = passage.split(" ")
-            if len(parts) >= 3 and parts[0].isdigit():  # Ex: "2 Rois 1"
-                book = " ".join(parts[:2])  # "2 Rois"
-                chapter_info = " ".join(parts[2:])  # "1"
-            else:  # Ex: "Genèse 1"
-                book, chapter_info = passage.split(" ", 1)
-            
-            if ":" in chapter_info:
-                chapter, verse_range = chapter_info.split(":", 1)
-            else:
-                chapter = chapter_info.strip()
-                verse_range = "1-5"  # Par défaut
-            
-            try:
-                chapter = int(chapter)
-            except ValueError:
-                print(f"[PARSING ERROR] Cannot convert '{chapter}' to int from '{passage}'")
-                chapter = 1  # Fallback
-            
-            # Récupérer le texte biblique via l'API
-            book_code = self._get_book_code(book)
-            if book_code:
-                headers = {
-                    "api-key": self.bible_api_key,
-                    "accept": "application/json"
-                }
-                
-                # Pour simplicité, récupérer le chapitre entier ou les premiers versets
-                if "-" in verse_range:
-                    start_verse, end_verse = map(int, verse_range.split("-"))
-                    verses = list(range(start_verse, min(end_verse + 1, start_verse + 5)))
-                else:
-                    verses = [int(verse_range)]
-                
-                biblical_texts = []
-                for verse_num in verses:
-                    verse_id = f"{book_code}.{chapter}.{verse_num}"
-                    url = f"https://api.scripture.api.bible/v1/bibles/{self.bible_id}/verses/{verse_id}"
-                    
-                    try:
-                        response = requests.get(url, headers=headers, timeout=10)
-                        if response.status_code == 200:
-                            verse_data = response.json()
-                            verse_content = verse_data.get("data", {}).get("content", "")
-                            
-                            # Nettoyer le HTML
-                            import re
-                            clean_text = re.sub(r'<[^>]+>', '', verse_content).strip()
-                            if clean_text:
-                                biblical_texts.append(f"{verse_num}. {clean_text}")
-                    except:
-                        continue
-                
-                biblical_text = "\n".join(biblical_texts) if biblical_texts else f"Texte de {passage}"
-            
-            # 2. Générer une analyse théologique basée sur le type de rubrique
-            theological_analyses = {
-                "Prière d'ouverture": f"""
-Père céleste, Creator de toutes choses, nous voici rassemblés devant la majesté de Ta Parole, le cœur débordant de reconnaissance pour cette grâce immense que Tu nous accordes. En ouvrant {passage}, nous pénétrons dans le sanctuaire de Ta révélation où chaque mot porte l'empreinte de Ta sagesse éternelle.
-
-{biblical_text}
-
-Comme les patriarches d'autrefois qui dressaient des autels partout où Tu te révélais à eux, nous érigeons aujourd'hui l'autel de notre attention respectueuse devant ces versets sacrés. Nous reconnaissons que sans l'illumination de Ton Saint-Esprit, nos yeux demeurent voilés et notre intelligence obscurcie. 
-
-Viens donc, Esprit de vérité, pénètre les profondeurs de nos âmes comme Tu scrutes les profondeurs de Dieu. Que cette étude ne soit pas un simple exercice intellectuel, mais une véritable rencontre transformatrice avec le Dieu vivant. Que Ta Parole soit pour nous aujourd'hui ce qu'elle fut pour les disciples d'Emmaüs : un feu qui brûle dans nos cœurs et ouvre notre compréhension.
-
-Nous Te prions de nous révéler les trésors cachés de {passage}, ces richesses spirituelles que seul l'Esprit peut dévoiler à ceux qui cherchent Ta face avec sincérité. Que notre étude porte des fruits durables pour Ta gloire et l'édification mutuelle, au nom précieux de Jésus-Christ notre Seigneur. Amen.
-                """,
-                
-                "Structure littéraire": f"""
-En contemplant {passage}, nous découvrons avec émerveillement l'architecture magistrale que l'Esprit Saint a tissée dans ce texte inspiré. Comme un artisan génial qui façonne son œuvre avec une précision millimétrique, Dieu a orchestré chaque phrase, chaque transition, chaque répétition pour créer une symphonie littéraire d'une beauté saisissante.
-
-{biblical_text}
-
-L'auteur sacré, guidé par l'inspiration divine, déploie devant nous une structure narrative qui dépasse de loin les simples considérations stylistiques. Chaque élément du texte trouve sa place dans un ensemble plus vaste, comme les pierres d'un temple qui s'élèvent selon un plan divin minutieusement conçu. Les répétitions ne sont pas des redondances, mais des refrains spirituels qui ancrent les vérités essentielles dans nos cœurs.
-
-Cette organisation littéraire révèle la pédagogie divine à l'œuvre : Dieu ne se contente pas de nous transmettre des informations, Il sculpte notre compréhension par la beauté même de sa révélation. La progression du récit nous conduit naturellement des réalités visibles vers les vérités invisibles, de l'historique vers l'éternel. Ainsi, la forme devient message, et la structure se fait révélation, nous enseignant que dans l'économie divine, la manière de dire est indissociable de ce qui est dit.
-                """,
-                
-                "Questions du chapitre précédent": f"""
-Aborder {passage} sans considérer le chemin parcouru dans les chapitres précédents reviendrait à contempler un tableau en ne regardant qu'un seul détail, perdant ainsi la vision d'ensemble que l'artiste a voulu créer. L'Écriture sainte se déploie comme une majestueuse cathédrale où chaque pierre trouve son sens dans l'architecture globale de la révélation.
-
-{biblical_text}
-
-Lorsque nous remontons le fil de la narration biblique, nous découvrons avec fascination comment Dieu prépare méthodiquement le terrain pour chaque nouvelle révélation. Les interrogations soulevées dans les passages antérieurs ne sont jamais laissées sans réponse, mais Dieu, dans sa sagesse infinie, choisit le moment propice pour dévoiler progressivement les facettes de sa vérité.
-
-Cette progression révélationnelle témoigne de la patience divine envers notre faiblesse humaine. Comme un père aimant qui adapte son enseignement à la capacité de compréhension de son enfant, Dieu nous conduit étape par étape vers une connaissance plus pleine de ses voies. Les questions d'hier deviennent les fondements des réponses d'aujourd'hui, et les mystères présents préparent les illuminations futures. Cette marche progressive dans la lumière divine cultive en nous l'humilité de l'apprenant et la confiance en Celui qui détient toute sagesse.
-                """
-            }
-            
-            # Ajouter plus de rubriques spécifiques pour éviter la répétition
-            theological_analyses.update({
-                "Fondements théologiques": f"""
-L'étude des fondements théologiques de {passage} nous conduit au cœur des vérités essentielles qui sous-tendent toute l'architecture de la foi chrétienne. Ce texte, loin d'être un simple récit historique, constitue un pilier doctrinal majeur qui éclaire notre compréhension de Dieu et de son œuvre dans l'histoire.
-
-{biblical_text}
-
-Les fondements théologiques révélés dans ce passage touchent aux questions les plus profondes de l'existence : la nature de Dieu, sa souveraineté, sa justice et sa grâce. Chaque verset résonne avec les grandes doctrines de la foi, offrant un terrain solide sur lequel édifier notre compréhension spirituelle.
-
-Cette exploration doctrinale nous révèle comment les vérités éternelles s'incarnent dans des situations concrètes. Nous découvrons que la théologie n'est pas une discipline abstraite, mais une réalité vivante qui transforme notre vision du monde et notre relation avec le Créateur. Les enseignements qui émergent de ce texte continuent de nourrir la foi des croyants à travers les âges.
-                """,
-                
-                "Contexte historique": f"""
-Pour saisir pleinement la portée de {passage}, il est essentiel de plonger dans le contexte historique qui a vu naître ce texte remarquable. L'histoire n'est jamais neutre dans l'Écriture ; elle constitue le théâtre choisi par Dieu pour révéler sa volonté et accomplir ses desseins éternels.
-
-{biblical_text}
-
-L'époque qui encadre ces événements était marquée par des bouleversements politiques, sociaux et spirituels considérables. Dans ce tourbillon historique, Dieu continue d'œuvrer avec une précision divine, utilisant les circonstances humaines pour faire avancer son plan rédempteur. Les personnages de ce récit évoluent dans un monde complexe où les enjeux terrestres se mêlent aux réalités spirituelles.
-
-Cette analyse historique nous enseigne que Dieu n'est pas un observateur distant de l'histoire humaine, mais qu'il en est le souverain orchestrateur. Chaque détail historique mentionné dans ce passage contribue à notre compréhension plus large de la manière dont Dieu guide les événements vers l'accomplissement de ses promesses. Cette perspective historique enrichit considérablement notre appréciation du texte et de son message intemporel.
-                """,
-                
-                "Contexte culturel": f"""
-La richesse culturelle qui entoure {passage} ouvre des perspectives fascinantes sur la manière dont Dieu communique à travers les particularités de chaque époque. Les coutumes, les traditions et les mentalités de l'ancien monde constituent un prisme à travers lequel la révélation divine prend une couleur particulièrement éclatante.
-
-{biblical_text}
-
-Les pratiques culturelles de cette période révèlent des vérités profondes sur la nature humaine et sur la façon dont Dieu s'adapte aux réalités sociales de chaque génération. Les codes sociaux, les structures familiales et les traditions religieuses de l'époque offrent un cadre interprétatif précieux pour comprendre les enjeux spirituels sous-jacents.
-
-Cette immersion culturelle nous aide à franchir le pont qui sépare notre monde moderne de celui des auteurs bibliques. Elle nous révèle l'universalité du message divin qui transcende les barrières culturelles tout en s'incarnant dans des contextes spécifiques. Cette double dimension - universelle et particulière - témoigne de la sagesse divine dans la communication de sa Parole à l'humanité.
-                """
-            })
-            
-            # Ajouter encore plus de rubriques narratives
-            theological_analyses.update({
-                "Thème doctrinal": f"""
-Pénétrer dans les profondeurs doctrinales de {passage}, c'est s'aventurer dans les mines d'or de la vérité divine où chaque verset recèle des trésors théologiques d'une richesse inouïe. Ce texte, loin d'être un simple récit historique, constitue un pilier doctrinal qui soutient l'édifice entier de notre foi chrétienne.
-
-{biblical_text}
-
-L'enseignement doctrinal qui émane de ces versets nous confronte aux réalités les plus essentielles de l'existence : qui est Dieu, quelle est sa nature, comment s'articulent sa justice et sa miséricorde, et de quelle manière Il entre en relation avec sa création. Chaque doctrine biblique trouve ici des racines profondes qui nourrissent l'arbre entier de la théologie chrétienne.
-
-Cette exploration doctrinale révèle la cohérence parfaite de la révélation divine. Les vérités qui se dessinent dans ce passage résonnent harmonieusement avec l'ensemble des Écritures, confirmant que nous avons affaire à une révélation unique et unifiée. Plus nous scrutons ces profondeurs doctrinales, plus nous sommes saisis par la grandeur de Dieu et l'excellence de son plan éternel pour l'humanité.
-                """,
-                
-                "Analyse lexicale": f"""
-Les mots de {passage} portent en eux une puissance qui dépasse infiniment leur simple définition lexicographique. Chaque terme choisi par l'Esprit Saint résonne de harmoniques spirituelles qui enrichissent prodigieusement notre compréhension du message divin. L'étude approfondie du vocabulaire original nous ouvre les portes d'un trésor linguistique où chaque nuance révèle une facette nouvelle de la vérité révélée.
-
-{biblical_text}
-
-L'hébreu et le grec bibliques, ces langues sacrées choisies par la Providence pour véhiculer la révélation, possèdent une richesse sémantique qui défie toute traduction exhaustive. Derrière chaque mot se cache souvent un univers conceptuel entier, une histoire culturelle millénaire, des associations symboliques qui éclairent d'un jour nouveau le texte inspiré.
-
-Cette plongée dans les racines linguistiques du texte nous révèle la précision divine dans le choix des mots. Rien n'est laissé au hasard dans l'Écriture : chaque terme est pesé, chaque expression calculée pour transmettre exactement la nuance de vérité que Dieu souhaite communiquer. Cette analyse lexicale nous enseigne le respect minutieux que nous devons porter à chaque parole divine, car dans la bouche de Dieu, il n'existe pas de mot anodin.
-                """
-            })
-            
-            # Utiliser l'analyse spécifique ou créer du contenu adapté
-            if rubrique_title in theological_analyses:
-                content = theological_analyses[rubrique_title]
+            # 2. Analyse théologique de la rubrique : seul son modèle est rendu
+            if rubrique_title in THEOLOGICAL_TEMPLATES:
+                content = THEOLOGICAL_TEMPLATES.render(rubrique_title, passage=passage, biblical_text=biblical_text)
             else:
                 # Générer du contenu spécifique basé sur le titre de la rubrique
                 content = self._generate_specific_rubrique_content(passage, rubrique_title, biblical_text)
@@ -915,39 +833,29 @@ Cette analyse {theme} contribue ainsi à notre édification spirituelle et à no
     
     def _get_book_code(self, book: str) -> str:
         """Obtenir le code de livre pour l'API Bible"""
-        book_codes = {
-            "Genèse": "GEN", "Exode": "EXO", "Lévitique": "LEV",
-            "Matthieu": "MAT", "Marc": "MRK", "Luc": "LUK", "Jean": "JHN",
-            "Romains": "ROM", "Psaumes": "PSA", "Apocalypse": "REV"
-        }
-        return book_codes.get(book)
+        return resolve_osis(book)
     
     def _check_gemini_quota(self) -> Tuple[bool, str]:
         """
         Vérifier l'état des quotas Gemini
         Retourne: (quota_ok, message)
         """
-        available_keys = []
-        failed_keys = []
-        
-        for key_info in self.gemini_keys:
-            if key_info.get("key") and not key_info.get("failed", False):
-                available_keys.append(key_info["name"])
-            else:
-                failed_keys.append(key_info["name"])
+        available_keys, unavailable_keys = self.key_scheduler.available_keys()
         
         if available_keys:
             quota_msg = f"Clés disponibles: {', '.join(available_keys)}"
-            if failed_keys:
-                quota_msg += f" | Clés épuisées: {', '.join(failed_keys)}"
+            if unavailable_keys:
+                quota_msg += f" | Clés en pause ou épuisées: {', '.join(unavailable_keys)}"
             return True, quota_msg
         else:
-            return False, f"Toutes clés Gemini épuisées: {', '.join([k['name'] for k in self.gemini_keys])}"
+            wait = self.key_scheduler.next_available_in()
+            suffix = f" (prochaine dans {wait:.0f}s)" if wait is not None else ""
+            return False, f"Toutes clés Gemini épuisées: {', '.join(unavailable_keys)}{suffix}"
     
     def get_api_status(self) -> Dict:
         """
         Obtenir le statut en temps réel de toutes les API avec historique détaillé
-        Retourne un dictionnaire avec le statut de chaque API
+        Retourne un dictionnaire avec le statut de chaque API et le budget restant de chaque clé
         """
         status = {
             "timestamp": datetime.now().isoformat(),
@@ -955,17 +863,17 @@ Cette analyse {theme} contribue ainsi à notre édification spirituelle et à no
             "call_history": getattr(self, "call_history", [])
         }
         
-        # Statut des clés Gemini
-        for i, key_info in enumerate(self.gemini_keys):
-            api_key = f"gemini_{i+1}"
-            status["apis"][api_key] = {
+        # Statut et budget des clés Gemini
+        colors = {"available": "green", "rate_limited": "orange", "cooldown": "orange"}
+        for i, (key_info, budget) in enumerate(zip(self.gemini_keys, self.key_scheduler.stats())):
+            status["apis"][f"gemini_{i+1}"] = {
                 "name": key_info["name"],
-                "status": "available" if not key_info.get("failed", False) else "quota_exceeded",
-                "color": "green" if not key_info.get("failed", False) else "red",
+                "color": colors.get(budget["status"], "red"),
                 "last_error": key_info.get("last_error", None),
                 "last_used": key_info.get("last_used", None),
                 "success_count": key_info.get("success_count", 0),
-                "error_count": key_info.get("error_count", 0)
+                "error_count": key_info.get("error_count", 0),
+                **{k: v for k, v in budget.items() if k != "name"},
             }
         
         # Statut Bible API
@@ -980,12 +888,9 @@ Cette analyse {theme} contribue ainsi à notre édification spirituelle et à no
             "error_count": bible_stats.get("error_count", 0)
         }
         
-        # API actuellement active
-        current_index = self.quota_tracker.get("current_key_index", 0)
-        if current_index < len(self.gemini_keys):
-            status["active_api"] = f"gemini_{current_index+1}"
-        else:
-            status["active_api"] = "bible_api"
+        # API qui servirait la prochaine requête
+        next_key = self.key_scheduler.peek()
+        status["active_api"] = f"gemini_{next_key.index+1}" if next_key else "bible_api"
             
         return status
     
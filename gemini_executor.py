@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Exécuteur asynchrone pour les appels Gemini
+- Les appels LLM ne bloquent plus la boucle d'événements uvicorn
+- Concurrence bornée (sémaphore) et timeout par appel
+- Annulation propagée à l'appel en cours
+- Compteurs en temps réel (requêtes en vol, timeouts, annulations)
+
+SDK historique (google.generativeai, synchrone, dans un pool de threads) :
+- genai.configure est global et le modèle ne résout son client qu'au moment de
+  generate_content : chaque clé a donc son propre client, attaché au modèle
+- asyncio.wait_for n'interrompt pas un thread : un appel expiré continue jusqu'au
+  timeout transmis au SDK (request_options) et occupe son thread jusque-là. Le pool
+  est dimensionné au-delà de max_concurrency (GEMINI_LEGACY_POOL_SIZE) pour que ces
+  appels abandonnés ne bloquent pas les suivants ; "legacy_threads_busy" les compte
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+# SDK asynchrone (google-genai) : un client par clé, sans état global
+try:
+    from google import genai as google_genai
+    ASYNC_SDK_AVAILABLE = True
+except Exception:
+    google_genai = None
+    ASYNC_SDK_AVAILABLE = False
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+DEFAULT_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+# Threads du SDK historique : appels en cours + appels expirés pas encore terminés (0 : 2 x max_concurrency)
+LEGACY_POOL_SIZE = int(os.getenv("GEMINI_LEGACY_POOL_SIZE", "0"))
+
+
+class GeminiTimeoutError(Exception):
+    """Levée quand un appel Gemini dépasse le timeout configuré"""
+
+
+class GeminiExecutor:
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT, model_name: str = DEFAULT_MODEL,
+                 legacy_pool_size: Optional[int] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.model_name = model_name
+
+        # Le sémaphore est créé à la première utilisation (dans la boucle active)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._clients: Dict[str, object] = {}
+
+        # Pool de threads pour le SDK historique (google.generativeai, synchrone) :
+        # marge au-delà du sémaphore pour les appels expirés encore en cours
+        self.legacy_pool_size = max(self.max_concurrency,
+                                    legacy_pool_size or LEGACY_POOL_SIZE or 2 * self.max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=self.legacy_pool_size,
+                                        thread_name_prefix="gemini")
+        self._legacy_lock = threading.Lock()
+        self._legacy_clients: Dict[str, object] = {}
+        self._legacy_busy = 0
+
+        self.stats_counters = {
+            "in_flight": 0,
+            "waiting": 0,
+            "completed": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+            "total_latency": 0.0,
+        }
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _get_client(self, api_key: str):
+        """Un client google-genai par clé (pas de genai.configure global)"""
+        client = self._clients.get(api_key)
+        if client is None:
+            client = google_genai.Client(api_key=api_key)
+            self._clients[api_key] = client
+        return client
+
+    async def _call_async_sdk(self, api_key: str, prompt: str, model_name: str) -> str:
+        client = self._get_client(api_key)
+        response = await client.aio.models.generate_content(model=model_name, contents=prompt)
+        return (response.text or "") if response else ""
+
+    def _get_legacy_client(self, api_key: str):
+        """Client GenerativeService propre à la clé, sans passer par genai.configure (global)"""
+        from google.generativeai import client as genai_client
+
+        with self._legacy_lock:
+            client = self._legacy_clients.get(api_key)
+            if client is None:
+                manager = genai_client._ClientManager()
+                manager.configure(api_key=api_key)
+                client = manager.get_default_client("generative")
+                self._legacy_clients[api_key] = client
+        return client
+
+    def _call_legacy_sdk(self, api_key: str, prompt: str, model_name: str, timeout: float) -> str:
+        """Chemin synchrone exécuté dans le pool de threads"""
+        import google.generativeai as genai
+
+        with self._legacy_lock:
+            self._legacy_busy += 1
+        try:
+            # Le modèle utiliserait sinon le client global du moment de l'appel,
+            # peut-être configuré entre-temps avec la clé d'un autre appel
+            model = genai.GenerativeModel(model_name)
+            model._client = self._get_legacy_client(api_key)
+            response = model.generate_content(prompt, request_options={"timeout": timeout})
+            return (response.text or "") if response else ""
+        finally:
+            with self._legacy_lock:
+                self._legacy_busy -= 1
+
+    async def _dispatch(self, api_key: str, prompt: str, model_name: str, timeout: float) -> str:
+        if ASYNC_SDK_AVAILABLE:
+            return await self._call_async_sdk(api_key, prompt, model_name)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._call_legacy_sdk, api_key, prompt, model_name, timeout)
+
+    async def generate(self, api_key: str, prompt: str, model_name: Optional[str] = None,
+                       timeout: Optional[float] = None) -> str:
+        """
+        Générer du contenu sans bloquer la boucle d'événements
+        Lève GeminiTimeoutError si le timeout est dépassé ; l'annulation de la
+        tâche appelante annule l'appel en cours.
+        """
+        model_name = model_name or self.model_name
+        timeout = self.timeout if timeout is None else timeout
+        counters = self.stats_counters
+
+        counters["waiting"] += 1
+        try:
+            await self._get_semaphore().acquire()
+        finally:
+            counters["waiting"] -= 1
+
+        counters["in_flight"] += 1
+        started = time.perf_counter()
+        try:
+            content = await asyncio.wait_for(self._dispatch(api_key, prompt, model_name, timeout), timeout=timeout)
+            counters["completed"] += 1
+            return content.strip()
+        except asyncio.TimeoutError:
+            counters["timeouts"] += 1
+            raise GeminiTimeoutError(f"Timeout Gemini après {timeout:g}s")
+        except asyncio.CancelledError:
+            counters["cancelled"] += 1
+            raise
+        except Exception:
+            counters["errors"] += 1
+            raise
+        finally:
+            counters["in_flight"] -= 1
+            counters["total_latency"] += time.perf_counter() - started
+            self._get_semaphore().release()
+
+    def stats(self) -> Dict:
+        """Statistiques en temps réel pour /api/health et /api/cache-stats"""
+        counters = self.stats_counters
+        finished = counters["completed"] + counters["errors"] + counters["timeouts"] + counters["cancelled"]
+        return {
+            "backend": "google-genai (async)" if ASYNC_SDK_AVAILABLE else "google-generativeai (thread pool)",
+            "in_flight": counters["in_flight"],
+            "waiting": counters["waiting"],
+            "max_concurrency": self.max_concurrency,
+            "legacy_pool_size": self.legacy_pool_size,
+            "legacy_threads_busy": self._legacy_busy,
+            "timeout_seconds": self.timeout,
+            "completed": counters["completed"],
+            "errors": counters["errors"],
+            "timeouts": counters["timeouts"],
+            "cancelled": counters["cancelled"],
+            "avg_latency_seconds": round(counters["total_latency"] / finished, 3) if finished else 0.0,
+        }
+
+
+# Instance globale
+gemini_executor = GeminiExecutor()
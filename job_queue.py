@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+File de travaux en arrière-plan pour les générations longues
+- Un endpoint soumet un travail et répond immédiatement avec son identifiant
+- Un pool de workers asynchrones (concurrence configurable) exécute les travaux ;
+  un échec temporaire (toutes les clés Gemini en pause) est retenté avec un
+  backoff exponentiel à gigue, au lieu de garder la connexion du client ouverte
+- Les soumissions identiques en attente partagent le même travail : pas de
+  ruée de clients qui relancent tous en même temps
+- Résultats partiels publiés au fil de l'eau (une rubrique, un verset...)
+- Annulation d'un travail en file ou en cours
+- Table SQLite locale : les travaux survivent à un redémarrage (ceux qui
+  tournaient sont remis en file)
+- Les clients interrogent GET /api/jobs/{id} (éventuellement en attente longue)
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "6"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+JOB_STORE_PATH = os.getenv(
+    "JOB_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite3"),
+)
+
+FINISHED = ("done", "failed", "cancelled")
+
+# report(section, done, total) : publier un résultat partiel depuis un handler
+Reporter = Callable[..., None]
+Handler = Callable[[Dict, Reporter], Awaitable[Any]]
+
+
+class RetryableJobError(Exception):
+    """Échec temporaire : le travail sera retenté (retry_after = délai minimal suggéré)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Dict
+    dedupe_key: Optional[str] = None
+    status: str = "queued"  # queued, running, retrying, done, failed, cancelled
+    attempts: int = 0
+    max_attempts: int = JOB_MAX_ATTEMPTS
+    result: Any = None
+    partial: List[Any] = field(default_factory=list)
+    progress: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    next_run_at: Optional[float] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if self.next_run_at and self.status == "retrying":
+            data["retry_in_seconds"] = round(max(0.0, self.next_run_at - time.time()), 1)
+        if self.status == "done":
+            data["result"] = self.result
+        else:
+            data["partial"] = self.partial
+        return data
+
+
+class JobStore:
+    """Table SQLite des travaux (état, charge utile, résultats partiels et finaux)"""
+
+    _COLUMNS = ("id", "kind", "payload", "dedupe_key", "status", "attempts", "max_attempts",
+                "result", "partial", "progress", "error", "next_run_at", "created_at", "updated_at")
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                dedupe_key TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                max_attempts INTEGER NOT NULL,
+                result TEXT,
+                partial TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                error TEXT,
+                next_run_at REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, updated_at)")
+
+    def save(self, job: Job) -> None:
+        row = (job.id, job.kind, json.dumps(job.payload, ensure_ascii=False), job.dedupe_key, job.status,
+               job.attempts, job.max_attempts, json.dumps(job.result, ensure_ascii=False),
+               json.dumps(job.partial, ensure_ascii=False), json.dumps(job.progress), job.error,
+               job.next_run_at, job.created_at, job.updated_at)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self._COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self._COLUMNS))})", row)
+
+    def _to_job(self, row: Tuple) -> Job:
+        data = dict(zip(self._COLUMNS, row))
+        for name in ("payload", "result", "partial", "progress"):
+            data[name] = json.loads(data[name]) if data[name] is not None else None
+        return Job(**data)
+
+    def load(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def unfinished(self) -> List[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE status NOT IN ({', '.join('?' * len(FINISHED))}) "
+                "ORDER BY created_at", FINISHED).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def purge_finished(self, before: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) AND updated_at < ?",
+                (*FINISHED, before))
+        return cursor.rowcount
+
+
+class JobQueue:
+    def __init__(self, name: str, workers: int = JOB_WORKERS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 base_delay: float = JOB_RETRY_BASE_SECONDS, max_delay: float = JOB_RETRY_MAX_SECONDS,
+                 result_ttl: float = JOB_RESULT_TTL, store: Optional[JobStore] = None):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.result_ttl = result_ttl
+        self.store = store
+
+        self._handlers: Dict[str, Handler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._pending_by_key: Dict[str, str] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self.counters = {"submitted": 0, "deduplicated": 0, "retries": 0,
+                         "done": 0, "failed": 0, "cancelled": 0, "restored": 0}
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """handler(payload, report) ; report(section, done=None, total=None) publie un résultat partiel"""
+        self._handlers[kind] = handler
+
+    # ---- Cycle de vie
+
+    def start(self) -> None:
+        """Démarrer les workers (dans la boucle active) et reprendre les travaux persistés"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        if self.store is not None:
+            for job in self.store.unfinished():
+                if job.id in self._jobs:
+                    continue
+                # Interrompu par l'arrêt : repart de zéro, sans compter la tentative perdue
+                if job.status == "running":
+                    job.attempts = max(0, job.attempts - 1)
+                job.status = "queued"
+                job.next_run_at = None
+                self._track(job)
+                self.counters["restored"] += 1
+        for job in self._jobs.values():
+            if job.status == "queued":
+                self._queue.put_nowait(job.id)
+        restored = f", {self.counters['restored']} travaux repris" if self.counters["restored"] else ""
+        print(f"🧵 File '{self.name}' démarrée ({self.workers} workers{restored})")
+
+    async def stop(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ---- Soumission et suivi
+
+    def submit(self, kind: str, payload: Dict, dedupe_key: Optional[str] = None) -> Tuple[Job, bool]:
+        """
+        Mettre un travail en file ; retourne (travail, créé)
+        Avec dedupe_key, une soumission identique non terminée renvoie le travail existant.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Type de travail inconnu: {kind}")
+        self._purge()
+        if dedupe_key:
+            existing = self._jobs.get(self._pending_by_key.get(dedupe_key, ""))
+            if existing is not None and not existing.finished:
+                self.counters["deduplicated"] += 1
+                return existing, False
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload, dedupe_key=dedupe_key,
+                  max_attempts=self.max_attempts)
+        self._track(job)
+        self._persist(job)
+        self.counters["submitted"] += 1
+        self.start()
+        self._queue.put_nowait(job.id)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Attendre la fin du travail (au plus timeout secondes) ; retourne son état courant"""
+        job = self.get(job_id)
+        if job is None or job.finished or timeout <= 0:
+            return job
+        event = self._events.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Annuler un travail en file, en attente de retry ou en cours ; sans effet s'il est terminé"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        timer = self._timers.pop(job_id, None)
+        if timer is not None:
+            timer.cancel()
+        running = self._running.get(job_id)
+        self._finish(job, "cancelled")
+        if running is not None:
+            running.cancel()
+        return job
+
+    # ---- Exécution
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Backoff exponentiel à gigue (moitié fixe, moitié aléatoire), au moins retry_after"""
+        cap = min(self.max_delay, self.base_delay * 2 ** max(0, attempt - 1))
+        delay = cap / 2 + random.uniform(0, cap / 2)
+        if retry_after:
+            # Gigue après le refroidissement annoncé : les travaux ne repartent pas tous ensemble
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return min(delay, self.max_delay)
+
+    def _reporter(self, job: Job) -> Reporter:
+        def report(section: Any, done: Optional[int] = None, total: Optional[int] = None) -> None:
+            if job.finished:
+                return
+            job.partial.append(section)
+            job.progress = {"done": len(job.partial) if done is None else done,
+                            "total": total if total is not None else job.progress.get("total", 0)}
+            job.updated_at = time.time()
+            self._persist(job)
+        return report
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+            job.status = "running"
+            job.attempts += 1
+            job.partial, job.progress = [], {}
+            job.updated_at = time.time()
+            self._persist(job)
+            task = asyncio.create_task(self._handlers[job.kind](job.payload, self._reporter(job)))
+            self._running[job.id] = task
+            try:
+                # shield : l'arrêt du worker n'annule pas le handler avant qu'on le décide ci-dessous
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if job.status == "cancelled":
+                    continue  # annulation demandée par le client, déjà enregistrée
+                # Arrêt du serveur : le travail sera repris au prochain démarrage
+                task.cancel()
+                raise
+            except RetryableJobError as e:
+                job.error = str(e)
+                if job.attempts < job.max_attempts:
+                    self._retry_later(job, self.backoff(job.attempts, e.retry_after))
+                    continue
+                self._finish(job, "failed")
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, "failed")
+            else:
+                job.result = result
+                job.error = None
+                self._finish(job, "done")
+            finally:
+                self._running.pop(job.id, None)
+
+    def _retry_later(self, job: Job, delay: float) -> None:
+        self.counters["retries"] += 1
+        job.status = "retrying"
+        job.next_run_at = time.time() + delay
+        job.updated_at = time.time()
+        self._persist(job)
+        print(f"🔁 Travail {job.id[:8]} ({job.kind}) retenté dans {delay:.1f}s "
+              f"(tentative {job.attempts}/{job.max_attempts})")
+        self._timers[job.id] = asyncio.get_running_loop().call_later(delay, self._requeue, job.id)
+
+    def _requeue(self, job_id: str) -> None:
+        self._timers.pop(job_id, None)
+        job = self._jobs.get(job_id)
+        if job is not None and job.status == "retrying":
+            job.status = "queued"
+            job.next_run_at = None
+            self._queue.put_nowait(job_id)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.next_run_at = None
+        job.updated_at = time.time()
+        self.counters[status] += 1
+        self._persist(job)
+        if job.dedupe_key and self._pending_by_key.get(job.dedupe_key) == job.id:
+            del self._pending_by_key[job.dedupe_key]
+        event = self._events.pop(job.id, None)
+        if event is not None:
+            event.set()
+        icon = {"done": "✅", "cancelled": "🛑"}.get(status, "❌")
+        print(f"{icon} Travail {job.id[:8]} ({job.kind}) {status} après {job.attempts} tentative(s)")
+
+    def _track(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        if job.dedupe_key and not job.finished:
+            self._pending_by_key[job.dedupe_key] = job.id
+
+    def _persist(self, job: Job) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.save(job)
+        except sqlite3.Error as e:
+            print(f"⚠️ Sauvegarde du travail {job.id[:8]} impossible: {e}")
+
+    def _purge(self) -> None:
+        """Oublier les travaux terminés depuis plus de result_ttl"""
+        limit = time.time() - self.result_ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.updated_at < limit]:
+            del self._jobs[job_id]
+        if self.store is not None:
+            try:
+                self.store.purge_finished(limit)
+            except sqlite3.Error as e:
+                print(f"⚠️ Purge des travaux impossible: {e}")
+
+    def stats(self) -> Dict:
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {"workers": self.workers, "running": len(self._running), "jobs": by_status,
+                "persistent": self.store is not None, **self.counters}
+
+
+def create_job_queue(name: str, workers: int = JOB_WORKERS) -> JobQueue:
+    """File avec table SQLite ; en mémoire seule si le disque n'est pas accessible"""
+    try:
+        store = JobStore()
+    except sqlite3.Error as e:
+        print(f"⚠️ Persistance des travaux désactivée ({JOB_STORE_PATH}): {e}")
+        store = None
+    return JobQueue(name, workers=workers, store=store)
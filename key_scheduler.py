@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Ordonnanceur des clés Gemini sensible aux quotas
+- Deux seaux à jetons par clé : requêtes/minute (RPM) et requêtes/jour (RPD)
+- Sélection de la clé la moins chargée (requêtes en vol, puis budget restant) :
+  une rafale se répartit sur toutes les clés au lieu d'épuiser la première
+- Refroidissement piloté par le délai renvoyé par l'API sur un 429
+  ("retryDelay": "37s") au lieu d'un drapeau "échouée" jusqu'au lendemain
+- État persisté (JSON) : budgets et refroidissements survivent aux redémarrages
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_RPM = int(os.getenv("GEMINI_RPM", "15"))
+DEFAULT_RPD = int(os.getenv("GEMINI_RPD", "1500"))
+DEFAULT_COOLDOWN = float(os.getenv("GEMINI_COOLDOWN_SECONDS", "60"))
+MAX_COOLDOWN = float(os.getenv("GEMINI_MAX_COOLDOWN_SECONDS", "3600"))
+STATE_PATH = os.getenv(
+    "GEMINI_KEY_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_key_state.json"),
+)
+SAVE_INTERVAL = float(os.getenv("GEMINI_KEY_STATE_SAVE_SECONDS", "5"))
+
+# "retryDelay": "37s" (corps JSON de l'erreur) ou "Please retry in 37.5s" (message)
+_RETRY_DELAY_RE = re.compile(r"retry_?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s|retry in (\d+(?:\.\d+)?)\s*s", re.I)
+_DAILY_QUOTA_RE = re.compile(r"per ?day|PerDay|daily", re.I)
+
+
+def is_quota_error(message: str) -> bool:
+    lowered = message.lower()
+    return "429" in message or "quota" in lowered or "exceeded" in lowered or "resource_exhausted" in lowered
+
+
+def parse_retry_delay(message: str) -> Optional[float]:
+    """Délai de nouvelle tentative annoncé par l'API, en secondes"""
+    m = _RETRY_DELAY_RE.search(message or "")
+    if not m:
+        return None
+    return float(m.group(1) or m.group(2))
+
+
+class TokenBucket:
+    """Seau à jetons : capacité = limite, remplissage continu sur la période"""
+
+    def __init__(self, capacity: float, period: float, tokens: Optional[float] = None,
+                 updated_at: Optional[float] = None):
+        self.capacity = max(1.0, float(capacity))
+        self.rate = self.capacity / period
+        self.tokens = self.capacity if tokens is None else min(self.capacity, max(0.0, tokens))
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    def refill(self, now: float) -> float:
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return self.tokens
+
+    def take(self, now: float) -> bool:
+        if self.refill(now) >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def seconds_until_token(self, now: float) -> float:
+        missing = 1.0 - self.refill(now)
+        return max(0.0, missing / self.rate)
+
+
+@dataclass
+class KeyState:
+    index: int
+    name: str
+    secret: Optional[str]
+    rpm: int
+    rpd: int
+    minute: TokenBucket = field(init=False)
+    day: TokenBucket = field(init=False)
+    cooldown_until: float = 0.0
+    consecutive_quota_errors: int = 0
+    in_flight: int = 0
+    counters: Dict[str, int] = field(default_factory=lambda: {"success": 0, "errors": 0, "quota_errors": 0})
+
+    def __post_init__(self):
+        self.minute = TokenBucket(self.rpm, 60.0)
+        self.day = TokenBucket(self.rpd, 86400.0)
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifiant persistable (jamais la clé elle-même)"""
+        return hashlib.sha256((self.secret or self.name).encode()).hexdigest()[:16]
+
+    def budget_fraction(self, now: float) -> float:
+        return min(self.minute.refill(now) / self.minute.capacity, self.day.refill(now) / self.day.capacity)
+
+    def wait_seconds(self, now: float) -> float:
+        """Délai avant que la clé puisse servir une requête"""
+        return max(self.cooldown_until - now, self.minute.seconds_until_token(now),
+                   self.day.seconds_until_token(now), 0.0)
+
+
+class KeyScheduler:
+    def __init__(self, keys: List[Dict], state_path: Optional[str] = STATE_PATH):
+        """keys : [{"name", "key", "rpm"?, "rpd"?}, ...] dans l'ordre de préférence"""
+        self.keys = [
+            KeyState(i, k["name"], k.get("key"), int(k.get("rpm") or DEFAULT_RPM), int(k.get("rpd") or DEFAULT_RPD))
+            for i, k in enumerate(keys)
+        ]
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._load()
+
+    def set_budget(self, rpm: Optional[int] = None, rpd: Optional[int] = None) -> None:
+        """Abaisser les limites de chaque clé (traitements par lots : laisser du quota au trafic)"""
+        with self._lock:
+            now = time.time()
+            for key in self.keys:
+                if rpm is not None and rpm < key.rpm:
+                    key.rpm = rpm
+                    key.minute = TokenBucket(rpm, 60.0, key.minute.refill(now), now)
+                if rpd is not None and rpd < key.rpd:
+                    key.rpd = rpd
+                    key.day = TokenBucket(rpd, 86400.0, key.day.refill(now), now)
+
+    # ---- Sélection
+
+    def acquire(self) -> Optional[KeyState]:
+        """
+        Réserver la clé la moins chargée ayant du budget (un jeton minute et un jeton jour)
+        Retourne None si aucune clé n'est utilisable maintenant (voir next_available_in).
+        """
+        with self._lock:
+            now = time.time()
+            candidates = [k for k in self.keys
+                          if k.secret and k.cooldown_until <= now
+                          and k.minute.refill(now) >= 1.0 and k.day.refill(now) >= 1.0]
+            if not candidates:
+                return None
+            # Moins de requêtes en vol, puis plus grand budget restant, puis ordre configuré
+            chosen = min(candidates, key=lambda k: (k.in_flight, -k.budget_fraction(now), k.index))
+            chosen.minute.take(now)
+            chosen.day.take(now)
+            chosen.in_flight += 1
+            return chosen
+
+    def peek(self) -> Optional[KeyState]:
+        """Clé qui serait choisie maintenant, sans consommer de budget"""
+        with self._lock:
+            now = time.time()
+            candidates = [k for k in self.keys if k.secret and k.wait_seconds(now) == 0.0]
+            if not candidates:
+                return None
+            return min(candidates, key=lambda k: (k.in_flight, -k.budget_fraction(now), k.index))
+
+    def next_available_in(self) -> Optional[float]:
+        """Secondes avant qu'une clé redevienne utilisable (None si aucune clé configurée)"""
+        with self._lock:
+            now = time.time()
+            waits = [k.wait_seconds(now) for k in self.keys if k.secret]
+            return min(waits) if waits else None
+
+    # ---- Résultats d'appel
+
+    def release(self, key: KeyState, success: bool = True) -> None:
+        """Fin d'un appel qui n'est pas un dépassement de quota"""
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            if success:
+                key.counters["success"] += 1
+                key.consecutive_quota_errors = 0
+            else:
+                key.counters["errors"] += 1
+        self._save()
+
+    def report_quota_error(self, key: KeyState, message: str = "") -> float:
+        """
+        Dépassement de quota (429) : refroidissement du délai annoncé par l'API,
+        sinon délai par défaut doublé à chaque 429 consécutif. Retourne le délai appliqué.
+        """
+        with self._lock:
+            now = time.time()
+            key.in_flight = max(0, key.in_flight - 1)
+            key.counters["quota_errors"] += 1
+            key.consecutive_quota_errors += 1
+            delay = parse_retry_delay(message)
+            if delay is None:
+                delay = DEFAULT_COOLDOWN * 2 ** (key.consecutive_quota_errors - 1)
+            delay = min(delay, MAX_COOLDOWN)
+            key.cooldown_until = max(key.cooldown_until, now + delay)
+            key.minute.tokens = 0.0
+            if _DAILY_QUOTA_RE.search(message or ""):
+                # Quota journalier épuisé : le seau jour se reremplit au fil de la journée
+                key.day.tokens = 0.0
+        print(f"🧊 {key.name} en refroidissement {delay:.0f}s")
+        self._save(force=True)
+        return delay
+
+    # ---- Persistance
+
+    def _load(self) -> None:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ État des clés Gemini illisible ({e}), budgets réinitialisés")
+            return
+        for key in self.keys:
+            entry = saved.get(key.fingerprint)
+            if not entry:
+                continue
+            key.minute = TokenBucket(key.rpm, 60.0, entry.get("minute_tokens"), entry.get("updated_at"))
+            key.day = TokenBucket(key.rpd, 86400.0, entry.get("day_tokens"), entry.get("updated_at"))
+            key.cooldown_until = float(entry.get("cooldown_until", 0.0))
+            key.consecutive_quota_errors = int(entry.get("consecutive_quota_errors", 0))
+            key.counters.update(entry.get("counters", {}))
+        print(f"✅ État des clés Gemini restauré ({self.state_path})")
+
+    def _save(self, force: bool = False) -> None:
+        if not self.state_path:
+            return
+        now = time.time()
+        if not force and now - self._last_save < SAVE_INTERVAL:
+            return
+        with self._lock:
+            self._last_save = now
+            state = {
+                key.fingerprint: {
+                    "name": key.name,
+                    "minute_tokens": round(key.minute.refill(now), 3),
+                    "day_tokens": round(key.day.refill(now), 3),
+                    "updated_at": now,
+                    "cooldown_until": key.cooldown_until,
+                    "consecutive_quota_errors": key.consecutive_quota_errors,
+                    "counters": key.counters,
+                }
+                for key in self.keys if key.secret
+            }
+        tmp = self.state_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            print(f"⚠️ Sauvegarde de l'état des clés Gemini impossible: {e}")
+
+    def flush(self) -> None:
+        self._save(force=True)
+
+    # ---- Monitoring
+
+    def key_status(self, key: KeyState, now: Optional[float] = None) -> Dict:
+        now = time.time() if now is None else now
+        minute_left = key.minute.refill(now)
+        day_left = key.day.refill(now)
+        cooldown = max(0.0, key.cooldown_until - now)
+        if not key.secret:
+            status = "missing"
+        elif day_left < 1.0:
+            status = "daily_quota_exhausted"
+        elif cooldown > 0:
+            status = "cooldown"
+        elif minute_left < 1.0:
+            status = "rate_limited"
+        else:
+            status = "available"
+        return {
+            "status": status,
+            "remaining_minute": int(minute_left),
+            "remaining_day": int(day_left),
+            "rpm": key.rpm,
+            "rpd": key.rpd,
+            "cooldown_seconds": round(cooldown, 1),
+            "available_in_seconds": round(key.wait_seconds(now), 1) if key.secret else None,
+            "in_flight": key.in_flight,
+            **key.counters,
+        }
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            now = time.time()
+            return [{"name": key.name, **self.key_status(key, now)} for key in self.keys]
+
+    def available_keys(self) -> Tuple[List[str], List[str]]:
+        """(noms des clés utilisables maintenant, noms des autres)"""
+        ok, ko = [], []
+        for entry in self.stats():
+            (ok if entry["status"] == "available" else ko).append(entry["name"])
+        return ok, ko
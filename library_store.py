@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Bibliothèques chapitrées (VERSE_BY_VERSE_LIBRARY, THEOLOGICAL_LIBRARY) sur disque
+- Un fichier JSON par chapitre : data/<bibliothèque>/<OSIS>/<chapitre>.json
+- index.json : livres (ordre d'origine) -> code OSIS et chapitres disponibles
+- Rien n'est lu à l'import : l'index au premier accès, un chapitre quand il est demandé
+- LRU des chapitres décodés (LIBRARY_CHAPTER_CACHE_SIZE)
+- ShardedLibrary se lit comme l'ancien dict : LIB.get(livre, {}).get(chapitre, {})
+
+Usage :
+  python library_store.py export module:ATTRIBUT data/<bibliothèque>   (dict Python -> fichiers)
+  python library_store.py index data/<bibliothèque>                    (reconstruire index.json)
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+LIBRARY_DATA_DIR = os.getenv("LIBRARY_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+LIBRARY_CHAPTER_CACHE_SIZE = int(os.getenv("LIBRARY_CHAPTER_CACHE_SIZE", "256"))
+
+INDEX_FILE = "index.json"
+
+
+def _int_keys(pairs) -> Dict:
+    """Les numéros de verset redeviennent des entiers (JSON n'a que des clés texte)"""
+    return {int(k) if k.isdigit() else k: v for k, v in pairs}
+
+
+class _BookView(Mapping):
+    """Chapitres d'un livre, décodés à la demande"""
+
+    def __init__(self, library: "ShardedLibrary", book: str, chapters: List[int]):
+        self._library = library
+        self._book = book
+        self._chapters = chapters
+
+    def __getitem__(self, chapter: int) -> Dict:
+        content = self._library.chapter(self._book, chapter)
+        if content is None:
+            raise KeyError(chapter)
+        return content
+
+    def __contains__(self, chapter: object) -> bool:
+        return chapter in self._chapters
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._chapters)
+
+    def __len__(self) -> int:
+        return len(self._chapters)
+
+
+class ShardedLibrary(Mapping):
+    """livre -> chapitre -> contenu, chargé chapitre par chapitre depuis data/<nom>/"""
+
+    def __init__(self, name: str, root: Optional[str] = None, cache_size: int = LIBRARY_CHAPTER_CACHE_SIZE):
+        self.name = name
+        self.path = os.path.join(root or LIBRARY_DATA_DIR, name)
+        self.cache_size = max(1, cache_size)
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._chapters: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"loads": 0, "hits": 0, "evictions": 0}
+
+    @property
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            try:
+                with open(os.path.join(self.path, INDEX_FILE), encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                print(f"⚠️ Bibliothèque {self.name} absente ({self.path})")
+                self._index = {}
+        return self._index
+
+    def chapter(self, book: str, chapter: int) -> Optional[Dict]:
+        """Contenu décodé du chapitre, None s'il n'existe pas dans la bibliothèque"""
+        entry = self.index.get(book)
+        if entry is None or chapter not in entry["chapters"]:
+            return None
+        key = (book, chapter)
+        with self._lock:
+            content = self._chapters.get(key)
+            if content is not None:
+                self._chapters.move_to_end(key)
+                self.counters["hits"] += 1
+                return content
+        with open(os.path.join(self.path, entry["osis"], f"{chapter}.json"), encoding="utf-8") as f:
+            content = json.load(f, object_pairs_hook=_int_keys)
+        with self._lock:
+            self._chapters[key] = content
+            self.counters["loads"] += 1
+            while len(self._chapters) > self.cache_size:
+                self._chapters.popitem(last=False)
+                self.counters["evictions"] += 1
+        return content
+
+    def __getitem__(self, book: str) -> _BookView:
+        entry = self.index.get(book)
+        if entry is None:
+            raise KeyError(book)
+        return _BookView(self, book, entry["chapters"])
+
+    def __contains__(self, book: object) -> bool:
+        return book in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def stats(self) -> Dict:
+        return {
+            "books": len(self.index),
+            "chapters": sum(len(e["chapters"]) for e in self.index.values()),
+            "cached_chapters": len(self._chapters),
+            "cache_size": self.cache_size,
+            **self.counters,
+        }
+
+
+# =========================
+#   Outils d'écriture (CLI)
+# =========================
+
+def export_library(library: Dict[str, Dict[int, Dict]], dest: str) -> Dict[str, Dict[str, Any]]:
+    """Écrit un dict {livre: {chapitre: contenu}} en fichiers par chapitre + index.json"""
+    from passage_ref import resolve_osis
+
+    index: Dict[str, Dict[str, Any]] = {}
+    for book, chapters in library.items():
+        osis = resolve_osis(book)
+        if not osis:
+            raise ValueError(f"Livre non reconnu: '{book}'")
+        os.makedirs(os.path.join(dest, osis), exist_ok=True)
+        for chapter, content in chapters.items():
+            with open(os.path.join(dest, osis, f"{chapter}.json"), "w", encoding="utf-8") as f:
+                json.dump(content, f, ensure_ascii=False, indent=1)
+                f.write("\n")
+        index[book] = {"osis": osis, "chapters": sorted(chapters)}
+    _write_index(dest, index)
+    return index
+
+
+def rebuild_index(dest: str) -> Dict[str, Dict[str, Any]]:
+    """index.json depuis les dossiers OSIS présents (ordre canonique, noms français)"""
+    from passage_ref import BOOK_NAMES_FR
+
+    index: Dict[str, Dict[str, Any]] = {}
+    for osis, name in BOOK_NAMES_FR.items():
+        folder = os.path.join(dest, osis)
+        if not os.path.isdir(folder):
+            continue
+        chapters = sorted(int(f[:-5]) for f in os.listdir(folder) if f.endswith(".json") and f[:-5].isdigit())
+        if chapters:
+            index[name] = {"osis": osis, "chapters": chapters}
+    _write_index(dest, index)
+    return index
+
+
+def _write_index(dest: str, index: Dict[str, Dict[str, Any]]) -> None:
+    os.makedirs(dest, exist_ok=True)
+    # Un livre par ligne : diffs lisibles quand un chapitre est ajouté
+    lines = [f" {json.dumps(book, ensure_ascii=False)}: {json.dumps(entry)}" for book, entry in index.items()]
+    with open(os.path.join(dest, INDEX_FILE), "w", encoding="utf-8") as f:
+        f.write("{\n" + ",\n".join(lines) + "\n}\n")
+
+
+def main(argv: List[str]) -> int:
+    if not argv or (argv[0], len(argv)) not in (("export", 3), ("index", 2)):
+        print(__doc__)
+        return 2
+    if argv[0] == "export":
+        import importlib
+
+        module_name, _, attr = argv[1].partition(":")
+        library = getattr(importlib.import_module(module_name), attr)
+        index = export_library(library, argv[2])
+    else:
+        index = rebuild_index(argv[1])
+    chapters = sum(len(e["chapters"]) for e in index.values())
+    print(f"✅ {argv[-1]} : {len(index)} livres, {chapters} chapitres")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,12 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import os
 import re
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
-from cache_fallback_system import cache_fallback
+import bible_http
+import bible_store
+import concordance
+import rubric_templates
+import singleflight
+from job_queue import RetryableJobError, create_job_queue
+from passage_ref import bucket_tokens, canonical_passage
+from cache_fallback_system import cache_fallback, is_gemini_unavailable
+from gemini_executor import gemini_executor
 
 # Charger les variables d'environnement
 load_dotenv()
@@ -21,7 +35,20 @@ else:
     print("❌ No personal Gemini key available")
     GEMINI_AVAILABLE = False
 
-app = FastAPI(title="Bible Study API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pool HTTP partagé vers api.bible : ouvert au démarrage, fermé à l'arrêt
+    async with bible_http.client_lifespan():
+        study_jobs.start()
+        # Index de concordance construit une seule fois, en tâche de fond (ne retarde pas le démarrage)
+        concordance_build = asyncio.create_task(asyncio.to_thread(concordance.build_default_index))
+        yield
+        concordance_build.cancel()
+        await study_jobs.stop()
+    # Budgets et refroidissements des clés Gemini conservés pour le prochain démarrage
+    cache_fallback.key_scheduler.flush()
+
+app = FastAPI(title="Bible Study API", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -32,6 +59,236 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Repli Bible API : rubriques générées en parallèle, dans un budget de latence
+RUBRIC_CONCURRENCY = int(os.getenv("STUDY_RUBRIC_CONCURRENCY", "8"))
+STUDY_LATENCY_BUDGET = float(os.getenv("STUDY_LATENCY_BUDGET_SECONDS", "25"))
+
+# Gemini : rubriques demandées par lots (un appel par lot), lots en parallèle dans le budget
+# de latence ; STUDY_FALLBACK_RESERVE_SECONDS restent au repli pour les lots non obtenus
+GEMINI_RUBRICS_PER_CALL = int(os.getenv("STUDY_GEMINI_RUBRICS_PER_CALL", "5"))
+GEMINI_CONCURRENCY = int(os.getenv("STUDY_GEMINI_CONCURRENCY", "4"))
+STUDY_FALLBACK_RESERVE = float(os.getenv("STUDY_FALLBACK_RESERVE_SECONDS", "5"))
+
+# Générations identiques concurrentes partagées (un seul appel LLM par clé)
+study_flight = singleflight.SingleFlight("generate-study")
+verse_flight = singleflight.SingleFlight("generate-verse-by-verse")
+
+# Travaux en arrière-plan (table SQLite) : études longues via /api/jobs et
+# générations Gemini retentées quand toutes les clés sont en pause
+study_jobs = create_job_queue("studies")
+
+# Liste des rubriques SYNCHRONISÉE avec le frontend (BASE_RUBRIQUES)
+RUBRIQUES_LIST = [
+    "Étude verset par verset",
+    "Prière d'ouverture",
+    "Structure littéraire", 
+    "Questions du chapitre précédent",
+    "Thème doctrinal",
+    "Fondements théologiques",
+    "Contexte historique",
+    "Contexte culturel", 
+    "Contexte géographique",
+    "Analyse lexicale",
+    "Parallèles bibliques",
+    "Prophétie et accomplissement",
+    "Personnages",
+    "Structure rhétorique",
+    "Théologie trinitaire",
+    "Christ au centre",
+    "Évangile et grâce",
+    "Application personnelle", 
+    "Application communautaire",
+    "Prière de réponse",
+    "Questions d'étude",
+    "Points de vigilance",
+    "Objections et réponses",
+    "Perspective missionnelle",
+    "Éthique chrétienne", 
+    "Louange / liturgie",
+    "Méditation guidée",
+    "Mémoire / versets clés",
+    "Plan d'action"
+]
+
+def _rubrique_header(index: int) -> str:
+    """En-tête Markdown d'une rubrique (index 0 = étude verset par verset, non numérotée)"""
+    if index == 0:
+        return f"## Étude verset par verset: {RUBRIQUES_LIST[index]}"
+    return f"## Rubrique {index}: {RUBRIQUES_LIST[index]}"
+
+def _build_rubriques_prompt(passage: str, indices: list) -> str:
+    """Prompt Gemini demandant le contenu des rubriques indiquées pour le passage"""
+    prompt_parts = [f"Créez une étude biblique théologique pour le passage {passage}.", ""]
+    for i in indices:
+        if i < len(RUBRIQUES_LIST):
+            prompt_parts.append("Générez du contenu substantiel pour :")
+            prompt_parts.append(_rubrique_header(i))
+            prompt_parts.append(f"Adaptez spécifiquement au passage {passage}.")
+            prompt_parts.append("")
+    prompt_parts.extend([
+        "INSTRUCTIONS CRITIQUES :",
+        "1. Utilisez EXACTEMENT les titres de rubriques indiqués ci-dessus",
+        "2. Contenu unique et spécifique au passage biblique",
+        "3. Langage théologique érudit et précis", 
+        "4. 150-200 mots par rubrique minimum",
+        "5. AUCUN contenu générique type 'sera généré automatiquement'",
+        "",
+        "IMPORTANT : Respectez EXACTEMENT la numérotation des rubriques demandées !"
+    ])
+    return "\n".join(prompt_parts)
+
+def _biblical_text_loader(passage: str):
+    """Retourne une fonction async qui récupère le texte biblique une seule fois par requête"""
+    task = None
+
+    async def load() -> str:
+        nonlocal task
+        if task is None:
+            task = asyncio.ensure_future(cache_fallback.fetch_theological_biblical_text(passage))
+        try:
+            return await task
+        except Exception as e:
+            print(f"⚠️ Texte biblique indisponible pour {passage}: {e}")
+            return f"Texte de {passage}"
+
+    return load
+
+def _valid_rubriques(selected) -> list:
+    """Indices de rubriques existants ; 400 si aucun (ex. selected_rubriques=[99])"""
+    indices = [i for i in selected if isinstance(i, int) and 0 <= i < len(RUBRIQUES_LIST)]
+    if not indices:
+        raise HTTPException(status_code=400, detail=f"Aucune rubrique valide (0 à {len(RUBRIQUES_LIST) - 1})")
+    return indices
+
+async def _generate_fallback_rubriques(passage: str, indices: list, budget: float = STUDY_LATENCY_BUDGET) -> list:
+    """
+    Repli Bible API : texte récupéré une fois, rubriques générées en parallèle
+    (au plus RUBRIC_CONCURRENCY à la fois). Les rubriques non terminées dans le
+    budget de latence sont remplacées par un message d'attente.
+    """
+    if not indices:
+        return []
+    load_text = _biblical_text_loader(passage)
+    biblical_text = await load_text()
+    semaphore = asyncio.Semaphore(max(1, RUBRIC_CONCURRENCY))
+
+    async def generate(index: int) -> str:
+        async with semaphore:
+            content = await cache_fallback.generate_theological_content_with_bible_api(
+                passage, RUBRIQUES_LIST[index], index, biblical_text=biblical_text
+            )
+        return f"{_rubrique_header(index)}\n\n{content}"
+
+    tasks = [asyncio.ensure_future(generate(i)) for i in indices]
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"⏱️ Budget de {budget:g}s dépassé : {len(pending)} rubrique(s) non terminée(s)")
+
+    sections = []
+    for index, task in zip(indices, tasks):
+        if task in done and task.exception() is None:
+            sections.append(task.result())
+        else:
+            error = task.exception() if task in done else "budget de latence dépassé"
+            print(f"❌ Erreur Bible API Théologique pour {RUBRIQUES_LIST[index]}: {error}")
+            sections.append(f"""
+{_rubrique_header(index)}
+
+⚠️ Toutes les API sont temporairement indisponibles. Nouvelle tentative dans 1 minute.
+La génération théologique pour "{RUBRIQUES_LIST[index]}" sera disponible sous peu.
+            """.strip())
+    return sections
+
+def _fix_rubrique_numbering(content: str, indices: list) -> str:
+    """Pour une rubrique unique, forcer le bon numéro dans « ## Rubrique N: »"""
+    if len(indices) == 1 and indices[0] > 0:
+        return re.sub(r"## Rubrique \d+:", f"## Rubrique {indices[0]}:", content)
+    return content
+
+_RUBRIQUE_HEADER_RE = re.compile(r"^##\s*(?:Rubrique\s+(\d+)\s*:|Étude verset par verset\b)", re.M)
+
+def _split_rubriques(content: str, indices: list):
+    """Sections « ## Rubrique N: » d'une réponse multi-rubriques ; None si une rubrique demandée manque"""
+    matches = list(_RUBRIQUE_HEADER_RE.finditer(content))
+    sections = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        index = int(match.group(1)) if match.group(1) else 0
+        end = following.start() if following else len(content)
+        sections.setdefault(index, content[match.start():end].strip())
+    if not all(i in sections for i in indices):
+        return None
+    return {i: sections[i] for i in indices}
+
+def _cache_gemini_rubriques(passage: str, tokens: int, content: str, indices: list, source: str) -> int:
+    """
+    Mettre en cache une réponse Gemini rubrique par rubrique (mêmes entrées que le
+    streaming, la pré-génération et le contrôle de cache de /api/generate-study)
+    Retourne le nombre de rubriques stockées.
+    """
+    if len(indices) == 1:
+        sections = {indices[0]: _finalize_rubrique(content, indices[0])}
+    else:
+        sections = _split_rubriques(content, indices)
+        if sections is None:
+            print(f"⚠️ Titres de rubriques introuvables dans la réponse Gemini : {passage} non mis en cache")
+            return 0
+    now = time.time()
+    for index, section in sections.items():
+        cache_fallback.cache[cache_fallback._get_rubric_cache_key(passage, index, tokens, True)] = {
+            "content": section, "timestamp": now, "source": source}
+    return len(sections)
+
+async def _generate_gemini_rubriques(request: "StudyRequest", indices: list, budget: Optional[float] = None):
+    """
+    Rubriques Gemini par lots de GEMINI_RUBRICS_PER_CALL (au plus GEMINI_CONCURRENCY appels
+    simultanés). Un lot déjà en cache n'est pas redemandé, un lot obtenu est mis en cache.
+    Avec un budget, les lots non terminés à temps sont annulés.
+    Retourne (lots, contenus, sources, échecs) : contenus[lot] = texte du lot,
+    échecs[lot] = (raison, nouvel essai utile).
+    """
+    size = max(1, GEMINI_RUBRICS_PER_CALL)
+    chunks = [tuple(indices[i:i + size]) for i in range(0, len(indices), size)]
+    semaphore = asyncio.Semaphore(max(1, GEMINI_CONCURRENCY))
+
+    async def generate(chunk: tuple):
+        cached = _cached_rubriques(request, list(chunk))
+        if cached:
+            return "\n\n".join(entry["content"] for entry in cached), cached[0].get("source", "Cache"), None
+        async with semaphore:
+            content, source, success = await cache_fallback._try_gemini_with_rotation(
+                _build_rubriques_prompt(request.passage, list(chunk)))
+        if not success or not content:
+            return None, source, (source, is_gemini_unavailable(source))
+        if "**VERSET" in content.upper():
+            print(f"⚠️ Contenu format verset détecté pour les rubriques {list(chunk)}")
+            return None, source, ("réponse au format verset", False)
+        _cache_gemini_rubriques(request.passage, request.tokens, content, list(chunk), source)
+        return _fix_rubrique_numbering(content, list(chunk)), source, None
+
+    tasks = {chunk: asyncio.ensure_future(generate(chunk)) for chunk in chunks}
+    done, pending = await asyncio.wait(tasks.values(), timeout=budget) if tasks else (set(), set())
+    for task in pending:
+        task.cancel()
+
+    contents, sources, failures = {}, [], {}
+    for chunk, task in tasks.items():
+        if task in pending:
+            failures[chunk] = ("budget de latence dépassé", True)
+        elif task.exception() is not None:
+            print(f"❌ Erreur rotation Gemini: {task.exception()}")
+            failures[chunk] = (str(task.exception()), False)
+        else:
+            content, source, failure = task.result()
+            if failure is not None:
+                failures[chunk] = failure
+                continue
+            contents[chunk] = content
+            if source not in sources:
+                sources.append(source)
+    return chunks, contents, sources, failures
+
 # Modèles
 class VerseByVerseRequest(BaseModel):
     passage: str = Field(..., description="Ex: 'Genèse 1' ou 'Genèse 1:1'")
@@ -55,12 +312,12 @@ async def generate_with_gemini_raw(prompt: str) -> str:
         raise Exception("Gemini non disponible - clé API manquante")
     
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        response = model.generate_content(prompt)
+        # Exécution asynchrone bornée : la boucle d'événements reste disponible
+        content = await gemini_executor.generate(GEMINI_API_KEY, prompt)
         
-        if response and response.text:
-            print(f"✅ Content generated with personal Gemini (GRATUIT): {len(response.text)} chars")
-            return response.text.strip()
+        if content:
+            print(f"✅ Content generated with personal Gemini (GRATUIT): {len(content)} chars")
+            return content
         else:
             raise Exception("Gemini n'a pas retourné de contenu")
             
@@ -113,28 +370,47 @@ async def health_check():
     try:
         # Vérifier le système de rotation Gemini
         quota_ok, quota_message = cache_fallback._check_gemini_quota()
+        next_key = cache_fallback.key_scheduler.peek()
+        index = concordance.get_index()
         
         return {
             "status": "ok",
             "rotation_system": "Système de rotation activé",
             "gemini_keys": [
-                f"{key['name']}: {'✅ Disponible' if not key.get('failed', False) else '❌ Quota dépassé'}" 
-                for key in cache_fallback.gemini_keys
+                f"{key['name']}: {'✅ Disponible' if key['status'] == 'available' else '❌ ' + key['status']}"
+                f" ({key['remaining_minute']}/{key['rpm']} rpm, {key['remaining_day']}/{key['rpd']} rpd)"
+                for key in cache_fallback.key_scheduler.stats()
             ],
-            "current_key": cache_fallback.gemini_keys[cache_fallback.quota_tracker.get("current_key_index", 0)]["name"],
+            "current_key": next_key.name if next_key else None,
             "bible_api_configured": True,
             "cache_entries": len(cache_fallback.cache),
+            "llm_in_flight": gemini_executor.stats()["in_flight"],
+            "concordance": index.stats() if index else None,
             "message": "Études garanties sans interruption grâce à la rotation automatique",
             "features": [
                 "🔑 Rotation automatique Gemini Keys",
                 "📖 Bible API fallback",
                 "📋 Cache intelligent (24h)",
-                "♻️ Reset quotidien automatique"
+                "⏱️ Budgets RPM/RPD par clé et refroidissement sur 429"
             ]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur système: {str(e)}")
 
+@app.get("/api/concordance")
+async def search_concordance(
+    q: str = Query(..., min_length=1, description="Mots, \"expression exacte\" ou préfixe*"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=concordance.MAX_PAGE_SIZE),
+    prefix: bool = Query(False, description="Traiter le dernier mot comme un préfixe (recherche à la frappe)"),
+):
+    index = concordance.get_index()
+    if index is None:
+        if bible_store.get_store() is None:
+            raise HTTPException(status_code=503, detail="Concordance indisponible : aucune Bible locale (bible_store).")
+        raise HTTPException(status_code=503, detail="Index de concordance en cours de construction, réessayez.")
+    return index.search(q, page=page, page_size=page_size, prefix=prefix)
+
 @app.get("/api/api-status")
 async def get_api_status():
     """
@@ -166,220 +442,310 @@ async def get_api_history():
 async def generate_study(request: StudyRequest):
     """
     Génère une étude biblique en 28 rubriques avec Gemini intelligent
+    Les requêtes identiques simultanées partagent la même génération.
     """
+    key = singleflight.request_key(canonical_passage(request.passage), request.version,
+                                   bucket_tokens(request.tokens), request.selected_rubriques or [],
+                                   request.use_gemini)
+    result, shared = await study_flight.do(key, lambda: _generate_study(request))
+    if shared:
+        print(f"🔗 [SINGLE-FLIGHT] generate-study partagé pour {request.passage}")
+    return result
+
+async def _generate_study(request: StudyRequest):
+    rubriques_list = RUBRIQUES_LIST
+    # Déterminer quelles rubriques générer
+    rubriques_to_generate = request.selected_rubriques if request.selected_rubriques else list(range(len(rubriques_list)))
+    requested = _valid_rubriques(rubriques_to_generate)
     try:
         print(f"[GENERATE STUDY] Requête reçue: {request.passage}")
         
-        # Liste des rubriques SYNCHRONISÉE avec le frontend (BASE_RUBRIQUES)
-        rubriques_list = [
-            "Étude verset par verset",
-            "Prière d'ouverture",
-            "Structure littéraire", 
-            "Questions du chapitre précédent",
-            "Thème doctrinal",
-            "Fondements théologiques",
-            "Contexte historique",
-            "Contexte culturel", 
-            "Contexte géographique",
-            "Analyse lexicale",
-            "Parallèles bibliques",
-            "Prophétie et accomplissement",
-            "Personnages",
-            "Structure rhétorique",
-            "Théologie trinitaire",
-            "Christ au centre",
-            "Évangile et grâce",
-            "Application personnelle", 
-            "Application communautaire",
-            "Prière de réponse",
-            "Questions d'étude",
-            "Points de vigilance",
-            "Objections et réponses",
-            "Perspective missionnelle",
-            "Éthique chrétienne", 
-            "Louange / liturgie",
-            "Méditation guidée",
-            "Mémoire / versets clés",
-            "Plan d'action"
-        ]
+        # Rubriques toutes en cache (passages populaires pré-générés) : aucun appel LLM
+        cached = _cached_rubriques(request, requested) if requested else None
+        if cached:
+            print(f"📋 Cache HIT rubriques {requested} pour {request.passage}")
+            return {
+                "content": "\n\n".join(entry["content"] for entry in cached),
+                "passage": request.passage,
+                "version": request.version,
+                "source": cached[0].get("source", "Cache"),
+                "rubriques_generated": len(cached),
+                "from_cache": True
+            }
         
-        # Déterminer quelles rubriques générer
-        rubriques_to_generate = request.selected_rubriques if request.selected_rubriques else list(range(len(rubriques_list)))
+        # Gemini par lots, en parallèle, dans le budget de latence (toutes les rubriques demandées)
+        started = time.perf_counter()
+        chunks, contents, sources, failures = [], {}, [], {}
+        if request.use_gemini and requested:
+            chunks, contents, sources, failures = await _generate_gemini_rubriques(
+                request, requested, budget=max(0.0, STUDY_LATENCY_BUDGET - STUDY_FALLBACK_RESERVE))
+            if not failures:
+                print(f"✅ Étude {len(requested)} rubriques générée avec {' + '.join(sources)}")
+                return {
+                    "content": "\n\n".join(contents[chunk] for chunk in chunks),
+                    "passage": request.passage,
+                    "version": request.version,
+                    "source": " + ".join(sources),
+                    "rubriques_generated": len(requested),
+                    "from_cache": False
+                }
+        missing = [i for chunk, _ in failures.items() for i in chunk] if chunks else requested
         
-        # Utiliser notre système de rotation Gemini avec prompt spécifique aux rubriques
-        if request.use_gemini:
-            # Créer un prompt spécifique pour les rubriques (pas les versets)
-            rubriques_to_generate = request.selected_rubriques if request.selected_rubriques else [0, 1, 2, 3, 4]
-            rubriques_names = []
-            
-            for idx, i in enumerate(rubriques_to_generate[:5]):
-                if i < len(rubriques_list):
-                    # Pour les rubriques à partir de l'index 1, utiliser i (pas i+1) car l'index correspond déjà au numéro affiché
-                    # Index 0 = "Étude verset par verset" (pas numéroté), Index 1 = "Rubrique 1", etc.
-                    if i == 0:
-                        rubriques_names.append(f"Étude verset par verset: {rubriques_list[i]}")
-                    else:
-                        rubriques_names.append(f"Rubrique {i}: {rubriques_list[i]}")
-            
-            # Construire le prompt de manière explicite pour chaque rubrique demandée
-            prompt_parts = []
-            prompt_parts.append(f"Créez une étude biblique théologique pour le passage {request.passage}.")
-            prompt_parts.append("")
-            
-            # Instructions spécifiques pour chaque rubrique
-            for i in rubriques_to_generate[:5]:
-                if i < len(rubriques_list):
-                    if i == 0:
-                        rubrique_title = f"Étude verset par verset: {rubriques_list[i]}"
-                    else:
-                        rubrique_title = f"Rubrique {i}: {rubriques_list[i]}"
-                    
-                    prompt_parts.append(f"Générez du contenu substantiel pour :")
-                    prompt_parts.append(f"## {rubrique_title}")
-                    prompt_parts.append(f"Adaptez spécifiquement au passage {request.passage}.")
-                    prompt_parts.append("")
-            
-            prompt_parts.extend([
-                "INSTRUCTIONS CRITIQUES :",
-                "1. Utilisez EXACTEMENT les titres de rubriques indiqués ci-dessus",
-                "2. Contenu unique et spécifique au passage biblique",
-                "3. Langage théologique érudit et précis", 
-                "4. 150-200 mots par rubrique minimum",
-                "5. AUCUN contenu générique type 'sera généré automatiquement'",
-                "",
-                "IMPORTANT : Respectez EXACTEMENT la numérotation des rubriques demandées !"
-            ])
-            
-            prompt = "\n".join(prompt_parts)
-            
-            # Essayer avec notre système de rotation Gemini
-            try:
-                gemini_content, gemini_source, success = await cache_fallback._try_gemini_with_rotation(prompt)
-                
-                if success and gemini_content:
-                    # Vérifier que le contenu ne contient pas de format "VERSET"
-                    if "**VERSET" not in gemini_content.upper():
-                        print(f"✅ Étude 28 points générée avec {gemini_source}")
-                        
-                        # Corriger la numérotation des rubriques après génération
-                        corrected_content = gemini_content
-                        
-                        # Si on a demandé une rubrique spécifique, corriger sa numérotation
-                        if len(rubriques_to_generate) == 1:
-                            requested_index = rubriques_to_generate[0]
-                            if requested_index > 0:  # Pas pour l'étude verset par verset (index 0)
-                                # Remplacer "Rubrique X:" par "Rubrique [correct_number]:" 
-                                import re
-                                pattern = r"## Rubrique \d+:"
-                                replacement = f"## Rubrique {requested_index}:"
-                                corrected_content = re.sub(pattern, replacement, corrected_content)
-                                print(f"[CORRECTION] Numérotation corrigée pour Rubrique {requested_index}")
-                        
-                        return {
-                            "content": corrected_content,
-                            "passage": request.passage,
-                            "version": request.version,
-                            "source": gemini_source,
-                            "rubriques_generated": len(rubriques_to_generate),
-                            "from_cache": False
-                        }
-                    else:
-                        print(f"⚠️ Contenu format verset détecté, régénération...")
-                        
-            except Exception as e:
-                print(f"❌ Erreur rotation Gemini: {e}")
+        # Lots en échec faute de clé, de quota ou de temps : la génération Gemini est retentée en
+        # arrière-plan (backoff à gigue) et le client reçoit tout de suite le repli + l'identifiant du travail.
+        # Pas de travail sans clé configurée, ni pour un échec qui ne tient pas aux quotas.
+        job = None
+        retry_indices = [i for chunk, (_, retryable) in failures.items() if retryable for i in chunk]
+        if retry_indices and cache_fallback.key_scheduler.next_available_in() is not None:
+            job, created = study_jobs.submit(
+                "study-gemini",
+                {"passage": request.passage, "version": request.version, "tokens": request.tokens,
+                 "rubriques": retry_indices},
+                dedupe_key=singleflight.request_key("study", canonical_passage(request.passage),
+                                                    bucket_tokens(request.tokens), retry_indices),
+            )
+            print(f"📥 Étude Gemini {'mise en file' if created else 'déjà en file'} : travail {job.id}")
         
-        # Si toutes les clés Gemini échouent, attendre 1 minute puis retenter
-        retry_count = 0
-        max_retries = 3
+        # En attendant (ou sans Gemini demandé), utiliser la Bible API pour du contenu théologique authentique
+        print(f"🔄 Bible API Théologique - Génération authentique ({len(missing)} rubriques)")
         
-        while retry_count < max_retries:
-            retry_count += 1
-            print(f"🔄 Tentative {retry_count}/{max_retries} - Attente 60 secondes avant retry...")
-            
-            # Attendre 1 minute (en production) ou 5 secondes (en dev)
-            import asyncio
-            await asyncio.sleep(5)  # 5 secondes pour les tests, changer à 60 en production
-            
-            # Reset des clés et nouvelle tentative
-            for key_info in cache_fallback.gemini_keys:
-                key_info["failed"] = False
-            cache_fallback.quota_tracker["current_key_index"] = 0
-            
-            print(f"🔄 Retry {retry_count}: Reset des clés Gemini et nouvelle tentative")
-            
-            try:
-                gemini_content, gemini_source, success = await cache_fallback._try_gemini_with_rotation(prompt)
-                if success and gemini_content:
-                    print(f"✅ Retry {retry_count} réussi avec {gemini_source}")
-                    # Appliquer la correction de numérotation si nécessaire
-                    corrected_content = gemini_content
-                    if len(rubriques_to_generate) == 1:
-                        requested_index = rubriques_to_generate[0]
-                        if requested_index > 0:
-                            pattern = r"## Rubrique \d+:"
-                            replacement = f"## Rubrique {requested_index}:"
-                            corrected_content = re.sub(pattern, replacement, corrected_content)
-                    return {"content": corrected_content}
-            except Exception as retry_error:
-                print(f"❌ Retry {retry_count} échoué: {retry_error}")
+        # Rubriques non obtenues de Gemini, générées en parallèle dans le reste du budget
+        remaining = max(STUDY_FALLBACK_RESERVE, STUDY_LATENCY_BUDGET - (time.perf_counter() - started))
+        fallback = dict(zip(missing, await _generate_fallback_rubriques(request.passage, missing, budget=remaining)))
         
-        print(f"🚫 Tous les retries Gemini ont échoué, utilisation Bible API théologique")
-        
-        # En dernier recours, utiliser la Bible API pour du contenu théologique authentique
-        print(f"🔄 Bible API Théologique - Génération authentique")
-        
-        theological_content = []
-        for i in rubriques_to_generate[:5]:  # Limiter à 5 pour commencer
-            rubrique_title = rubriques_list[i]
-            
-            try:
-                # Générer du vrai contenu théologique avec la Bible API
-                content = await cache_fallback.generate_theological_content_with_bible_api(
-                    request.passage, rubrique_title, i
-                )
-                
-                # Formater avec le bon en-tête
-                if i == 0:
-                    header = f"## Étude verset par verset: {rubrique_title}"
-                else:
-                    header = f"## Rubrique {i}: {rubrique_title}"
-                
-                theological_content.append(f"{header}\n\n{content}")
-                print(f"📖 Bible API Théologique: {rubrique_title} générée ({len(content)} chars)")
-                
-            except Exception as e:
-                print(f"❌ Erreur Bible API Théologique pour {rubrique_title}: {e}")
-                # En dernier recours seulement, message d'erreur explicite
-                if i == 0:
-                    header = f"## Étude verset par verset: {rubrique_title}"
-                else:
-                    header = f"## Rubrique {i}: {rubrique_title}"
-                
-                theological_content.append(f"""
-{header}
-
-⚠️ Toutes les API sont temporairement indisponibles. Nouvelle tentative dans 1 minute.
-La génération théologique pour "{rubrique_title}" sera disponible sous peu.
-                """.strip())
-        
-        fallback_text = "\n\n".join(theological_content)
+        if chunks:
+            sections = [contents[chunk] if chunk in contents else "\n\n".join(fallback[i] for i in chunk)
+                        for chunk in chunks]
+        else:
+            sections = [fallback[i] for i in requested]
         
-        return {
-            "content": fallback_text,
+        response = {
+            "content": "\n\n".join(sections),
             "passage": request.passage,
             "version": request.version,
-            "source": "Fallback théologique intelligent",
-            "rubriques_generated": len(rubriques_to_generate[:5]),
+            "source": " + ".join(sources + ["Fallback théologique intelligent"]),
+            "rubriques_generated": len(requested),
             "from_cache": False
         }
+        if job is not None:
+            response.update({"job_id": job.id, "job_status": job.status, "job_url": f"/api/jobs/{job.id}"})
+        return response
         
     except Exception as e:
         print(f"❌ Erreur generate_study: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur génération étude: {str(e)}")
 
+async def _run_gemini_study_job(payload: dict, report) -> dict:
+    """
+    Travail en arrière-plan : étude Gemini, retentée tant que les clés sont en pause
+    Le résultat est mis en cache sous les clés que /api/generate-study consulte.
+    """
+    # Travaux persistés avant l'ajout de "tokens" : longueur par défaut de StudyRequest
+    request = StudyRequest(**{k: v for k, v in payload.items() if v is not None})
+    # Mêmes lots que /api/generate-study ; ceux obtenus lors d'un essai précédent sont relus du cache
+    chunks, contents, sources, failures = await _generate_gemini_rubriques(request, payload["rubriques"])
+    if failures:
+        reasons = "; ".join(f"rubriques {list(chunk)} : {reason}" for chunk, (reason, _) in failures.items())
+        retry_after = cache_fallback.key_scheduler.next_available_in()
+        if all(retryable for _, retryable in failures.values()) and retry_after is not None:
+            raise RetryableJobError(reasons, retry_after=retry_after)
+        raise RuntimeError(reasons)
+    return {
+        "content": "\n\n".join(contents[chunk] for chunk in chunks),
+        "passage": payload["passage"],
+        "version": payload["version"],
+        "source": " + ".join(sources),
+        "rubriques_generated": len(payload["rubriques"]),
+        "from_cache": False
+    }
+
+class JobRequest(BaseModel):
+    kind: str = Field("study", description="'study' (rubriques) ou 'verse-by-verse'")
+    passage: str = Field(..., description="Ex: 'Genèse 1' ou 'Jean 3:16'")
+    version: str = Field("LSG", description="Version biblique")
+    tokens: int = Field(1000, description="Longueur cible")
+    selected_rubriques: list = Field(None, description="Rubriques à générer (study, optionnel)")
+    use_gemini: bool = Field(True, description="Utiliser Gemini")
+    enriched: bool = Field(True, description="Contenu enrichi (verse-by-verse)")
+    rubric_type: str = Field("verse_by_verse", description="Type de rubrique (verse-by-verse)")
+
+async def _run_full_study_job(payload: dict, report) -> dict:
+    """Étude complète rubrique par rubrique ; chaque rubrique terminée est publiée en résultat partiel"""
+    request = StudyRequest(**{k: v for k, v in payload.items() if v is not None})
+    indices = [i for i in (request.selected_rubriques or range(len(RUBRIQUES_LIST)))
+               if isinstance(i, int) and 0 <= i < len(RUBRIQUES_LIST)]
+    load_text = _biblical_text_loader(request.passage)
+    semaphore = asyncio.Semaphore(RUBRIC_CONCURRENCY)
+    sections = {}
+
+    async def one(index: int):
+        async with semaphore:
+            return index, await _generate_rubrique(request, index, load_text)
+
+    for next_done in asyncio.as_completed([one(i) for i in indices]):
+        index, rubric = await next_done
+        sections[index] = rubric
+        report({"index": index, "title": RUBRIQUES_LIST[index], **rubric},
+               done=len(sections), total=len(indices))
+
+    return {
+        "content": "\n\n".join(sections[i]["content"] for i in indices),
+        "passage": request.passage,
+        "version": request.version,
+        "source": ", ".join(sorted({sections[i]["source"] for i in indices})),
+        "rubriques_generated": len(indices),
+        "from_cache": all(sections[i]["cache_hit"] for i in indices)
+    }
+
+async def _run_verse_by_verse_job(payload: dict, report) -> dict:
+    return await _generate_verse_by_verse(VerseByVerseRequest(**{k: v for k, v in payload.items() if v is not None}))
+
+study_jobs.register("study-gemini", _run_gemini_study_job)
+study_jobs.register("study", _run_full_study_job)
+study_jobs.register("verse-by-verse", _run_verse_by_verse_job)
+PUBLIC_JOB_KINDS = {
+    "study": ("passage", "version", "tokens", "selected_rubriques", "use_gemini"),
+    "verse-by-verse": ("passage", "version", "tokens", "use_gemini", "enriched", "rubric_type"),
+}
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """
+    Lancer une étude longue en arrière-plan (study ou verse-by-verse)
+    Répond immédiatement avec job_id ; suivre avec GET /api/jobs/{job_id}
+    """
+    fields = PUBLIC_JOB_KINDS.get(request.kind)
+    if fields is None:
+        raise HTTPException(status_code=400, detail=f"kind invalide: {request.kind} (study, verse-by-verse)")
+    if not request.passage.strip():
+        raise HTTPException(status_code=400, detail="Passage requis")
+    payload = {name: getattr(request, name) for name in fields}
+    key = singleflight.request_key(request.kind, canonical_passage(request.passage),
+                                   *[payload[name] for name in fields if name != "passage"])
+    job, created = study_jobs.submit(request.kind, payload, dedupe_key=key)
+    return {**job.to_dict(), "created": created, "job_url": f"/api/jobs/{job.id}"}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """
+    État d'un travail en arrière-plan : partial (rubriques déjà prêtes) et progress
+    pendant l'exécution, result quand status == "done"
+    wait (secondes, max 60) : attente longue jusqu'à la fin du travail
+    """
+    job = await study_jobs.wait(job_id, timeout=min(max(wait, 0.0), 60.0))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Travail inconnu ou expiré")
+    return job.to_dict()
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Annuler un travail en file ou en cours (la génération Gemini en vol est interrompue)"""
+    job = study_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Travail inconnu ou expiré")
+    return job.to_dict()
+
+async def _generate_rubrique(request: StudyRequest, index: int, load_text) -> dict:
+    """
+    Générer une rubrique isolée : cache -> Gemini (rotation) -> Bible API théologique
+    Retourne le contenu avec son en-tête et les métadonnées de provenance.
+    """
+    cache_key = cache_fallback._get_rubric_cache_key(request.passage, index, request.tokens, request.use_gemini)
+    cached = cache_fallback.cache.get(cache_key)
+    if cached and cache_fallback._is_cache_valid(cached):
+        return {"content": cached["content"], "source": cached.get("source", "Cache"), "cache_hit": True}
+
+    if request.use_gemini:
+        prompt = _build_rubriques_prompt(request.passage, [index])
+        content, source, success = await cache_fallback._try_gemini_with_rotation(prompt)
+        if success and content and "**VERSET" not in content.upper():
+            content = _finalize_rubrique(content, index)
+            cache_fallback.cache[cache_key] = {"content": content, "timestamp": time.time(), "source": source}
+            return {"content": content, "source": source, "cache_hit": False}
+
+    # Repli sans quota : non mis en cache pour laisser Gemini reprendre la main
+    content = await cache_fallback.generate_theological_content_with_bible_api(
+        request.passage, RUBRIQUES_LIST[index], index, biblical_text=await load_text()
+    )
+    return {"content": f"{_rubrique_header(index)}\n\n{content}",
+            "source": "Bible API théologique", "cache_hit": False}
+
+def _finalize_rubrique(content: str, index: int) -> str:
+    """Numérotation et en-tête d'une rubrique générée isolément (forme stockée en cache)"""
+    content = _fix_rubrique_numbering(content, [index])
+    if not content.lstrip().startswith("##"):
+        content = f"{_rubrique_header(index)}\n\n{content}"
+    return content
+
+def _cached_rubriques(request: StudyRequest, indices: list):
+    """Contenus des rubriques demandées si toutes sont en cache (pré-générées ou déjà servies), sinon None"""
+    contents = []
+    for index in indices:
+        entry = cache_fallback.cache.get(
+            cache_fallback._get_rubric_cache_key(request.passage, index, request.tokens, request.use_gemini))
+        if not entry or not cache_fallback._is_cache_valid(entry):
+            return None
+        contents.append(entry)
+    return contents
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/generate-study-stream")
+async def generate_study_stream(request: StudyRequest, http_request: Request):
+    """
+    Variante streaming (Server-Sent Events) de /api/generate-study
+    Chaque rubrique est envoyée dès qu'elle est prête (événement « rubric »),
+    avec index, source et cache_hit. Si le client se déconnecte, la génération
+    en cours (appel Gemini compris) est annulée.
+    """
+    indices = _valid_rubriques(request.selected_rubriques or range(len(RUBRIQUES_LIST)))
+
+    load_text = _biblical_text_loader(request.passage)
+
+    async def events():
+        started = time.perf_counter()
+        yield _sse("start", {"passage": request.passage, "version": request.version,
+                             "total": len(indices), "rubriques": indices})
+        try:
+            for completed, index in enumerate(indices, start=1):
+                if await http_request.is_disconnected():
+                    print(f"🛑 [STREAM] Client déconnecté - arrêt après {completed - 1}/{len(indices)} rubriques")
+                    return
+                try:
+                    rubric = await _generate_rubrique(request, index, load_text)
+                except Exception as e:
+                    print(f"❌ [STREAM] Rubrique {index}: {e}")
+                    rubric = {"content": f"{_rubrique_header(index)}\n\n⚠️ Génération indisponible pour cette rubrique.",
+                              "source": "Erreur", "cache_hit": False, "error": str(e)}
+                yield _sse("rubric", {
+                    "index": index,
+                    "title": RUBRIQUES_LIST[index],
+                    **rubric,
+                    "completed": completed,
+                    "total": len(indices),
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000),
+                })
+        except asyncio.CancelledError:
+            print(f"🛑 [STREAM] Génération annulée pour {request.passage} (client déconnecté)")
+            raise
+        yield _sse("done", {"passage": request.passage, "total": len(indices),
+                            "elapsed_ms": round((time.perf_counter() - started) * 1000)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/api/generate-verse-by-verse")
 async def generate_verse_by_verse(request: VerseByVerseRequest):
+    key = singleflight.request_key(canonical_passage(request.passage), request.version,
+                                   bucket_tokens(request.tokens), request.use_gemini,
+                                   request.enriched, request.rubric_type)
+    result, shared = await verse_flight.do(key, lambda: _generate_verse_by_verse(request))
+    if shared:
+        print(f"🔗 [SINGLE-FLIGHT] generate-verse-by-verse partagé pour {request.passage}")
+    return result
+
+async def _generate_verse_by_verse(request: VerseByVerseRequest):
     try:
         # Prompt adapté selon le type de rubrique
         if request.rubric_type == "verse_by_verse":
@@ -467,10 +833,12 @@ Passage : {request.passage}
 async def clear_cache():
     """Endpoint pour vider le cache (utile pour les tests)"""
     cache_size = len(cache_fallback.cache)
-    cache_fallback.cache.clear()
+    removed_by_tier = cache_fallback.cache.clear()
     
     return {
         "message": f"Cache cleared ({cache_size} entries removed)",
+        "removed_by_tier": removed_by_tier,
+        "cache_tiers": cache_fallback.cache.stats()["tiers"],
         "status": "success"
     }
 
@@ -480,10 +848,11 @@ async def cache_stats():
     import time
     
     quota_ok, quota_msg = cache_fallback._check_gemini_quota()
+    key_budgets = cache_fallback.key_scheduler.stats()
     
     # Analyser le cache
     cache_info = []
-    for key, entry in cache_fallback.cache.items():
+    for key, entry in cache_fallback.cache.items(limit=10):
         cache_info.append({
             "key": key[:16] + "...",  # Masquer la clé complète
             "source": entry.get("source", "unknown"),
@@ -494,10 +863,17 @@ async def cache_stats():
     return {
         "quota_status": quota_msg,
         "quota_available": quota_ok,
-        "quota_used_today": cache_fallback.quota_tracker.get("gemini_calls_today", 0),
+        "quota_used_today": sum(k["rpd"] - k["remaining_day"] for k in key_budgets if k["status"] != "missing"),
+        "gemini_keys": key_budgets,
         "cache_entries": len(cache_fallback.cache),
         "cache_details": cache_info[:10],  # Limiter à 10 entrées pour l'affichage
+        "cache_tiers": cache_fallback.cache.stats(),
         "bible_api_configured": bool(cache_fallback.bible_api_key),
+        "llm_executor": gemini_executor.stats(),
+        "bible_http": bible_http.client_stats(),
+        "single_flight": singleflight.all_stats(),
+        "jobs": study_jobs.stats(),
+        "rubric_templates": rubric_templates.all_stats(),
         "system_status": "operational"
     }
 
@@ -1688,7 +1688,7 @@ ${contextualEnrichment}
   return (
     <div className="App">
       {currentPage === 'concordance' ? (
-        <BibleConcordancePage onGoBack={navigateToMain} />
+        <BibleConcordancePage onGoBack={navigateToMain} apiBase={API_BASE} />
       ) : currentPage === 'versets' ? (
         <VersetParVersetPage 
           onGoBack={navigateToMain} 
@@ -1,69 +1,112 @@
 import React, { useState, useEffect } from 'react';
 
-const BibleConcordancePage = ({ onGoBack }) => {
+const PAGE_SIZE = 20;
+
+// Extraits intégrés : repli quand le backend n'a pas d'index (503 sans Bible locale) ou ne répond pas
+const SAMPLE_VERSES = {
+  "amour": [
+    { osis: "JHN", reference: "Jean 3:16", chapter: 3, verse: 16, text: "Car Dieu a tant aimé le monde qu'il a donné son Fils unique, afin que quiconque croit en lui ne périsse point, mais qu'il ait la vie éternelle." },
+    { osis: "1CO", reference: "1 Corinthiens 13:4", chapter: 13, verse: 4, text: "L'amour est patient, il est plein de bonté; l'amour n'est point envieux; l'amour ne se vante point, il ne s'enfle point d'orgueil," },
+    { osis: "1JN", reference: "1 Jean 4:8", chapter: 4, verse: 8, text: "Celui qui n'aime pas n'a pas connu Dieu, car Dieu est amour." }
+  ],
+  "paix": [
+    { osis: "JHN", reference: "Jean 14:27", chapter: 14, verse: 27, text: "Je vous laisse la paix, je vous donne ma paix. Je ne vous donne pas comme le monde donne. Que votre cœur ne se trouble point, et ne s'alarme point." },
+    { osis: "PHP", reference: "Philippiens 4:7", chapter: 4, verse: 7, text: "Et la paix de Dieu, qui surpasse toute intelligence, gardera vos cœurs et vos pensées en Jésus-Christ." }
+  ],
+  "foi": [
+    { osis: "HEB", reference: "Hébreux 11:1", chapter: 11, verse: 1, text: "Or la foi est une ferme assurance des choses qu'on espère, une démonstration de celles qu'on ne voit point." },
+    { osis: "ROM", reference: "Romains 10:17", chapter: 10, verse: 17, text: "Ainsi la foi vient de ce qu'on entend, et ce qu'on entend vient de la parole de Christ." }
+  ],
+  "joie": [
+    { osis: "NEH", reference: "Néhémie 8:10", chapter: 8, verse: 10, text: "Il leur dit: Allez, mangez des viandes grasses et buvez des liqueurs douces, et envoyez des portions à ceux qui n'ont rien de préparé, car ce jour est consacré à notre Seigneur; ne vous affligez pas, car la joie de l'Éternel sera votre force." }
+  ],
+  "espoir": [
+    { osis: "ROM", reference: "Romains 15:13", chapter: 15, verse: 13, text: "Que le Dieu de l'espérance vous remplisse de toute joie et de toute paix dans la foi, pour que vous abondiez en espérance, par la puissance du Saint-Esprit!" }
+  ]
+};
+
+const sampleConcordanceResults = (query) => {
+  const termLower = query.toLowerCase();
+  return Object.entries(SAMPLE_VERSES)
+    .filter(([key]) => key.includes(termLower) || termLower.includes(key))
+    .flatMap(([key, verses]) => verses.map(v => ({ ...v, highlights: [key] })))
+    .filter((verse, index, arr) => arr.findIndex(v => v.reference === verse.reference) === index);
+};
+
+const BibleConcordancePage = ({ onGoBack, apiBase }) => {
   const [searchTerm, setSearchTerm] = useState("");
   const [results, setResults] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
+  const [total, setTotal] = useState(0);
+  const [page, setPage] = useState(1);
+  const [hasMore, setHasMore] = useState(false);
+  const [lastQuery, setLastQuery] = useState("");
+  const [error, setError] = useState("");
+  const [fallbackNotice, setFallbackNotice] = useState("");
 
-  const generateConcordanceResults = (term) => {
-    const mockVerses = {
-      "amour": [
-        { book: "Jean", chapter: 3, verse: 16, text: "Car Dieu a tant aimé le monde qu'il a donné son Fils unique, afin que quiconque croit en lui ne périsse point, mais qu'il ait la vie éternelle." },
-        { book: "1 Corinthiens", chapter: 13, verse: 4, text: "L'amour est patient, il est plein de bonté; l'amour n'est point envieux; l'amour ne se vante point, il ne s'enfle point d'orgueil," },
-        { book: "1 Jean", chapter: 4, verse: 8, text: "Celui qui n'aime pas n'a pas connu Dieu, car Dieu est amour." }
-      ],
-      "paix": [
-        { book: "Jean", chapter: 14, verse: 27, text: "Je vous laisse la paix, je vous donne ma paix. Je ne vous donne pas comme le monde donne. Que votre cœur ne se trouble point, et ne s'alarme point." },
-        { book: "Philippiens", chapter: 4, verse: 7, text: "Et la paix de Dieu, qui surpasse toute intelligence, gardera vos cœurs et vos pensées en Jésus-Christ." }
-      ],
-      "foi": [
-        { book: "Hébreux", chapter: 11, verse: 1, text: "Or la foi est une ferme assurance des choses qu'on espère, une démonstration de celles qu'on ne voit point." },
-        { book: "Romains", chapter: 10, verse: 17, text: "Ainsi la foi vient de ce qu'on entend, et ce qu'on entend vient de la parole de Christ." }
-      ],
-      "joie": [
-        { book: "Néhémie", chapter: 8, verse: 10, text: "Il leur dit: Allez, mangez des viandes grasses et buvez des liqueurs douces, et envoyez des portions à ceux qui n'ont rien de préparé, car ce jour est consacré à notre Seigneur; ne vous affligez pas, car la joie de l'Éternel sera votre force." }
-      ],
-      "espoir": [
-        { book: "Romains", chapter: 15, verse: 13, text: "Que le Dieu de l'espérance vous remplisse de toute joie et de toute paix dans la foi, pour que vous abondiez en espérance, par la puissance du Saint-Esprit!" }
-      ]
-    };
-
-    const termLower = term.toLowerCase();
-    const matchingEntries = [];
-    
-    for (const [key, verses] of Object.entries(mockVerses)) {
-      if (key.includes(termLower) || termLower.includes(key)) {
-        matchingEntries.push(...verses);
-      }
+  // Index inversé côté backend : GET /api/concordance?q=...&page=...&page_size=...
+  const fetchConcordancePage = async (query, pageNumber) => {
+    const params = new URLSearchParams({ q: query, page: String(pageNumber), page_size: String(PAGE_SIZE) });
+    const response = await fetch(`${apiBase}/concordance?${params.toString()}`);
+    if (!response.ok) {
+      const body = await response.json().catch(() => ({}));
+      const error = new Error(body.detail || `HTTP ${response.status}`);
+      error.status = response.status;
+      throw error;
     }
-    
-    const uniqueResults = matchingEntries.filter((verse, index, arr) => 
-      arr.findIndex(v => v.book === verse.book && v.chapter === verse.chapter && v.verse === verse.verse) === index
-    );
-    
-    return uniqueResults.slice(0, 10);
+    return response.json();
   };
 
-  const searchBibleConcordance = async (searchTerm) => {
-    if (!searchTerm || searchTerm.trim().length < 2) {
+  const searchBibleConcordance = async (searchTerm, pageNumber = 1) => {
+    const query = (searchTerm || "").trim();
+    if (query.length < 2) {
       setResults([]);
+      setTotal(0);
+      setHasMore(false);
       return;
     }
 
     setIsLoading(true);
+    setError("");
+    setFallbackNotice("");
     
     try {
-      await new Promise(resolve => setTimeout(resolve, 800));
-      const mockResults = generateConcordanceResults(searchTerm.trim());
-      setResults(mockResults);
+      const data = await fetchConcordancePage(query, pageNumber);
+      setResults(prev => (pageNumber > 1 ? [...prev, ...data.results] : data.results));
+      setTotal(data.total);
+      setPage(data.page);
+      setHasMore(data.has_more);
+      setLastQuery(query);
     } catch (error) {
       console.error("Erreur de recherche:", error);
-      setResults([]);
+      // Pas d'index (503) ou backend injoignable : extraits intégrés plutôt qu'une page vide
+      const samples = pageNumber === 1 && (error.status === 503 || error.status === undefined)
+        ? sampleConcordanceResults(query)
+        : [];
+      if (samples.length > 0) {
+        setResults(samples);
+        setTotal(samples.length);
+        setPage(1);
+        setHasMore(false);
+        setLastQuery(query);
+        setFallbackNotice(error.message);
+      } else {
+        setError(error.message);
+        if (pageNumber === 1) {
+          setResults([]);
+          setTotal(0);
+          setHasMore(false);
+        }
+      }
     } finally {
       setIsLoading(false);
     }
   };
 
+  const loadMoreResults = () => {
+    searchBibleConcordance(lastQuery, page + 1);
+  };
+
   const handleSearchSubmit = (e) => {
     e.preventDefault();
     searchBibleConcordance(searchTerm);
@@ -81,10 +124,20 @@ const BibleConcordancePage = ({ onGoBack }) => {
     window.open(searchUrl, '_blank');
   };
 
-  const highlightSearchTerm = (text, term) => {
-    if (!term) return text;
-    const regex = new RegExp(`(${term})`, 'gi');
-    return text.replace(regex, '<mark style="background: #fef3c7; color: #92400e; padding: 2px 4px; border-radius: 4px;">$1</mark>');
+  const escapeHtml = (text) => text
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;');
+
+  // Le backend renvoie les mots du verset qui correspondent (accents et préfixes compris)
+  const highlightSearchTerm = (text, words) => {
+    const safe = escapeHtml(text);
+    if (!words || words.length === 0) return safe;
+    const pattern = words
+      .map(w => escapeHtml(w).replace(/[.*+?^${}()|[\]\\]/g, '\\$&'))
+      .join('|');
+    const regex = new RegExp(`(^|[^\\p{L}\\p{N}])(${pattern})(?![\\p{L}\\p{N}])`, 'gu');
+    return safe.replace(regex, '$1<mark style="background: #fef3c7; color: #92400e; padding: 2px 4px; border-radius: 4px;">$2</mark>');
   };
 
   return (
@@ -212,7 +265,7 @@ const BibleConcordancePage = ({ onGoBack }) => {
 
         {/* Résultats */}
         <div style={{ marginTop: '30px' }}>
-          {isLoading ? (
+          {isLoading && results.length === 0 ? (
             <div style={{ textAlign: 'center', padding: '40px' }}>
               <div style={{
                 width: '40px',
@@ -235,15 +288,39 @@ const BibleConcordancePage = ({ onGoBack }) => {
                 fontSize: '1.5rem',
                 marginBottom: '20px'
               }}>
-                📋 {results.length} résultat(s) pour "{searchTerm}"
+                📋 {total} résultat(s) pour "{lastQuery}"
               </h2>
+              {fallbackNotice && (
+                <div style={{
+                  background: '#fef3c7',
+                  color: '#92400e',
+                  borderRadius: '12px',
+                  padding: '15px 20px',
+                  marginBottom: '20px',
+                  textAlign: 'center'
+                }}>
+                  ⚠️ Concordance complète indisponible ({fallbackNotice}) : extraits intégrés.{' '}
+                  <button
+                    onClick={openYouVersionConcordance}
+                    style={{
+                      background: 'none',
+                      border: 'none',
+                      color: '#7c3aed',
+                      textDecoration: 'underline',
+                      cursor: 'pointer'
+                    }}
+                  >
+                    Rechercher sur YouVersion
+                  </button>
+                </div>
+              )}
               <div style={{
                 display: 'grid',
                 gap: '20px'
               }}>
-                {results.map((verse, index) => (
+                {results.map((verse) => (
                   <div 
-                    key={index}
+                    key={`${verse.osis}.${verse.chapter}.${verse.verse}`}
                     style={{
                       background: 'white',
                       borderRadius: '12px',
@@ -258,7 +335,7 @@ const BibleConcordancePage = ({ onGoBack }) => {
                       fontWeight: 'bold',
                       marginBottom: '10px'
                     }}>
-                      {verse.book} {verse.chapter}:{verse.verse}
+                      {verse.reference}
                     </div>
                     <div 
                       style={{
@@ -266,14 +343,57 @@ const BibleConcordancePage = ({ onGoBack }) => {
                         lineHeight: '1.6'
                       }}
                       dangerouslySetInnerHTML={{ 
-                        __html: highlightSearchTerm(verse.text, searchTerm) 
+                        __html: highlightSearchTerm(verse.text, verse.highlights) 
                       }}
                     />
                   </div>
                 ))}
               </div>
+              {hasMore && (
+                <div style={{ textAlign: 'center', marginTop: '20px' }}>
+                  <button
+                    onClick={loadMoreResults}
+                    disabled={isLoading}
+                    style={{
+                      background: 'white',
+                      color: '#7c3aed',
+                      border: 'none',
+                      padding: '12px 24px',
+                      borderRadius: '8px',
+                      cursor: 'pointer',
+                      fontWeight: 'bold'
+                    }}
+                  >
+                    {isLoading ? "⏳ Chargement..." : `Afficher plus (${results.length}/${total})`}
+                  </button>
+                </div>
+              )}
+            </div>
+          ) : error ? (
+            <div style={{
+              background: 'white',
+              borderRadius: '12px',
+              padding: '40px',
+              textAlign: 'center'
+            }}>
+              <h3 style={{ color: '#6b7280', marginBottom: '15px' }}>
+                ⚠️ Concordance indisponible : {error}
+              </h3>
+              <button
+                onClick={openYouVersionConcordance}
+                style={{
+                  background: '#8b5cf6',
+                  color: 'white',
+                  border: 'none',
+                  padding: '12px 24px',
+                  borderRadius: '8px',
+                  cursor: 'pointer'
+                }}
+              >
+                Rechercher sur YouVersion
+              </button>
             </div>
-          ) : searchTerm.length > 0 ? (
+          ) : lastQuery.length > 0 ? (
             <div style={{
               background: 'white',
               borderRadius: '12px',
@@ -281,7 +401,7 @@ const BibleConcordancePage = ({ onGoBack }) => {
               textAlign: 'center'
             }}>
               <h3 style={{ color: '#6b7280' }}>
-                🔍 Aucun résultat pour "{searchTerm}"
+                🔍 Aucun résultat pour "{lastQuery}"
               </h3>
             </div>
           ) : (
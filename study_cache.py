@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Cache persistant des études générées (remplace le dict en mémoire)
+- Interface de backend commune (CacheTier) pour brancher d'autres stockages
+- Niveau 1 : mémoire LRU + TTL, borné en entrées et en octets
+- Niveau 2 : SQLite sur disque, borné en octets, purge des entrées expirées
+- Démarrage à chaud : les entrées récentes du disque sont rechargées en mémoire
+- Statistiques par niveau (hits, évictions, expirations) pour /api/cache-stats
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_TTL = float(os.getenv("STUDY_CACHE_TTL_SECONDS", str(3600 * 24)))
+MEMORY_MAX_ENTRIES = int(os.getenv("STUDY_CACHE_MEMORY_ENTRIES", "256"))
+MEMORY_MAX_BYTES = int(os.getenv("STUDY_CACHE_MEMORY_MAX_BYTES", str(16 * 1024 * 1024)))
+DISK_PATH = os.getenv(
+    "STUDY_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "study_cache.sqlite3"),
+)
+DISK_MAX_BYTES = int(os.getenv("STUDY_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+SWEEP_INTERVAL = float(os.getenv("STUDY_CACHE_SWEEP_SECONDS", "300"))
+WARM_START_ENTRIES = int(os.getenv("STUDY_CACHE_WARM_ENTRIES", "128"))
+# Hits mémoire reportés sur accessed_at du disque par lots (LRU disque fidèle aux lectures)
+TOUCH_BATCH = int(os.getenv("STUDY_CACHE_TOUCH_BATCH", "32"))
+TOUCH_INTERVAL = float(os.getenv("STUDY_CACHE_TOUCH_SECONDS", "30"))
+
+
+def _entry_size(value: str) -> int:
+    return len(value.encode("utf-8"))
+
+
+class CacheTier(ABC):
+    """Un niveau de cache : clé -> entrée (dict sérialisable en JSON)"""
+
+    name = "tier"
+
+    def __init__(self):
+        self.counters = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0}
+
+    @abstractmethod
+    def lookup(self, key: str) -> Optional[Tuple[Dict, float]]:
+        """(entrée, expiration) si la clé est présente et valide, sinon None"""
+
+    def get(self, key: str) -> Optional[Dict]:
+        found = self.lookup(key)
+        return found[0] if found else None
+
+    @abstractmethod
+    def set(self, key: str, entry: Dict, expires_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> int:
+        """Vider le niveau, retourne le nombre d'entrées supprimées"""
+
+    @abstractmethod
+    def items(self, limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def size_bytes(self) -> int:
+        ...
+
+    def sweep_expired(self) -> int:
+        return 0
+
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "entries": len(self),
+            "bytes": self.size_bytes(),
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            **self.counters,
+        }
+
+
+class MemoryLRUTier(CacheTier):
+    """LRU en mémoire avec TTL, borné en nombre d'entrées et en octets"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = MEMORY_MAX_ENTRIES, max_bytes: int = MEMORY_MAX_BYTES):
+        super().__init__()
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        # clé -> (entrée, expiration, taille)
+        self._data: "OrderedDict[str, Tuple[Dict, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.counters["misses"] += 1
+                return None
+            entry, expires_at, _ = item
+            if expires_at <= time.time():
+                self._remove(key)
+                self.counters["expirations"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry, expires_at
+
+    def set(self, key: str, entry: Dict, expires_at: float, size: Optional[int] = None) -> None:
+        if size is None:
+            size = _entry_size(json.dumps(entry, ensure_ascii=False))
+        if size > self.max_bytes:
+            return  # Trop gros pour la mémoire, reste sur disque
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (entry, expires_at, size)
+            self._bytes += size
+            self.counters["sets"] += 1
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._data)
+            self._data.clear()
+            self._bytes = 0
+            return removed
+
+    def items(self, limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        with self._lock:
+            snapshot = [(k, v[0]) for k, v in reversed(self._data.items())]
+        return iter(snapshot[:limit] if limit else snapshot)
+
+    def sweep_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+        self.counters["expirations"] += len(expired)
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class SQLiteTier(CacheTier):
+    """Stockage SQLite sur disque, borné en octets (éviction LRU par date d'accès)"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = DISK_PATH, max_bytes: int = DISK_MAX_BYTES,
+                 sweep_interval: float = SWEEP_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS study_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_study_cache_accessed ON study_cache(accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_study_cache_expires ON study_cache(expires_at)")
+        self._last_sweep = 0.0
+        self.sweep_expired()
+        self._bytes = self._query_bytes()
+
+    def _query_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM study_cache").fetchone()[0]
+
+    def lookup(self, key: str) -> Optional[Tuple[Dict, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM study_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._delete_locked(key)
+                self.counters["expirations"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._conn.execute("UPDATE study_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.counters["hits"] += 1
+        return json.loads(value), expires_at
+
+    def set(self, key: str, entry: Dict, expires_at: float) -> None:
+        value = json.dumps(entry, ensure_ascii=False)
+        size = _entry_size(value)
+        now = time.time()
+        with self._lock:
+            self._delete_locked(key)
+            self._conn.execute(
+                "INSERT INTO study_cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, expires_at, now),
+            )
+            self._bytes += size
+            self.counters["sets"] += 1
+            self._evict_locked()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep_expired()
+
+    def _delete_locked(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM study_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM study_cache WHERE key = ?", (key,))
+            self._bytes -= row[0]
+
+    def _evict_locked(self) -> None:
+        """Supprimer les entrées les moins récemment lues jusqu'à repasser sous la limite"""
+        while self._bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM study_cache ORDER BY accessed_at ASC LIMIT 32"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM study_cache WHERE key = ?", (key,))
+                self._bytes -= size
+                self.counters["evictions"] += 1
+                if self._bytes <= self.max_bytes:
+                    break
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._delete_locked(key)
+
+    def touch(self, accessed: Dict[str, float]) -> None:
+        """Reporter des lectures servies par un niveau supérieur (clé -> date d'accès)"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE study_cache SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                [(at, key) for key, at in accessed.items()],
+            )
+
+    def sweep_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM study_cache WHERE expires_at <= ?", (time.time(),))
+            removed = max(cursor.rowcount, 0)
+            self._bytes = self._query_bytes()
+            self._last_sweep = time.time()
+        self.counters["expirations"] += removed
+        return removed
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self)
+            self._conn.execute("DELETE FROM study_cache")
+            self._bytes = 0
+            return removed
+
+    def items(self, limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        sql = "SELECT key, value FROM study_cache WHERE expires_at > ? ORDER BY accessed_at DESC"
+        params: Tuple = (time.time(),)
+        if limit:
+            sql += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return ((key, json.loads(value)) for key, value in rows)
+
+    def recent(self, limit: int) -> List[Tuple[str, Dict, float]]:
+        """Entrées valides les plus récemment lues (démarrage à chaud)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, expires_at FROM study_cache WHERE expires_at > ? "
+                "ORDER BY accessed_at DESC LIMIT ?", (time.time(), limit)
+            ).fetchall()
+        return [(key, json.loads(value), expires_at) for key, value, expires_at in rows]
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM study_cache").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict:
+        return {"path": self.path, "max_bytes": self.max_bytes, **super().stats()}
+
+
+class TieredStudyCache:
+    """
+    Cache à deux niveaux compatible avec l'usage dict de CacheFallbackSystem :
+    cache.get(key), cache[key] = entry, len(cache), cache.items(), cache.clear()
+    """
+
+    def __init__(self, memory: Optional[MemoryLRUTier] = None, disk: Optional[CacheTier] = None,
+                 ttl: float = DEFAULT_TTL, warm_entries: int = WARM_START_ENTRIES):
+        self.ttl = ttl
+        self.memory = memory if memory is not None else MemoryLRUTier()
+        self.disk = disk
+        self.misses = 0
+        self.disk_errors = 0
+        # Hits mémoire pas encore reportés sur le disque : clé -> date d'accès
+        self._touched: Dict[str, float] = {}
+        self._last_touch_flush = time.time()
+        self._touch_lock = threading.Lock()
+        if disk is not None and warm_entries > 0 and isinstance(disk, SQLiteTier):
+            warmed = disk.recent(warm_entries)
+            for key, entry, expires_at in reversed(warmed):
+                self.memory.set(key, entry, expires_at)
+            print(f"🔥 Cache études : {len(warmed)} entrées rechargées depuis {disk.path}")
+
+    @property
+    def tiers(self) -> List[CacheTier]:
+        return [self.memory] + ([self.disk] if self.disk is not None else [])
+
+    def get(self, key: str, default=None):
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._touch(key)
+            return entry
+        if self.disk is not None:
+            try:
+                found = self.disk.lookup(key)
+            except sqlite3.Error as e:
+                # Base verrouillée ou corrompue : lecture traitée comme un miss
+                self.disk_errors += 1
+                print(f"⚠️ Cache disque indisponible en lecture: {e}")
+                found = None
+            if found is not None:
+                # Promotion vers la mémoire avec l'expiration d'origine
+                self.memory.set(key, *found)
+                return found[0]
+        self.misses += 1
+        return default
+
+    def _touch(self, key: str) -> None:
+        """Noter un hit mémoire ; le lot est écrit sur le disque tous les TOUCH_BATCH hits ou TOUCH_INTERVAL s"""
+        if not isinstance(self.disk, SQLiteTier):
+            return
+        now = time.time()
+        with self._touch_lock:
+            self._touched[key] = now
+            if len(self._touched) < TOUCH_BATCH and now - self._last_touch_flush < TOUCH_INTERVAL:
+                return
+            batch, self._touched = self._touched, {}
+            self._last_touch_flush = now
+        try:
+            self.disk.touch(batch)
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"⚠️ Cache disque indisponible (date d'accès): {e}")
+
+    def set(self, key: str, entry: Dict, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self.memory.set(key, entry, expires_at)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, entry, expires_at)
+            except sqlite3.Error as e:
+                self.disk_errors += 1
+                print(f"⚠️ Cache disque indisponible en écriture: {e}")
+
+    def __setitem__(self, key: str, entry: Dict) -> None:
+        self.set(key, entry)
+
+    def __getitem__(self, key: str) -> Dict:
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __delitem__(self, key: str) -> None:
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def __len__(self) -> int:
+        return len(self.disk) if self.disk is not None else len(self.memory)
+
+    def items(self, limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        return (self.disk if self.disk is not None else self.memory).items(limit)
+
+    def clear(self) -> Dict[str, int]:
+        """Vider tous les niveaux, retourne le nombre d'entrées supprimées par niveau"""
+        return {tier.name: tier.clear() for tier in self.tiers}
+
+    def sweep_expired(self) -> Dict[str, int]:
+        return {tier.name: tier.sweep_expired() for tier in self.tiers}
+
+    def stats(self) -> Dict:
+        hits = sum(tier.counters["hits"] for tier in self.tiers)
+        lookups = hits + self.misses
+        return {
+            "entries": len(self),
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "disk_errors": self.disk_errors,
+            "tiers": {tier.name: tier.stats() for tier in self.tiers},
+        }
+
+
+def create_study_cache(ttl: float = DEFAULT_TTL) -> TieredStudyCache:
+    """Cache mémoire + SQLite ; mémoire seule si le disque n'est pas accessible"""
+    try:
+        disk = SQLiteTier()
+    except sqlite3.Error as e:
+        print(f"⚠️ Cache disque désactivé ({DISK_PATH}): {e}")
+        disk = None
+    return TieredStudyCache(disk=disk, ttl=ttl)
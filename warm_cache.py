@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+PRÉ-GÉNÉRATION - Remplit le cache persistant pour les passages populaires
+
+Génère hors pointe les études 28 rubriques (une entrée de cache par rubrique,
+celle lue par /api/generate-study et /api/generate-study-stream) et les
+études verset par verset (/api/generate-verse-by-verse), avec les clés de
+cache utilisées à la requête : un passage chaud ne touche plus le LLM.
+
+- Budget bridé par clé Gemini (--key-rpm / --key-rpd) pour laisser du quota au trafic ;
+  état des clés dans son propre fichier (WARM_GEMINI_KEY_STATE_PATH), distinct du serveur
+- Reprise après interruption : le cache sert de point de reprise, les entrées
+  déjà générées par Gemini sont sautées (les replis sont régénérés)
+- Fenêtre hors pointe : --until 06:30 arrête proprement à l'heure dite
+- Rapport de couverture (avant / après) et de débit
+
+Usage :
+  python warm_cache.py                          # passages populaires intégrés
+  python warm_cache.py passages.txt --kinds study --until 06:30
+  python warm_cache.py --report                 # couverture seule, sans génération
+Fichier de passages : un passage par ligne ("Jean 3", "Psaumes 23"), # pour commenter.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+WARM_TTL = float(os.getenv("WARM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# État des clés Gemini propre au pré-générateur : le serveur API réécrit gemini_key_state.json
+# en entier à chaque sauvegarde, un fichier partagé effacerait les budgets de l'autre processus
+WARM_KEY_STATE_PATH = os.getenv(
+    "WARM_GEMINI_KEY_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_key_state.warm.json"),
+)
+NO_KEY_SOURCE = "Toutes les clés Gemini épuisées"
+
+from server import RUBRIQUES_LIST, _build_rubriques_prompt, _finalize_rubrique
+from cache_fallback_system import cache_fallback
+from key_scheduler import KeyScheduler
+
+POPULAR_PASSAGES = [
+    "Genèse 1", "Genèse 2", "Genèse 3", "Genèse 12", "Exode 3", "Exode 20",
+    "Deutéronome 6", "Josué 1", "1 Samuel 17", "Psaumes 1", "Psaumes 23", "Psaumes 51",
+    "Psaumes 91", "Psaumes 119", "Proverbes 3", "Ésaïe 40", "Ésaïe 53", "Jérémie 29",
+    "Matthieu 5", "Matthieu 6", "Matthieu 28", "Luc 15", "Jean 1", "Jean 3", "Jean 14",
+    "Jean 15", "Actes 2", "Romains 8", "Romains 12", "1 Corinthiens 13", "Galates 5",
+    "Éphésiens 2", "Éphésiens 6", "Philippiens 4", "Hébreux 11", "Jacques 1",
+    "1 Jean 4", "Apocalypse 21",
+]
+
+
+@dataclass
+class WarmItem:
+    kind: str  # "study" (une rubrique) ou "verse-by-verse"
+    passage: str
+    tokens: int
+    rubric: Optional[int] = None
+
+    @property
+    def cache_key(self) -> str:
+        if self.kind == "study":
+            return cache_fallback._get_rubric_cache_key(self.passage, self.rubric, self.tokens, True)
+        return cache_fallback._get_cache_key(self.passage, self.tokens, True)
+
+    @property
+    def label(self) -> str:
+        return f"{self.passage} #{self.rubric}" if self.kind == "study" else f"{self.passage} (verset par verset)"
+
+    def prompt(self) -> str:
+        if self.kind == "study":
+            return _build_rubriques_prompt(self.passage, [self.rubric])
+        return cache_fallback._verse_by_verse_prompt(self.passage)
+
+    def finalize(self, content: str) -> str:
+        return _finalize_rubrique(content, self.rubric) if self.kind == "study" else content
+
+
+def load_passages(path: Optional[str]) -> List[str]:
+    if not path:
+        return list(POPULAR_PASSAGES)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def build_items(passages: List[str], kinds: List[str], study_tokens: int, verse_tokens: int,
+                verse_batches: int) -> List[WarmItem]:
+    items = []
+    for passage in passages:
+        if "study" in kinds:
+            items.extend(WarmItem("study", passage, study_tokens, i) for i in range(len(RUBRIQUES_LIST)))
+        if "verse-by-verse" in kinds:
+            items.append(WarmItem("verse-by-verse", passage, verse_tokens))
+            # Suites "Continuer" du front : versets 6-10, 11-15...
+            if ":" not in passage:
+                items.extend(WarmItem("verse-by-verse", f"{passage}:{start}-{start + 4}", verse_tokens)
+                             for start in range(6, 5 * verse_batches + 1, 5))
+    return items
+
+
+def is_covered(item: WarmItem) -> bool:
+    """Entrée valide et générée par Gemini (un repli en cache ne compte pas)"""
+    entry = cache_fallback.cache.get(item.cache_key)
+    return bool(entry and cache_fallback._is_cache_valid(entry)
+                and str(entry.get("source", "")).startswith("Gemini"))
+
+
+def coverage(items: List[WarmItem]) -> Dict[str, Dict[str, int]]:
+    report: Dict[str, Dict[str, int]] = {}
+    for item in items:
+        bucket = report.setdefault(item.kind, {"covered": 0, "total": 0})
+        bucket["total"] += 1
+        bucket["covered"] += is_covered(item)
+    return report
+
+
+def print_coverage(title: str, report: Dict[str, Dict[str, int]]) -> None:
+    print(f"\n📊 Couverture {title}")
+    for kind, counts in report.items():
+        ratio = counts["covered"] / counts["total"] if counts["total"] else 0.0
+        print(f"  {kind:<16} {counts['covered']:>5}/{counts['total']:<5} {ratio:>6.1%}")
+
+
+def parse_deadline(until: Optional[str]) -> Optional[float]:
+    """'06:30' -> prochain 06:30 (aujourd'hui ou demain), en timestamp"""
+    if not until:
+        return None
+    hour, minute = (int(part) for part in until.split(":"))
+    now = datetime.now()
+    deadline = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)
+    return deadline.timestamp()
+
+
+class Warmer:
+    def __init__(self, items: List[WarmItem], concurrency: int, deadline: Optional[float],
+                 max_attempts: int):
+        self.items = items
+        self.concurrency = max(1, concurrency)
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.stats = {"generated": 0, "skipped": 0, "failed": 0, "chars": 0, "calls": 0}
+        self.started = time.perf_counter()
+        self._stop = False
+
+    def out_of_time(self, wait: float = 0.0) -> bool:
+        return self.deadline is not None and time.time() + wait >= self.deadline
+
+    async def warm_item(self, item: WarmItem) -> None:
+        if is_covered(item):
+            self.stats["skipped"] += 1
+            return
+        attempt = 0
+        while attempt < self.max_attempts:
+            # Attendre le budget des clés (bridé) plutôt que de produire un repli
+            wait = cache_fallback.key_scheduler.next_available_in()
+            if wait is None:
+                print("❌ Aucune clé Gemini configurée")
+                self._stop = True
+                return
+            if self.out_of_time(wait):
+                self._stop = True
+                return
+            if wait > 0:
+                await asyncio.sleep(wait)
+            content, source, success = await cache_fallback._try_gemini_with_rotation(item.prompt())
+            if source == NO_KEY_SOURCE:
+                # Jeton pris par un autre worker entre-temps : attendre, sans compter de tentative
+                continue
+            attempt += 1
+            self.stats["calls"] += 1
+            if success and content and (item.kind != "study" or "**VERSET" not in content.upper()):
+                content = item.finalize(content)
+                cache_fallback.cache.set(item.cache_key, {
+                    "content": content, "timestamp": time.time(), "source": source,
+                    "expires_at": time.time() + WARM_TTL, "warmed": True,
+                }, ttl=WARM_TTL)
+                self.stats["generated"] += 1
+                self.stats["chars"] += len(content)
+                return
+            print(f"⚠️ {item.label} : tentative {attempt}/{self.max_attempts} échouée ({source})")
+        self.stats["failed"] += 1
+
+    async def run(self) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in self.items:
+            queue.put_nowait(item)
+        total = len(self.items)
+
+        async def worker():
+            while not self._stop and not queue.empty():
+                item = queue.get_nowait()
+                await self.warm_item(item)
+                done = total - queue.qsize()
+                if done % 25 == 0 or done == total:
+                    self.print_progress(done, total)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        if self._stop and self.out_of_time():
+            print("🌅 Fin de la fenêtre hors pointe : arrêt (relancer pour reprendre)")
+
+    def print_progress(self, done: int, total: int) -> None:
+        elapsed = time.perf_counter() - self.started
+        generated = self.stats["generated"]
+        rate = generated / elapsed * 60 if elapsed else 0.0
+        print(f"⏳ {done}/{total} traités | {generated} générés, {self.stats['skipped']} déjà en cache, "
+              f"{self.stats['failed']} échecs | {rate:.1f} générations/min")
+
+    def print_report(self) -> None:
+        elapsed = time.perf_counter() - self.started
+        generated = self.stats["generated"]
+        print(f"\n🏁 {generated} entrées générées en {elapsed:.0f}s "
+              f"({generated / elapsed * 60 if elapsed else 0:.1f}/min, "
+              f"{self.stats['chars'] / elapsed if elapsed else 0:.0f} caractères/s)")
+        print(f"   {self.stats['calls']} appels Gemini, {self.stats['skipped']} entrées déjà couvertes, "
+              f"{self.stats['failed']} échecs")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pré-génération du cache des passages populaires")
+    parser.add_argument("passages", nargs="?", help="Fichier de passages (défaut : liste intégrée)")
+    parser.add_argument("--kinds", default="study,verse-by-verse",
+                        help="Types à pré-générer : study, verse-by-verse (séparés par des virgules)")
+    parser.add_argument("--study-tokens", type=int, default=1000, help="Cible de tokens des rubriques (front : 1000)")
+    parser.add_argument("--verse-tokens", type=int, default=500, help="Cible de tokens verset par verset (front : 500)")
+    parser.add_argument("--verse-batches", type=int, default=1,
+                        help="Lots de 5 versets par chapitre (1 = versets 1-5 seulement)")
+    parser.add_argument("--key-rpm", type=int, default=int(os.getenv("WARM_KEY_RPM", "5")),
+                        help="Requêtes/minute max par clé Gemini")
+    parser.add_argument("--key-rpd", type=int, default=int(os.getenv("WARM_KEY_RPD", "500")),
+                        help="Requêtes/jour max par clé Gemini")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--max-attempts", type=int, default=3, help="Tentatives par entrée")
+    parser.add_argument("--until", help="Heure de fin de la fenêtre hors pointe (HH:MM)")
+    parser.add_argument("--report", action="store_true", help="Afficher la couverture sans générer")
+    args = parser.parse_args(argv)
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    items = build_items(load_passages(args.passages), kinds, args.study_tokens, args.verse_tokens,
+                        max(1, args.verse_batches))
+    print_coverage("avant", coverage(items))
+    if args.report:
+        return 0
+
+    cache_fallback.key_scheduler = KeyScheduler(cache_fallback.gemini_keys, state_path=WARM_KEY_STATE_PATH)
+    cache_fallback.key_scheduler.set_budget(rpm=args.key_rpm, rpd=args.key_rpd)
+    warmer = Warmer(items, args.concurrency, parse_deadline(args.until), max(1, args.max_attempts))
+    try:
+        asyncio.run(warmer.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Interrompu : les entrées déjà générées sont conservées (relancer pour reprendre)")
+    finally:
+        cache_fallback.key_scheduler.flush()
+        warmer.print_report()
+        print_coverage("après", coverage(items))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())